@@ -169,3 +169,5 @@ class CompileRequest(BaseModel):
     outro_url: Optional[str] = None
     aspect_ratio: str = "9:16"
     aspect_mode: str = "crop"
+    # draft | standard | archival; None uses the server default profile.
+    encoder_profile: Optional[str] = None
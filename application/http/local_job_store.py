@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import copy
-import json
 import threading
 import traceback
 import uuid
@@ -10,11 +9,15 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional
 
+from infrastructure.job_events import CURRENT_JOB_ID_REF
+from shared.job_state_log import JobStateLog, job_state_log_for, set_record, update_record
+
 
 LOCAL_JOB_STORE_PATH = Path(".local_job_state") / "render_jobs.json"
 
 _local_jobs: Dict[str, Dict[str, Any]] = {}
 _local_jobs_lock = threading.Lock()
+_local_job_log: Optional[JobStateLog] = None
 
 
 def _utcnow_iso() -> str:
@@ -27,30 +30,23 @@ def _json_default(value: Any) -> Any:
     return str(value)
 
 
+def _local_job_log_locked() -> JobStateLog:
+    global _local_job_log
+    _local_job_log = job_state_log_for(_local_job_log, LOCAL_JOB_STORE_PATH, json_default=_json_default)
+    return _local_job_log
+
+
 def _save_local_jobs_locked() -> None:
-    LOCAL_JOB_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    temp_path = LOCAL_JOB_STORE_PATH.with_suffix(".tmp")
-    temp_path.write_text(
-        json.dumps(_local_jobs, ensure_ascii=False, indent=2, sort_keys=True, default=_json_default),
-        encoding="utf-8",
-    )
-    temp_path.replace(LOCAL_JOB_STORE_PATH)
+    _local_job_log_locked().compact(_local_jobs)
+
+
+def _append_local_job_records_locked(*records: Dict[str, Any]) -> None:
+    _local_job_log_locked().append(_local_jobs, *records)
 
 
 def _load_local_jobs_locked() -> None:
     _local_jobs.clear()
-    if not LOCAL_JOB_STORE_PATH.exists():
-        return
-    try:
-        raw = json.loads(LOCAL_JOB_STORE_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return
-    if not isinstance(raw, dict):
-        return
-    for job_id, state in raw.items():
-        if isinstance(job_id, str) and isinstance(state, dict):
-            state.setdefault("job_id", job_id)
-            _local_jobs[job_id] = state
+    _local_jobs.update(_local_job_log_locked().load())
 
 
 with _local_jobs_lock:
@@ -68,7 +64,7 @@ def set_local_job(job_id: str, state: Dict[str, Any]) -> None:
         next_state = copy.deepcopy(state)
         next_state["job_id"] = job_id
         _local_jobs[job_id] = next_state
-        _save_local_jobs_locked()
+        _append_local_job_records_locked(set_record(job_id, next_state))
 
 
 def update_local_job(job_id: str, **fields: Any) -> None:
@@ -76,8 +72,9 @@ def update_local_job(job_id: str, **fields: Any) -> None:
         state = _local_jobs.get(job_id)
         if state is None:
             return
-        state.update(copy.deepcopy(fields))
-        _save_local_jobs_locked()
+        next_fields = copy.deepcopy(fields)
+        state.update(next_fields)
+        _append_local_job_records_locked(update_record(job_id, next_fields))
 
 
 def get_local_job_state(job_id: str) -> Optional[Dict[str, Any]]:
@@ -136,6 +133,7 @@ def enqueue_local_job(
     job_func: Callable[..., Any],
     *args: Any,
     job_id: str | None = None,
+    on_status: Callable[[str, str], None] | None = None,
     **kwargs: Any,
 ) -> LocalInlineJob:
     job_id = job_id or uuid.uuid4().hex
@@ -152,8 +150,18 @@ def enqueue_local_job(
         },
     )
 
+    def _notify(status: str) -> None:
+        if on_status is None:
+            return
+        try:
+            on_status(job_id, status)
+        except Exception:
+            pass
+
     def _runner() -> None:
+        CURRENT_JOB_ID_REF.set(job_id)
         update_local_job(job_id, status="started", started_at=_utcnow_iso(), exc_info=None)
+        _notify("started")
         try:
             result = job_func(*args, **kwargs)
             update_local_job(
@@ -163,6 +171,7 @@ def enqueue_local_job(
                 result=result,
                 exc_info=None,
             )
+            _notify("finished")
         except Exception:
             update_local_job(
                 job_id,
@@ -171,6 +180,7 @@ def enqueue_local_job(
                 result=None,
                 exc_info=traceback.format_exc(),
             )
+            _notify("failed")
 
     thread = threading.Thread(target=_runner, name=f"local-inline-job-{job_id[:8]}", daemon=True)
     thread.start()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import os
+import json
 import logging
+import time
 import traceback
 import uuid
 from pathlib import Path
@@ -10,9 +12,11 @@ from datetime import datetime, timezone
 from typing import Any, Callable
 
 from fastapi import HTTPException, Request, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from application.tracker_metadata import TRACKER_MANIFEST_FIELDS
+from infrastructure.job_events import TERMINAL_JOB_STATUSES
 
 
 logger = logging.getLogger(__name__)
@@ -474,28 +478,24 @@ def _stage_internal_render_publish_and_enqueue(
         )
 
 
-def handle_get_job_status(job_id: str, *, deps: QueueRouteDependencies, compact: bool = False) -> JSONResponse:
-    if not _queue_backend_available(deps):
-        return _redis_not_configured_response()
+def build_job_status_payload(job_id: str, *, deps: QueueRouteDependencies, compact: bool = False) -> tuple[dict, int]:
     job = deps.fetch_job(job_id)
     if not job:
         staged = _get_staging_job(deps, job_id)
         if staged is not None:
-            return JSONResponse(content=_stage_status_payload(job_id, staged))
+            return _stage_status_payload(job_id, staged), 200
         saved = deps.load_job_result_s3(job_id)
         if saved is not None:
-            return JSONResponse(
-                content=_compact_job_status_payload({
-                    "id": job_id,
-                    "status": "finished",
-                    "enqueued_at": None,
-                    "started_at": None,
-                    "ended_at": None,
-                    "result": saved,
-                    "result_source": "s3",
-                }, compact=compact)
-            )
-        return JSONResponse(content={"error": "Job not found"}, status_code=404)
+            return _compact_job_status_payload({
+                "id": job_id,
+                "status": "finished",
+                "enqueued_at": None,
+                "started_at": None,
+                "ended_at": None,
+                "result": saved,
+                "result_source": "s3",
+            }, compact=compact), 200
+        return {"error": "Job not found"}, 404
 
     payload = {
         "id": job.id,
@@ -524,7 +524,87 @@ def handle_get_job_status(job_id: str, *, deps: QueueRouteDependencies, compact:
             payload["result"] = saved
             payload["result_source"] = "s3"
         payload["error"] = _safe_failed_error(saved)
-    return JSONResponse(content=_compact_job_status_payload(payload, compact=compact))
+    return _compact_job_status_payload(payload, compact=compact), 200
+
+
+def handle_get_job_status(job_id: str, *, deps: QueueRouteDependencies, compact: bool = False) -> JSONResponse:
+    if not _queue_backend_available(deps):
+        return _redis_not_configured_response()
+    payload, status_code = build_job_status_payload(job_id, deps=deps, compact=compact)
+    return JSONResponse(content=payload, status_code=status_code)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _job_status_is_terminal(payload: dict) -> bool:
+    return str(payload.get("status") or "") in TERMINAL_JOB_STATUSES
+
+
+async def handle_stream_job_events(
+    job_id: str,
+    *,
+    deps: QueueRouteDependencies,
+    job_events: Any,
+    keepalive_sec: float = 15.0,
+    recheck_sec: float = 30.0,
+    max_stream_sec: float = 1800.0,
+    time_now: Callable[[], float] = time.monotonic,
+) -> Any:
+    """Server-sent events for one job: a snapshot, stage/status events, then the result.
+
+    The subscription is opened before the snapshot is read so a job finishing in between
+    is not missed. The compact status payload is only re-read when a terminal event
+    arrives, plus a slow periodic re-check in case an event was lost.
+    """
+    if not _queue_backend_available(deps):
+        return _redis_not_configured_response()
+    subscription = job_events.subscribe(job_id)
+    try:
+        snapshot, status_code = await run_in_threadpool(build_job_status_payload, job_id, deps=deps, compact=True)
+    except BaseException:
+        subscription.close()
+        raise
+    if status_code != 200:
+        subscription.close()
+        return JSONResponse(content=snapshot, status_code=status_code)
+
+    async def _events():
+        try:
+            if _job_status_is_terminal(snapshot):
+                yield _sse_event("result", snapshot)
+                return
+            yield _sse_event("snapshot", snapshot)
+            deadline = time_now() + max(1.0, float(max_stream_sec))
+            next_recheck = time_now() + max(1.0, float(recheck_sec))
+            while True:
+                now = time_now()
+                if now >= deadline:
+                    yield _sse_event("timeout", {"id": job_id})
+                    return
+                event = await subscription.get(min(keepalive_sec, max(0.0, next_recheck - now), deadline - now))
+                if event is not None:
+                    event_type = str(event.get("event") or "message")
+                    yield _sse_event(event_type, {key: value for key, value in event.items() if key != "origin"})
+                    if event_type != "status" or event.get("status") not in TERMINAL_JOB_STATUSES:
+                        continue
+                elif time_now() < next_recheck:
+                    yield ": keepalive\n\n"
+                    continue
+                next_recheck = time_now() + max(1.0, float(recheck_sec))
+                current, _ = await run_in_threadpool(build_job_status_payload, job_id, deps=deps, compact=True)
+                if _job_status_is_terminal(current):
+                    yield _sse_event("result", current)
+                    return
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 def handle_patch_external_tracker_manifest(req: Any, request: Request, job_id: str, *, deps: QueueRouteDependencies) -> JSONResponse:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 import json
 import os
 import time
@@ -27,6 +28,7 @@ from application.tracker_metadata import (
     tracker_metadata_from_payload,
 )
 from application.video.external_render_video_workflow import run_external_render_video_job
+from application.video.video_support import DEFAULT_ENCODER_PROFILE
 
 
 @dataclass
@@ -67,6 +69,8 @@ class JobEntrypointServices:
     poll_kling_task: Callable[..., str]
     video_target_fps: int
     video_max_concurrency: int
+    image_publisher: Any = None
+    video_encoder_profile: str = DEFAULT_ENCODER_PROFILE
 
 
 _SERVICES: JobEntrypointServices | None = None
@@ -108,7 +112,22 @@ def _json_from_response(resp: Any) -> dict:
     return {"result": resp}
 
 
+def _deferred_publishing(services: JobEntrypointServices):
+    publisher = getattr(services, "image_publisher", None)
+    if publisher is None:
+        return contextlib.nullcontext()
+    return publisher.deferred()
+
+
+def _flush_published_images() -> None:
+    publisher = getattr(_SERVICES, "image_publisher", None)
+    if publisher is not None:
+        # Result URLs are handed out before their uploads finish; never persist ahead of them.
+        publisher.flush()
+
+
 def _persist_job_result(result: dict, audience: Optional[str] = None, metadata: dict | None = None) -> None:
+    _flush_published_images()
     try:
         job = get_current_job()
         if not job:
@@ -278,16 +297,17 @@ def job_render(payload: dict, persist_result: bool = True) -> dict:
     prepared_payload = _prepare_worker_cart_moodboard_items(payload, services)
     if isinstance(prepared_payload, dict) and prepared_payload.get("error"):
         return prepared_payload
-    return run_render_job(
-        prepared_payload,
-        persist_result=persist_result,
-        materialize_input=services.materialize_input,
-        normalize_audience=services.normalize_audience,
-        local_upload_factory=_LocalUpload,
-        render_room=services.render_room,
-        json_from_response=_json_from_response,
-        persist_job_result=_persist_job_result,
-    )
+    with _deferred_publishing(services):
+        return run_render_job(
+            prepared_payload,
+            persist_result=persist_result,
+            materialize_input=services.materialize_input,
+            normalize_audience=services.normalize_audience,
+            local_upload_factory=_LocalUpload,
+            render_room=services.render_room,
+            json_from_response=_json_from_response,
+            persist_job_result=_persist_job_result,
+        )
 
 
 def job_render_with_extra(payload: dict) -> dict:
@@ -497,26 +517,27 @@ def job_frontal_view(payload: dict) -> dict:
 
 def job_generate_details(payload: dict) -> dict:
     services = _services()
-    return run_generate_details_job(
-        payload,
-        normalize_audience=services.normalize_audience,
-        build_s3_prefix=services.build_s3_prefix,
-        persist_job_result=_persist_job_result,
-        materialize_input=services.materialize_input,
-        resolve_image_url=services.resolve_image_url,
-        log_section=services.log_section,
-        detect_furniture_boxes=services.detect_furniture_boxes,
-        detect_item_bbox_norm=services.detect_item_bbox_norm,
-        canonical_category=services.canonical_category,
-        build_item_target_key=services.build_item_target_key,
-        max_concurrency_analysis=services.max_concurrency_analysis,
-        analyze_cropped_item=services.analyze_cropped_item,
-        attach_volume_ranks=services.attach_volume_ranks,
-        construct_dynamic_styles=services.construct_dynamic_styles,
-        generate_detail_view=services.generate_detail_view,
-        normalize_label_for_match=services.normalize_label_for_match,
-        volume_ranking_snapshot=services.volume_ranking_snapshot,
-    )
+    with _deferred_publishing(services):
+        return run_generate_details_job(
+            payload,
+            normalize_audience=services.normalize_audience,
+            build_s3_prefix=services.build_s3_prefix,
+            persist_job_result=_persist_job_result,
+            materialize_input=services.materialize_input,
+            resolve_image_url=services.resolve_image_url,
+            log_section=services.log_section,
+            detect_furniture_boxes=services.detect_furniture_boxes,
+            detect_item_bbox_norm=services.detect_item_bbox_norm,
+            canonical_category=services.canonical_category,
+            build_item_target_key=services.build_item_target_key,
+            max_concurrency_analysis=services.max_concurrency_analysis,
+            analyze_cropped_item=services.analyze_cropped_item,
+            attach_volume_ranks=services.attach_volume_ranks,
+            construct_dynamic_styles=services.construct_dynamic_styles,
+            generate_detail_view=services.generate_detail_view,
+            normalize_label_for_match=services.normalize_label_for_match,
+            volume_ranking_snapshot=services.volume_ranking_snapshot,
+        )
 
 
 def job_regenerate_single_detail(payload: dict) -> dict:
@@ -556,6 +577,7 @@ def job_generate_render_video(payload: dict) -> dict:
         poll_kling_task=services.poll_kling_task,
         video_target_fps=services.video_target_fps,
         video_max_concurrency=services.video_max_concurrency,
+        encoder_profile=services.video_encoder_profile,
     )
     _persist_job_result(result, audience=payload.get("audience"))
     return result
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import os
+import re
 import statistics
-from collections import deque
 from typing import NamedTuple
 
-from PIL import Image, ImageOps
+from PIL import Image, ImageChops, ImageMath, ImageOps
+
+_CANDIDATE_RUN = re.compile(rb"\x01+")
+_OBJECT_ALPHA = bytes([255, 0]) + bytes(254)
 
 
 class _BackgroundDetection(NamedTuple):
@@ -156,74 +159,88 @@ def _collect_border_pixels(image: Image.Image) -> list[tuple[int, int, int]]:
     return pixels
 
 
-def _flood_fill_background(image: Image.Image, bg_color: tuple[int, int, int], threshold: int) -> list[int]:
-    width, height = image.size
-    pixels = image.load()
-    mask = [0] * (width * height)
-    queue: deque[tuple[int, int]] = deque()
-
-    def _mark_if_background(x: int, y: int) -> None:
-        idx = y * width + x
-        if mask[idx]:
-            return
-        if _color_distance(pixels[x, y], bg_color) > threshold:
-            return
-        mask[idx] = 1
-        queue.append((x, y))
+def _background_candidate_mask(image: Image.Image, bg_color: tuple[int, int, int], threshold: int) -> bytes:
+    # One pass over the image: 1 where _color_distance(pixel, bg_color) <= threshold, else 0.
+    rgb = image if image.mode == "RGB" else image.convert("RGB")
+    red, green, blue = ImageChops.difference(rgb, Image.new("RGB", rgb.size, tuple(bg_color))).split()
+    within = ImageMath.lambda_eval(
+        lambda args: (args["r"] + args["g"] + args["b"]) <= threshold,
+        r=red,
+        g=green,
+        b=blue,
+    )
+    return within.convert("L").tobytes()
 
-    for x in range(width):
-        _mark_if_background(x, 0)
-        _mark_if_background(x, height - 1)
-    for y in range(height):
-        _mark_if_background(0, y)
-        _mark_if_background(width - 1, y)
 
-    while queue:
-        x, y = queue.popleft()
-        for next_x, next_y in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
-            if next_x < 0 or next_y < 0 or next_x >= width or next_y >= height:
-                continue
-            _mark_if_background(next_x, next_y)
+def _flood_fill_background(image: Image.Image, bg_color: tuple[int, int, int], threshold: int) -> bytearray:
+    """Mark background pixels 4-connected to the border, as a row-major 0/1 mask.
+
+    Candidate pixels are grouped into horizontal runs and runs on adjacent rows are
+    unioned when they overlap, so the work scales with the number of runs rather than
+    the number of pixels.
+    """
+    width, height = image.size
+    candidates = _background_candidate_mask(image, bg_color, threshold)
+    runs: list[tuple[int, int, int]] = []
+    parent: list[int] = []
+
+    def _find(run_id: int) -> int:
+        while parent[run_id] != run_id:
+            parent[run_id] = parent[parent[run_id]]
+            run_id = parent[run_id]
+        return run_id
 
+    previous_row: list[int] = []
+    for y in range(height):
+        row_offset = y * width
+        current_row: list[int] = []
+        for match in _CANDIDATE_RUN.finditer(candidates, row_offset, row_offset + width):
+            run_id = len(runs)
+            runs.append((y, match.start() - row_offset, match.end() - row_offset))
+            parent.append(run_id)
+            current_row.append(run_id)
+
+        prev_idx = 0
+        cur_idx = 0
+        while prev_idx < len(previous_row) and cur_idx < len(current_row):
+            _, prev_start, prev_end = runs[previous_row[prev_idx]]
+            _, cur_start, cur_end = runs[current_row[cur_idx]]
+            if prev_start < cur_end and cur_start < prev_end:
+                parent[_find(current_row[cur_idx])] = _find(previous_row[prev_idx])
+            if prev_end <= cur_end:
+                prev_idx += 1
+            else:
+                cur_idx += 1
+        previous_row = current_row
+
+    border_roots = {
+        _find(run_id)
+        for run_id, (y, start, end) in enumerate(runs)
+        if y == 0 or y == height - 1 or start == 0 or end == width
+    }
+
+    mask = bytearray(width * height)
+    filled_row = b"\x01" * width
+    for run_id, (y, start, end) in enumerate(runs):
+        if _find(run_id) in border_roots:
+            mask[y * width + start:y * width + end] = filled_row[: end - start]
     return mask
 
 
 def _cutout_simple_background(image: Image.Image, bg_color: tuple[int, int, int], threshold: int) -> Image.Image:
     rgba = image.convert("RGBA")
     mask = _flood_fill_background(image, bg_color, threshold)
-    alpha = bytearray(255 if value == 0 else 0 for value in mask)
-    alpha_image = Image.frombytes("L", image.size, bytes(alpha))
+    alpha_image = Image.frombytes("L", image.size, bytes(mask).translate(_OBJECT_ALPHA))
     rgba.putalpha(alpha_image)
     return rgba
 
 
-def _mask_bbox(mask: list[int], width: int, height: int, *, target_value: int) -> tuple[int, int, int, int] | None:
-    left = width
-    top = height
-    right = -1
-    bottom = -1
-
-    for y in range(height):
-        row_offset = y * width
-        for x in range(width):
-            if mask[row_offset + x] != target_value:
-                continue
-            if x < left:
-                left = x
-            if y < top:
-                top = y
-            if x > right:
-                right = x
-            if y > bottom:
-                bottom = y
-
-    if right < left or bottom < top:
-        return None
-
-    return left, top, right + 1, bottom + 1
+def _mask_bbox(mask: bytes | bytearray, width: int, height: int, *, target_value: int) -> tuple[int, int, int, int] | None:
+    selected = Image.frombytes("L", (width, height), bytes(mask)).point(lambda value: 255 if value == target_value else 0)
+    return selected.getbbox()
 
 
-def _object_border_touch_ratio(mask: list[int], width: int, height: int) -> float:
+def _object_border_touch_ratio(mask: bytes | bytearray, width: int, height: int) -> float:
     border_count = 0
     object_count = 0
 
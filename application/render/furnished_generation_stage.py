@@ -2,17 +2,21 @@ import re
 import json
 import os
 import time
+from itertools import compress
 from typing import Any, Callable
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageMath
 from application.render.placement_support import build_placement_prompt_block
 from application.render.postprocess_support import decor_prefers_surface_placement
+from application.render.render_variant_stage import variant_race_cancelled
 from shared.image_canvas import (
     get_image_size,
     image_matches_ratio,
     match_aspect_to_ratio,
     match_aspect_to_target as default_match_aspect_to_target,
 )
+from shared.image_handle import ImageHandle
+from shared.prepared_image import adopt_rendered_image, open_reference_image, open_rendered_image
 
 
 _PLACEMENT_FAILED_RULE_IDS = {"wall_attached_floor_collision", "rug_floating_above_floor_zone", "floor_item_floating"}
@@ -164,6 +168,64 @@ def _normalize_render_candidate_aspect(
         return None
 
 
+def _normalize_render_candidate_handle(
+    handle: ImageHandle,
+    output_path: str,
+    room_path: str,
+    *,
+    expected_ratio: float,
+    ratio_tol: float,
+    match_aspect_to_target: Callable[[str, str], str | None],
+    log_brief: bool,
+    max_crop_fraction: float = 0.20,
+) -> ImageHandle | None:
+    """In-memory ``_normalize_render_candidate_aspect``: decode at most once, encode at most once.
+
+    An injected (non-default) ``match_aspect_to_target`` works on files, so the handle is
+    materialized for it and a different output path is re-read as a new handle.
+    """
+    try:
+        width, height = handle.size
+        if height <= 0:
+            return None
+        if expected_ratio and expected_ratio > 0 and abs((width / height) - expected_ratio) <= ratio_tol:
+            return handle
+        current_ratio = width / height
+        if match_aspect_to_target is not None and match_aspect_to_target is not default_match_aspect_to_target:
+            handle.materialize(output_path)
+            processed_path = match_aspect_to_target(output_path, room_path)
+            if processed_path and image_matches_ratio(processed_path, expected_ratio, ratio_tol):
+                return handle if processed_path == output_path else ImageHandle.from_path(processed_path)
+        if abs(current_ratio - expected_ratio) > ratio_tol:
+            if current_ratio > expected_ratio:
+                retained_fraction = expected_ratio / current_ratio if current_ratio > 0 else 0.0
+            else:
+                retained_fraction = current_ratio / expected_ratio if expected_ratio > 0 else 0.0
+            crop_fraction = max(0.0, 1.0 - retained_fraction)
+            if crop_fraction > max_crop_fraction:
+                if log_brief:
+                    print(
+                        f"[RatioCheck] FAIL {width}x{height} (expected ~{expected_ratio:.4f}, crop={crop_fraction:.3f})",
+                        flush=True,
+                    )
+                return None
+            handle = handle.cropped_to_ratio(expected_ratio)
+        normalized_width, normalized_height = handle.size
+        if normalized_height <= 0:
+            return None
+        normalized_ratio = normalized_width / normalized_height
+        if abs(normalized_ratio - expected_ratio) > ratio_tol:
+            if log_brief:
+                print(
+                    f"[RatioCheck] FAIL {normalized_width}x{normalized_height} (expected ~{expected_ratio:.4f})",
+                    flush=True,
+                )
+            return None
+        return handle
+    except Exception:
+        return None
+
+
 def _format_identity_dims(dims: dict | None) -> str:
     if not isinstance(dims, dict):
         return ""
@@ -1077,30 +1139,70 @@ def _mean(values: list[float]) -> float:
     return sum(values) / len(values)
 
 
-def _extract_guide_line_positions(guide_img: Image.Image) -> tuple[list[int], list[int], set[tuple[int, int]]]:
-    width, height = guide_img.size
-    pixels = guide_img.load()
-    guide_mask: set[tuple[int, int]] = set()
-    row_positions: list[int] = []
-    col_positions: list[int] = []
-
-    for y in range(height):
-        row_hits = 0
-        for x in range(width):
-            if _is_fluorescent_guide_pixel(pixels[x, y]):
-                guide_mask.add((x, y))
-                row_hits += 1
-        if row_hits / max(1, width) >= 0.35:
-            row_positions.append(y)
-
-    for x in range(width):
-        col_hits = 0
-        for y in range(height):
-            if (x, y) in guide_mask:
-                col_hits += 1
-        if col_hits / max(1, height) >= 0.35:
-            col_positions.append(x)
+def _threshold_band(band: Image.Image, predicate: Callable[[int], bool]) -> Image.Image:
+    return band.point([255 if predicate(value) else 0 for value in range(256)])
 
+
+def _guide_pixel_mask(img: Image.Image, *, r_min: int, g_min: int, b_max: int) -> Image.Image:
+    # Same predicate as _is_fluorescent_guide_pixel/_is_guide_like_pixel, evaluated per band in C.
+    r, g, b = img.convert("RGB").split()
+    mask = ImageChops.multiply(
+        _threshold_band(r, lambda value: value >= r_min),
+        _threshold_band(g, lambda value: value >= g_min),
+    )
+    mask = ImageChops.multiply(mask, _threshold_band(b, lambda value: value <= b_max))
+    return ImageChops.multiply(mask, _threshold_band(ImageChops.difference(r, g), lambda value: value <= 80))
+
+
+def _pixel_max(a: Image.Image, b: Image.Image) -> Image.Image:
+    if a.mode == "L":
+        return ImageChops.lighter(a, b)
+    return ImageMath.lambda_eval(lambda args: args["max"](args["a"], args["b"]), a=a, b=b)
+
+
+def _dilate_max(img: Image.Image, radius: int) -> Image.Image:
+    """Sliding-window max over a (2r+1)x(2r+1) box clamped to the image, as two separable passes.
+
+    Shifted copies are zero-filled, which matches clamping because every input is non-negative.
+    """
+    radius = max(0, int(radius))
+    for horizontal in (True, False):
+        result = img
+        for step in range(1, radius + 1):
+            for offset in (step, -step):
+                shifted = Image.new(img.mode, img.size, 0)
+                shifted.paste(img, (offset, 0) if horizontal else (0, offset))
+                result = _pixel_max(result, shifted)
+        img = result
+    return img
+
+
+def _mask_point_count(guide_mask: Image.Image) -> int:
+    return guide_mask.histogram()[255]
+
+
+def _mask_offsets(guide_mask: Image.Image) -> list[int]:
+    # Column-major offsets, so points decode already sorted by (x, y).
+    column_major = guide_mask.transpose(Image.Transpose.TRANSPOSE).tobytes()
+    return list(compress(range(len(column_major)), column_major))
+
+
+def _mask_points(guide_mask: Image.Image) -> list[tuple[int, int]]:
+    height = guide_mask.size[1]
+    return [divmod(offset, height) for offset in _mask_offsets(guide_mask)]
+
+
+def _extract_guide_line_positions(guide_img: Image.Image) -> tuple[list[int], list[int], Image.Image]:
+    width, height = guide_img.size
+    guide_mask = _guide_pixel_mask(guide_img, r_min=180, g_min=170, b_max=140)
+    row_major = guide_mask.tobytes()
+    column_major = guide_mask.transpose(Image.Transpose.TRANSPOSE).tobytes()
+    row_positions = [
+        y for y in range(height) if row_major[y * width:(y + 1) * width].count(255) / max(1, width) >= 0.35
+    ]
+    col_positions = [
+        x for x in range(width) if column_major[x * height:(x + 1) * height].count(255) / max(1, height) >= 0.35
+    ]
     return row_positions, col_positions, guide_mask
 
 
@@ -1108,42 +1210,41 @@ def _pixel_delta(a: tuple[int, int, int], b: tuple[int, int, int]) -> float:
     return float(abs(a[0] - b[0]) + abs(a[1] - b[1]) + abs(a[2] - b[2])) / 3.0
 
 
-def _line_energy(img: Image.Image, axis: str, index: int) -> float:
-    width, height = img.size
-    if axis == "row":
-        if index <= 0 or index >= height - 1:
-            return 0.0
-    else:
-        if index <= 0 or index >= width - 1:
-            return 0.0
+def _neighbour_delta_sum(img: Image.Image, offsets: tuple[tuple[int, int], ...]) -> Image.Image:
+    """Per-pixel max over ``offsets`` of the summed RGB delta (3x ``_pixel_delta``), as an "I" image."""
+    bands = img.convert("RGB").split()
+    best = None
+    for dx, dy in offsets:
+        r, g, b = (ImageChops.difference(band, ImageChops.offset(band, -dx, -dy)) for band in bands)
+        total = ImageMath.lambda_eval(lambda args: args["r"] + args["g"] + args["b"], r=r, g=g, b=b)
+        best = total if best is None else ImageMath.lambda_eval(lambda args: args["max"](args["a"], args["b"]), a=best, b=total)
+    return best
 
-    pixels = img.load()
-    scores: list[float] = []
+
+def _line_energy_profile(img: Image.Image, axis: str) -> list[float]:
+    width, height = img.size
     if axis == "row":
-        for x in range(width):
-            here = pixels[x, index]
-            prev_px = pixels[x, index - 1]
-            next_px = pixels[x, index + 1]
-            scores.append(max(_pixel_delta(here, prev_px), _pixel_delta(here, next_px)))
+        limit, span = height, width
+        delta = _neighbour_delta_sum(img, ((0, -1), (0, 1)))
     else:
-        for y in range(height):
-            here = pixels[index, y]
-            prev_px = pixels[index - 1, y]
-            next_px = pixels[index + 1, y]
-            scores.append(max(_pixel_delta(here, prev_px), _pixel_delta(here, next_px)))
-    return _mean(scores)
+        limit, span = width, height
+        delta = _neighbour_delta_sum(img, ((-1, 0), (1, 0))).transpose(Image.Transpose.TRANSPOSE)
+    values = list(delta.getdata())
+    profile = [0.0] * limit
+    for index in range(1, limit - 1):
+        profile[index] = _mean([value / 3.0 for value in values[index * span:(index + 1) * span]])
+    return profile
 
 
 def _aligned_line_energy(img: Image.Image, axis: str, indices: list[int], *, search_radius: int = 8) -> float:
     if not indices:
         return 0.0
-    limit = img.size[1] if axis == "row" else img.size[0]
+    profile = _line_energy_profile(img, axis)
+    limit = len(profile)
     scores: list[float] = []
     for index in indices:
-        best = 0.0
-        for probe in range(max(1, index - search_radius), min(limit - 1, index + search_radius + 1)):
-            best = max(best, _line_energy(img, axis, probe))
-        scores.append(best)
+        window = profile[max(1, index - search_radius):min(limit - 1, index + search_radius + 1)]
+        scores.append(max([0.0, *window]))
     return _mean(scores)
 
 
@@ -1163,15 +1264,17 @@ def _baseline_line_energy(img: Image.Image, axis: str, guide_indices: list[int],
         sampled = [candidates[min(len(candidates) - 1, int(round(i * step)))] for i in range(sample_count)]
     else:
         sampled = candidates
-    return _mean([_line_energy(img, axis, idx) for idx in sampled])
+    profile = _line_energy_profile(img, axis)
+    return _mean([profile[idx] for idx in sampled])
 
 
-def _sample_points(points: set[tuple[int, int]], *, max_points: int = 512) -> list[tuple[int, int]]:
-    ordered = sorted(points)
-    if len(ordered) <= max_points:
-        return ordered
-    step = len(ordered) / max_points
-    return [ordered[min(len(ordered) - 1, int(i * step))] for i in range(max_points)]
+def _sample_points(guide_mask: Image.Image, *, max_points: int = 512) -> list[tuple[int, int]]:
+    height = guide_mask.size[1]
+    ordered = _mask_offsets(guide_mask)
+    if len(ordered) > max_points:
+        step = len(ordered) / max_points
+        ordered = [ordered[min(len(ordered) - 1, int(i * step))] for i in range(max_points)]
+    return [divmod(offset, height) for offset in ordered]
 
 
 def _point_energy(img: Image.Image, x: int, y: int) -> float:
@@ -1188,54 +1291,46 @@ def _point_energy(img: Image.Image, x: int, y: int) -> float:
     )
 
 
-def _aligned_mask_energy(img: Image.Image, guide_mask: set[tuple[int, int]], *, search_radius: int = 8) -> float:
+def _point_energy_map(img: Image.Image) -> Image.Image:
+    """3x ``_point_energy`` for every pixel as an "I" image; border pixels are 0."""
+    width, height = img.size
+    energy = _neighbour_delta_sum(img, ((-1, 0), (1, 0), (0, -1), (0, 1)))
+    for box in ((0, 0, width, 1), (0, height - 1, width, height), (0, 0, 1, height), (width - 1, 0, width, height)):
+        energy.paste(0, box)
+    return energy
+
+
+def _aligned_mask_energy(img: Image.Image, guide_mask: Image.Image, *, search_radius: int = 8) -> float:
     sampled = _sample_points(guide_mask)
     if not sampled:
         return 0.0
 
-    width, height = img.size
-    scores: list[float] = []
-    for x, y in sampled:
-        best = 0.0
-        for px in range(max(1, x - search_radius), min(width - 1, x + search_radius + 1)):
-            for py in range(max(1, y - search_radius), min(height - 1, y + search_radius + 1)):
-                best = max(best, _point_energy(img, px, py))
-        scores.append(best)
-    return _mean(scores)
+    # Border energy is 0, so the clamped max window matches the old interior-only search.
+    best = _dilate_max(_point_energy_map(img), search_radius).load()
+    return _mean([best[x, y] / 3.0 for x, y in sampled])
 
 
-def _baseline_mask_energy(img: Image.Image, guide_mask: set[tuple[int, int]], *, max_points: int = 256) -> float:
+def _baseline_mask_energy(img: Image.Image, guide_mask: Image.Image, *, max_points: int = 256) -> float:
     width, height = img.size
     stride = max(4, int(((width * height) / max(1, max_points)) ** 0.5))
+    mask_pixels = guide_mask.load()
     points: list[tuple[int, int]] = []
     for y in range(max(1, stride // 2), height - 1, stride):
         for x in range(max(1, stride // 2), width - 1, stride):
-            if (x, y) not in guide_mask:
+            if not mask_pixels[x, y]:
                 points.append((x, y))
     if not points:
         return 0.0
     return _mean([_point_energy(img, x, y) for x, y in points[:max_points]])
 
 
-def _guide_mask_overlap_ratio(rendered_img: Image.Image, guide_mask: set[tuple[int, int]], *, search_radius: int = 2) -> float:
+def _guide_mask_overlap_ratio(rendered_img: Image.Image, guide_mask: Image.Image, *, search_radius: int = 2) -> float:
     sampled = _sample_points(guide_mask)
     if not sampled:
         return 0.0
 
-    width, height = rendered_img.size
-    pixels = rendered_img.load()
-    hits = 0
-    for x, y in sampled:
-        found = False
-        for px in range(max(0, x - search_radius), min(width - 1, x + search_radius) + 1):
-            for py in range(max(0, y - search_radius), min(height - 1, y + search_radius) + 1):
-                if _is_guide_like_pixel(pixels[px, py]):
-                    found = True
-                    break
-            if found:
-                break
-        if found:
-            hits += 1
+    guide_like = _dilate_max(_guide_pixel_mask(rendered_img, r_min=175, g_min=160, b_max=190), search_radius).load()
+    hits = sum(1 for x, y in sampled if guide_like[x, y])
     return hits / max(1, len(sampled))
 
 
@@ -1249,20 +1344,21 @@ def _has_scale_guide_leak(rendered_path: str, scale_guide_path: str | None) -> b
     rendered_img = None
     try:
         guide_img = Image.open(scale_guide_path).convert("RGB")
-        rendered_img = Image.open(rendered_path).convert("RGB")
+        with open_rendered_image(rendered_path) as rendered_source:
+            rendered_img = rendered_source.convert("RGB")
         target_size = (256, 256)
         guide_img = guide_img.resize(target_size, Image.Resampling.BILINEAR)
         rendered_img = rendered_img.resize(target_size, Image.Resampling.BILINEAR)
 
         _, _, guide_mask = _extract_guide_line_positions(guide_img)
-        if len(guide_mask) < 32:
+        if _mask_point_count(guide_mask) < 32:
             return False
 
         overlap_ratio = _guide_mask_overlap_ratio(rendered_img, guide_mask, search_radius=2)
         if os.getenv("SCALE_GUIDE_DEBUG", "0") == "1":
             print(
                 f"[GuideLeakDebug] rendered={os.path.basename(rendered_path)} "
-                f"guide={os.path.basename(scale_guide_path)} mask_points={len(guide_mask)} "
+                f"guide={os.path.basename(scale_guide_path)} mask_points={_mask_point_count(guide_mask)} "
                 f"overlap={overlap_ratio:.4f} threshold=0.7500",
                 flush=True,
             )
@@ -2065,12 +2161,8 @@ def generate_furnished_room(
                             opts_txt = str(opts)
                     elif isinstance(opts, str) and opts.strip():
                         opts_txt = opts.strip()
-                    cutout_img = Image.open(cp)
-                    try:
-                        max_thumb = _reference_thumbnail_size(it)
-                        cutout_img.thumbnail((max_thumb, max_thumb), Image.Resampling.LANCZOS)
-                    except Exception:
-                        pass
+                    max_thumb = _reference_thumbnail_size(it)
+                    cutout_img = open_reference_image(cp, (max_thumb, max_thumb))
                     extra_imgs.append(cutout_img)
                     reference_header = (
                         "Furniture Cutout Reference (LISTED PRODUCT LOCK - ADD THIS EXACT PRODUCT IN THE MAIN RENDER; "
@@ -2107,11 +2199,7 @@ def generate_furnished_room(
                     path_str = str(raw_path or "").strip()
                     if not path_str or not os.path.exists(path_str):
                         continue
-                    ref_img = Image.open(path_str)
-                    try:
-                        ref_img.thumbnail((384, 384), Image.Resampling.LANCZOS)
-                    except Exception:
-                        pass
+                    ref_img = open_reference_image(path_str, (384, 384))
                     extra_imgs.append(ref_img)
                     fallback_entry = [
                         f"Fallback Furniture Reference Image {index} (EXACTNESS ANCHOR - use this reference image even if structured item cards are unavailable).",
@@ -2131,9 +2219,9 @@ def generate_furnished_room(
                         timestamp = int(time.time())
                         filename = f"{prefix}_{timestamp}_{unique_id}.png"
                         path = os.path.join("outputs", filename)
-                        with open(path, "wb") as output_file:
-                            output_file.write(part.inline_data.data)
-                        normalized_path = _normalize_render_candidate_aspect(
+                        source_handle = ImageHandle.from_bytes(part.inline_data.data)
+                        handle = _normalize_render_candidate_handle(
+                            source_handle,
                             path,
                             room_path,
                             expected_ratio=expected_ratio,
@@ -2141,17 +2229,26 @@ def generate_furnished_room(
                             match_aspect_to_target=match_aspect_to_target,
                             log_brief=log_brief,
                         )
-                        if normalized_path is None:
+                        if handle is None:
                             try:
-                                os.remove(path)
+                                if os.path.exists(path):
+                                    os.remove(path)
                             except Exception:
                                 pass
                             return None
+                        if handle.path:
+                            normalized_path = handle.path
+                        elif handle is source_handle:
+                            normalized_path = handle.materialize(path)
+                        else:
+                            normalized_path = handle.materialize(f"{os.path.splitext(path)[0]}_aspect.png")
                         if normalized_path != path:
                             try:
-                                os.remove(path)
+                                if os.path.exists(path):
+                                    os.remove(path)
                             except Exception:
                                 pass
+                        adopt_rendered_image(handle)
                         return normalized_path
             return None
 
@@ -2289,6 +2386,8 @@ def generate_furnished_room(
             return result
 
         for attempt in range(max_attempts):
+            if variant_race_cancelled():
+                return None
             try:
                 last_path = _render_once()
             except Exception as exc:
@@ -2307,6 +2406,8 @@ def generate_furnished_room(
                 continue
 
             last_success_path = last_path
+            if variant_race_cancelled():
+                return None
             scale_check_failed = False
             scalecheck_issues = []
             scalecheck_diagnostics = {}
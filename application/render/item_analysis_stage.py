@@ -2,6 +2,7 @@ import json
 import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Optional
 
 from PIL import Image
@@ -14,6 +15,8 @@ from application.render.reference_features_stage import (
     extract_reference_features,
     should_extract_reference_features,
 )
+from application.render.render_stage_spans import submit_in_context
+from infrastructure.ai.analysis_result_cache import build_analysis_cache_key, file_sha256
 
 
 _GENERIC_DESC_PREFIXES = (
@@ -26,6 +29,26 @@ _GENERIC_DESC_PREFIXES = (
 _MATERIAL_HINT_RE = re.compile(r"\b(wood|walnut|oak|marble|stone|glass|metal|chrome|steel|fabric|linen|boucle|leather|rattan|mirror|reflective)\b", re.IGNORECASE)
 _SHAPE_HINT_RE = re.compile(r"\b(round|circular|oval|square|rectangular|arched|curved|modular|low-profile|pedestal|spindle|flaring|blocky|slim|thin|tufted|rolled|boxy)\b", re.IGNORECASE)
 
+_DETECT_FURNITURE_PROMPT = (
+    "OBJECT DETECTION TASK:\n"
+    "Identify ALL discrete interior objects that could make useful detail-shot targets in this image, "
+    "including furniture, lighting, decor, and accessories.\n"
+    "Examples: sofas, chairs, tables, lamps, rugs, ottomans, mirrors, wall art, framed prints, posters, "
+    "vases, books, plants, candles, sculptures, trays, table decor, shelf decor, and small accessories.\n"
+    "**NOTE:** The background is a neutral grey (#D2D2D2) for contrast. Do not detect the background itself.\n"
+    "Return a JSON list where each item has:\n"
+    "- 'label': Specific name of the item. Use specific labels instead of generic 'Decor' whenever possible.\n"
+    "- 'box_2d': [ymin, xmin, ymax, xmax] coordinates normalized to 0-1000 scale.\n"
+    "\n"
+    "<CRITICAL: SORTING ORDER>\n"
+    "**YOU MUST SORT THE LIST BY PHYSICAL SIZE (VOLUME) FROM LARGEST TO SMALLEST.**\n"
+    "1. Largest items first (e.g., Sofa, Bed, Large Rug, Wardrobe).\n"
+    "2. Medium items second (e.g., Armchair, Coffee Table, Console).\n"
+    "3. Small items last (e.g., Side Table, Lamp, Vase, Decor).\n"
+    "Ignore walls, windows, floors, ceiling, and built-in architecture. "
+    "But do detect discrete objects attached to a wall or placed on a shelf, table, or floor."
+)
+
 
 def _coerce_positive_int(value: Any) -> int | None:
     try:
@@ -287,30 +310,26 @@ def detect_furniture_boxes(
     model_name: Optional[str] = None,
     timeout_sec: Optional[int] = None,
     max_attempts: Optional[int] = None,
+    analysis_cache: Any = None,
 ):
     if not log_brief:
         print(f">> [Detection] Scanning furniture in {moodboard_path}...", flush=True)
+    cache_key = None
+    if analysis_cache is not None:
+        cache_key = build_analysis_cache_key(
+            namespace="detect-furniture",
+            image_sha256=file_sha256(moodboard_path),
+            model_name=model_name or default_model_name,
+            prompt=_DETECT_FURNITURE_PROMPT,
+        )
+        cached_items = analysis_cache.get(cache_key)
+        if isinstance(cached_items, list) and cached_items:
+            if not log_brief:
+                print(f">> [Detection] cache hit ({len(cached_items)} items)", flush=True)
+            return cached_items
     try:
         with Image.open(moodboard_path) as img:
-            prompt = (
-                "OBJECT DETECTION TASK:\n"
-                "Identify ALL discrete interior objects that could make useful detail-shot targets in this image, "
-                "including furniture, lighting, decor, and accessories.\n"
-                "Examples: sofas, chairs, tables, lamps, rugs, ottomans, mirrors, wall art, framed prints, posters, "
-                "vases, books, plants, candles, sculptures, trays, table decor, shelf decor, and small accessories.\n"
-                "**NOTE:** The background is a neutral grey (#D2D2D2) for contrast. Do not detect the background itself.\n"
-                "Return a JSON list where each item has:\n"
-                "- 'label': Specific name of the item. Use specific labels instead of generic 'Decor' whenever possible.\n"
-                "- 'box_2d': [ymin, xmin, ymax, xmax] coordinates normalized to 0-1000 scale.\n"
-                "\n"
-                "<CRITICAL: SORTING ORDER>\n"
-                "**YOU MUST SORT THE LIST BY PHYSICAL SIZE (VOLUME) FROM LARGEST TO SMALLEST.**\n"
-                "1. Largest items first (e.g., Sofa, Bed, Large Rug, Wardrobe).\n"
-                "2. Medium items second (e.g., Armchair, Coffee Table, Console).\n"
-                "3. Small items last (e.g., Side Table, Lamp, Vase, Decor).\n"
-                "Ignore walls, windows, floors, ceiling, and built-in architecture. "
-                "But do detect discrete objects attached to a wall or placed on a shelf, table, or floor."
-            )
+            prompt = _DETECT_FURNITURE_PROMPT
             detect_model = model_name or default_model_name
             detect_timeout = max(60, int(timeout_sec or 120))
             detect_max_attempts = max(3, int(max_attempts or 3))
@@ -335,6 +354,8 @@ def detect_furniture_boxes(
                 if isinstance(items, list) and len(items) > 0:
                     if not log_brief:
                         print(f">> [Detection] Found {len(items)} items (Sorted): {[i.get('label') for i in items]}", flush=True)
+                    if cache_key:
+                        analysis_cache.set(cache_key, items)
                     return items
     except Exception as exc:
         print(f"!! Detection Failed: {exc}", flush=True)
@@ -427,6 +448,291 @@ def _crop_item_with_padding(moodboard_path, item_data, unique_id=None, item_inde
     return cropped_img, crop_path
 
 
+def _build_crop_item_prompt(
+    *,
+    label: str,
+    enable_text_read: bool,
+    provided_dims_mm,
+    normalize_dims_dict: Callable[[dict], dict],
+) -> str:
+    if enable_text_read:
+        return (
+            f"Analyze this image cutout of a '{label}'.\n"
+            "IMPORTANT: Look specifically at the TEXT written below or near the object.\n"
+            "1. **READ EXTRACT DIMENSIONS:** If there is text like 'W: 2800', 'Width 2800mm', '2800*1450', extract these numbers EXACTLY in millimeters.\n"
+            "   - Support radius notation too (R, 반지름, Ø, ⌀, Φ).\n"
+            "2. **LONG DESCRIPTION (90-120 words):** Describe material, color, shape, proportions, silhouette, support/base geometry, openings/gaps, and scale cues.\n"
+            "   - Treat dimensions as core identity cues, not as a metadata tail.\n"
+            "   - Avoid generic filler like 'high quality furniture'.\n"
+            "\n"
+            "Return STRICT JSON only:\n"
+            "{\n"
+            "  \"description\": \"Visual description...\",\n"
+            "  \"dimensions_mm\": {\"width\": int/null, \"depth\": int/null, \"height\": int/null, \"radius\": int/null},\n"
+            "  \"raw_text_found\": \"copy the text you read here\"\n"
+            "}\n"
+        )
+    dims_hint = normalize_dims_dict(provided_dims_mm or {})
+    w_hint = dims_hint.get("width_mm")
+    d_hint = dims_hint.get("depth_mm")
+    h_hint = dims_hint.get("height_mm")
+    r_hint = dims_hint.get("radius_mm")
+    has_dim_hint = any([(w_hint or 0) > 0, (d_hint or 0) > 0, (h_hint or 0) > 0, (r_hint or 0) > 0])
+
+    hint_line = ""
+    if has_dim_hint:
+        hint_line = (
+            f"CATALOG DIMENSIONS (authoritative, mm): "
+            f"W={w_hint if (w_hint or 0) > 0 else 'null'}, "
+            f"D={d_hint if (d_hint or 0) > 0 else 'null'}, "
+            f"H={h_hint if (h_hint or 0) > 0 else 'null'}, "
+            f"R={r_hint if (r_hint or 0) > 0 else 'null'}.\n"
+            "Use these exact numbers naturally in the description body (not as a metadata tail).\n"
+            "Do NOT add template-like phrases such as 'Requested size'.\n"
+        )
+
+    return (
+        f"Analyze this image cutout of a '{label}'.\n"
+        "Write a 90-120 word visual description.\n"
+        "Cover material, color, shape, proportions, silhouette, support/base geometry, openings/gaps, and real-world scale cues.\n"
+        f"{hint_line}"
+        "Treat the dimensions as core identity constraints and mention whether the item reads tiny, compact, standard, large, or oversized.\n"
+        "Do not use generic filler like 'a high quality chair'.\n"
+        "If dimensions are missing, do NOT invent them.\n"
+        "Return STRICT JSON only:\n"
+        "{\n"
+        "  \"description\": \"Visual description...\"\n"
+        "}\n"
+    )
+
+
+_CACHED_CROP_ANALYSIS_FIELDS = ("label", "description", "box_2d", "reference_features", "item_analysis_profile")
+
+
+def _crop_analysis_cache_key(
+    moodboard_path,
+    item_data: dict,
+    *,
+    analysis_model_name: str,
+    normalize_dims_dict: Callable[[dict], dict],
+    enable_text_read: bool,
+    analysis_profile: str | None,
+    allow_reference_feature_model: bool,
+    provided_dims_mm,
+) -> str | None:
+    label = item_data.get("label", "Furniture")
+    resolved_profile = normalize_item_analysis_profile(
+        analysis_profile,
+        default=DETAILED_ITEM_ANALYSIS_PROFILE if enable_text_read else COMPACT_ITEM_ANALYSIS_PROFILE,
+    )
+    return build_analysis_cache_key(
+        namespace="crop-item",
+        image_sha256=file_sha256(moodboard_path),
+        crop_box=item_data.get("box_2d"),
+        profile=resolved_profile,
+        model_name=analysis_model_name,
+        prompt=_build_crop_item_prompt(
+            label=label,
+            enable_text_read=enable_text_read,
+            provided_dims_mm=provided_dims_mm,
+            normalize_dims_dict=normalize_dims_dict,
+        ),
+        extra={
+            "category": item_data.get("category"),
+            "category_canonical": item_data.get("category_canonical"),
+            "dims_mm": normalize_dims_dict(provided_dims_mm or {}),
+            "options_reference_features": _options_reference_features(item_data),
+            "allow_reference_feature_model": bool(allow_reference_feature_model),
+        },
+    )
+
+
+def _cacheable_crop_analysis(result: dict) -> dict:
+    return {field: result.get(field) for field in _CACHED_CROP_ANALYSIS_FIELDS}
+
+
+def _detailed_crop_analysis_cacheable(result: dict, *, model_described: bool) -> bool:
+    # A fallback after a deadline, quota error or weak reply would otherwise be served for
+    # the whole cache TTL, so model-extracted features must have come back sufficient.
+    if not model_described:
+        return False
+    reference_features = result.get("reference_features")
+    if not isinstance(reference_features, dict):
+        return False
+    if reference_features.get("extraction_mode") != "model" or not result.get("crop_path"):
+        return True
+    return reference_features.get("analysis_quality") == "model_sufficient"
+
+
+def _restore_cached_crop_analysis(
+    cached: dict,
+    moodboard_path,
+    item_data: dict,
+    *,
+    unique_id=None,
+    item_index=None,
+    save_crop=True,
+) -> dict:
+    # Crops are per-job files, so they are re-materialized locally; only model output is reused.
+    cropped_img, crop_path = _crop_item_with_padding(
+        moodboard_path,
+        item_data,
+        unique_id=unique_id,
+        item_index=item_index,
+        save_crop=save_crop,
+    )
+    if cropped_img:
+        try:
+            cropped_img.close()
+        except Exception:
+            pass
+    return {
+        "label": cached.get("label"),
+        "description": cached.get("description"),
+        "box_2d": cached.get("box_2d"),
+        "crop_path": crop_path,
+        "reference_features": cached.get("reference_features"),
+        "target_key": item_data.get("target_key"),
+        "source_index": item_data.get("source_index"),
+        "category": item_data.get("category"),
+        "category_canonical": item_data.get("category_canonical"),
+        "product_name": item_data.get("product_name"),
+        "item_id": item_data.get("item_id"),
+        "item_analysis_profile": cached.get("item_analysis_profile"),
+    }
+
+
+def _complete_detailed_crop_analysis(
+    data: dict | None,
+    *,
+    label: str,
+    item_data: dict,
+    box,
+    crop_path: str | None,
+    resolved_dims_mm: dict,
+    resolved_analysis_profile: str,
+    enable_text_read: bool,
+    call_gemini_with_failover: Callable[..., Any],
+    analysis_model_name: str,
+    safe_extract_json: Callable[[str], dict],
+    normalize_dims_dict: Callable[[dict], dict],
+    log_brief: bool,
+    absolute_deadline_ts: float | None,
+) -> tuple[dict, bool]:
+    """Turn one parsed crop-description payload into the per-item analysis dict.
+
+    Shared by the single-item call and the batched call so both return the same
+    contract; the second value tells whether the model supplied the description.
+    """
+    desc = f"{label} with its original material and silhouette preserved."
+    model_described = False
+
+    if data:
+        desc = data.get("description", desc)
+        model_described = bool(data.get("description"))
+        if enable_text_read:
+            raw_dims = data.get("dimensions_mm", {})
+            width_mm = raw_dims.get("width")
+            depth_mm = raw_dims.get("depth")
+            height_mm = raw_dims.get("height")
+            radius_mm = raw_dims.get("radius")
+            extracted_dims_mm = normalize_dims_dict(
+                {
+                    "width_mm": width_mm,
+                    "depth_mm": depth_mm,
+                    "height_mm": height_mm,
+                    "radius_mm": radius_mm,
+                }
+            )
+            if extracted_dims_mm:
+                merged_dims_mm = dict(extracted_dims_mm)
+                for dim_key, dim_value in (resolved_dims_mm or {}).items():
+                    if dim_value:
+                        merged_dims_mm[dim_key] = dim_value
+                resolved_dims_mm = normalize_dims_dict(merged_dims_mm)
+
+            if width_mm and depth_mm and height_mm:
+                if not log_brief:
+                    print(
+                        f"   -> [Text Read] {label}: W={width_mm}mm, D={depth_mm}mm, H={height_mm}mm. "
+                        f"(Source: {data.get('raw_text_found')})",
+                        flush=True,
+                    )
+            elif radius_mm and (height_mm or depth_mm or width_mm):
+                if not log_brief:
+                    dim_bits = [f"R={radius_mm}mm"]
+                    if height_mm:
+                        dim_bits.append(f"H={height_mm}mm")
+                    elif depth_mm:
+                        dim_bits.append(f"D={depth_mm}mm")
+                    elif width_mm:
+                        dim_bits.append(f"W={width_mm}mm")
+                    print(
+                        f"   -> [Text Read] {label}: {', '.join(dim_bits)}. "
+                        f"(Source: {data.get('raw_text_found')})",
+                        flush=True,
+                    )
+            elif log_brief:
+                print(f"[Text Read] FAIL {label}", flush=True)
+
+    desc = _stabilize_description(
+        label=label,
+        category=item_data.get("category") or item_data.get("category_canonical"),
+        description=desc,
+        dims_mm=resolved_dims_mm,
+        reference_features=None,
+    )
+
+    extract_ref_features, extraction_reason = should_extract_reference_features(
+        label=label,
+        category=item_data.get("category"),
+        category_canonical=item_data.get("category_canonical"),
+        dims_mm=resolved_dims_mm,
+    )
+    reference_features = extract_reference_features(
+        crop_path=crop_path,
+        label=label,
+        category=item_data.get("category"),
+        description=desc,
+        dims_mm=resolved_dims_mm,
+        call_gemini_with_failover=call_gemini_with_failover,
+        analysis_model_name=analysis_model_name,
+        safe_json_from_model_text=safe_extract_json,
+        log_brief=log_brief,
+        allow_model_call=extract_ref_features,
+        extraction_reason=extraction_reason,
+        absolute_deadline_ts=absolute_deadline_ts,
+    )
+    if isinstance(reference_features, dict):
+        reference_features["extraction_mode"] = "model" if extract_ref_features else "fallback"
+        reference_features["extraction_reason"] = extraction_reason
+        reference_features["analysis_profile"] = resolved_analysis_profile
+    reference_features = _merge_options_reference_features(reference_features, item_data)
+    final_desc = _stabilize_description(
+        label=label,
+        category=item_data.get("category") or item_data.get("category_canonical"),
+        description=desc,
+        dims_mm=resolved_dims_mm,
+        reference_features=reference_features,
+    )
+
+    result = {
+        "label": label,
+        "description": final_desc,
+        "box_2d": box,
+        "crop_path": crop_path,
+        "reference_features": reference_features,
+        "target_key": item_data.get("target_key"),
+        "source_index": item_data.get("source_index"),
+        "category": item_data.get("category"),
+        "category_canonical": item_data.get("category_canonical"),
+        "product_name": item_data.get("product_name"),
+        "item_id": item_data.get("item_id"),
+        "item_analysis_profile": resolved_analysis_profile,
+    }
+    return result, model_described
+
+
 def analyze_cropped_item(
     moodboard_path,
     item_data,
@@ -444,7 +750,31 @@ def analyze_cropped_item(
     allow_reference_feature_model: bool = False,
     provided_dims_mm=None,
     absolute_deadline_ts: float | None = None,
+    analysis_cache: Any = None,
 ):
+    cache_key = None
+    if analysis_cache is not None:
+        cache_key = _crop_analysis_cache_key(
+            moodboard_path,
+            item_data,
+            analysis_model_name=analysis_model_name,
+            normalize_dims_dict=normalize_dims_dict,
+            enable_text_read=enable_text_read,
+            analysis_profile=analysis_profile,
+            allow_reference_feature_model=allow_reference_feature_model,
+            provided_dims_mm=provided_dims_mm,
+        )
+        cached = analysis_cache.get(cache_key)
+        if isinstance(cached, dict):
+            return _restore_cached_crop_analysis(
+                cached,
+                moodboard_path,
+                item_data,
+                unique_id=unique_id,
+                item_index=item_index,
+                save_crop=save_crop,
+            )
+
     cropped_img = None
     cutout_img = None
     try:
@@ -578,7 +908,7 @@ def analyze_cropped_item(
                     cutout_img.close()
                 except Exception:
                     pass
-            return {
+            result = {
                 "label": label,
                 "description": final_desc,
                 "box_2d": box,
@@ -592,57 +922,21 @@ def analyze_cropped_item(
                 "item_id": item_data.get("item_id"),
                 "item_analysis_profile": resolved_analysis_profile,
             }
-
-        if enable_text_read:
-            prompt = (
-                f"Analyze this image cutout of a '{label}'.\n"
-                "IMPORTANT: Look specifically at the TEXT written below or near the object.\n"
-                "1. **READ EXTRACT DIMENSIONS:** If there is text like 'W: 2800', 'Width 2800mm', '2800*1450', extract these numbers EXACTLY in millimeters.\n"
-                "   - Support radius notation too (R, 반지름, Ø, ⌀, Φ).\n"
-                "2. **LONG DESCRIPTION (90-120 words):** Describe material, color, shape, proportions, silhouette, support/base geometry, openings/gaps, and scale cues.\n"
-                "   - Treat dimensions as core identity cues, not as a metadata tail.\n"
-                "   - Avoid generic filler like 'high quality furniture'.\n"
-                "\n"
-                "Return STRICT JSON only:\n"
-                "{\n"
-                "  \"description\": \"Visual description...\",\n"
-                "  \"dimensions_mm\": {\"width\": int/null, \"depth\": int/null, \"height\": int/null, \"radius\": int/null},\n"
-                "  \"raw_text_found\": \"copy the text you read here\"\n"
-                "}\n"
-            )
-        else:
-            dims_hint = normalize_dims_dict(provided_dims_mm or {})
-            w_hint = dims_hint.get("width_mm")
-            d_hint = dims_hint.get("depth_mm")
-            h_hint = dims_hint.get("height_mm")
-            r_hint = dims_hint.get("radius_mm")
-            has_dim_hint = any([(w_hint or 0) > 0, (d_hint or 0) > 0, (h_hint or 0) > 0, (r_hint or 0) > 0])
-
-            hint_line = ""
-            if has_dim_hint:
-                hint_line = (
-                    f"CATALOG DIMENSIONS (authoritative, mm): "
-                    f"W={w_hint if (w_hint or 0) > 0 else 'null'}, "
-                    f"D={d_hint if (d_hint or 0) > 0 else 'null'}, "
-                    f"H={h_hint if (h_hint or 0) > 0 else 'null'}, "
-                    f"R={r_hint if (r_hint or 0) > 0 else 'null'}.\n"
-                    "Use these exact numbers naturally in the description body (not as a metadata tail).\n"
-                    "Do NOT add template-like phrases such as 'Requested size'.\n"
-                )
-
-            prompt = (
-                f"Analyze this image cutout of a '{label}'.\n"
-                "Write a 90-120 word visual description.\n"
-                "Cover material, color, shape, proportions, silhouette, support/base geometry, openings/gaps, and real-world scale cues.\n"
-                f"{hint_line}"
-                "Treat the dimensions as core identity constraints and mention whether the item reads tiny, compact, standard, large, or oversized.\n"
-                "Do not use generic filler like 'a high quality chair'.\n"
-                "If dimensions are missing, do NOT invent them.\n"
-                "Return STRICT JSON only:\n"
-                "{\n"
-                "  \"description\": \"Visual description...\"\n"
-                "}\n"
-            )
+            if (
+                cache_key
+                and reference_model_allowed
+                and isinstance(reference_features, dict)
+                and reference_features.get("analysis_quality") == "model_sufficient"
+            ):
+                analysis_cache.set(cache_key, _cacheable_crop_analysis(result))
+            return result
+
+        prompt = _build_crop_item_prompt(
+            label=label,
+            enable_text_read=enable_text_read,
+            provided_dims_mm=provided_dims_mm,
+            normalize_dims_dict=normalize_dims_dict,
+        )
 
         crop_timeout_sec = 150
         crop_max_attempts = None
@@ -672,65 +966,7 @@ def analyze_cropped_item(
                 log_tag="Analysis.CropItem",
             )
 
-        desc = f"{label} with its original material and silhouette preserved."
-
-        if response and response.text:
-            data = safe_extract_json(response.text)
-            if data:
-                desc = data.get("description", desc)
-                if enable_text_read:
-                    raw_dims = data.get("dimensions_mm", {})
-                    width_mm = raw_dims.get("width")
-                    depth_mm = raw_dims.get("depth")
-                    height_mm = raw_dims.get("height")
-                    radius_mm = raw_dims.get("radius")
-                    extracted_dims_mm = normalize_dims_dict(
-                        {
-                            "width_mm": width_mm,
-                            "depth_mm": depth_mm,
-                            "height_mm": height_mm,
-                            "radius_mm": radius_mm,
-                        }
-                    )
-                    if extracted_dims_mm:
-                        merged_dims_mm = dict(extracted_dims_mm)
-                        for dim_key, dim_value in (resolved_dims_mm or {}).items():
-                            if dim_value:
-                                merged_dims_mm[dim_key] = dim_value
-                        resolved_dims_mm = normalize_dims_dict(merged_dims_mm)
-
-                    if width_mm and depth_mm and height_mm:
-                        if not log_brief:
-                            print(
-                                f"   -> [Text Read] {label}: W={width_mm}mm, D={depth_mm}mm, H={height_mm}mm. "
-                                f"(Source: {data.get('raw_text_found')})",
-                                flush=True,
-                            )
-                    elif radius_mm and (height_mm or depth_mm or width_mm):
-                        if not log_brief:
-                            dim_bits = [f"R={radius_mm}mm"]
-                            if height_mm:
-                                dim_bits.append(f"H={height_mm}mm")
-                            elif depth_mm:
-                                dim_bits.append(f"D={depth_mm}mm")
-                            elif width_mm:
-                                dim_bits.append(f"W={width_mm}mm")
-                            print(
-                                f"   -> [Text Read] {label}: {', '.join(dim_bits)}. "
-                                f"(Source: {data.get('raw_text_found')})",
-                                flush=True,
-                            )
-                    elif log_brief:
-                        print(f"[Text Read] FAIL {label}", flush=True)
-
-        desc = _stabilize_description(
-            label=label,
-            category=item_data.get("category") or item_data.get("category_canonical"),
-            description=desc,
-            dims_mm=resolved_dims_mm,
-            reference_features=None,
-        )
-
+        data = safe_extract_json(response.text) if response and response.text else None
         if cropped_img:
             try:
                 cropped_img.close()
@@ -741,53 +977,25 @@ def analyze_cropped_item(
                 cutout_img.close()
             except Exception:
                 pass
-        extract_ref_features, extraction_reason = should_extract_reference_features(
+        result, model_described = _complete_detailed_crop_analysis(
+            data,
             label=label,
-            category=item_data.get("category"),
-            category_canonical=item_data.get("category_canonical"),
-            dims_mm=resolved_dims_mm,
-        )
-        reference_features = extract_reference_features(
+            item_data=item_data,
+            box=box,
             crop_path=crop_path,
-            label=label,
-            category=item_data.get("category"),
-            description=desc,
-            dims_mm=resolved_dims_mm,
+            resolved_dims_mm=resolved_dims_mm,
+            resolved_analysis_profile=resolved_analysis_profile,
+            enable_text_read=enable_text_read,
             call_gemini_with_failover=call_gemini_with_failover,
             analysis_model_name=analysis_model_name,
-            safe_json_from_model_text=safe_extract_json,
+            safe_extract_json=safe_extract_json,
+            normalize_dims_dict=normalize_dims_dict,
             log_brief=log_brief,
-            allow_model_call=extract_ref_features,
-            extraction_reason=extraction_reason,
             absolute_deadline_ts=absolute_deadline_ts,
         )
-        if isinstance(reference_features, dict):
-            reference_features["extraction_mode"] = "model" if extract_ref_features else "fallback"
-            reference_features["extraction_reason"] = extraction_reason
-            reference_features["analysis_profile"] = resolved_analysis_profile
-        reference_features = _merge_options_reference_features(reference_features, item_data)
-        final_desc = _stabilize_description(
-            label=label,
-            category=item_data.get("category") or item_data.get("category_canonical"),
-            description=desc,
-            dims_mm=resolved_dims_mm,
-            reference_features=reference_features,
-        )
-
-        return {
-            "label": label,
-            "description": final_desc,
-            "box_2d": box,
-            "crop_path": crop_path,
-            "reference_features": reference_features,
-            "target_key": item_data.get("target_key"),
-            "source_index": item_data.get("source_index"),
-            "category": item_data.get("category"),
-            "category_canonical": item_data.get("category_canonical"),
-            "product_name": item_data.get("product_name"),
-            "item_id": item_data.get("item_id"),
-            "item_analysis_profile": resolved_analysis_profile,
-        }
+        if cache_key and _detailed_crop_analysis_cacheable(result, model_described=model_described):
+            analysis_cache.set(cache_key, _cacheable_crop_analysis(result))
+        return result
 
     except Exception as exc:
         print(f"!! Crop Analysis Failed for {item_data.get('label','Furniture')}: {exc}", flush=True)
@@ -837,3 +1045,276 @@ def analyze_cropped_item(
         "category_canonical": item_data.get("category_canonical"),
         "item_id": item_data.get("item_id"),
     }
+
+
+def _build_batched_crop_items_prompt(
+    slots: list[dict],
+    *,
+    enable_text_read: bool,
+    normalize_dims_dict: Callable[[dict], dict],
+) -> str:
+    lines = [
+        f"Analyze {len(slots)} furniture image cutouts. Each cutout follows its 'ITEM SLOT n' marker.",
+        "Analyze every slot independently and never mix details between slots.",
+        "For each slot write a 90-120 word visual description covering material, color, shape, proportions, "
+        "silhouette, support/base geometry, openings/gaps, and real-world scale cues.",
+        "Treat dimensions as core identity constraints and mention whether the item reads tiny, compact, standard, large, or oversized.",
+        "Do not use generic filler like 'a high quality chair'. If dimensions are missing, do NOT invent them.",
+    ]
+    if enable_text_read:
+        lines.append(
+            "For each slot also READ any dimension TEXT written below or near the object ('W: 2800', '2800*1450', "
+            "R, 반지름, Ø, ⌀, Φ) and extract the numbers EXACTLY in millimeters."
+        )
+    lines.append("")
+    for slot in slots:
+        dims_hint = normalize_dims_dict(slot["provided_dims_mm"] or {})
+        hint = ""
+        if any((dims_hint.get(key) or 0) > 0 for key in ("width_mm", "depth_mm", "height_mm", "radius_mm")):
+            hint = (
+                " | CATALOG DIMENSIONS (authoritative, mm): "
+                + ", ".join(
+                    f"{short}={dims_hint.get(key) if (dims_hint.get(key) or 0) > 0 else 'null'}"
+                    for key, short in (("width_mm", "W"), ("depth_mm", "D"), ("height_mm", "H"), ("radius_mm", "R"))
+                )
+                + " - use these exact numbers naturally in the description body."
+            )
+        lines.append(f"ITEM SLOT {slot['slot']}: '{slot['label']}'{hint}")
+    entry = '{"slot": 1, "description": "Visual description..."'
+    if enable_text_read:
+        entry += ', "dimensions_mm": {"width": int/null, "depth": int/null, "height": int/null, "radius": int/null}, "raw_text_found": "..."'
+    entry += "}"
+    lines += [
+        "",
+        "Return STRICT JSON only, with exactly one entry per slot:",
+        '{"items": [' + entry + ", ...]}",
+    ]
+    return "\n".join(lines)
+
+
+def _parse_batched_crop_items(data: Any, slot_numbers: set[int]) -> dict[int, dict]:
+    entries = data.get("items") if isinstance(data, dict) else data
+    parsed: dict[int, dict] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            slot_number = int(entry.get("slot"))
+        except (TypeError, ValueError):
+            continue
+        description = entry.get("description")
+        if slot_number not in slot_numbers or not isinstance(description, str) or not description.strip():
+            continue
+        if not isinstance(entry.get("dimensions_mm"), dict):
+            entry = {**entry, "dimensions_mm": {}}
+        parsed[slot_number] = entry
+    return parsed
+
+
+def analyze_cropped_items_batched(
+    requests: list[dict],
+    *,
+    analyze_single: Callable[..., dict],
+    call_gemini_with_failover: Callable[..., Any],
+    analysis_model_name: str,
+    safe_extract_json: Callable[[str], dict],
+    normalize_dims_dict: Callable[[dict], dict],
+    log_brief: bool,
+    unique_id=None,
+    enable_text_read=True,
+    analysis_profile: str | None = None,
+    allow_reference_feature_model: bool = False,
+    absolute_deadline_ts: float | None = None,
+    analysis_cache: Any = None,
+    completion_workers: int = 4,
+) -> list[dict | None]:
+    """Describe several crops with one structured model call, keeping the per-item contract.
+
+    ``requests`` hold ``moodboard_path``, ``item_data``, ``item_index`` and
+    ``provided_dims_mm``. A truncated or malformed response is split in half and
+    retried, slots the model skipped are asked again as a smaller batch, and a single
+    slot that still fails (or a call that errors outright) goes through
+    ``analyze_single``, i.e. the regular ``analyze_cropped_item`` path.
+    """
+    results: list[dict | None] = [None] * len(requests)
+    resolved_analysis_profile = normalize_item_analysis_profile(
+        analysis_profile,
+        default=DETAILED_ITEM_ANALYSIS_PROFILE if enable_text_read else COMPACT_ITEM_ANALYSIS_PROFILE,
+    )
+
+    def _single(index: int) -> None:
+        request = requests[index]
+        try:
+            results[index] = analyze_single(
+                request.get("moodboard_path"),
+                request.get("item_data") or {},
+                unique_id=unique_id,
+                item_index=request.get("item_index"),
+                save_crop=True,
+                enable_text_read=enable_text_read,
+                analysis_profile=analysis_profile,
+                allow_reference_feature_model=allow_reference_feature_model,
+                provided_dims_mm=request.get("provided_dims_mm"),
+                absolute_deadline_ts=absolute_deadline_ts,
+            )
+        except Exception:
+            results[index] = None
+
+    if resolved_analysis_profile != DETAILED_ITEM_ANALYSIS_PROFILE:
+        # Compact analysis makes no description call, so there is nothing to batch.
+        for index in range(len(requests)):
+            _single(index)
+        return results
+
+    slots: list[dict] = []
+    for index, request in enumerate(requests):
+        item_data = request.get("item_data") or {}
+        moodboard_path = request.get("moodboard_path")
+        provided_dims_mm = request.get("provided_dims_mm")
+        cache_key = None
+        try:
+            if analysis_cache is not None:
+                cache_key = _crop_analysis_cache_key(
+                    moodboard_path,
+                    item_data,
+                    analysis_model_name=analysis_model_name,
+                    normalize_dims_dict=normalize_dims_dict,
+                    enable_text_read=enable_text_read,
+                    analysis_profile=analysis_profile,
+                    allow_reference_feature_model=allow_reference_feature_model,
+                    provided_dims_mm=provided_dims_mm,
+                )
+                cached = analysis_cache.get(cache_key)
+                if isinstance(cached, dict):
+                    results[index] = _restore_cached_crop_analysis(
+                        cached,
+                        moodboard_path,
+                        item_data,
+                        unique_id=unique_id,
+                        item_index=request.get("item_index"),
+                        save_crop=True,
+                    )
+                    continue
+            cropped_img, crop_path = _crop_item_with_padding(
+                moodboard_path,
+                item_data,
+                unique_id=unique_id,
+                item_index=request.get("item_index"),
+                save_crop=True,
+            )
+        except Exception:
+            cropped_img, crop_path = None, None
+        if cropped_img is None:
+            _single(index)
+            continue
+        slots.append(
+            {
+                "index": index,
+                "slot": len(slots) + 1,
+                "label": item_data.get("label", "Furniture"),
+                "item_data": item_data,
+                "provided_dims_mm": provided_dims_mm,
+                "image": cropped_img,
+                "crop_path": crop_path,
+                "cache_key": cache_key,
+            }
+        )
+
+    def _complete(slot: dict, data: dict) -> None:
+        item_data = slot["item_data"]
+        try:
+            result, model_described = _complete_detailed_crop_analysis(
+                data,
+                label=slot["label"],
+                item_data=item_data,
+                box=item_data.get("box_2d"),
+                crop_path=slot["crop_path"],
+                resolved_dims_mm=normalize_dims_dict(slot["provided_dims_mm"] or {}),
+                resolved_analysis_profile=resolved_analysis_profile,
+                enable_text_read=enable_text_read,
+                call_gemini_with_failover=call_gemini_with_failover,
+                analysis_model_name=analysis_model_name,
+                safe_extract_json=safe_extract_json,
+                normalize_dims_dict=normalize_dims_dict,
+                log_brief=log_brief,
+                absolute_deadline_ts=absolute_deadline_ts,
+            )
+        except Exception:
+            _single(slot["index"])
+            return
+        if slot["cache_key"] and _detailed_crop_analysis_cacheable(result, model_described=model_described):
+            analysis_cache.set(slot["cache_key"], _cacheable_crop_analysis(result))
+        results[slot["index"]] = result
+
+    def _describe(batch: list[dict]) -> None:
+        request_options: dict[str, Any] = {"timeout": 150}
+        if absolute_deadline_ts is not None:
+            remaining_deadline_sec = max(0.0, float(absolute_deadline_ts) - float(time.time()))
+            if remaining_deadline_sec <= 10.0:
+                for slot in batch:
+                    _single(slot["index"])
+                return
+            request_options = {
+                "timeout": int(max(10.0, min(45.0 + 15.0 * (len(batch) - 1), remaining_deadline_sec))),
+                "max_attempts": 1,
+            }
+        content: list[Any] = [
+            _build_batched_crop_items_prompt(batch, enable_text_read=enable_text_read, normalize_dims_dict=normalize_dims_dict)
+        ]
+        for slot in batch:
+            content += [f"ITEM SLOT {slot['slot']}:", slot["image"]]
+        try:
+            response = call_gemini_with_failover(
+                analysis_model_name,
+                content,
+                request_options,
+                {},
+                log_tag="Analysis.CropItemBatch",
+            )
+        except Exception:
+            response = None
+        text = getattr(response, "text", None) if response is not None else None
+        if not text:
+            # No answer at all (quota, timeout): a smaller batch would not fare better.
+            for slot in batch:
+                _single(slot["index"])
+            return
+        try:
+            parsed = _parse_batched_crop_items(safe_extract_json(text), {slot["slot"] for slot in batch})
+        except Exception:
+            parsed = {}
+        missing = [slot for slot in batch if slot["slot"] not in parsed]
+        answered = [slot for slot in batch if slot["slot"] in parsed]
+        if len(answered) > 1 and completion_workers > 1:
+            # Reference-feature extraction is still one call per item; keep those concurrent.
+            with ThreadPoolExecutor(max_workers=min(completion_workers, len(answered))) as executor:
+                for future in [submit_in_context(executor, _complete, slot, parsed[slot["slot"]]) for slot in answered]:
+                    future.result()
+        else:
+            for slot in answered:
+                _complete(slot, parsed[slot["slot"]])
+        if not missing:
+            return
+        if len(batch) == 1:
+            _single(batch[0]["index"])
+            return
+        if not log_brief:
+            print(f"   -> [Batch Analysis] {len(missing)}/{len(batch)} slots unanswered, splitting", flush=True)
+        if len(missing) < len(batch):
+            groups = [missing]
+        else:
+            middle = len(missing) // 2
+            groups = [missing[:middle], missing[middle:]]
+        for group in groups:
+            _describe([{**slot, "slot": position} for position, slot in enumerate(group, start=1)])
+
+    try:
+        if slots:
+            _describe(slots)
+    finally:
+        for slot in slots:
+            try:
+                slot["image"].close()
+            except Exception:
+                pass
+    return results
@@ -2,12 +2,12 @@ import os
 import re
 from typing import Any, Callable, Optional
 
-from PIL import Image
 from application.render.batch_detection_support import (
     build_matched_items_from_rows,
     detect_rows_from_render,
     match_items_to_detected_rows,
 )
+from shared.prepared_image import open_reference_image
 
 
 _CANONICAL_RULES = [
@@ -296,8 +296,7 @@ def rank_best_variant_flash(
             if not crop_path or not os.path.exists(crop_path):
                 continue
             try:
-                image = Image.open(crop_path)
-                image.thumbnail((384, 384), Image.Resampling.LANCZOS)
+                image = open_reference_image(crop_path, (384, 384))
                 opened.append(image)
                 label = (item.get("label") or f"Item{index}").strip()
                 category = item.get("category_canonical") or item.get("category") or "unknown"
@@ -324,8 +323,7 @@ def rank_best_variant_flash(
                 continue
         for index, path in enumerate(candidate_paths, start=1):
             try:
-                image = Image.open(path)
-                image.thumbnail((512, 512), Image.Resampling.LANCZOS)
+                image = open_reference_image(path, (512, 512))
                 opened.append(image)
                 content.extend([f"Candidate #{index}", image])
             except Exception:
@@ -17,6 +17,7 @@ from application.render.postprocess_support import (
     resolve_item_family,
 )
 from application.render.scale_plan_support import build_scale_plan
+from application.render.render_stage_spans import submit_in_context
 
 
 _CATEGORY_METADATA_FIELDS = (
@@ -615,6 +616,24 @@ def _description_is_generic(description: str, label: str) -> bool:
     return word_count < 12
 
 
+def _item_analysis_payload(meta: dict) -> dict:
+    return {
+        "label": meta.get("label"),
+        "box_2d": meta.get("box_2d"),
+        "target_key": meta.get("target_key"),
+        "source_index": meta.get("source_index"),
+        "category": meta.get("category"),
+        "category_canonical": meta.get("category_canonical"),
+        "product_name": meta.get("product_name"),
+        "item_id": meta.get("item_id"),
+        **{
+            field: meta.get(field)
+            for field in _CATEGORY_METADATA_FIELDS
+            if meta.get(field) not in (None, "")
+        },
+    }
+
+
 def _analyze_items(
     *,
     item_metas: list[dict],
@@ -629,6 +648,8 @@ def _analyze_items(
     cart_max_analysis_workers: int,
     item_analysis_profile: str = DETAILED_ITEM_ANALYSIS_PROFILE,
     absolute_deadline_ts: float | None = None,
+    analyze_cropped_items_batch: Callable[..., list] | None = None,
+    analysis_batch_size: int = 0,
 ) -> list[dict]:
     full_analyzed_data: list[dict] = []
     if not item_metas:
@@ -647,47 +668,74 @@ def _analyze_items(
         analysis_workers = min(max_concurrency_analysis, max(1, len(item_metas)))
 
     results = [None] * len(item_metas)
-    with ThreadPoolExecutor(max_workers=analysis_workers) as executor:
-        futures = []
-        for index, meta in enumerate(item_metas):
-            item_data = {
-                "label": meta.get("label"),
-                "box_2d": meta.get("box_2d"),
-                "target_key": meta.get("target_key"),
-                "source_index": meta.get("source_index"),
-                "category": meta.get("category"),
-                "category_canonical": meta.get("category_canonical"),
-                "product_name": meta.get("product_name"),
-                "item_id": meta.get("item_id"),
-                **{
-                    field: meta.get(field)
-                    for field in _CATEGORY_METADATA_FIELDS
-                    if meta.get(field) not in (None, "")
-                },
-            }
-            futures.append(
+    batch_size = max(0, int(analysis_batch_size or 0))
+    if (
+        analyze_cropped_items_batch is not None
+        and batch_size > 1
+        and len(item_metas) > 1
+        and resolved_analysis_profile == DETAILED_ITEM_ANALYSIS_PROFILE
+    ):
+        batches = [list(range(start, min(start + batch_size, len(item_metas)))) for start in range(0, len(item_metas), batch_size)]
+        with ThreadPoolExecutor(max_workers=min(analysis_workers, len(batches))) as executor:
+            futures = [
                 (
-                    index,
-                    executor.submit(
-                        analyze_cropped_item,
-                        meta.get("source_path"),
-                        item_data,
+                    indexes,
+                    submit_in_context(
+                        executor,
+                        analyze_cropped_items_batch,
+                        [
+                            {
+                                "moodboard_path": item_metas[index].get("source_path"),
+                                "item_data": _item_analysis_payload(item_metas[index]),
+                                "item_index": index + 1,
+                                "provided_dims_mm": item_metas[index].get("dims_mm"),
+                            }
+                            for index in indexes
+                        ],
                         unique_id=unique_id,
-                        item_index=index + 1,
-                        save_crop=True,
                         enable_text_read=ocr_text_read_enabled,
                         analysis_profile=resolved_analysis_profile,
                         allow_reference_feature_model=is_direct_item_mode,
-                        provided_dims_mm=meta.get("dims_mm"),
                         absolute_deadline_ts=absolute_deadline_ts,
                     ),
                 )
-            )
-        for index, future in futures:
-            try:
-                results[index] = future.result()
-            except Exception:
-                results[index] = None
+                for indexes in batches
+            ]
+            for indexes, future in futures:
+                try:
+                    batch_results = list(future.result() or [])
+                except Exception:
+                    batch_results = []
+                for position, index in enumerate(indexes):
+                    results[index] = batch_results[position] if position < len(batch_results) else None
+    else:
+        with ThreadPoolExecutor(max_workers=analysis_workers) as executor:
+            futures = []
+            for index, meta in enumerate(item_metas):
+                futures.append(
+                    (
+                        index,
+                        submit_in_context(
+                            executor,
+                            analyze_cropped_item,
+                            meta.get("source_path"),
+                            _item_analysis_payload(meta),
+                            unique_id=unique_id,
+                            item_index=index + 1,
+                            save_crop=True,
+                            enable_text_read=ocr_text_read_enabled,
+                            analysis_profile=resolved_analysis_profile,
+                            allow_reference_feature_model=is_direct_item_mode,
+                            provided_dims_mm=meta.get("dims_mm"),
+                            absolute_deadline_ts=absolute_deadline_ts,
+                        ),
+                    )
+                )
+            for index, future in futures:
+                try:
+                    results[index] = future.result()
+                except Exception:
+                    results[index] = None
 
     for idx, meta in enumerate(item_metas):
         res_item = results[idx] if isinstance(results[idx], dict) else {}
@@ -922,6 +970,8 @@ def run_render_analysis_stage(
     cart_max_analysis_workers: int,
     item_analysis_profile: str = DETAILED_ITEM_ANALYSIS_PROFILE,
     absolute_deadline_ts: float | None = None,
+    analyze_cropped_items_batch: Callable[..., list] | None = None,
+    analysis_batch_size: int = 0,
 ) -> RenderAnalysisStageResult:
     result = RenderAnalysisStageResult(full_analyzed_data=[])
     if not (ref_paths or item_refs):
@@ -987,6 +1037,8 @@ def run_render_analysis_stage(
             cart_max_analysis_workers=cart_max_analysis_workers,
             item_analysis_profile=item_analysis_profile,
             absolute_deadline_ts=absolute_deadline_ts,
+            analyze_cropped_items_batch=analyze_cropped_items_batch,
+            analysis_batch_size=analysis_batch_size,
         )
 
         _log_analyzed_items(
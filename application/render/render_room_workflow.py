@@ -9,6 +9,7 @@ from application.render.render_input_stage import run_render_input_stage
 from application.render.render_postprocess_stage import run_render_postprocess_stage
 from application.render.render_response_stage import build_render_response_payload, log_render_summary
 from application.render.render_scale_stage import run_render_scale_stage
+from application.render.render_stage_spans import STAGE_SPANS_REF, StageSpanRecorder
 from application.render.render_variant_stage import run_render_variant_stage
 from application.render.qc_gate_stage import annotate_variant_reviews, select_rankable_paths, sort_variant_paths
 from application.render.scale_plan_support import build_scale_plan
@@ -18,6 +19,7 @@ from application.render.render_workflow_contracts import (
     RenderWorkflowDependencies,
     RenderWorkflowRequest,
 )
+from shared.prepared_image import PREPARED_REFERENCES_REF, PreparedReferenceCache
 
 
 def _coerce_positive_int(value: Any) -> int | None:
@@ -594,6 +596,32 @@ def _review_summary_from_scalecheck_diagnostics(diagnostics: dict | None, *, sca
     }
 
 
+def _variant_race_acceptor(
+    *,
+    enable_scale_check: bool,
+    strict_internal: bool,
+    geometry_source: str,
+    geometry_confidence: str,
+    strict_scale_mode: str,
+):
+    def _accept(row: dict) -> bool:
+        if not row.get("path"):
+            return False
+        if not enable_scale_check:
+            # Without a scale check there is no QC verdict to wait for.
+            return True
+        reviewed = annotate_variant_reviews(
+            _compact_variant_diagnostics([row]),
+            strict_internal=strict_internal,
+            geometry_source=geometry_source,
+            geometry_confidence=geometry_confidence,
+            strict_scale_mode=strict_scale_mode,
+        )
+        return bool(reviewed) and bool(reviewed[0].get("hard_qc_pass") or reviewed[0].get("soft_qc_pass")) and not reviewed[0].get("confidence_hard_block")
+
+    return _accept
+
+
 def _compact_variant_diagnostics(variant_results: list) -> list[dict]:
     diagnostics: list[dict] = []
     for index, row in enumerate(variant_results or []):
@@ -989,7 +1017,13 @@ def run_render_room_workflow(
     deps: RenderWorkflowDependencies,
 ) -> dict:
     summary_token = None
+    stage_spans = deps.runtime.stage_spans or StageSpanRecorder()
+    stage_spans_token = STAGE_SPANS_REF.set(stage_spans)
+    # One prepared copy of each reference for the variants, the ranker and QC of this job.
+    reference_cache = PreparedReferenceCache()
+    reference_cache_token = PREPARED_REFERENCES_REF.set(reference_cache)
     try:
+        stage_spans.enter("bootstrap")
         bootstrap = run_render_bootstrap_stage(
             generate_unique_id=deps.runtime.generate_unique_id,
             time_now=deps.runtime.time_now,
@@ -1002,6 +1036,7 @@ def run_render_room_workflow(
         summary_token = bootstrap.summary_token
         absolute_deadline_ts = float(start_time) + max(1.0, float(deps.runtime.total_timeout_limit_sec or 1800.0))
 
+        stage_spans.enter("audience")
         audience_result = run_render_audience_stage(
             audience=request.audience,
             normalize_audience=deps.storage.normalize_audience,
@@ -1014,6 +1049,7 @@ def run_render_room_workflow(
         prefix_main_rendered = audience_result.prefix_main_rendered
         prefix_customize = audience_result.prefix_customize
 
+        stage_spans.enter("input")
         input_result = run_render_input_stage(
             upload_file=request.file,
             unique_id=unique_id,
@@ -1028,6 +1064,7 @@ def run_render_room_workflow(
             step1_img = precomputed_empty_room_path
             step1_raw = str(request.precomputed_empty_room_raw_path or "").strip() or step1_img
         else:
+            stage_spans.enter("empty")
             empty_stage_result = run_render_empty_stage(
                 std_path=std_path,
                 unique_id=unique_id,
@@ -1037,6 +1074,7 @@ def run_render_room_workflow(
             step1_img = empty_stage_result.step1_img
             step1_raw = empty_stage_result.step1_raw
 
+        stage_spans.enter("scale")
         scale_stage_result = run_render_scale_stage(
             audience=aud,
             dimensions=request.dimensions,
@@ -1060,6 +1098,7 @@ def run_render_room_workflow(
         size_hierarchy = scale_stage_result.size_hierarchy
         full_analyzed_data = scale_stage_result.full_analyzed_data
 
+        stage_spans.enter("references")
         reference_selection = prepare_render_references(
             moodboard_items=request.moodboard_items,
             style=request.style,
@@ -1081,6 +1120,7 @@ def run_render_room_workflow(
         ref_paths = reference_selection.ref_paths
         item_refs = reference_selection.item_refs
 
+        stage_spans.enter("analysis")
         analysis_result = run_render_analysis_stage(
             ref_paths=ref_paths,
             item_refs=item_refs,
@@ -1108,6 +1148,8 @@ def run_render_room_workflow(
             cart_max_analysis_workers=deps.runtime.cart_max_analysis_workers,
             item_analysis_profile=request.item_analysis_profile,
             absolute_deadline_ts=absolute_deadline_ts,
+            analyze_cropped_items_batch=getattr(deps.analysis, "analyze_cropped_items_batch", None),
+            analysis_batch_size=getattr(deps.runtime, "item_analysis_batch_size", 0),
         )
         windows_present = analysis_result.windows_present
         room_analysis_text = analysis_result.room_analysis_text
@@ -1128,6 +1170,7 @@ def run_render_room_workflow(
             "wall_span_norm": wall_span_norm,
             "estimated_dimensions_mm": getattr(analysis_result, "estimated_room_dims", None),
         }
+        stage_spans.enter("room_dims")
         room_dims_contract = deps.analysis.estimate_room_dims_contract(
             room=request.room,
             explicit_room_dims=room_dims_parsed,
@@ -1152,7 +1195,9 @@ def run_render_room_workflow(
                 "height_mm": room_dims_center.get("height_mm") or room_dims_parsed.get("height_mm"),
             }
         full_analyzed_data = _refresh_layout_envelopes(full_analyzed_data, room_dims_center)
+        stage_spans.enter("product_identity")
         full_analyzed_data, product_identities = deps.analysis.build_product_identity_bundle(full_analyzed_data)
+        stage_spans.enter("archetype")
         full_analyzed_data, archetype_strategies = deps.analysis.build_archetype_strategies(
             full_analyzed_data,
             primary_item=primary_item,
@@ -1180,6 +1225,7 @@ def run_render_room_workflow(
             primary_item=primary_item,
             strict_scale_requested=bool(strict_scale_requested),
         )
+        stage_spans.enter("scene_contract")
         scene_contract = deps.analysis.build_scene_contract(
             room=request.room,
             audience=aud,
@@ -1191,6 +1237,7 @@ def run_render_room_workflow(
             analyzed_items=full_analyzed_data,
             primary_item=primary_item,
         )
+        stage_spans.enter("placement_plan")
         placement_plan, full_analyzed_data = deps.analysis.build_placement_plan(
             analyzed_items=full_analyzed_data,
             primary_item=primary_item,
@@ -1199,6 +1246,7 @@ def run_render_room_workflow(
         )
         primary_item = _rebind_primary_item(full_analyzed_data, primary_item)
         primary_item = _hydrate_item_dims(primary_item, (furniture_specs_json or {}).get("primary_scale") or (furniture_specs_json or {}).get("primary"))
+        stage_spans.enter("geometry_contract")
         geometry_contract = deps.analysis.build_geometry_contract(
             room_dims_contract=room_dims_contract,
             scene_contract=scene_contract,
@@ -1255,6 +1303,9 @@ def run_render_room_workflow(
         if not generation_dimensions and stage2_strict_scale_requested:
             generation_dimensions = _room_dimensions_text_from_dims(room_dims_parsed)
 
+        stage_spans.enter("variants")
+        variant_timings: list[dict] = []
+        race_variants = bool(aud == "external" and deps.runtime.race_external_variants)
         variant_results = run_render_variant_stage(
             step1_img=step1_img,
             style_prompt=resolved_style_prompt,
@@ -1283,7 +1334,25 @@ def run_render_room_workflow(
             max_workers=3,
             max_generation_attempts=1,
             start_index=0,
+            reference_cache=reference_cache,
+            race=race_variants,
+            accept_variant=_variant_race_acceptor(
+                enable_scale_check=stage2_enable_scale_check,
+                strict_internal=stage2_strict_scale_requested,
+                geometry_source=qc_geometry_source,
+                geometry_confidence=qc_geometry_confidence,
+                strict_scale_mode=qc_strict_scale_mode,
+            ),
+            absolute_deadline_ts=absolute_deadline_ts,
+            min_remaining_budget_sec=deps.runtime.variant_race_min_budget_sec,
+            time_now=deps.runtime.time_now,
+            variant_timings=variant_timings,
         )
+        if not deps.runtime.log_brief:
+            deps.runtime.logger.info(
+                f"[Variants] mode={'race' if race_variants else 'all'} kept={len(variant_results or [])} "
+                f"timings={[(row['variant_index'], row['status'], row['elapsed_sec']) for row in variant_timings]}"
+            )
         variant_diagnostics = _compact_variant_diagnostics(variant_results)
         variant_diagnostics = annotate_variant_reviews(
             variant_diagnostics,
@@ -1309,6 +1378,7 @@ def run_render_room_workflow(
             strict_scale_requested=strict_delivery_scale_requested,
         )
 
+        stage_spans.enter("postprocess")
         postprocess_result = run_render_postprocess_stage(
             generated_results=generated_results,
             rankable_results=rankable_results,
@@ -1363,8 +1433,9 @@ def run_render_room_workflow(
             except Exception as exc:
                 deps.runtime.logger.exception(f"[VolumeRank] selected-review reuse failed: {exc}")
 
+        stage_spans.enter("response")
         log_render_summary(summary, log_summary=deps.runtime.log_summary, logger=deps.runtime.logger)
-        return build_render_response_payload(
+        payload = build_render_response_payload(
             std_path=std_path,
             step1_img=step1_img,
             scale_guide_path=None,
@@ -1389,5 +1460,22 @@ def run_render_room_workflow(
             prefix_main_rendered=prefix_main_rendered,
             resolve_image_url=deps.storage.resolve_image_url,
         )
+        reference_cache_stats = reference_cache.stats()
+        if not deps.runtime.log_brief:
+            deps.runtime.logger.info(
+                f"[RefCache] builds={reference_cache_stats['builds']} hits={reference_cache_stats['hits']} "
+                f"bytes_saved={reference_cache_stats['bytes_saved']} prepare_sec_saved={reference_cache_stats['prepare_sec_saved']}"
+            )
+        if deps.runtime.stage_spans is not None:
+            payload["stage_timings"] = {
+                **stage_spans.finish(),
+                "reference_cache": reference_cache_stats,
+                "variant_mode": "race" if race_variants else "all",
+                "variants": variant_timings,
+            }
+        return payload
     finally:
+        stage_spans.finish()
+        STAGE_SPANS_REF.reset(stage_spans_token)
+        PREPARED_REFERENCES_REF.reset(reference_cache_token)
         deps.runtime.reset_summary_token(summary_token)
@@ -0,0 +1,197 @@
+import contextvars
+import functools
+import threading
+import time
+from typing import Any, Callable
+
+STAGE_SPANS_REF: contextvars.ContextVar = contextvars.ContextVar("STAGE_SPANS_REF", default=None)
+
+UNATTRIBUTED_STAGE = "unattributed"
+
+
+def _empty_span(name: str) -> dict[str, Any]:
+    return {"stage": name, "wall_sec": 0.0, "entries": 0, "model_calls": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+class StageSpanRecorder:
+    """Lap timer for one render request.
+
+    ``enter(name)`` closes the running stage and opens the next one, so the linear
+    workflow only marks stage boundaries. Model calls made while a stage is open are
+    attributed to it, including calls from executor threads submitted through
+    ``submit_in_context``. Re-entering a stage name accumulates into the same span.
+    ``on_enter`` is told about each stage boundary, e.g. to stream job progress.
+    """
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.perf_counter,
+        on_finish: Callable[[dict[str, Any]], None] | None = None,
+        on_enter: Callable[[str, int], None] | None = None,
+    ):
+        self._clock = clock
+        self._on_finish = on_finish
+        self._on_enter = on_enter
+        self._lock = threading.Lock()
+        self._spans: dict[str, dict[str, Any]] = {}
+        self._current: str | None = None
+        self._current_started_at = 0.0
+        self._started_at: float | None = None
+        self._total_wall_sec = 0.0
+        self._steps = 0
+        self._finished = False
+
+    @property
+    def current_stage(self) -> str | None:
+        return self._current
+
+    def _close_current_locked(self, now: float) -> None:
+        if self._current is None:
+            return
+        span = self._spans[self._current]
+        span["wall_sec"] += max(0.0, now - self._current_started_at)
+        self._current = None
+
+    def enter(self, name: str) -> None:
+        now = self._clock()
+        with self._lock:
+            if self._finished:
+                return
+            if self._started_at is None:
+                self._started_at = now
+            self._close_current_locked(now)
+            span = self._spans.setdefault(name, _empty_span(name))
+            span["entries"] += 1
+            self._current = name
+            self._current_started_at = now
+            self._steps += 1
+            step = self._steps
+        if self._on_enter is not None:
+            try:
+                self._on_enter(name, step)
+            except Exception:
+                pass
+
+    def record_model_call(self, *, bytes_in: int = 0, bytes_out: int = 0) -> None:
+        with self._lock:
+            name = self._current or UNATTRIBUTED_STAGE
+            span = self._spans.setdefault(name, _empty_span(name))
+            span["model_calls"] += 1
+            span["bytes_in"] += max(0, int(bytes_in or 0))
+            span["bytes_out"] += max(0, int(bytes_out or 0))
+
+    def finish(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            first_finish = not self._finished
+            if first_finish:
+                self._close_current_locked(now)
+                if self._started_at is not None:
+                    self._total_wall_sec = max(0.0, now - self._started_at)
+                self._finished = True
+        snapshot = self.snapshot()
+        if first_finish and self._on_finish is not None:
+            try:
+                self._on_finish(snapshot)
+            except Exception:
+                pass
+        return snapshot
+
+    def snapshot(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            stages = []
+            for span in self._spans.values():
+                row = dict(span)
+                if span["stage"] == self._current:
+                    row["wall_sec"] += max(0.0, now - self._current_started_at)
+                row["wall_sec"] = round(row["wall_sec"], 4)
+                stages.append(row)
+            if self._finished or self._started_at is None:
+                total_wall_sec = self._total_wall_sec
+            else:
+                total_wall_sec = max(0.0, now - self._started_at)
+        return {
+            "total_wall_sec": round(total_wall_sec, 4),
+            "model_calls": sum(row["model_calls"] for row in stages),
+            "bytes_in": sum(row["bytes_in"] for row in stages),
+            "bytes_out": sum(row["bytes_out"] for row in stages),
+            "stages": stages,
+        }
+
+
+def current_stage_spans() -> StageSpanRecorder | None:
+    return STAGE_SPANS_REF.get()
+
+
+def submit_in_context(executor: Any, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """``executor.submit`` that carries the caller's context (and its span recorder) into the worker."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def estimate_payload_bytes(value: Any, _depth: int = 0) -> int:
+    """Rough wire size of a model request or response.
+
+    Prepared references count their encoded size; other images count as decoded pixel
+    bytes because their encoding happens inside the provider client. The figure is for
+    comparing stages, not for billing.
+    """
+    if value is None or _depth > 6:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore"))
+    if isinstance(value, dict):
+        return sum(estimate_payload_bytes(item, _depth + 1) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_payload_bytes(item, _depth + 1) for item in value)
+    encoded_bytes = getattr(value, "encoded_bytes", None)
+    if isinstance(encoded_bytes, bytes):
+        return len(encoded_bytes)
+    size = getattr(value, "size", None)
+    mode = getattr(value, "mode", None)
+    if isinstance(size, tuple) and len(size) == 2 and isinstance(mode, str):
+        try:
+            return int(size[0]) * int(size[1]) * len(value.getbands())
+        except Exception:
+            return 0
+    inline_data = getattr(value, "inline_data", None)
+    if inline_data is not None:
+        return estimate_payload_bytes(getattr(inline_data, "data", None), _depth + 1)
+    candidates = getattr(value, "candidates", None)
+    if isinstance(candidates, (list, tuple)) and candidates:
+        total = 0
+        for candidate in candidates:
+            parts = getattr(getattr(candidate, "content", None), "parts", None)
+            total += estimate_payload_bytes(list(parts or []), _depth + 1)
+        return total
+    parts = getattr(value, "parts", None)
+    if isinstance(parts, (list, tuple)):
+        return estimate_payload_bytes(list(parts), _depth + 1)
+    text = getattr(value, "text", None)
+    if isinstance(text, str):
+        return estimate_payload_bytes(text, _depth + 1)
+    return 0
+
+
+def instrument_model_caller(caller: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a ``(model_name, contents, ...)`` provider caller so each call lands on the active span."""
+
+    @functools.wraps(caller)
+    def _instrumented(model_name, contents, *args, **kwargs):
+        recorder = STAGE_SPANS_REF.get()
+        if recorder is None:
+            return caller(model_name, contents, *args, **kwargs)
+        response = None
+        try:
+            response = caller(model_name, contents, *args, **kwargs)
+            return response
+        finally:
+            recorder.record_model_call(
+                bytes_in=estimate_payload_bytes(contents),
+                bytes_out=estimate_payload_bytes(response),
+            )
+
+    return _instrumented
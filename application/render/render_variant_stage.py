@@ -1,7 +1,21 @@
+import contextvars
 import gc
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Any, Callable
 
+from application.render.render_stage_spans import submit_in_context
+from shared.prepared_image import PREPARED_REFERENCES_REF, PreparedReferenceCache
+
+VARIANT_RACE_REF: contextvars.ContextVar = contextvars.ContextVar("VARIANT_RACE_REF", default=None)
+
+
+def variant_race_cancelled() -> bool:
+    """True once a racing variant stage has its winner; generation checks this between attempts."""
+    stop_event = VARIANT_RACE_REF.get()
+    return bool(stop_event is not None and stop_event.is_set())
+
 
 def _normalize_variant_result(result: Any) -> dict[str, Any]:
     def _coerce_list(value: Any) -> list[Any]:
@@ -60,6 +74,8 @@ def _generate_one_variant(
     generate_furnished_room: Callable[..., str | dict[str, Any] | None],
 ):
     sub_id = f"{unique_id}_v{index+1}"
+    if variant_race_cancelled():
+        return None
     try:
         result = generate_furnished_room(
             step1_img,
@@ -93,6 +109,114 @@ def _generate_one_variant(
     return None
 
 
+def _empty_variant_timing(index: int) -> dict[str, Any]:
+    return {"variant_index": index, "status": "queued", "started_sec": None, "finished_sec": None, "elapsed_sec": None}
+
+
+def _timed_variant(
+    index: int,
+    *,
+    timing: dict[str, Any],
+    stage_started_at: float,
+    variant_kwargs: dict[str, Any],
+):
+    started_at = time.perf_counter()
+    timing["status"] = "running"
+    timing["started_sec"] = round(started_at - stage_started_at, 4)
+    result = None
+    try:
+        result = _generate_one_variant(index, **variant_kwargs)
+        return result
+    finally:
+        finished_at = time.perf_counter()
+        timing["finished_sec"] = round(finished_at - stage_started_at, 4)
+        timing["elapsed_sec"] = round(finished_at - started_at, 4)
+        if result:
+            timing["status"] = "completed"
+        elif variant_race_cancelled():
+            timing["status"] = "cancelled"
+        else:
+            timing["status"] = "empty"
+
+
+def _report_variant_timings(variant_timings: list[dict[str, Any]] | None, timings: dict[int, dict[str, Any]]) -> None:
+    if variant_timings is None:
+        return
+    for index in sorted(timings):
+        row = dict(timings[index])
+        if row["status"] == "queued":
+            row["status"] = "cancelled"
+        elif row["status"] == "running":
+            row["status"] = "abandoned"
+        variant_timings.append(row)
+
+
+def _race_variants(
+    variant_indexes: list[int],
+    *,
+    worker_count: int,
+    variant_kwargs: dict[str, Any],
+    accept_variant: Callable[[dict[str, Any]], bool] | None,
+    absolute_deadline_ts: float | None,
+    min_remaining_budget_sec: float,
+    time_now: Callable[[], float],
+    variant_timings: list[dict[str, Any]] | None,
+) -> list[dict[str, Any]]:
+    stop_event = threading.Event()
+    race_token = VARIANT_RACE_REF.set(stop_event)
+    timings = {index: _empty_variant_timing(index) for index in variant_indexes}
+    stage_started_at = time.perf_counter()
+    finished: list[tuple[int, dict[str, Any]]] = []
+    executor = ThreadPoolExecutor(max_workers=worker_count)
+    try:
+        pending = {
+            submit_in_context(
+                executor,
+                _timed_variant,
+                index,
+                timing=timings[index],
+                stage_started_at=stage_started_at,
+                variant_kwargs=variant_kwargs,
+            ): index
+            for index in variant_indexes
+        }
+    finally:
+        VARIANT_RACE_REF.reset(race_token)
+    try:
+        while pending:
+            timeout = None
+            if absolute_deadline_ts is not None and finished:
+                timeout = max(0.0, float(absolute_deadline_ts) - float(time_now()) - float(min_remaining_budget_sec or 0.0))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            accepted = False
+            for future in done:
+                index = pending.pop(future)
+                result = future.result()
+                if not result:
+                    continue
+                normalized = _normalize_variant_result(result)
+                finished.append((index, normalized))
+                if accept_variant is not None and not accepted:
+                    try:
+                        accepted = bool(accept_variant(normalized))
+                    except Exception:
+                        accepted = False
+                    if accepted:
+                        timings[index]["accepted"] = True
+            gc.collect()
+            if accepted:
+                break
+    finally:
+        # Running variants see the stop flag at their next attempt; queued ones never start.
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    _report_variant_timings(variant_timings, timings)
+    finished.sort(key=lambda row: row[0])
+    return [result for _, result in finished]
+
+
 def run_render_variant_stage(
     *,
     step1_img: str,
@@ -122,7 +246,23 @@ def run_render_variant_stage(
     max_workers: int = 2,
     max_generation_attempts: int | None = None,
     start_index: int = 0,
+    reference_cache: PreparedReferenceCache | None = None,
+    race: bool = False,
+    accept_variant: Callable[[dict[str, Any]], bool] | None = None,
+    absolute_deadline_ts: float | None = None,
+    min_remaining_budget_sec: float = 0.0,
+    time_now: Callable[[], float] = time.time,
+    variant_timings: list[dict[str, Any]] | None = None,
 ) -> list[dict[str, Any]]:
+    """Generate ``max_variants`` candidates in parallel.
+
+    By default every variant runs to completion and results keep submission order. With
+    ``race=True`` variants are consumed as they finish and the stage returns as soon as one
+    satisfies ``accept_variant``, or once the time left before ``absolute_deadline_ts`` drops
+    to ``min_remaining_budget_sec`` and at least one candidate exists. Queued variants are
+    cancelled and running ones stop at their next attempt boundary. Per-variant timing rows
+    are appended to ``variant_timings`` when a list is given.
+    """
     generated_results: list[dict[str, Any]] = []
     try:
         variant_count = max(0, int(max_variants or 0))
@@ -135,41 +275,67 @@ def run_render_variant_stage(
     variant_indexes = [int(start_index) + index for index in range(variant_count)]
     if not variant_indexes:
         return generated_results
-    with ThreadPoolExecutor(max_workers=worker_count) as executor:
-        futures = [
-            executor.submit(
-                _generate_one_variant,
-                index,
-                step1_img=step1_img,
-                style_prompt=style_prompt,
-                ref_input=ref_input,
-                unique_id=unique_id,
-                furniture_specs_text=furniture_specs_text,
-                furniture_specs_json=furniture_specs_json,
-                dimensions=dimensions,
-                placement=placement,
-                scale_guide_path=scale_guide_path,
-                primary_item=primary_item,
-                room_dims_parsed=room_dims_parsed,
-                wall_span_norm=wall_span_norm,
-                size_hierarchy=size_hierarchy,
-                scale_plan=scale_plan,
-                geometry_contract=geometry_contract,
-                scene_contract=scene_contract,
-                placement_plan=placement_plan,
-                start_time=start_time,
-                room_planes=room_planes,
-                windows_present=windows_present,
-                room_analysis_text=room_analysis_text,
-                enable_scale_check=enable_scale_check,
-                max_generation_attempts=max_generation_attempts,
-                generate_furnished_room=generate_furnished_room,
+    variant_kwargs = dict(
+        step1_img=step1_img,
+        style_prompt=style_prompt,
+        ref_input=ref_input,
+        unique_id=unique_id,
+        furniture_specs_text=furniture_specs_text,
+        furniture_specs_json=furniture_specs_json,
+        dimensions=dimensions,
+        placement=placement,
+        scale_guide_path=scale_guide_path,
+        primary_item=primary_item,
+        room_dims_parsed=room_dims_parsed,
+        wall_span_norm=wall_span_norm,
+        size_hierarchy=size_hierarchy,
+        scale_plan=scale_plan,
+        geometry_contract=geometry_contract,
+        scene_contract=scene_contract,
+        placement_plan=placement_plan,
+        start_time=start_time,
+        room_planes=room_planes,
+        windows_present=windows_present,
+        room_analysis_text=room_analysis_text,
+        enable_scale_check=enable_scale_check,
+        max_generation_attempts=max_generation_attempts,
+        generate_furnished_room=generate_furnished_room,
+    )
+    # Variants share one prepared copy of each reference instead of re-encoding it per thread.
+    reference_cache = reference_cache or PREPARED_REFERENCES_REF.get() or PreparedReferenceCache()
+    reference_cache_token = PREPARED_REFERENCES_REF.set(reference_cache)
+    try:
+        if race:
+            return _race_variants(
+                variant_indexes,
+                worker_count=worker_count,
+                variant_kwargs=variant_kwargs,
+                accept_variant=accept_variant,
+                absolute_deadline_ts=absolute_deadline_ts,
+                min_remaining_budget_sec=min_remaining_budget_sec,
+                time_now=time_now,
+                variant_timings=variant_timings,
             )
-            for index in variant_indexes
-        ]
-        for future in futures:
-            result = future.result()
-            if result:
-                generated_results.append(_normalize_variant_result(result))
-            gc.collect()
+        timings = {index: _empty_variant_timing(index) for index in variant_indexes}
+        stage_started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = [
+                submit_in_context(
+                    executor,
+                    _timed_variant,
+                    index,
+                    timing=timings[index],
+                    stage_started_at=stage_started_at,
+                    variant_kwargs=variant_kwargs,
+                )
+                for index in variant_indexes
+            ]
+            for future in futures:
+                result = future.result()
+                if result:
+                    generated_results.append(_normalize_variant_result(result))
+                gc.collect()
+        _report_variant_timings(variant_timings, timings)
+    finally:
+        PREPARED_REFERENCES_REF.reset(reference_cache_token)
     return generated_results
@@ -67,6 +67,10 @@ class RenderWorkflowRuntime:
     max_concurrency_analysis: int
     cart_max_analysis_workers: int
     total_timeout_limit_sec: float
+    stage_spans: Any = None
+    race_external_variants: bool = False
+    variant_race_min_budget_sec: float = 0.0
+    item_analysis_batch_size: int = 0
 
 
 @dataclass
@@ -101,6 +105,7 @@ class RenderWorkflowAnalysisServices:
     build_placement_plan: Callable[..., Any] = _noop_placement_plan
     build_geometry_contract: Callable[..., Any] = _noop_geometry_contract
     build_archetype_strategies: Callable[..., Any] = _noop_archetype_strategies
+    analyze_cropped_items_batch: Callable[..., list] | None = None
 
 
 @dataclass
@@ -1,10 +1,42 @@
-from typing import Callable
+from typing import Any, Callable
 
 from PIL import Image
 
+from infrastructure.ai.analysis_result_cache import build_analysis_cache_key, file_sha256
+
 _ROOM_ANALYSIS_SEED = 7
 
 
+def _build_room_structure_prompt(room_dimensions) -> str:
+    return (
+        "You will receive ONE image: the EMPTY ROOM.\n\n"
+        "TASK: Write a structural analysis of the room (80-100 words). "
+        "Focus on architecture, wall layout, openings (windows/doors), ceiling and floor details. "
+        "If windows are clearly present, set windows_present=true. If uncertain, use false.\n"
+        f"ROOM DIMENSIONS (if provided): {room_dimensions or 'N/A'}\n\n"
+        "Return estimated room dimensions in millimeters.\n"
+        "- If ROOM DIMENSIONS were provided, echo those values exactly in estimated_dimensions_mm.\n"
+        "- If ROOM DIMENSIONS were not provided, estimate width/depth/height as carefully as possible from the room image.\n"
+        "- Round width/depth to the nearest 500 mm.\n"
+        "- Round height to the nearest 100 mm.\n"
+        "- Prefer the smaller conservative value when two absolute size estimates look similarly plausible.\n"
+        "- Do not invent false precision beyond what the image supports.\n"
+        "- Use null for any axis you cannot justify from the image.\n\n"
+        "Also return numeric room geometry bounds that can be used directly by scale math.\n"
+        'Use "room_planes" only for normalized numeric bounds, not wall labels.\n'
+        'Example: "room_planes": {"y_top": 0.08, "y_bottom": 0.92}\n'
+        'If uncertain, use default numeric bounds and keep the keys present.\n\n'
+        "Return STRICT JSON ONLY:\n"
+        "{\n"
+        '  "room_text": "...",\n'
+        '  "windows_present": true/false,\n'
+        '  "room_planes": {"y_top": 0.0, "y_bottom": 1.0},\n'
+        '  "wall_span_norm": [0.0, 1.0],\n'
+        '  "estimated_dimensions_mm": {"width_mm": null, "depth_mm": null, "height_mm": null}\n'
+        "}\n"
+    )
+
+
 def analyze_room_structure(
     room_path,
     room_dimensions=None,
@@ -14,7 +46,21 @@ def analyze_room_structure(
     call_gemini_with_failover: Callable[..., object],
     model_name: str,
     safe_json_from_model_text: Callable[[str], dict],
+    analysis_cache: Any = None,
 ):
+    cache_key = None
+    if analysis_cache is not None:
+        cache_key = build_analysis_cache_key(
+            namespace="room-structure",
+            image_sha256=file_sha256(room_path),
+            model_name=model_name,
+            prompt=_build_room_structure_prompt(room_dimensions),
+            extra={"room_dimensions": room_dimensions},
+        )
+        cached = analysis_cache.get(cache_key)
+        if isinstance(cached, dict) and cached:
+            return cached
+
     room_img = None
     try:
         room_img = Image.open(room_path) if room_path else None
@@ -24,33 +70,7 @@ def analyze_room_structure(
         except Exception:
             pass
 
-        prompt = (
-            "You will receive ONE image: the EMPTY ROOM.\n\n"
-            "TASK: Write a structural analysis of the room (80-100 words). "
-            "Focus on architecture, wall layout, openings (windows/doors), ceiling and floor details. "
-            "If windows are clearly present, set windows_present=true. If uncertain, use false.\n"
-            f"ROOM DIMENSIONS (if provided): {room_dimensions or 'N/A'}\n\n"
-            "Return estimated room dimensions in millimeters.\n"
-            "- If ROOM DIMENSIONS were provided, echo those values exactly in estimated_dimensions_mm.\n"
-            "- If ROOM DIMENSIONS were not provided, estimate width/depth/height as carefully as possible from the room image.\n"
-            "- Round width/depth to the nearest 500 mm.\n"
-            "- Round height to the nearest 100 mm.\n"
-            "- Prefer the smaller conservative value when two absolute size estimates look similarly plausible.\n"
-            "- Do not invent false precision beyond what the image supports.\n"
-            "- Use null for any axis you cannot justify from the image.\n\n"
-            "Also return numeric room geometry bounds that can be used directly by scale math.\n"
-            'Use "room_planes" only for normalized numeric bounds, not wall labels.\n'
-            'Example: "room_planes": {"y_top": 0.08, "y_bottom": 0.92}\n'
-            'If uncertain, use default numeric bounds and keep the keys present.\n\n'
-            "Return STRICT JSON ONLY:\n"
-            "{\n"
-            '  "room_text": "...",\n'
-            '  "windows_present": true/false,\n'
-            '  "room_planes": {"y_top": 0.0, "y_bottom": 1.0},\n'
-            '  "wall_span_norm": [0.0, 1.0],\n'
-            '  "estimated_dimensions_mm": {"width_mm": null, "depth_mm": null, "height_mm": null}\n'
-            "}\n"
-        )
+        prompt = _build_room_structure_prompt(room_dimensions)
         content = [prompt]
         if room_img:
             content.append(room_img)
@@ -69,6 +89,8 @@ def analyze_room_structure(
         )
         obj = safe_json_from_model_text(res.text if res and hasattr(res, "text") else "")
         if isinstance(obj, dict):
+            if cache_key and obj:
+                analysis_cache.set(cache_key, obj)
             return obj
     except Exception as exc:
         print(f"!! [Room Analysis Failed] {exc}", flush=True)
@@ -25,6 +25,7 @@ from application.render.postprocess_support import (
     remap_match_score,
 )
 from infrastructure.ai.analysis_provider_dispatch import GEMINI_ANALYSIS_DEFAULT
+from shared.prepared_image import open_reference_image, open_rendered_image
 
 
 _MATCH_STRATEGY_CONFIDENCE = {
@@ -191,7 +192,7 @@ def detect_primary_bbox_norm(
     safe_json_from_model_text: Callable[[str], Any],
 ):
     try:
-        with Image.open(staged_path) as img:
+        with open_rendered_image(staged_path) as img:
             prompt = (
                 "OBJECT LOCALIZATION TASK.\\n"
                 "Find the PRIMARY ANCHOR furniture in the staged room image.\\n"
@@ -204,7 +205,7 @@ def detect_primary_bbox_norm(
             ref_img = None
             try:
                 if ref_item_crop_path and os.path.exists(ref_item_crop_path):
-                    ref_img = Image.open(ref_item_crop_path)
+                    ref_img = open_reference_image(ref_item_crop_path)
                     content += ["Reference item crop:", ref_img]
                 response = call_gemini_with_failover(
                     analysis_model_name,
@@ -245,7 +246,7 @@ def detect_item_bbox_norm(
     timeout_sec: float = 70.0,
 ):
     try:
-        with Image.open(staged_path) as img:
+        with open_rendered_image(staged_path) as img:
             prompt = (
                 "OBJECT LOCALIZATION TASK.\n"
                 "Find the specified furniture item in the staged room image.\n"
@@ -284,7 +285,7 @@ def detect_item_bbox_norm(
             ref_img = None
             try:
                 if ref_item_crop_path and os.path.exists(ref_item_crop_path):
-                    ref_img = Image.open(ref_item_crop_path)
+                    ref_img = open_reference_image(ref_item_crop_path)
                     content += ["Reference item crop:", ref_img]
                 response = call_gemini_with_failover(
                     analysis_model_name,
@@ -334,7 +335,7 @@ def crop_bbox_norm_image(image_path: str, bbox_norm: tuple, out_path: str):
     try:
         if not bbox_norm:
             return None
-        with Image.open(image_path) as img:
+        with open_rendered_image(image_path) as img:
             width, height = img.size
             xmin, ymin, xmax, ymax = bbox_norm
             left = int(max(0.0, min(1.0, xmin)) * width)
@@ -1,12 +1,25 @@
+import hashlib
+import json
+import os
 import threading
+import time
 import traceback
 import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Callable
 
-from api_models import CompileRequest
+from api_models import CompileClip, CompileRequest
 from application.video.job_store import set_video_job, update_video_job
-from application.video.video_support import download_to_path, run_ffmpeg, safe_filename_from_url
+from application.video.video_support import (
+    DEFAULT_ENCODER_PROFILE,
+    download_to_path,
+    encoder_args,
+    resolve_encoder_profile,
+    run_ffmpeg,
+    safe_filename_from_url,
+)
 
 
 def _resolve_aspect_dimensions(aspect_ratio: str) -> tuple[int, int]:
@@ -64,74 +77,299 @@ def _publish_local_output_url(
     return resolve_output_url(local_url) or local_url
 
 
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _clip_cache_key(source_hash: str, video_filter: str, encode_args: list[str]) -> str:
+    # The filter string already encodes trim, speed, reverse, flip, aspect and fps.
+    payload = json.dumps([source_hash, video_filter, encode_args], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+DEFAULT_CLIP_CACHE_MAX_BYTES = 2048 * 1024 * 1024
+# Clips used this recently are kept even over the cap: a compile in another process
+# may still be about to concat them.
+_CACHE_EVICT_MIN_IDLE_SEC = 3600.0
+
+# Cached clips held by running compiles in this process, never evicted.
+_clips_in_use: Counter[str] = Counter()
+_clips_in_use_lock = threading.Lock()
+
+
+def _hold_cached_clip(path: Path) -> None:
+    with _clips_in_use_lock:
+        _clips_in_use[str(path)] += 1
+
+
+def _release_cached_clips(paths: list[Path]) -> None:
+    with _clips_in_use_lock:
+        for path in paths:
+            _clips_in_use[str(path)] -= 1
+            if _clips_in_use[str(path)] <= 0:
+                del _clips_in_use[str(path)]
+
+
+def _evict_compile_cache(cache_dir: Path, max_bytes: int, *, now: float | None = None) -> int:
+    """Delete least recently used clips until the cache fits in ``max_bytes``; returns files removed.
+
+    Recency is the later of atime and mtime, and cache hits touch the file, so this works
+    on ``noatime``/``relatime`` mounts. Leftover ``.part`` files from killed encodes go
+    once they are idle too. ``max_bytes <= 0`` disables eviction.
+    """
+    if max_bytes <= 0:
+        return 0
+    now = time.time() if now is None else now
+    entries = []
+    total = 0
+    removed = 0
+    for path in cache_dir.glob("clip_*.mp4"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        last_used = max(stat.st_atime, stat.st_mtime)
+        if path.name.endswith(".part.mp4"):
+            if now - last_used >= _CACHE_EVICT_MIN_IDLE_SEC:
+                path.unlink(missing_ok=True)
+                removed += 1
+            continue
+        entries.append((last_used, stat.st_size, path))
+        total += stat.st_size
+    for last_used, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        if now - last_used < _CACHE_EVICT_MIN_IDLE_SEC:
+            break
+        with _clips_in_use_lock:
+            if _clips_in_use.get(str(path)):
+                continue
+            path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def _resolve_compile_parallelism(clip_count: int, compile_workers: int, cpu_budget: int) -> tuple[int, int]:
+    """Concurrent ffmpeg processes and encoder threads each, within ``cpu_budget`` cores."""
+    budget = cpu_budget if cpu_budget > 0 else (os.cpu_count() or 1)
+    # x264 on veryslow scales poorly past a couple of threads per clip, so by default
+    # the budget is spent on more clips at once rather than more threads per clip.
+    workers = compile_workers if compile_workers > 0 else max(1, budget // 2)
+    workers = max(1, min(workers, clip_count, budget))
+    return workers, max(1, budget // workers)
+
+
+class _CompileProgress:
+    """Folds per-clip ffmpeg output time into one monotonic job progress value."""
+
+    def __init__(self, job_id: str, expected_sec: dict[int, float], *, span: int):
+        self._job_id = job_id
+        self._expected_sec = expected_sec
+        self._span = span
+        self._done: dict[int, float] = {}
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    def update(self, index: int, fraction: float) -> None:
+        with self._lock:
+            self._done[index] = max(self._done.get(index, 0.0), min(1.0, max(0.0, fraction)))
+            overall = sum(self._done.values()) / max(1, len(self._expected_sec))
+            progress = int(overall * self._span)
+            if progress <= self._reported:
+                return
+            self._reported = progress
+        update_video_job(self._job_id, progress=progress)
+
+    def ffmpeg_callback(self, index: int) -> Callable[[float], None]:
+        expected = max(0.001, self._expected_sec[index])
+        return lambda out_sec: self.update(index, out_sec / expected)
+
+
+def _clip_trim_window(clip: CompileClip) -> tuple[float, float]:
+    trim_start = max(0.0, clip.trim_start)
+    trim_end = min(5.0, clip.trim_end)
+    if trim_end <= trim_start:
+        trim_end = 5.0
+    return trim_start, trim_end
+
+
+# Striped so the lock table stays bounded however many sources are fetched.
+_SOURCE_LOCKS = tuple(threading.Lock() for _ in range(32))
+
+
+def _source_lock(path: Path) -> threading.Lock:
+    digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).digest()
+    return _SOURCE_LOCKS[digest[0] % len(_SOURCE_LOCKS)]
+
+
+def _fetch_compile_source(url: str, out_dir: Path) -> Path:
+    """Local copy of ``url``, downloaded once even when several clips share it."""
+    # The URL hash keeps same-named files from different locations apart.
+    url_key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    local_src = out_dir / f"src_{url_key}_{safe_filename_from_url(url)}"
+    with _source_lock(local_src):
+        if local_src.exists():
+            return local_src
+        # download_to_path opens its target before any bytes arrive, so it writes to a
+        # private name that only becomes visible once complete.
+        partial_path = out_dir / f"{local_src.name}.{uuid.uuid4().hex[:8]}.part"
+        try:
+            download_to_path(url, partial_path)
+            os.replace(partial_path, local_src)
+        finally:
+            partial_path.unlink(missing_ok=True)
+    return local_src
+
+
+def _process_compile_clip(
+    index: int,
+    clip: CompileClip,
+    req: CompileRequest,
+    *,
+    out_dir: Path,
+    cache_dir: Path,
+    video_target_fps: int,
+    encoder_profile: str,
+    ffmpeg_threads: int,
+    progress: _CompileProgress,
+) -> tuple[Path, bool]:
+    local_src = _fetch_compile_source(clip.video_url, out_dir)
+
+    trim_start, trim_end = _clip_trim_window(clip)
+    vf = _build_video_filter(
+        trim_start=trim_start,
+        trim_end=trim_end,
+        speed=clip.speed,
+        reverse=clip.reverse,
+        flip_horizontal=clip.flip_horizontal,
+        video_target_fps=video_target_fps,
+        aspect_ratio=req.aspect_ratio,
+        aspect_mode=req.aspect_mode,
+    )
+    encode_args = encoder_args(encoder_profile)
+    final_path = cache_dir / f"clip_{_clip_cache_key(_file_sha256(local_src), vf, encode_args)}.mp4"
+    # Held before the existence check, so eviction cannot remove a hit before the concat.
+    _hold_cached_clip(final_path)
+    try:
+        # Touching a hit marks it as recently used for eviction.
+        os.utime(final_path)
+        if final_path.stat().st_size > 0:
+            progress.update(index, 1.0)
+            return final_path, True
+    except FileNotFoundError:
+        pass
+
+    # Encode under a unique name and rename, so an interrupted job never leaves a
+    # truncated clip that a later recompile would treat as cached.
+    partial_path = cache_dir / f"{final_path.stem}.{uuid.uuid4().hex[:8]}.part.mp4"
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(local_src),
+        "-filter_complex",
+        vf,
+        "-map",
+        "[vout]",
+        "-an",
+        *encode_args,
+        "-threads",
+        str(ffmpeg_threads),
+        str(partial_path),
+    ]
+    try:
+        run_ffmpeg(cmd, on_progress=progress.ffmpeg_callback(index))
+        os.replace(partial_path, final_path)
+    except BaseException:
+        _release_cached_clips([final_path])
+        raise
+    finally:
+        partial_path.unlink(missing_ok=True)
+    progress.update(index, 1.0)
+    return final_path, False
+
+
 def run_final_compile_job(
     job_id: str,
     req: CompileRequest,
     *,
     video_target_fps: int,
     resolve_output_url: Callable[[str], str | None] | None = None,
+    compile_workers: int = 0,
+    cpu_budget: int = 0,
+    clip_cache_dir: Path | None = None,
+    clip_cache_max_bytes: int = DEFAULT_CLIP_CACHE_MAX_BYTES,
+    default_encoder_profile: str = DEFAULT_ENCODER_PROFILE,
 ) -> None:
+    """Transcode clips in parallel into a content-keyed cache, then concat them.
+
+    Each processed clip is stored under a hash of its source bytes, filter chain and
+    encoder settings, so a recompile (or a retried job) only re-encodes clips whose
+    inputs changed. After the concat the cache is trimmed to ``clip_cache_max_bytes``,
+    least recently used first. ``req.encoder_profile`` picks the x264 settings, falling
+    back to ``default_encoder_profile``.
+    """
+    processed: dict[int, Path] = {}
+    cache_dir: Path | None = None
     try:
         set_video_job(job_id, {"status": "RUNNING", "message": "Compiling...", "progress": 0})
 
         out_dir = Path("outputs")
-        processed_paths = []
-        total_clips = len(req.clips)
+        cache_dir = clip_cache_dir or out_dir / "compile_cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        clips = [(i, clip) for i, clip in enumerate(req.clips) if clip.video_url]
+        if not clips:
+            raise RuntimeError("No clips to merge")
 
-        for i, clip in enumerate(req.clips):
-            if not clip.video_url:
-                continue
+        expected_sec = {}
+        for i, clip in clips:
+            trim_start, trim_end = _clip_trim_window(clip)
+            expected_sec[i] = (trim_end - trim_start) / (clip.speed if clip.speed > 0.1 else 1.0)
+        progress = _CompileProgress(job_id, expected_sec, span=80)
+        workers, ffmpeg_threads = _resolve_compile_parallelism(len(clips), compile_workers, cpu_budget)
+        encoder_profile = resolve_encoder_profile(req.encoder_profile, default_encoder_profile)
 
-            src_name = safe_filename_from_url(clip.video_url)
-            local_src = out_dir / src_name
-            if not local_src.exists():
-                download_to_path(clip.video_url, local_src)
-
-            final_path = out_dir / f"proc_{job_id}_{i}.mp4"
-
-            trim_start = max(0.0, clip.trim_start)
-            trim_end = min(5.0, clip.trim_end)
-            if trim_end <= trim_start:
-                trim_end = 5.0
-
-            vf = _build_video_filter(
-                trim_start=trim_start,
-                trim_end=trim_end,
-                speed=clip.speed,
-                reverse=clip.reverse,
-                flip_horizontal=clip.flip_horizontal,
-                video_target_fps=video_target_fps,
-                aspect_ratio=req.aspect_ratio,
-                aspect_mode=req.aspect_mode,
-            )
-
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-i",
-                str(local_src),
-                "-filter_complex",
-                vf,
-                "-map",
-                "[vout]",
-                "-an",
-                "-c:v",
-                "libx264",
-                "-pix_fmt",
-                "yuv420p",
-                "-preset",
-                "veryslow",
-                "-crf",
-                "10",
-                str(final_path),
-            ]
-            run_ffmpeg(cmd)
-            processed_paths.append(final_path)
-
-            update_video_job(job_id, progress=int(((i + 1) / total_clips) * 80))
-
-        if not processed_paths:
-            raise RuntimeError("No clips to merge")
+        cache_hits = 0
+        first_error: BaseException | None = None
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"compile-{job_id[:8]}") as executor:
+            futures = {
+                executor.submit(
+                    _process_compile_clip,
+                    i,
+                    clip,
+                    req,
+                    out_dir=out_dir,
+                    cache_dir=cache_dir,
+                    video_target_fps=video_target_fps,
+                    encoder_profile=encoder_profile,
+                    ffmpeg_threads=ffmpeg_threads,
+                    progress=progress,
+                ): i
+                for i, clip in clips
+            }
+            for future in as_completed(futures):
+                # Every clip is collected, even after a failure, so its cache hold is released.
+                try:
+                    processed[futures[future]], cached = future.result()
+                    cache_hits += int(cached)
+                except Exception as exc:
+                    first_error = first_error or exc
+        if first_error is not None:
+            raise first_error
+        print(
+            f"[Compile] job={job_id} clips={len(clips)} cached={cache_hits} profile={encoder_profile} "
+            f"workers={workers} threads={ffmpeg_threads}",
+            flush=True,
+        )
+        processed_paths = [processed[i] for i in sorted(processed)]
 
         list_file = out_dir / f"list_{job_id}.txt"
         with open(list_file, "w", encoding="utf-8") as file_obj:
@@ -156,15 +394,38 @@ def run_final_compile_job(
         print(f"Compile Error: {exc}", flush=True)
         traceback.print_exc()
         update_video_job(job_id, status="FAILED", error=str(exc))
+    finally:
+        _release_cached_clips(list(processed.values()))
+        if cache_dir is not None:
+            try:
+                evicted = _evict_compile_cache(cache_dir, clip_cache_max_bytes)
+                if evicted:
+                    print(f"[Compile] evicted {evicted} cached clips from {cache_dir}", flush=True)
+            except OSError as exc:
+                print(f"[Compile] cache eviction failed: {exc}", flush=True)
 
 
-def queue_final_compile_job(req: CompileRequest, *, video_target_fps: int) -> str:
+def queue_final_compile_job(
+    req: CompileRequest,
+    *,
+    video_target_fps: int,
+    compile_workers: int = 0,
+    cpu_budget: int = 0,
+    clip_cache_max_bytes: int = DEFAULT_CLIP_CACHE_MAX_BYTES,
+    default_encoder_profile: str = DEFAULT_ENCODER_PROFILE,
+) -> str:
     job_id = uuid.uuid4().hex
     set_video_job(job_id, {"status": "QUEUED", "progress": 0})
     threading.Thread(
         target=run_final_compile_job,
         args=(job_id, req),
-        kwargs={"video_target_fps": video_target_fps},
+        kwargs={
+            "video_target_fps": video_target_fps,
+            "compile_workers": compile_workers,
+            "cpu_budget": cpu_budget,
+            "clip_cache_max_bytes": clip_cache_max_bytes,
+            "default_encoder_profile": default_encoder_profile,
+        },
     ).start()
     return job_id
 
@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Any, Callable
 
 from api_models import CompileClip, CompileRequest, SourceGenRequest, SourceItem
-from application.video.video_support import download_to_path, ffmpeg_image_to_video
+from application.video.video_support import DEFAULT_ENCODER_PROFILE, download_to_path, ffmpeg_image_to_video
 
 
 _EXTERNAL_VIDEO_CLIP_COUNT = 7
@@ -157,6 +157,7 @@ def _build_static_fallback_clips(
     source_images: list[str],
     clip_count: int,
     video_target_fps: int,
+    encoder_profile: str,
 ) -> list[str]:
     if not source_images:
         return []
@@ -171,7 +172,15 @@ def _build_static_fallback_clips(
         output_video = out_dir / f"fallback_{render_job_id}_{index}.mp4"
         try:
             download_to_path(source_image, temp_image)
-            ffmpeg_image_to_video(temp_image, output_video, 5.0, 1080, 1920, video_target_fps)
+            ffmpeg_image_to_video(
+                temp_image,
+                output_video,
+                5.0,
+                1080,
+                1920,
+                video_target_fps,
+                encoder_profile=encoder_profile,
+            )
             fallback_results.append(f"/outputs/{output_video.name}")
         finally:
             if temp_image.exists():
@@ -184,6 +193,7 @@ def _build_brand_card_clip(
     *,
     position: str,
     video_target_fps: int,
+    encoder_profile: str,
 ) -> str | None:
     card_path = _preferred_brand_card_path()
     if card_path is None:
@@ -192,7 +202,15 @@ def _build_brand_card_clip(
     out_dir.mkdir(parents=True, exist_ok=True)
     output_video = out_dir / f"external_brand_{render_job_id}_{position}.mp4"
     if not output_video.exists():
-        ffmpeg_image_to_video(card_path, output_video, _EXTERNAL_BRAND_CARD_SEC, 1080, 1920, video_target_fps)
+        ffmpeg_image_to_video(
+            card_path,
+            output_video,
+            _EXTERNAL_BRAND_CARD_SEC,
+            1080,
+            1920,
+            video_target_fps,
+            encoder_profile=encoder_profile,
+        )
     return f"/outputs/{output_video.name}"
 
 
@@ -203,6 +221,7 @@ def _supplement_missing_clips(
     source_images: list[str],
     requested_clip_count: int,
     video_target_fps: int,
+    encoder_profile: str,
 ) -> list[str]:
     if len(existing_results) >= requested_clip_count:
         return list(existing_results[:requested_clip_count])
@@ -213,6 +232,7 @@ def _supplement_missing_clips(
         source_images=source_images,
         clip_count=needed,
         video_target_fps=video_target_fps,
+        encoder_profile=encoder_profile,
     )
     return list(existing_results) + fallback_results
 
@@ -236,6 +256,7 @@ def run_external_render_video_job(
     sleep: Callable[[float], None] = time.sleep,
     source_timeout_sec: float = 1800.0,
     compile_timeout_sec: float = 900.0,
+    encoder_profile: str = DEFAULT_ENCODER_PROFILE,
 ) -> dict:
     render_job_id = str(payload.get("render_job_id") or "").strip()
     audience = normalize_audience(payload.get("audience"))
@@ -268,6 +289,7 @@ def run_external_render_video_job(
     source_job_id = queue_source_generation_job(
         source_req,
         video_target_fps=video_target_fps,
+        encoder_profile=encoder_profile,
         video_max_concurrency=video_max_concurrency,
         create_kling_task=create_kling_task,
         poll_kling_task=poll_kling_task,
@@ -294,6 +316,7 @@ def run_external_render_video_job(
             source_images=planned_source_images,
             clip_count=requested_clip_count,
             video_target_fps=video_target_fps,
+            encoder_profile=encoder_profile,
         )
         if not fallback_results:
             return {
@@ -311,11 +334,22 @@ def run_external_render_video_job(
             source_images=planned_source_images,
             requested_clip_count=requested_clip_count,
             video_target_fps=video_target_fps,
+            encoder_profile=encoder_profile,
         )
         fallback_used = True
 
-    intro_artifact = _build_brand_card_clip(render_job_id, position="intro", video_target_fps=video_target_fps)
-    outro_artifact = _build_brand_card_clip(render_job_id, position="outro", video_target_fps=video_target_fps)
+    intro_artifact = _build_brand_card_clip(
+        render_job_id,
+        position="intro",
+        video_target_fps=video_target_fps,
+        encoder_profile=encoder_profile,
+    )
+    outro_artifact = _build_brand_card_clip(
+        render_job_id,
+        position="outro",
+        video_target_fps=video_target_fps,
+        encoder_profile=encoder_profile,
+    )
     compile_clip_urls: list[str] = []
     if intro_artifact:
         compile_clip_urls.append(intro_artifact)
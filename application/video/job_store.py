@@ -1,5 +1,4 @@
 import copy
-import json
 import threading
 import time
 from pathlib import Path
@@ -7,11 +6,21 @@ from typing import Any, Dict, Optional
 
 from rq import get_current_job
 
+from shared.job_state_log import (
+    JobStateLog,
+    delete_record,
+    job_state_log_for,
+    set_record,
+    update_item_record,
+    update_record,
+)
+
 
 VIDEO_JOB_STORE_PATH = Path(".video_state") / "video_jobs.json"
 
 video_jobs: Dict[str, Dict[str, Any]] = {}
 video_jobs_lock = threading.Lock()
+_video_job_log: Optional[JobStateLog] = None
 
 
 def _json_default(value: Any) -> Any:
@@ -20,14 +29,14 @@ def _json_default(value: Any) -> Any:
     raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
-def _save_video_jobs_locked() -> None:
-    VIDEO_JOB_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    temp_path = VIDEO_JOB_STORE_PATH.with_suffix(".tmp")
-    temp_path.write_text(
-        json.dumps(video_jobs, ensure_ascii=False, indent=2, sort_keys=True, default=_json_default),
-        encoding="utf-8",
-    )
-    temp_path.replace(VIDEO_JOB_STORE_PATH)
+def _video_job_log_locked() -> JobStateLog:
+    global _video_job_log
+    _video_job_log = job_state_log_for(_video_job_log, VIDEO_JOB_STORE_PATH, json_default=_json_default)
+    return _video_job_log
+
+
+def _append_video_job_records_locked(*records: Dict[str, Any]) -> None:
+    _video_job_log_locked().append(video_jobs, *records)
 
 
 def _local_output_path(output_url: str | None) -> Path | None:
@@ -68,15 +77,8 @@ def _state_rank(state: Dict[str, Any]) -> tuple[int, float]:
 
 def _load_video_jobs_locked() -> None:
     video_jobs.clear()
-    if not VIDEO_JOB_STORE_PATH.exists():
-        return
     try:
-        raw = json.loads(VIDEO_JOB_STORE_PATH.read_text(encoding="utf-8"))
-        if isinstance(raw, dict):
-            for job_id, state in raw.items():
-                if isinstance(job_id, str) and isinstance(state, dict):
-                    state.setdefault("job_id", job_id)
-                    video_jobs[job_id] = state
+        video_jobs.update(_video_job_log_locked().load())
     except Exception:
         # Corrupt cache should not block the server from starting.
         return
@@ -96,7 +98,7 @@ def set_video_job(job_id: str, state: Dict[str, Any]) -> None:
         next_state.setdefault("created_at", existing.get("created_at", now))
         next_state["updated_at"] = now
         video_jobs[job_id] = next_state
-        _save_video_jobs_locked()
+        _append_video_job_records_locked(set_record(job_id, next_state))
         sync_state = copy.deepcopy(next_state)
     _sync_current_rq_job(job_id, sync_state, replace=True)
 
@@ -106,9 +108,10 @@ def update_video_job(job_id: str, **fields: Any) -> None:
     with video_jobs_lock:
         if job_id not in video_jobs:
             return
-        video_jobs[job_id].update(copy.deepcopy(fields))
-        video_jobs[job_id]["updated_at"] = now
-        _save_video_jobs_locked()
+        next_fields = copy.deepcopy(fields)
+        next_fields["updated_at"] = now
+        video_jobs[job_id].update(next_fields)
+        _append_video_job_records_locked(update_record(job_id, next_fields))
         sync_state = copy.deepcopy(video_jobs[job_id])
     _sync_current_rq_job(job_id, sync_state, replace=True)
 
@@ -126,9 +129,13 @@ def update_video_job_item(job_id: str, index: int, **fields: Any) -> None:
         if not isinstance(item_state, dict):
             item_state = {}
             items[index] = item_state
-        item_state.update(copy.deepcopy(fields))
+        next_fields = copy.deepcopy(fields)
+        item_state.update(next_fields)
         job["updated_at"] = now
-        _save_video_jobs_locked()
+        _append_video_job_records_locked(
+            update_item_record(job_id, "items", index, next_fields),
+            update_record(job_id, {"updated_at": now}),
+        )
         sync_state = copy.deepcopy(job)
     _sync_current_rq_job(job_id, sync_state, replace=True)
 
@@ -195,7 +202,7 @@ def create_video_job_if_absent(
         next_state.setdefault("created_at", now)
         next_state["updated_at"] = now
         video_jobs[job_id] = next_state
-        _save_video_jobs_locked()
+        _append_video_job_records_locked(set_record(job_id, next_state))
         return copy.deepcopy(next_state), True
 
 
@@ -210,12 +217,10 @@ def prune_video_jobs(limit: int) -> int:
             key=lambda pair: float(pair[1].get("updated_at") or pair[1].get("created_at") or 0),
         )
         overflow = len(video_jobs) - limit
-        removed = 0
-        for job_id, _ in ordered[:overflow]:
-            if video_jobs.pop(job_id, None) is not None:
-                removed += 1
-        if removed:
-            _save_video_jobs_locked()
+        removed_ids = [job_id for job_id, _ in ordered[:overflow] if video_jobs.pop(job_id, None) is not None]
+        if removed_ids:
+            _append_video_job_records_locked(*(delete_record(job_id) for job_id in removed_ids))
+        removed = len(removed_ids)
         return removed
 
 
@@ -3,7 +3,8 @@ import json
 import threading
 import traceback
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable
 
@@ -16,6 +17,7 @@ from application.video.job_store import (
     update_video_job_item,
 )
 from application.video.video_support import (
+    DEFAULT_ENCODER_PROFILE,
     clip_url_to_image_bytes,
     download_to_path,
     ffmpeg_image_to_video,
@@ -41,6 +43,15 @@ def _release_source_worker(job_id: str) -> None:
         _active_source_workers.discard(job_id)
 
 
+@dataclass(frozen=True)
+class _PendingProviderClip:
+    """A clip whose provider task is running; the shared poller finishes it."""
+
+    idx: int
+    task_id: str
+    out_path: Path
+
+
 def _local_output_path(output_url: str | None) -> Path | None:
     if not output_url or not output_url.startswith("/outputs/"):
         return None
@@ -193,9 +204,10 @@ def _process_clip_by_index(
     total_clips: int,
     cfg_scale: float,
     video_target_fps: int,
+    encoder_profile: str,
     create_kling_task: Callable[..., str],
-    poll_kling_task: Callable[..., str],
-) -> Path:
+    poll_kling_task: Callable[..., str] | None,
+) -> Path | _PendingProviderClip:
     current_job = get_video_job(job_id) or {}
     current_items = current_job.get("items") or []
     if idx >= len(current_items):
@@ -208,6 +220,7 @@ def _process_clip_by_index(
         total_clips=total_clips,
         cfg_scale=cfg_scale,
         video_target_fps=video_target_fps,
+        encoder_profile=encoder_profile,
         create_kling_task=create_kling_task,
         poll_kling_task=poll_kling_task,
     )
@@ -273,12 +286,21 @@ def _process_static_clip(
     out_path: Path,
     *,
     video_target_fps: int,
+    encoder_profile: str,
 ) -> Path:
     update_video_job_item(job_id, idx, status="PROCESSING", provider_status="LOCAL_STATIC", last_error=None)
     temp_img = out_path.parent / f"temp_src_{job_id}_{idx}.png"
     try:
         download_to_path(item.url, temp_img)
-        ffmpeg_image_to_video(temp_img, out_path, 5.0, 1080, 1920, video_target_fps)
+        ffmpeg_image_to_video(
+            temp_img,
+            out_path,
+            5.0,
+            1080,
+            1920,
+            video_target_fps,
+            encoder_profile=encoder_profile,
+        )
         update_video_job_item(job_id, idx, status="COMPLETED", output_url=f"/outputs/{out_path.name}")
         return out_path
     finally:
@@ -295,8 +317,8 @@ def _process_ai_clip(
     total_clips: int,
     cfg_scale: float,
     create_kling_task: Callable[..., str],
-    poll_kling_task: Callable[..., str],
-) -> Path:
+    poll_kling_task: Callable[..., str] | None,
+) -> Path | _PendingProviderClip:
     current_job = get_video_job(job_id) or {}
     item_state = ((current_job.get("items") or []) + [{}])[idx]
     provider_result_url = item_state.get("provider_result_url")
@@ -328,24 +350,33 @@ def _process_ai_clip(
             last_error=None,
         )
 
-    video_url = poll_kling_task(
-        task_id,
-        clip_index=idx,
-        total_clips=total_clips,
-        update_job_status=lambda progress, message: _update_job_progress_monotonic(
+    if poll_kling_task is None:
+        return _PendingProviderClip(idx=idx, task_id=task_id, out_path=out_path)
+
+    video_url = poll_kling_task(task_id, **_kling_poll_kwargs(job_id, idx, total_clips))
+    return _finish_ai_clip(job_id, idx, out_path, video_url)
+
+
+def _kling_poll_kwargs(job_id: str, idx: int, total_clips: int) -> dict:
+    return {
+        "clip_index": idx,
+        "total_clips": total_clips,
+        "update_job_status": lambda progress, message: _update_job_progress_monotonic(
             job_id,
             progress=progress,
             message=message,
         ),
-        status_callback=lambda status, progress, elapsed_sec: _update_clip_progress(
+        "status_callback": lambda status, progress, elapsed_sec: _update_clip_progress(
             job_id,
             idx,
             status,
             progress,
             elapsed_sec,
         ),
-    )
+    }
 
+
+def _finish_ai_clip(job_id: str, idx: int, out_path: Path, video_url: str) -> Path:
     update_video_job_item(
         job_id,
         idx,
@@ -358,6 +389,64 @@ def _process_ai_clip(
     return out_path
 
 
+def _submit_tracked_clip(
+    executor: ThreadPoolExecutor,
+    job_id: str,
+    idx: int,
+    *,
+    total_clips: int,
+    track_kling_task: Callable[..., Future],
+    **clip_kwargs,
+) -> Future:
+    """Run a clip without holding a worker thread while the provider renders it.
+
+    A worker creates the provider task, the shared poller waits on it, and a worker
+    is taken again only to download the finished clip.
+    """
+    clip_future: Future = Future()
+
+    def _fail(exc: BaseException) -> None:
+        if not clip_future.done():
+            clip_future.set_exception(exc)
+
+    def _on_downloaded(download: Future) -> None:
+        try:
+            clip_future.set_result(download.result())
+        except BaseException as exc:
+            _fail(exc)
+
+    def _on_provider_done(pending: _PendingProviderClip, tracked: Future) -> None:
+        try:
+            download = executor.submit(_finish_ai_clip, job_id, pending.idx, pending.out_path, tracked.result())
+        except BaseException as exc:
+            _fail(exc)
+            return
+        download.add_done_callback(_on_downloaded)
+
+    def _on_started(started: Future) -> None:
+        try:
+            value = started.result()
+            if not isinstance(value, _PendingProviderClip):
+                clip_future.set_result(value)
+                return
+            tracked = track_kling_task(value.task_id, **_kling_poll_kwargs(job_id, value.idx, total_clips))
+        except BaseException as exc:
+            _fail(exc)
+            return
+        tracked.add_done_callback(lambda done: _on_provider_done(value, done))
+
+    started = executor.submit(
+        _process_clip_by_index,
+        job_id,
+        idx,
+        total_clips=total_clips,
+        poll_kling_task=None,
+        **clip_kwargs,
+    )
+    started.add_done_callback(_on_started)
+    return clip_future
+
+
 def _process_clip(
     job_id: str,
     idx: int,
@@ -366,9 +455,10 @@ def _process_clip(
     total_clips: int,
     cfg_scale: float,
     video_target_fps: int,
+    encoder_profile: str,
     create_kling_task: Callable[..., str],
-    poll_kling_task: Callable[..., str],
-) -> Path:
+    poll_kling_task: Callable[..., str] | None,
+) -> Path | _PendingProviderClip:
     out_dir = Path("outputs")
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / item_state["output_name"]
@@ -386,7 +476,14 @@ def _process_clip(
     )
 
     if is_static:
-        return _process_static_clip(job_id, idx, item, out_path, video_target_fps=video_target_fps)
+        return _process_static_clip(
+            job_id,
+            idx,
+            item,
+            out_path,
+            video_target_fps=video_target_fps,
+            encoder_profile=encoder_profile,
+        )
 
     return _process_ai_clip(
         job_id,
@@ -410,6 +507,8 @@ def run_source_generation_job(
     create_kling_task: Callable[..., str],
     poll_kling_task: Callable[..., str],
     resolve_output_url: Callable[[str], str | None] | None = None,
+    track_kling_task: Callable[..., Future] | None = None,
+    encoder_profile: str = DEFAULT_ENCODER_PROFILE,
 ) -> None:
     try:
         job = get_video_job(job_id)
@@ -446,19 +545,36 @@ def run_source_generation_job(
             return
 
         with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix=f"source-{job_id[:8]}") as executor:
-            future_map = {
-                executor.submit(
-                    _process_clip_by_index,
-                    job_id,
-                    idx,
-                    total_clips=total_clips,
-                    cfg_scale=cfg_scale,
-                    video_target_fps=video_target_fps,
-                    create_kling_task=create_kling_task,
-                    poll_kling_task=poll_kling_task,
-                ): idx
-                for idx in range(total_clips)
-            }
+            if track_kling_task is not None:
+                future_map = {
+                    _submit_tracked_clip(
+                        executor,
+                        job_id,
+                        idx,
+                        total_clips=total_clips,
+                        track_kling_task=track_kling_task,
+                        cfg_scale=cfg_scale,
+                        video_target_fps=video_target_fps,
+                        encoder_profile=encoder_profile,
+                        create_kling_task=create_kling_task,
+                    ): idx
+                    for idx in range(total_clips)
+                }
+            else:
+                future_map = {
+                    executor.submit(
+                        _process_clip_by_index,
+                        job_id,
+                        idx,
+                        total_clips=total_clips,
+                        cfg_scale=cfg_scale,
+                        video_target_fps=video_target_fps,
+                        encoder_profile=encoder_profile,
+                        create_kling_task=create_kling_task,
+                        poll_kling_task=poll_kling_task,
+                    ): idx
+                    for idx in range(total_clips)
+                }
 
             for future in as_completed(future_map):
                 idx = future_map[future]
@@ -522,9 +638,11 @@ def _start_source_generation_worker(
     job_id: str,
     *,
     video_target_fps: int,
+    encoder_profile: str,
     video_max_concurrency: int,
     create_kling_task: Callable[..., str],
     poll_kling_task: Callable[..., str],
+    track_kling_task: Callable[..., Future] | None = None,
 ) -> None:
     if not _claim_source_worker(job_id):
         return
@@ -533,9 +651,11 @@ def _start_source_generation_worker(
         kwargs={
             "job_id": job_id,
             "video_target_fps": video_target_fps,
+            "encoder_profile": encoder_profile,
             "video_max_concurrency": video_max_concurrency,
             "create_kling_task": create_kling_task,
             "poll_kling_task": poll_kling_task,
+            "track_kling_task": track_kling_task,
         },
         daemon=True,
     ).start()
@@ -548,6 +668,8 @@ def queue_source_generation_job(
     video_max_concurrency: int,
     create_kling_task: Callable[..., str],
     poll_kling_task: Callable[..., str],
+    track_kling_task: Callable[..., Future] | None = None,
+    encoder_profile: str = DEFAULT_ENCODER_PROFILE,
 ) -> str:
     candidate_job_id = uuid.uuid4().hex
     request_key, clip_states = _build_request_key(req, job_id=candidate_job_id)
@@ -590,9 +712,11 @@ def queue_source_generation_job(
             _start_source_generation_worker(
                 existing_job_id,
                 video_target_fps=video_target_fps,
+                encoder_profile=encoder_profile,
                 video_max_concurrency=video_max_concurrency,
                 create_kling_task=create_kling_task,
                 poll_kling_task=poll_kling_task,
+                track_kling_task=track_kling_task,
             )
             return existing_job_id
 
@@ -622,8 +746,10 @@ def queue_source_generation_job(
     _start_source_generation_worker(
         job_id,
         video_target_fps=video_target_fps,
+        encoder_profile=encoder_profile,
         video_max_concurrency=video_max_concurrency,
         create_kling_task=create_kling_task,
         poll_kling_task=poll_kling_task,
+        track_kling_task=track_kling_task,
     )
     return job_id
@@ -4,9 +4,11 @@ import os
 import time
 import shutil
 import subprocess
+import threading
 import uuid
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
 import requests
@@ -56,10 +58,61 @@ def download_to_path(url: str, out_path: Path) -> None:
         file_obj.write(_http_get_bytes(url))
 
 
-def run_ffmpeg(cmd: List[str]) -> None:
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if proc.returncode != 0:
-        raise RuntimeError(proc.stderr.strip() or "ffmpeg failed")
+# libx264 settings by name. "archival" is the historical fixed setting; "draft" is
+# meant for Video Studio previews and "standard" balances size and speed.
+ENCODER_PROFILES: Dict[str, tuple[str, ...]] = {
+    "draft": ("-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "veryfast", "-crf", "23"),
+    "standard": ("-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "medium", "-crf", "18"),
+    "archival": ("-c:v", "libx264", "-pix_fmt", "yuv420p", "-preset", "veryslow", "-crf", "10"),
+}
+DEFAULT_ENCODER_PROFILE = "archival"
+
+
+def resolve_encoder_profile(name: str | None, default: str = DEFAULT_ENCODER_PROFILE) -> str:
+    safe_name = (name or "").strip().lower()
+    if safe_name in ENCODER_PROFILES:
+        return safe_name
+    return default if default in ENCODER_PROFILES else DEFAULT_ENCODER_PROFILE
+
+
+def encoder_args(profile: str | None) -> List[str]:
+    return list(ENCODER_PROFILES[resolve_encoder_profile(profile)])
+
+
+def ffmpeg_progress_seconds(line: str) -> float | None:
+    """Encoded output time from one ``-progress`` line, or None for other keys."""
+    key, _, value = line.strip().partition("=")
+    # ffmpeg reports microseconds under both keys; out_time_ms is a historical misnomer.
+    if key in ("out_time_us", "out_time_ms") and value.isdigit():
+        return int(value) / 1_000_000
+    return None
+
+
+def run_ffmpeg(cmd: List[str], on_progress: Optional[Callable[[float], None]] = None) -> None:
+    if on_progress is None:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip() or "ffmpeg failed")
+        return
+
+    # Progress goes to stdout as key=value lines; stderr is drained on a side thread so
+    # a chatty encoder cannot fill the pipe and stall.
+    progress_cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    proc = subprocess.Popen(progress_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stderr_tail: deque[str] = deque(maxlen=50)
+    drain = threading.Thread(target=lambda: stderr_tail.extend(proc.stderr), daemon=True)
+    drain.start()
+    for line in proc.stdout:
+        seconds = ffmpeg_progress_seconds(line)
+        if seconds is not None:
+            try:
+                on_progress(seconds)
+            except Exception:
+                pass
+    returncode = proc.wait()
+    drain.join()
+    if returncode != 0:
+        raise RuntimeError("".join(stderr_tail).strip() or "ffmpeg failed")
 
 
 def ffmpeg_trim_speed(
@@ -69,6 +122,8 @@ def ffmpeg_trim_speed(
     dur_sec: float,
     speed: float,
     fps: int,
+    *,
+    encoder_profile: str = DEFAULT_ENCODER_PROFILE,
 ) -> None:
     setpts_expr = f"(PTS-STARTPTS)/{speed}" if speed and abs(speed - 1.0) > 1e-6 else "(PTS-STARTPTS)"
     vf = f"trim=start={start_sec}:duration={dur_sec},setpts={setpts_expr},fps={fps}"
@@ -80,14 +135,7 @@ def ffmpeg_trim_speed(
         "-vf",
         vf,
         "-an",
-        "-c:v",
-        "libx264",
-        "-pix_fmt",
-        "yuv420p",
-        "-crf",
-        "10",
-        "-preset",
-        "veryslow",
+        *encoder_args(encoder_profile),
         str(out_path),
     ]
     run_ffmpeg(cmd)
@@ -114,7 +162,15 @@ def ffprobe_wh(path: Path) -> tuple[int, int]:
     return int(stream.get("width") or 0), int(stream.get("height") or 0)
 
 
-def ffmpeg_normalize_to(in_path: Path, out_path: Path, target_w: int, target_h: int, fps: int) -> None:
+def ffmpeg_normalize_to(
+    in_path: Path,
+    out_path: Path,
+    target_w: int,
+    target_h: int,
+    fps: int,
+    *,
+    encoder_profile: str = DEFAULT_ENCODER_PROFILE,
+) -> None:
     vf = (
         f"scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
         f"crop={target_w}:{target_h},"
@@ -129,14 +185,7 @@ def ffmpeg_normalize_to(in_path: Path, out_path: Path, target_w: int, target_h:
         "-vf",
         vf,
         "-an",
-        "-c:v",
-        "libx264",
-        "-pix_fmt",
-        "yuv420p",
-        "-crf",
-        "10",
-        "-preset",
-        "veryslow",
+        *encoder_args(encoder_profile),
         str(out_path),
     ]
     run_ffmpeg(cmd)
@@ -178,6 +227,8 @@ def ffmpeg_image_to_video(
     target_w: int,
     target_h: int,
     fps: int,
+    *,
+    encoder_profile: str = DEFAULT_ENCODER_PROFILE,
 ) -> None:
     vf = (
         f"scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
@@ -195,14 +246,7 @@ def ffmpeg_image_to_video(
         "-vf",
         vf,
         "-an",
-        "-c:v",
-        "libx264",
-        "-pix_fmt",
-        "yuv420p",
-        "-crf",
-        "10",
-        "-preset",
-        "veryslow",
+        *encoder_args(encoder_profile),
         str(out_path),
     ]
     run_ffmpeg(cmd)
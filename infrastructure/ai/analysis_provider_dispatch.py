@@ -1,5 +1,7 @@
 from typing import Any, Callable, Iterable
 
+from infrastructure.ai.model_call_governor import PRIORITY_ANALYSIS, ModelCallGovernor, classify_model_call
+
 
 GEMINI_ANALYSIS_DEFAULT = "gemini-3.5-flash"
 
@@ -36,12 +38,14 @@ def build_analysis_provider_dispatch(
     openai_reasoning_effort: str,
     logger: Any,
     log_brief: bool,
+    governor: ModelCallGovernor | None = None,
+    default_priority: int = PRIORITY_ANALYSIS,
 ):
     provider_normalized = str(provider or "").strip().lower()
     if provider_normalized == "openai" and not str(openai_api_key or "").strip():
         raise RuntimeError("OPENAI_API_KEY is required when ANALYSIS_PROVIDER=openai")
 
-    def _dispatch(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
+    def _call_provider(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
         if should_route_analysis_to_openai(provider_normalized, model_name, openai_model_set):
             return openai_caller(
                 model_name,
@@ -63,4 +67,18 @@ def build_analysis_provider_dispatch(
             log_tag=log_tag,
         )
 
+    def _dispatch(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
+        if governor is None:
+            return _call_provider(model_name, contents, request_options, safety_settings, system_instruction, log_tag)
+        return governor.call(
+            _call_provider,
+            model_name,
+            contents,
+            request_options,
+            safety_settings,
+            system_instruction,
+            log_tag,
+            priority=classify_model_call(log_tag, default_priority),
+        )
+
     return _dispatch
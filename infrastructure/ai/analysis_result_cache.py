@@ -0,0 +1,280 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+ANALYSIS_CACHE_KEY_PREFIX = "analysis-cache:"
+# Bump when post-processing of cached model output changes shape.
+ANALYSIS_CACHE_SCHEMA_VERSION = 1
+
+_FILE_DIGESTS: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+_FILE_DIGESTS_LOCK = threading.Lock()
+_FILE_DIGESTS_MAX = 2048
+
+
+def file_sha256(path: str | os.PathLike | None) -> str | None:
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    memo_key = (os.path.abspath(str(path)), int(stat.st_size), int(stat.st_mtime_ns))
+    with _FILE_DIGESTS_LOCK:
+        digest = _FILE_DIGESTS.get(memo_key)
+        if digest is not None:
+            _FILE_DIGESTS.move_to_end(memo_key)
+            return digest
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                hasher.update(chunk)
+    except OSError:
+        return None
+    digest = hasher.hexdigest()
+    with _FILE_DIGESTS_LOCK:
+        _FILE_DIGESTS[memo_key] = digest
+        while len(_FILE_DIGESTS) > _FILE_DIGESTS_MAX:
+            _FILE_DIGESTS.popitem(last=False)
+    return digest
+
+
+def prompt_sha256(prompt: str | None) -> str:
+    return hashlib.sha256(str(prompt or "").encode("utf-8")).hexdigest()
+
+
+def build_analysis_cache_key(
+    *,
+    namespace: str,
+    image_sha256: str | None,
+    crop_box: Any = None,
+    profile: str | None = None,
+    model_name: str | None = None,
+    prompt: str | None = None,
+    extra: Any = None,
+) -> str | None:
+    if not image_sha256:
+        return None
+    material = json.dumps(
+        {
+            "v": ANALYSIS_CACHE_SCHEMA_VERSION,
+            "ns": namespace,
+            "image": image_sha256,
+            "box": list(crop_box) if isinstance(crop_box, (list, tuple)) else crop_box,
+            "profile": profile,
+            "model": model_name,
+            "prompt": prompt_sha256(prompt),
+            "extra": extra,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return f"{namespace}:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+
+class RedisAnalysisCacheTier:
+    def __init__(self, redis_conn_factory: Callable[[], Any], *, key_prefix: str = ANALYSIS_CACHE_KEY_PREFIX):
+        self._redis_conn_factory = redis_conn_factory
+        self._key_prefix = key_prefix
+
+    def get(self, key: str) -> Any | None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return None
+        raw = conn.get(f"{self._key_prefix}{key}")
+        if not raw:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_sec: int) -> None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return
+        conn.set(
+            f"{self._key_prefix}{key}",
+            json.dumps(value, ensure_ascii=False, default=str),
+            ex=max(1, int(ttl_sec)),
+        )
+
+
+class DiskAnalysisCacheTier:
+    def __init__(self, root_dir: str | os.PathLike, *, max_files: int = 20000):
+        self._root = Path(root_dir)
+        self._max_files = max(1, int(max_files))
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        safe = key.replace(":", "_").replace("/", "_")
+        return self._root / safe[-2:] / f"{safe}.json"
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if float(payload.get("expires_at") or 0) <= time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        return payload.get("value")
+
+    def set(self, key: str, value: Any, ttl_sec: int) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"expires_at": time.time() + ttl_sec, "value": value}, ensure_ascii=False, default=str),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % 256 == 0
+        if should_prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        try:
+            files = sorted(self._root.glob("*/*.json"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[: max(0, len(files) - self._max_files)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class AnalysisResultCache:
+    """Content-addressed cache for model analysis results.
+
+    A bounded in-process LRU with TTL sits in front of an optional shared tier (Redis
+    or disk). Values must be JSON-serializable; callers get deep copies so cached
+    entries cannot be mutated in place.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 4096,
+        ttl_sec: int = 7 * 24 * 60 * 60,
+        shared_tier: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._max_entries = max(1, int(max_entries))
+        self._ttl_sec = max(1, int(ttl_sec))
+        self._shared_tier = shared_tier
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "local_hits": 0,
+            "shared_hits": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "shared_errors": 0,
+        }
+
+    def _put_local_locked(self, key: str, value: Any) -> None:
+        self._entries[key] = (self._clock() + self._ttl_sec, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str | None) -> Any | None:
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["local_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self._stats["expirations"] += 1
+        value = None
+        if self._shared_tier is not None:
+            try:
+                value = self._shared_tier.get(key)
+            except Exception:
+                value = None
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["shared_hits"] += 1
+            self._put_local_locked(key, value)
+        return copy.deepcopy(value)
+
+    def set(self, key: str | None, value: Any) -> None:
+        if not key or value is None:
+            return
+        stored = copy.deepcopy(value)
+        with self._lock:
+            self._put_local_locked(key, stored)
+            self._stats["stores"] += 1
+        if self._shared_tier is not None:
+            try:
+                self._shared_tier.set(key, stored, self._ttl_sec)
+            except Exception:
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+def build_analysis_result_cache(
+    *,
+    enabled: bool,
+    backend: str = "memory",
+    max_entries: int = 4096,
+    ttl_sec: int = 7 * 24 * 60 * 60,
+    redis_conn_factory: Callable[[], Any] | None = None,
+    disk_dir: str | os.PathLike | None = None,
+) -> AnalysisResultCache | None:
+    if not enabled:
+        return None
+    normalized_backend = str(backend or "memory").strip().lower()
+    shared_tier = None
+    if normalized_backend == "redis" and redis_conn_factory is not None:
+        shared_tier = RedisAnalysisCacheTier(redis_conn_factory)
+    elif normalized_backend == "disk" and disk_dir:
+        shared_tier = DiskAnalysisCacheTier(disk_dir)
+    return AnalysisResultCache(max_entries=max_entries, ttl_sec=ttl_sec, shared_tier=shared_tier)
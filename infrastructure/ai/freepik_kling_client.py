@@ -1,11 +1,20 @@
 import json
 import math
 import time
+from concurrent.futures import Future
 from threading import Semaphore
 from typing import Callable, Optional
 
 import requests
 
+from infrastructure.ai.provider_task_poller import PollOutcome, PollSchedule, ProviderTaskPoller, TransientPollError
+
+KLING_POLL_PROVIDER = "kling"
+KLING_POLL_SCHEDULE = PollSchedule(initial_delay_sec=2.0, interval_sec=2.0, slow_interval_sec=5.0, slow_after_sec=180.0)
+_KLING_DONE_STATUSES = ("COMPLETED", "SUCCEEDED", "SUCCESS", "DONE")
+_KLING_FAILED_STATUSES = ("FAILED", "ERROR", "CANCELLED")
+_KLING_EMPTY_RESULT_RETRIES = 5
+
 
 def build_kling_endpoint(model_name: str) -> str:
     safe_model = (model_name or "").strip() or "kling-v2-6-pro"
@@ -84,58 +93,114 @@ def _provider_message(status: str, *, clip_index: int, total_clips: int, elapsed
     return f"Clip {clip_index + 1}/{total_clips}: {phase} ({elapsed_label})"
 
 
-def poll_kling_task(
+def _kling_status(status_payload: dict) -> tuple[str, object]:
+    data = status_payload.get("data", {})
+    status = "UNKNOWN"
+    if isinstance(data, dict):
+        status = data.get("status", "").upper()
+    elif isinstance(status_payload, dict):
+        status = status_payload.get("status", "").upper()
+    return status, data
+
+
+def _kling_result_url(status_payload: dict, data: object) -> str | None:
+    generated = []
+    if isinstance(data, dict):
+        generated = data.get("generated", [])
+    elif isinstance(status_payload, dict):
+        generated = status_payload.get("generated", [])
+
+    url = None
+    if generated and len(generated) > 0:
+        first = generated[0]
+        if isinstance(first, dict):
+            url = first.get("url") or first.get("video")
+        elif isinstance(first, str):
+            url = first
+
+    if not url and isinstance(data, dict):
+        url = data.get("video_url") or data.get("url") or data.get("video")
+
+    if not url:
+        url = status_payload.get("result_url") or status_payload.get("video_url")
+    return url
+
+
+def _kling_error_message(status_payload: dict, data: object) -> str:
+    error_msg = "Unknown error"
+    if isinstance(data, dict):
+        error_msg = data.get("error") or data.get("message") or error_msg
+    elif isinstance(data, str):
+        error_msg = data
+    elif isinstance(status_payload, dict):
+        error_msg = status_payload.get("error") or status_payload.get("message") or error_msg
+    return error_msg
+
+
+def check_kling_task(
     task_id: str,
+    state: dict,
     *,
-    clip_index: int,
-    total_clips: int,
     freepik_api_key: str,
     kling_endpoint: str,
     video_semaphore: Semaphore,
-    update_job_status: Optional[Callable[[int, str], None]] = None,
-    status_callback: Optional[Callable[[str, int, int], None]] = None,
-    timeout_sec: int = 1800,
-    poll_interval_sec: int = 2,
-    slow_poll_interval_sec: int = 5,
-    slow_after_sec: int = 180,
-) -> str:
+) -> PollOutcome:
+    """One Kling status request. Transient failures raise ``TransientPollError``.
+
+    A task reported complete before its result URL is attached is re-read from the
+    create endpoint, up to five times, before it counts as failed.
+    """
     headers = {"x-freepik-api-key": freepik_api_key}
-    kling_status_endpoint = build_kling_status_endpoint(kling_endpoint)
-    start = time.time()
-    poll_count = 0
-    clip_share_percent = 90 / max(1, total_clips)
-    clip_start_percent = clip_index * clip_share_percent
+    awaiting_url = int(state.get("empty_result_polls") or 0)
+    if awaiting_url:
+        status_url = f"{kling_endpoint}/{task_id}"
+    else:
+        status_url = f"{build_kling_status_endpoint(kling_endpoint)}/{task_id}"
+    try:
+        with video_semaphore:
+            response = requests.get(status_url, headers=headers, timeout=60)
+    except requests.exceptions.RequestException as exc:
+        raise TransientPollError(f"Polling failed temporarily: {exc}") from exc
 
-    while True:
-        elapsed_sec = int(time.time() - start)
-        if elapsed_sec > timeout_sec:
-            raise RuntimeError("Kling task timeout.")
+    if not response.ok:
+        if response.status_code >= 500 or awaiting_url:
+            raise TransientPollError(f"Kling status returned {response.status_code}")
+        raise RuntimeError(f"Kling status failed ({response.status_code}): {response.text[:300]}")
+
+    status_payload = response.json()
+    status, data = _kling_status(status_payload)
+    if awaiting_url and status == "UNKNOWN":
+        status = "COMPLETED"
+
+    if status in _KLING_DONE_STATUSES:
+        url = _kling_result_url(status_payload, data)
+        if url:
+            print(f"[SUCCESS] Found URL: {url[:60]}...", flush=True)
+            return PollOutcome(status=status, done=True, result=url)
+        if awaiting_url >= _KLING_EMPTY_RESULT_RETRIES:
+            print("[ERROR] Completed but no URL. Response dump:", flush=True)
+            print(json.dumps(status_payload, indent=2), flush=True)
+            raise RuntimeError("Kling completed but no result URL found.")
+        state["empty_result_polls"] = awaiting_url + 1
+        print(f"[WAIT] Generated array empty, retrying... ({awaiting_url + 1}/{_KLING_EMPTY_RESULT_RETRIES})", flush=True)
+        return PollOutcome(status=status)
+
+    if status in _KLING_FAILED_STATUSES:
+        raise RuntimeError(f"Kling task failed: {_kling_error_message(status_payload, data)}")
+    return PollOutcome(status=status)
 
-        poll_count += 1
-        try:
-            with video_semaphore:
-                response = requests.get(f"{kling_status_endpoint}/{task_id}", headers=headers, timeout=60)
-
-            if not response.ok:
-                if response.status_code >= 500:
-                    print(f"[Server Warning] {response.status_code}. Retrying...", flush=True)
-                    time.sleep(slow_poll_interval_sec)
-                    continue
-                raise RuntimeError(f"Kling status failed ({response.status_code}): {response.text[:300]}")
-
-            status_payload = response.json()
-        except requests.exceptions.RequestException as exc:
-            print(f"[Network Warning] Polling failed temporarily: {exc}. Retrying...", flush=True)
-            time.sleep(slow_poll_interval_sec)
-            continue
 
-        data = status_payload.get("data", {})
-        status = "UNKNOWN"
-        if isinstance(data, dict):
-            status = data.get("status", "").upper()
-        elif isinstance(status_payload, dict):
-            status = status_payload.get("status", "").upper()
+def _kling_progress_reporter(
+    *,
+    clip_index: int,
+    total_clips: int,
+    update_job_status: Optional[Callable[[int, str], None]],
+    status_callback: Optional[Callable[[str, int, int], None]],
+) -> Callable[[str, int, int], None]:
+    clip_share_percent = 90 / max(1, total_clips)
+    clip_start_percent = clip_index * clip_share_percent
 
+    def _report(status: str, poll_count: int, elapsed_sec: int) -> None:
         simulated_progress = clip_share_percent * 0.95 * (1 - math.exp(-0.05 * poll_count))
         current_total_progress = int(clip_start_percent + simulated_progress)
         status_message = _provider_message(
@@ -158,61 +223,101 @@ def poll_kling_task(
         if status_callback:
             status_callback(status, current_total_progress, elapsed_sec)
 
-        if status in ("COMPLETED", "SUCCEEDED", "SUCCESS", "DONE"):
-            print(f"[COMPLETED] Clip {clip_index + 1}/{total_clips}. Fetching URL...", flush=True)
-
-            generated = []
-            if isinstance(data, dict):
-                generated = data.get("generated", [])
-            elif isinstance(status_payload, dict):
-                generated = status_payload.get("generated", [])
-
-            retry_count = 0
-            while not generated and retry_count < 5:
-                print(f"[WAIT] Generated array empty, retrying... ({retry_count + 1}/5)", flush=True)
-                time.sleep(2)
-                retry_count += 1
-
-                with video_semaphore:
-                    response = requests.get(f"{kling_endpoint}/{task_id}", headers=headers, timeout=60)
-                if response.ok:
-                    status_payload = response.json()
-                    data = status_payload.get("data", {})
-                    if isinstance(data, dict):
-                        generated = data.get("generated", [])
-                    else:
-                        generated = status_payload.get("generated", [])
-
-            url = None
-            if generated and len(generated) > 0:
-                first = generated[0]
-                if isinstance(first, dict):
-                    url = first.get("url") or first.get("video")
-                elif isinstance(first, str):
-                    url = first
-
-            if not url and isinstance(data, dict):
-                url = data.get("video_url") or data.get("url") or data.get("video")
-
-            if not url:
-                url = status_payload.get("result_url") or status_payload.get("video_url")
-
-            if url:
-                print(f"[SUCCESS] Found URL: {url[:60]}...", flush=True)
-                return url
+    return _report
 
-            print("[ERROR] Completed but no URL. Response dump:", flush=True)
-            print(json.dumps(status_payload, indent=2), flush=True)
-            raise RuntimeError("Kling completed but no result URL found.")
 
-        if status in ("FAILED", "ERROR", "CANCELLED"):
-            error_msg = "Unknown error"
-            if isinstance(data, dict):
-                error_msg = data.get("error") or data.get("message") or error_msg
-            elif isinstance(data, str):
-                error_msg = data
-            elif isinstance(status_payload, dict):
-                error_msg = status_payload.get("error") or status_payload.get("message") or error_msg
-            raise RuntimeError(f"Kling task failed: {error_msg}")
+def register_kling_poll_provider(
+    poller: ProviderTaskPoller,
+    *,
+    freepik_api_key: str,
+    kling_endpoint: str,
+    video_semaphore: Semaphore,
+    schedule: PollSchedule = KLING_POLL_SCHEDULE,
+) -> None:
+    poller.register_provider(
+        KLING_POLL_PROVIDER,
+        check=lambda task_id, state: check_kling_task(
+            task_id,
+            state,
+            freepik_api_key=freepik_api_key,
+            kling_endpoint=kling_endpoint,
+            video_semaphore=video_semaphore,
+        ),
+        schedule=schedule,
+    )
+
+
+def track_kling_task(
+    poller: ProviderTaskPoller,
+    task_id: str,
+    *,
+    clip_index: int,
+    total_clips: int,
+    update_job_status: Optional[Callable[[int, str], None]] = None,
+    status_callback: Optional[Callable[[str, int, int], None]] = None,
+    timeout_sec: int = 1800,
+) -> Future:
+    """Hand ``task_id`` to the shared poller; the future resolves to the clip URL."""
+    return poller.track(
+        KLING_POLL_PROVIDER,
+        task_id,
+        timeout_sec=timeout_sec,
+        on_status=_kling_progress_reporter(
+            clip_index=clip_index,
+            total_clips=total_clips,
+            update_job_status=update_job_status,
+            status_callback=status_callback,
+        ),
+    )
+
+
+def poll_kling_task(
+    task_id: str,
+    *,
+    clip_index: int,
+    total_clips: int,
+    freepik_api_key: str,
+    kling_endpoint: str,
+    video_semaphore: Semaphore,
+    update_job_status: Optional[Callable[[int, str], None]] = None,
+    status_callback: Optional[Callable[[str, int, int], None]] = None,
+    timeout_sec: int = 1800,
+    poll_interval_sec: int = 2,
+    slow_poll_interval_sec: int = 5,
+    slow_after_sec: int = 180,
+) -> str:
+    report = _kling_progress_reporter(
+        clip_index=clip_index,
+        total_clips=total_clips,
+        update_job_status=update_job_status,
+        status_callback=status_callback,
+    )
+    state: dict = {}
+    start = time.time()
+    poll_count = 0
+
+    while True:
+        elapsed_sec = int(time.time() - start)
+        if elapsed_sec > timeout_sec:
+            raise RuntimeError("Kling task timeout.")
+
+        poll_count += 1
+        try:
+            outcome = check_kling_task(
+                task_id,
+                state,
+                freepik_api_key=freepik_api_key,
+                kling_endpoint=kling_endpoint,
+                video_semaphore=video_semaphore,
+            )
+        except TransientPollError as exc:
+            print(f"[Network Warning] {exc}. Retrying...", flush=True)
+            time.sleep(slow_poll_interval_sec)
+            continue
+
+        report(outcome.status, poll_count, elapsed_sec)
+        if outcome.done:
+            print(f"[COMPLETED] Clip {clip_index + 1}/{total_clips}.", flush=True)
+            return outcome.result
 
         time.sleep(slow_poll_interval_sec if elapsed_sec >= slow_after_sec else poll_interval_sec)
@@ -1,6 +1,5 @@
 import json
 import os
-import random
 import threading
 import time
 from collections.abc import Sequence
@@ -10,6 +9,11 @@ from typing import Any
 from google import genai
 from google.genai import types
 
+from infrastructure.ai.gemini_client_registry import get_gemini_client_registry
+from infrastructure.ai.gemini_key_scheduler import get_gemini_key_scheduler, parse_retry_after_sec
+from infrastructure.ai.model_call_governor import report_model_call_congestion
+from shared.prepared_image import PreparedImage
+
 _HIGH_THINKING_LOG_TAGS = {
     "Analysis.CropItem",
     "Analysis.DetectFurniture",
@@ -57,6 +61,18 @@ def _iter_contents(contents: Sequence[Any] | Any) -> list[Any]:
     return [contents]
 
 
+def _request_contents(contents: Any, content_items: list[Any]) -> Any:
+    # Prepared references already hold the bytes the SDK would encode, so send them as-is.
+    if not any(isinstance(item, PreparedImage) and item.encoded_bytes for item in content_items):
+        return contents
+    return [
+        types.Part.from_bytes(data=item.encoded_bytes, mime_type=item.mime_type)
+        if isinstance(item, PreparedImage) and item.encoded_bytes
+        else item
+        for item in content_items
+    ]
+
+
 def _normalize_enum_name(value: Any) -> str:
     name = getattr(value, "name", None)
     if name:
@@ -276,6 +292,39 @@ def _reserve_qa_budget_call(*, model_name: str, log_tag: str | None) -> dict | N
         return payload
 
 
+def _key_wait_timeout_sec() -> float:
+    try:
+        return max(0.0, float(os.getenv("GEMINI_KEY_MAX_WAIT_SEC", "30") or 30))
+    except Exception:
+        return 30.0
+
+
+def _response_total_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage_metadata", None)
+    try:
+        total = int(getattr(usage, "total_token_count", None) or 0)
+    except Exception:
+        return None
+    return total or None
+
+
+def _mark_key_exhausted(quota_exceeded_keys: Any, api_key: str, cooldown_sec: float) -> None:
+    mark_exhausted = getattr(quota_exceeded_keys, "mark_exhausted", None)
+    if callable(mark_exhausted):
+        mark_exhausted(api_key, cooldown_sec)
+        return
+    quota_exceeded_keys.add(api_key)
+
+
+def _record_key_request(quota_exceeded_keys: Any, api_key: str) -> None:
+    record_request = getattr(quota_exceeded_keys, "record_request", None)
+    if callable(record_request):
+        try:
+            record_request(api_key)
+        except Exception:
+            pass
+
+
 def call_gemini_with_failover(
     model_name: str,
     contents: Sequence[Any],
@@ -283,7 +332,7 @@ def call_gemini_with_failover(
     safety_settings: dict,
     *,
     api_key_pool: list[str],
-    quota_exceeded_keys: set[str],
+    quota_exceeded_keys: Any,
     logger: Any,
     log_brief: bool,
     system_instruction: str | None = None,
@@ -296,7 +345,10 @@ def call_gemini_with_failover(
         request_options.pop("max_attempts", None)
         max_attempts = 5
     tag = f" tag={log_tag}" if log_tag else ""
+    client_registry = get_gemini_client_registry()
+    key_scheduler = get_gemini_key_scheduler()
     content_items = _iter_contents(contents)
+    request_contents = _request_contents(contents, content_items)
 
     try:
         content_types = []
@@ -313,18 +365,23 @@ def call_gemini_with_failover(
         pass
 
     for attempt in range(max_attempts):
-        available_keys = [key for key in api_key_pool if key not in quota_exceeded_keys]
-        if not available_keys:
-            logger.warning("[Gemini] All keys locked. Cooldown 5s then reset.")
-            time.sleep(5)
-            quota_exceeded_keys.clear()
-            available_keys = list(api_key_pool)
-
-        current_key = random.choice(available_keys)
+        lease = key_scheduler.acquire(
+            api_key_pool,
+            timeout_sec=_key_wait_timeout_sec(),
+            external_cooldown=getattr(quota_exceeded_keys, "cooldown_remaining", None),
+        )
+        if lease is None:
+            logger.warning(
+                f"[Gemini] no key available{tag} attempt={attempt + 1}/{max_attempts} pool={len(api_key_pool or [])}"
+            )
+            continue
+
+        current_key = lease.api_key
         masked_key = current_key[-4:]
+        tokens_used = None
 
         try:
-            client = genai.Client(api_key=current_key)
+            client = client_registry.get(current_key, client_factory=genai.Client)
             config = _build_generation_config(
                 model_name=model_name,
                 request_options=dict(request_options or {}),
@@ -334,18 +391,24 @@ def call_gemini_with_failover(
             )
 
             budget_state = _reserve_qa_budget_call(model_name=model_name, log_tag=log_tag)
+            _record_key_request(quota_exceeded_keys, current_key)
             started_at = time.time()
             response = client.models.generate_content(
                 model=model_name,
-                contents=contents,
+                contents=request_contents,
                 config=config or None,
             )
             elapsed_ms = (time.time() - started_at) * 1000
+            tokens_used = _response_total_tokens(response)
+            quota_exceeded_keys.discard(current_key)
             if not log_brief:
                 budget_suffix = ""
                 if budget_state:
                     budget_suffix = f" budget={budget_state.get('count')}/{budget_state.get('limit')}"
-                logger.info(f"[Gemini] success key=...{masked_key} ({elapsed_ms:.0f}ms) model={model_name}{tag}{budget_suffix}")
+                wait_suffix = f" key_wait={lease.waited_sec:.1f}s" if lease.waited_sec >= 0.05 else ""
+                logger.info(
+                    f"[Gemini] success key=...{masked_key} ({elapsed_ms:.0f}ms) model={model_name}{tag}{budget_suffix}{wait_suffix}"
+                )
             return response
 
         except Exception as exc:
@@ -353,22 +416,31 @@ def call_gemini_with_failover(
             error_lower = error_msg.lower()
             is_timeout = any(token in error_lower for token in ["504", "deadline", "timeout", "timed out"])
             if is_timeout:
+                report_model_call_congestion()
                 logger.warning(
                     f"[Gemini] timeout{tag} key=...{masked_key} attempt={attempt + 1}/{max_attempts} :: {error_msg[:200]}"
                 )
                 time.sleep(1)
                 continue
             if any(token in error_msg for token in ["429", "403", "Quota", "limit", "Resource has been exhausted"]):
+                report_model_call_congestion()
+                cooldown_sec = key_scheduler.report_quota_exceeded(
+                    current_key,
+                    retry_after_sec=parse_retry_after_sec(error_msg),
+                )
                 logger.warning(
-                    f"[Gemini] quota{tag} key=...{masked_key} attempt={attempt + 1}/{max_attempts} :: {error_msg[:180]}"
+                    f"[Gemini] quota{tag} key=...{masked_key} attempt={attempt + 1}/{max_attempts} "
+                    f"cooldown={cooldown_sec:.0f}s :: {error_msg[:180]}"
                 )
-                quota_exceeded_keys.add(current_key)
-                time.sleep(2 + attempt)
+                _mark_key_exhausted(quota_exceeded_keys, current_key, cooldown_sec)
+                client_registry.invalidate(current_key)
             else:
                 logger.error(
                     f"[Gemini] error{tag} key=...{masked_key} attempt={attempt + 1}/{max_attempts} :: {error_msg[:250]}"
                 )
                 time.sleep(1)
+        finally:
+            key_scheduler.release(lease, tokens_used=tokens_used)
 
     logger.error(f"[Gemini] fatal{tag}: attempts exhausted ({max_attempts})")
     return None
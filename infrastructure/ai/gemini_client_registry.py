@@ -0,0 +1,101 @@
+import os
+import threading
+from typing import Any, Callable
+
+import httpx
+from google.genai import types
+
+
+def _env_int(name: str, default: int, *, minimum: int) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, str(default)) or default))
+    except Exception:
+        return default
+
+
+def _env_float(name: str, default: float, *, minimum: float) -> float:
+    try:
+        return max(minimum, float(os.getenv(name, str(default)) or default))
+    except Exception:
+        return default
+
+
+def build_pooled_http_options() -> types.HttpOptions:
+    limits = httpx.Limits(
+        max_connections=_env_int("GEMINI_HTTP_MAX_CONNECTIONS", 64, minimum=1),
+        max_keepalive_connections=_env_int("GEMINI_HTTP_MAX_KEEPALIVE", 32, minimum=1),
+        keepalive_expiry=_env_float("GEMINI_HTTP_KEEPALIVE_SEC", 90.0, minimum=1.0),
+    )
+    return types.HttpOptions(client_args={"limits": limits})
+
+
+def _empty_key_stats() -> dict[str, int]:
+    return {
+        "clients_created": 0,
+        "client_reuses": 0,
+        "handshakes_avoided": 0,
+        "invalidations": 0,
+    }
+
+
+class GeminiClientRegistry:
+    """Process-wide cache of one long-lived ``genai.Client`` per API key.
+
+    Each client owns an httpx pool with keep-alive, so repeated calls on the same
+    key reuse warm TLS connections instead of rebuilding the client per attempt.
+    """
+
+    def __init__(self, *, http_options_factory: Callable[[], Any] = build_pooled_http_options):
+        self._http_options_factory = http_options_factory
+        self._lock = threading.Lock()
+        self._clients: dict[str, Any] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def get(self, api_key: str, *, client_factory: Callable[..., Any]) -> Any:
+        with self._lock:
+            stats = self._stats.setdefault(api_key, _empty_key_stats())
+            client = self._clients.get(api_key)
+            if client is not None:
+                stats["client_reuses"] += 1
+                stats["handshakes_avoided"] += 1
+                return client
+            client = client_factory(api_key=api_key, http_options=self._http_options_factory())
+            self._clients[api_key] = client
+            stats["clients_created"] += 1
+            return client
+
+    def invalidate(self, api_key: str) -> bool:
+        # The dropped client is not closed here: other threads may still be mid-request
+        # on it, and its pool is released once the last reference goes away.
+        with self._lock:
+            removed = self._clients.pop(api_key, None) is not None
+            if removed:
+                self._stats.setdefault(api_key, _empty_key_stats())["invalidations"] += 1
+            return removed
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._stats.clear()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                f"...{api_key[-4:]}": {**stats, "active": api_key in self._clients}
+                for api_key, stats in self._stats.items()
+            }
+
+
+_REGISTRY = GeminiClientRegistry()
+
+
+def get_gemini_client_registry() -> GeminiClientRegistry:
+    return _REGISTRY
+
+
+def get_gemini_client_stats() -> dict[str, dict[str, Any]]:
+    return _REGISTRY.snapshot()
+
+
+def reset_gemini_client_registry() -> None:
+    _REGISTRY.reset()
@@ -0,0 +1,241 @@
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+_RETRY_DELAY_PATTERNS = (
+    re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retry in\s+(\d+(?:\.\d+)?)\s*(?:s|sec|seconds)\b", re.IGNORECASE),
+    re.compile(r"retry[- ]after['\"]?\s*[:=]?\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default)) or default))
+    except Exception:
+        return default
+
+
+def parse_retry_after_sec(error_message: str) -> float | None:
+    text = str(error_message or "")
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                return max(0.0, float(match.group(1)))
+            except Exception:
+                continue
+    return None
+
+
+def _external_cooldown_sec(external_cooldown: Callable[[str], float] | None, api_key: str) -> float:
+    if external_cooldown is None:
+        return 0.0
+    try:
+        return max(0.0, float(external_cooldown(api_key) or 0.0))
+    except Exception:
+        return 0.0
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.refill_per_sec = float(per_minute) / 60.0
+        self.updated_at = now
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if self.unlimited:
+            return
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_sec)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        if self.unlimited or self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_sec
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.tokens -= amount
+
+
+@dataclass
+class _KeyState:
+    requests: _TokenBucket
+    tokens: _TokenBucket
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+    last_acquired_at: float = 0.0
+    acquired: int = 0
+    quota_hits: int = 0
+
+
+@dataclass(frozen=True)
+class KeyLease:
+    api_key: str
+    acquired_at: float
+    waited_sec: float
+
+
+class GeminiKeyScheduler:
+    """Per-key RPM/TPM token buckets with 429 cooldowns and least-loaded key choice.
+
+    ``acquire`` blocks on a condition variable until some key has budget, instead of
+    sleeping a fixed interval and resetting every key at once.
+    """
+
+    def __init__(
+        self,
+        *,
+        rpm_limit: float = 0.0,
+        tpm_limit: float = 0.0,
+        default_cooldown_sec: float = 20.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._rpm_limit = float(rpm_limit or 0)
+        self._tpm_limit = float(tpm_limit or 0)
+        self._default_cooldown_sec = max(0.0, float(default_cooldown_sec))
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._keys: dict[str, _KeyState] = {}
+
+    def _state(self, api_key: str, now: float) -> _KeyState:
+        state = self._keys.get(api_key)
+        if state is None:
+            state = _KeyState(
+                requests=_TokenBucket(self._rpm_limit, now),
+                tokens=_TokenBucket(self._tpm_limit, now),
+            )
+            self._keys[api_key] = state
+        return state
+
+    def _wait_sec(self, state: _KeyState, now: float, external_cooldown_sec: float) -> float:
+        state.requests.refill(now)
+        state.tokens.refill(now)
+        return max(
+            state.cooldown_until - now,
+            external_cooldown_sec,
+            state.requests.seconds_until(1.0),
+            state.tokens.seconds_until(1.0),
+            0.0,
+        )
+
+    def acquire(
+        self,
+        api_key_pool: Sequence[str],
+        *,
+        timeout_sec: float | None = None,
+        external_cooldown: Callable[[str], float] | None = None,
+    ) -> KeyLease | None:
+        keys = [key for key in dict.fromkeys(api_key_pool or []) if key]
+        if not keys:
+            return None
+        started_at = self._clock()
+        deadline = None if timeout_sec is None else started_at + max(0.0, float(timeout_sec))
+        while True:
+            # External cooldowns may be Redis round trips, so they are read before taking
+            # the lock rather than serializing every caller behind them.
+            external_sec = {key: _external_cooldown_sec(external_cooldown, key) for key in keys}
+            with self._cond:
+                now = self._clock()
+                ready: list[tuple[int, float, float, str]] = []
+                next_ready_in: float | None = None
+                for key in keys:
+                    state = self._state(key, now)
+                    wait_sec = self._wait_sec(state, now, external_sec[key])
+                    if wait_sec <= 0:
+                        headroom = 1.0 if state.requests.unlimited else state.requests.tokens / state.requests.capacity
+                        ready.append((state.in_flight, -headroom, state.last_acquired_at, key))
+                    elif next_ready_in is None or wait_sec < next_ready_in:
+                        next_ready_in = wait_sec
+                if ready:
+                    _, _, _, chosen = min(ready)
+                    state = self._keys[chosen]
+                    state.requests.take(1.0)
+                    state.in_flight += 1
+                    state.acquired += 1
+                    state.last_acquired_at = now
+                    return KeyLease(api_key=chosen, acquired_at=now, waited_sec=now - started_at)
+                if deadline is not None and now >= deadline:
+                    return None
+                wait_for = next_ready_in if next_ready_in is not None else 1.0
+                if deadline is not None:
+                    wait_for = min(wait_for, deadline - now)
+                self._cond.wait(timeout=max(0.01, wait_for))
+
+    def release(self, lease: KeyLease | None, *, tokens_used: int | None = None) -> None:
+        if lease is None:
+            return
+        with self._cond:
+            state = self._state(lease.api_key, self._clock())
+            state.in_flight = max(0, state.in_flight - 1)
+            if tokens_used:
+                state.tokens.take(float(tokens_used))
+            self._cond.notify_all()
+
+    def report_quota_exceeded(self, api_key: str, *, retry_after_sec: float | None = None) -> float:
+        cooldown_sec = self._default_cooldown_sec if retry_after_sec is None else max(0.0, float(retry_after_sec))
+        with self._cond:
+            now = self._clock()
+            state = self._state(api_key, now)
+            state.cooldown_until = max(state.cooldown_until, now + cooldown_sec)
+            state.quota_hits += 1
+            self._cond.notify_all()
+        return cooldown_sec
+
+    def cooldown_remaining(self, api_key: str) -> float:
+        with self._cond:
+            state = self._keys.get(api_key)
+            if state is None:
+                return 0.0
+            return max(0.0, state.cooldown_until - self._clock())
+
+    def reset(self) -> None:
+        with self._cond:
+            self._keys.clear()
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._cond:
+            now = self._clock()
+            snapshot: dict[str, dict[str, Any]] = {}
+            for api_key, state in self._keys.items():
+                state.requests.refill(now)
+                state.tokens.refill(now)
+                snapshot[f"...{api_key[-4:]}"] = {
+                    "in_flight": state.in_flight,
+                    "acquired": state.acquired,
+                    "quota_hits": state.quota_hits,
+                    "cooldown_remaining_sec": round(max(0.0, state.cooldown_until - now), 3),
+                    "rpm_tokens": None if state.requests.unlimited else round(state.requests.tokens, 3),
+                    "tpm_tokens": None if state.tokens.unlimited else round(state.tokens.tokens, 1),
+                }
+            return snapshot
+
+
+_SCHEDULER = GeminiKeyScheduler(
+    rpm_limit=_env_float("GEMINI_KEY_RPM", 0.0),
+    tpm_limit=_env_float("GEMINI_KEY_TPM", 0.0),
+    default_cooldown_sec=_env_float("GEMINI_KEY_COOLDOWN_SEC", 20.0),
+)
+
+
+def get_gemini_key_scheduler() -> GeminiKeyScheduler:
+    return _SCHEDULER
+
+
+def get_gemini_key_scheduler_stats() -> dict[str, dict[str, Any]]:
+    return _SCHEDULER.snapshot()
+
+
+def reset_gemini_key_scheduler() -> None:
+    _SCHEDULER.reset()
@@ -0,0 +1,247 @@
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+QUOTA_LEDGER_KEY_PREFIX = "gemini:quota:"
+_RATE_WINDOW_SEC = 60
+_REDIS_RETRY_SEC = 5.0
+_COOLDOWN_CACHE_SEC = 0.25
+
+
+def _key_token(api_key: str) -> str:
+    # Raw API keys never leave the process; Redis only sees a stable digest.
+    return hashlib.sha256(str(api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class InMemoryQuotaLedger:
+    """Set-compatible ledger of exhausted keys with TTL-based cooldowns.
+
+    Used as the single-process default and as the stand-in for Redis in tests.
+    """
+
+    def __init__(
+        self,
+        *,
+        default_cooldown_sec: float = 20.0,
+        fleet_rpm_limit: int = 0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._default_cooldown_sec = max(0.0, float(default_cooldown_sec))
+        self._fleet_rpm_limit = max(0, int(fleet_rpm_limit or 0))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cooldowns: dict[str, float] = {}
+        self._windows: dict[str, tuple[int, int]] = {}
+
+    def _prune_locked(self, now: float) -> None:
+        for api_key in [key for key, until in self._cooldowns.items() if until <= now]:
+            del self._cooldowns[api_key]
+
+    def mark_exhausted(self, api_key: str, cooldown_sec: float | None = None) -> None:
+        ttl = self._default_cooldown_sec if cooldown_sec is None else max(0.0, float(cooldown_sec))
+        with self._lock:
+            now = self._clock()
+            self._cooldowns[api_key] = max(self._cooldowns.get(api_key, 0.0), now + ttl)
+
+    def mark_healthy(self, api_key: str) -> None:
+        with self._lock:
+            self._cooldowns.pop(api_key, None)
+
+    def record_request(self, api_key: str) -> int:
+        with self._lock:
+            window = int(self._clock() // _RATE_WINDOW_SEC)
+            current_window, count = self._windows.get(api_key, (window, 0))
+            count = count + 1 if current_window == window else 1
+            self._windows[api_key] = (window, count)
+            return count
+
+    def cooldown_remaining(self, api_key: str) -> float:
+        with self._lock:
+            now = self._clock()
+            remaining = max(0.0, self._cooldowns.get(api_key, 0.0) - now)
+            if self._fleet_rpm_limit:
+                window = int(now // _RATE_WINDOW_SEC)
+                current_window, count = self._windows.get(api_key, (window, 0))
+                if current_window == window and count >= self._fleet_rpm_limit:
+                    remaining = max(remaining, (window + 1) * _RATE_WINDOW_SEC - now)
+            return remaining
+
+    def add(self, api_key: str) -> None:
+        self.mark_exhausted(api_key)
+
+    def discard(self, api_key: str) -> None:
+        self.mark_healthy(api_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cooldowns.clear()
+            self._windows.clear()
+
+    def __contains__(self, api_key: object) -> bool:
+        with self._lock:
+            return self._cooldowns.get(str(api_key), 0.0) > self._clock()
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            self._prune_locked(self._clock())
+            return iter(list(self._cooldowns))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._prune_locked(self._clock())
+            return len(self._cooldowns)
+
+
+class RedisQuotaLedger:
+    """Key-health and rate-limit ledger shared by every process through Redis.
+
+    Cooldowns are Redis keys with a TTL, so all web and worker processes stop using an
+    exhausted Gemini key as soon as one of them sees a 429. A success only clears this
+    process's mark; the shared cooldown expires through its TTL, so one in-flight success
+    cannot undo another process's 429. Cooldown reads are cached for a quarter second
+    to keep Redis off the per-call path. Redis errors fall back to the in-process
+    ledger, which also mirrors every write.
+    """
+
+    def __init__(
+        self,
+        redis_conn_factory: Callable[[], Any],
+        *,
+        key_prefix: str = QUOTA_LEDGER_KEY_PREFIX,
+        default_cooldown_sec: float = 20.0,
+        fleet_rpm_limit: int = 0,
+        clock: Callable[[], float] = time.time,
+        cooldown_cache_sec: float = _COOLDOWN_CACHE_SEC,
+    ):
+        self._redis_conn_factory = redis_conn_factory
+        self._key_prefix = key_prefix
+        self._default_cooldown_sec = max(0.0, float(default_cooldown_sec))
+        self._fleet_rpm_limit = max(0, int(fleet_rpm_limit or 0))
+        self._clock = clock
+        self._conn_lock = threading.Lock()
+        self._conn: Any = None
+        self._redis_retry_at = 0.0
+        self._cooldown_cache_sec = max(0.0, float(cooldown_cache_sec))
+        self._cooldown_cache: dict[str, tuple[float, float]] = {}
+        self._local = InMemoryQuotaLedger(
+            default_cooldown_sec=default_cooldown_sec,
+            fleet_rpm_limit=fleet_rpm_limit,
+            clock=clock,
+        )
+
+    def _redis(self) -> Any:
+        with self._conn_lock:
+            if self._conn is None and self._clock() >= self._redis_retry_at:
+                try:
+                    self._conn = self._redis_conn_factory()
+                except Exception:
+                    self._conn = None
+            return self._conn
+
+    def _drop_redis(self) -> None:
+        with self._conn_lock:
+            self._conn = None
+            self._redis_retry_at = self._clock() + _REDIS_RETRY_SEC
+
+    def _cooldown_key(self, api_key: str) -> str:
+        return f"{self._key_prefix}cooldown:{_key_token(api_key)}"
+
+    def _rate_key(self, api_key: str, window: int) -> str:
+        return f"{self._key_prefix}rpm:{_key_token(api_key)}:{window}"
+
+    def mark_exhausted(self, api_key: str, cooldown_sec: float | None = None) -> None:
+        ttl = self._default_cooldown_sec if cooldown_sec is None else max(0.0, float(cooldown_sec))
+        self._local.mark_exhausted(api_key, ttl)
+        self._cooldown_cache[api_key] = (self._clock(), ttl)
+        conn = self._redis()
+        if conn is None or ttl <= 0:
+            return
+        try:
+            conn.set(self._cooldown_key(api_key), "1", px=max(1, int(ttl * 1000)))
+        except Exception:
+            self._drop_redis()
+
+    def mark_healthy(self, api_key: str) -> None:
+        self._local.mark_healthy(api_key)
+
+    def record_request(self, api_key: str) -> int:
+        local_count = self._local.record_request(api_key)
+        if not self._fleet_rpm_limit:
+            return local_count
+        conn = self._redis()
+        if conn is None:
+            return local_count
+        window = int(self._clock() // _RATE_WINDOW_SEC)
+        try:
+            rate_key = self._rate_key(api_key, window)
+            count = int(conn.incr(rate_key))
+            if count == 1:
+                conn.expire(rate_key, _RATE_WINDOW_SEC * 2)
+            return count
+        except Exception:
+            self._drop_redis()
+            return local_count
+
+    def cooldown_remaining(self, api_key: str) -> float:
+        now = self._clock()
+        cached = self._cooldown_cache.get(api_key)
+        if cached is not None and now - cached[0] < self._cooldown_cache_sec:
+            return max(0.0, cached[1] - (now - cached[0]))
+        remaining = self._read_cooldown(api_key)
+        self._cooldown_cache[api_key] = (now, remaining)
+        return remaining
+
+    def _read_cooldown(self, api_key: str) -> float:
+        conn = self._redis()
+        if conn is None:
+            return self._local.cooldown_remaining(api_key)
+        try:
+            remaining = max(0.0, float(conn.pttl(self._cooldown_key(api_key)) or 0) / 1000.0)
+            if self._fleet_rpm_limit:
+                now = self._clock()
+                window = int(now // _RATE_WINDOW_SEC)
+                count = int(conn.get(self._rate_key(api_key, window)) or 0)
+                if count >= self._fleet_rpm_limit:
+                    remaining = max(remaining, (window + 1) * _RATE_WINDOW_SEC - now)
+            return remaining
+        except Exception:
+            self._drop_redis()
+            return self._local.cooldown_remaining(api_key)
+
+    def add(self, api_key: str) -> None:
+        self.mark_exhausted(api_key)
+
+    def discard(self, api_key: str) -> None:
+        self.mark_healthy(api_key)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+    def __contains__(self, api_key: object) -> bool:
+        return self.cooldown_remaining(str(api_key)) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._local)
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+
+def build_gemini_quota_ledger(
+    *,
+    redis_conn_factory: Callable[[], Any] | None,
+    enabled: bool = True,
+    default_cooldown_sec: float = 20.0,
+    fleet_rpm_limit: int = 0,
+):
+    if enabled and redis_conn_factory is not None:
+        return RedisQuotaLedger(
+            redis_conn_factory,
+            default_cooldown_sec=default_cooldown_sec,
+            fleet_rpm_limit=fleet_rpm_limit,
+        )
+    return InMemoryQuotaLedger(
+        default_cooldown_sec=default_cooldown_sec,
+        fleet_rpm_limit=fleet_rpm_limit,
+    )
@@ -1,5 +1,7 @@
 from typing import Any, Callable
 
+from infrastructure.ai.model_call_governor import PRIORITY_GENERATION, ModelCallGovernor, classify_model_call
+
 
 def build_image_provider_dispatch(
     *,
@@ -7,13 +9,15 @@ def build_image_provider_dispatch(
     gemini_caller: Callable[..., Any],
     openai_image_caller: Callable[..., Any],
     openai_api_key: str,
+    governor: ModelCallGovernor | None = None,
+    default_priority: int = PRIORITY_GENERATION,
 ):
     normalized_provider = (provider or "gemini").strip().lower() or "gemini"
     has_openai_key = bool((openai_api_key or "").strip())
     if normalized_provider == "openai" and not has_openai_key:
         raise RuntimeError("OPENAI_API_KEY is required when MAIN_IMAGE_PROVIDER or REPAIR_IMAGE_PROVIDER is openai")
 
-    def dispatch(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
+    def _call_provider(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
         if normalized_provider == "openai" and has_openai_key:
             return openai_image_caller(
                 model_name,
@@ -32,4 +36,18 @@ def build_image_provider_dispatch(
             log_tag=log_tag,
         )
 
+    def dispatch(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
+        if governor is None:
+            return _call_provider(model_name, contents, request_options, safety_settings, system_instruction, log_tag)
+        return governor.call(
+            _call_provider,
+            model_name,
+            contents,
+            request_options,
+            safety_settings,
+            system_instruction,
+            log_tag,
+            priority=classify_model_call(log_tag, default_priority),
+        )
+
     return dispatch
@@ -1,138 +1,301 @@
 import base64
+import json
 import os
+import threading
 import time
-from typing import Callable
+import uuid
+from typing import Any, Callable
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from infrastructure.ai.provider_task_poller import PollOutcome, PollSchedule, ProviderTaskPoller, TransientPollError
 
-def _download_generated_image(
-    url: str,
-    unique_id: str,
-    *,
-    standardize_image: Callable[..., str],
-    set_png_dpi: Callable[[str, tuple[int, int]], None],
-    output_dir: str = "outputs",
-) -> str | None:
-    try:
-        response = requests.get(url)
-        if response.status_code != 200:
-            return None
-
-        timestamp = int(time.time())
-        filename = f"magnific_{timestamp}_{unique_id}.png"
-        raw_path = os.path.join(output_dir, filename)
-        with open(raw_path, "wb") as file_obj:
-            file_obj.write(response.content)
-
-        output_path = standardize_image(raw_path, keep_ratio=True)
-        set_png_dpi(output_path, (300, 300))
-        return output_path
-    except Exception:
-        return None
-
-
-def call_magnific_api(
-    image_path: str,
-    unique_id: str,
-    start_time: float,
-    *,
-    magnific_api_key: str | None,
-    magnific_endpoint: str,
-    total_timeout_limit: float,
-    standardize_image: Callable[..., str],
-    set_png_dpi: Callable[[str, tuple[int, int]], None],
-) -> str:
-    if time.time() - start_time > total_timeout_limit:
-        return image_path
-
-    key_preview = (magnific_api_key or "")[:5]
-    print(f"\n--- [Stage 4] Magnific Upscaling (Key: {key_preview}...) ---", flush=True)
-
-    if not magnific_api_key or "your_" in magnific_api_key:
-        print(">> [SKIP] API key missing. Return original.", flush=True)
-        return image_path
-
-    try:
-        with open(image_path, "rb") as file_obj:
-            encoded_image = base64.b64encode(file_obj.read()).decode("utf-8")
-
-        payload = {
-            "image": encoded_image,
-            "scale_factor": "2x",
-            "optimized_for": "films_n_photography",
-            "engine": "automatic",
-            "creativity": 0,
-            "hdr": 0,
-            "resemblance": 10,
-            "fractality": 0,
-            "prompt": (
-                "Professional interior photography, architectural digest style, "
-                "shot on Phase One XF IQ4, 100mm lens, ISO 100, f/8, "
-                "neutral white daylight or existing ambient light, soft shadows, "
-                "clean textures, true-to-source details, raw photo, 8k resolution. "
-                "--no dust, stains, painting, drawing, cartoon, anime, illustration, plastic look, oversaturated, watermark, text, blur, distorted."
-            ),
-        }
-        headers = {
-            "x-freepik-api-key": magnific_api_key,
-            "Content-Type": "application/json",
+MAGNIFIC_POLL_PROVIDER = "magnific"
+MAGNIFIC_POLL_SCHEDULE = PollSchedule(initial_delay_sec=2.0, interval_sec=2.0, slow_interval_sec=4.0, slow_after_sec=60.0)
+MAGNIFIC_CONNECT_TIMEOUT_SEC = 5.0
+MAGNIFIC_CREATE_TIMEOUT_SEC = 120.0
+MAGNIFIC_STATUS_TIMEOUT_SEC = 30.0
+MAGNIFIC_DOWNLOAD_TIMEOUT_SEC = 60.0
+_DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+MAGNIFIC_UPSCALE_PARAMS = {
+    "scale_factor": "2x",
+    "optimized_for": "films_n_photography",
+    "engine": "automatic",
+    "creativity": 0,
+    "hdr": 0,
+    "resemblance": 10,
+    "fractality": 0,
+    "prompt": (
+        "Professional interior photography, architectural digest style, "
+        "shot on Phase One XF IQ4, 100mm lens, ISO 100, f/8, "
+        "neutral white daylight or existing ambient light, soft shadows, "
+        "clean textures, true-to-source details, raw photo, 8k resolution. "
+        "--no dust, stains, painting, drawing, cartoon, anime, illustration, plastic look, oversaturated, watermark, text, blur, distorted."
+    ),
+}
+
+
+class MagnificDeadlineExceeded(RuntimeError):
+    """The request's total time budget ran out before the next step could start."""
+
+
+def build_upscale_body(image_bytes: bytes, params: dict[str, Any] = MAGNIFIC_UPSCALE_PARAMS) -> bytes:
+    """JSON request body with the base64 image spliced in.
+
+    Base64 needs no JSON escaping, so the encoded image is written once instead of being
+    decoded to ``str`` and copied again by ``json.dumps``.
+    """
+    rest = json.dumps(params, ensure_ascii=False)[1:].encode("utf-8")
+    return b"".join((b'{"image":"', base64.b64encode(image_bytes), b'",', rest))
+
+
+class MagnificClient:
+    """Process-wide Magnific upscaler.
+
+    All calls share one keep-alive ``requests.Session`` (rebuilt after a fork), every
+    request carries a connect/read timeout clipped to what is left of the caller's
+    deadline, and the result is streamed to disk and encoded once as a 300 DPI PNG.
+    Waiting for the provider goes through the shared ``ProviderTaskPoller`` when one is
+    attached. ``stats()`` reports provider queue time and upload/download transfer time.
+    """
+
+    def __init__(
+        self,
+        *,
+        api_key: str | None,
+        endpoint: str,
+        pool_maxsize: int = 8,
+        connect_timeout_sec: float = MAGNIFIC_CONNECT_TIMEOUT_SEC,
+        create_timeout_sec: float = MAGNIFIC_CREATE_TIMEOUT_SEC,
+        status_timeout_sec: float = MAGNIFIC_STATUS_TIMEOUT_SEC,
+        download_timeout_sec: float = MAGNIFIC_DOWNLOAD_TIMEOUT_SEC,
+        session_factory: Callable[[], requests.Session] | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._api_key = api_key or ""
+        self._endpoint = endpoint
+        self._pool_maxsize = max(1, int(pool_maxsize))
+        self._connect_timeout_sec = float(connect_timeout_sec)
+        self._create_timeout_sec = float(create_timeout_sec)
+        self._status_timeout_sec = float(status_timeout_sec)
+        self._download_timeout_sec = float(download_timeout_sec)
+        self._session_factory = session_factory
+        self._clock = clock
+        self._poller: ProviderTaskPoller | None = None
+        self._lock = threading.Lock()
+        self._session: requests.Session | None = None
+        self._pid: int | None = None
+        self._stats: dict[str, float] = {
+            "requests": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": 0,
+            "deadline_exceeded": 0,
+            "download_bytes": 0,
+            "queue_sec_max": 0.0,
         }
+        self._timings: dict[str, list[float]] = {"queue": [0.0, 0], "upload": [0.0, 0], "download": [0.0, 0], "encode": [0.0, 0]}
 
-        response = requests.post(magnific_endpoint, json=payload, headers=headers)
-        if response.status_code != 200:
-            print(f"!! [API Error] Status: {response.status_code}, Msg: {response.text}", flush=True)
-            return image_path
+    @property
+    def enabled(self) -> bool:
+        return bool(self._api_key) and "your_" not in self._api_key
+
+    def _build_session(self) -> requests.Session:
+        if self._session_factory is not None:
+            return self._session_factory()
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self._pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get_session(self) -> requests.Session:
+        pid = os.getpid()
+        with self._lock:
+            if self._session is None or self._pid != pid:
+                # A forked RQ work horse must not reuse the parent's sockets.
+                self._session = self._build_session()
+                self._pid = pid
+            return self._session
+
+    def _headers(self) -> dict[str, str]:
+        return {"x-freepik-api-key": self._api_key}
+
+    def _timeout(self, deadline: float | None, read_sec: float) -> tuple[float, float]:
+        if deadline is None:
+            return self._connect_timeout_sec, read_sec
+        remaining = deadline - self._clock()
+        if remaining <= 0:
+            raise MagnificDeadlineExceeded("Magnific deadline exceeded")
+        return min(self._connect_timeout_sec, remaining), min(read_sec, remaining)
 
-        data = response.json()
-        response_data = data.get("data", {})
-        if not response_data:
+    def _record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings[name]
+            timing[0] += seconds
+            timing[1] += 1
+            if name == "queue":
+                self._stats["queue_sec_max"] = max(self._stats["queue_sec_max"], seconds)
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    def register_poller(self, poller: ProviderTaskPoller, *, schedule: PollSchedule = MAGNIFIC_POLL_SCHEDULE) -> None:
+        poller.register_provider(MAGNIFIC_POLL_PROVIDER, check=self.check_task, schedule=schedule)
+        self._poller = poller
+
+    def check_task(self, task_id: str, state: dict) -> PollOutcome:
+        """One status request; resolves to the ``generated`` list, ``[]`` on failure."""
+        try:
+            check_response = self._get_session().get(
+                f"{self._endpoint}/{task_id}",
+                headers=self._headers(),
+                timeout=self._timeout(state.get("deadline"), self._status_timeout_sec),
+            )
+        except requests.exceptions.RequestException as exc:
+            raise TransientPollError(f"Magnific status failed: {exc}") from exc
+        if check_response.status_code != 200:
+            raise TransientPollError(f"Magnific status returned {check_response.status_code}")
+
+        status_data = check_response.json().get("data", {})
+        status = status_data.get("status") or ""
+        if status == "COMPLETED":
+            return PollOutcome(status=status, done=True, result=status_data.get("generated", []))
+        if status == "FAILED":
+            return PollOutcome(status=status, done=True, result=[])
+        return PollOutcome(status=status)
+
+    def _wait_for_task(self, task_id: str, deadline: float) -> list:
+        if self._poller is not None:
+            remaining_sec = max(0.0, deadline - self._clock())
+            try:
+                return self._poller.track(MAGNIFIC_POLL_PROVIDER, task_id, timeout_sec=remaining_sec).result()
+            except Exception:
+                if self._clock() >= deadline:
+                    raise MagnificDeadlineExceeded(f"Magnific task {task_id} did not finish before the deadline") from None
+                raise
+        state = {"deadline": deadline}
+        while True:
+            time.sleep(max(0.0, min(MAGNIFIC_POLL_SCHEDULE.interval_sec, deadline - self._clock())))
+            try:
+                outcome = self.check_task(task_id, state)
+            except TransientPollError:
+                continue
+            if outcome.done:
+                return outcome.result
+
+    def _download(
+        self,
+        url: str,
+        unique_id: str,
+        deadline: float,
+        *,
+        standardize_image: Callable[..., str],
+        output_dir: str,
+    ) -> str | None:
+        output_path = os.path.join(output_dir, f"magnific_{int(time.time())}_{unique_id}.png")
+        part_path = f"{output_path}.{uuid.uuid4().hex[:8]}.part"
+        started = time.perf_counter()
+        size = 0
+        try:
+            with self._get_session().get(url, stream=True, timeout=self._timeout(deadline, self._download_timeout_sec)) as response:
+                if response.status_code != 200:
+                    return None
+                with open(part_path, "wb") as file_obj:
+                    for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+                        # The read timeout bounds each socket read; the deadline bounds a slow trickle.
+                        if self._clock() > deadline:
+                            raise MagnificDeadlineExceeded("Magnific deadline exceeded during download")
+                        file_obj.write(chunk)
+                        size += len(chunk)
+            self._record("download", time.perf_counter() - started)
+            self._count("download_bytes", size)
+
+            started = time.perf_counter()
+            # One decode and one PNG encode, with the DPI written in the same save.
+            result_path = standardize_image(part_path, output_path=output_path, keep_ratio=True, dpi=(300, 300))
+            self._record("encode", time.perf_counter() - started)
+            return result_path if result_path == output_path else None
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def upscale(
+        self,
+        image_path: str,
+        unique_id: str,
+        start_time: float,
+        *,
+        total_timeout_limit: float,
+        standardize_image: Callable[..., str],
+        output_dir: str = "outputs",
+    ) -> str:
+        """Upscale ``image_path`` within ``start_time + total_timeout_limit``; the input is returned on any failure."""
+        deadline = start_time + total_timeout_limit
+        if self._clock() > deadline:
+            self._count("skipped")
             return image_path
 
-        task_id = response_data.get("task_id")
-        if task_id:
-            print(f">> Task queued (ID: {task_id})...", end="", flush=True)
-            while time.time() - start_time < total_timeout_limit:
-                time.sleep(2)
-                print(".", end="", flush=True)
-
-                check_response = requests.get(f"{magnific_endpoint}/{task_id}", headers=headers)
-                if check_response.status_code != 200:
-                    continue
-
-                status_data = check_response.json().get("data", {})
-                status = status_data.get("status")
-                if status == "COMPLETED":
-                    print(" done!", flush=True)
-                    generated_images = status_data.get("generated", [])
-                    if generated_images:
-                        return (
-                            _download_generated_image(
-                                generated_images[0],
-                                unique_id,
-                                standardize_image=standardize_image,
-                                set_png_dpi=set_png_dpi,
-                            )
-                            or image_path
-                        )
-                    return image_path
-                if status == "FAILED":
-                    print(" failed.", flush=True)
-                    return image_path
+        print(f"\n--- [Stage 4] Magnific Upscaling (Key: {self._api_key[:5]}...) ---", flush=True)
+        if not self.enabled:
+            print(">> [SKIP] API key missing. Return original.", flush=True)
+            self._count("skipped")
             return image_path
 
-        generated_images = response_data.get("generated", [])
-        if generated_images:
-            return (
-                _download_generated_image(
+        self._count("requests")
+        try:
+            with open(image_path, "rb") as file_obj:
+                body = build_upscale_body(file_obj.read())
+
+            started = time.perf_counter()
+            response = self._get_session().post(
+                self._endpoint,
+                data=body,
+                headers={**self._headers(), "Content-Type": "application/json"},
+                timeout=self._timeout(deadline, self._create_timeout_sec),
+            )
+            self._record("upload", time.perf_counter() - started)
+            if response.status_code != 200:
+                print(f"!! [API Error] Status: {response.status_code}, Msg: {response.text}", flush=True)
+                self._count("failed")
+                return image_path
+
+            response_data = response.json().get("data", {})
+            generated_images = response_data.get("generated", []) if response_data else []
+            task_id = (response_data or {}).get("task_id")
+            if task_id:
+                print(f">> Task queued (ID: {task_id})...", flush=True)
+                queued_at = time.perf_counter()
+                generated_images = self._wait_for_task(task_id, deadline)
+                self._record("queue", time.perf_counter() - queued_at)
+
+            output_path = None
+            if generated_images:
+                output_path = self._download(
                     generated_images[0],
                     unique_id,
+                    deadline,
                     standardize_image=standardize_image,
-                    set_png_dpi=set_png_dpi,
+                    output_dir=output_dir,
                 )
-                or image_path
-            )
+            self._count("succeeded" if output_path else "failed")
+            return output_path or image_path
+        except MagnificDeadlineExceeded:
+            self._count("deadline_exceeded")
+            return image_path
+        except Exception as exc:
+            self._count("failed")
+            print(f"!! [Magnific] upscale failed: {exc}", flush=True)
+            return image_path
 
-        return image_path
-    except Exception:
-        return image_path
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            for name, (total, count) in self._timings.items():
+                stats[f"{name}_sec_avg"] = round(total / count, 3) if count else 0.0
+                stats[f"{name}_count"] = count
+        stats["queue_sec_max"] = round(stats["queue_sec_max"], 3)
+        return stats
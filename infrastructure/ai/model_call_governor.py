@@ -0,0 +1,293 @@
+import contextvars
+import itertools
+import math
+import os
+import threading
+import time
+from typing import Any, Callable
+
+PRIORITY_GENERATION = 0
+PRIORITY_QC = 1
+PRIORITY_ANALYSIS = 2
+PRIORITY_RANKING = 3
+PRIORITY_NAMES = {
+    PRIORITY_GENERATION: "generation",
+    PRIORITY_QC: "qc",
+    PRIORITY_ANALYSIS: "analysis",
+    PRIORITY_RANKING: "ranking",
+}
+
+# log_tag prefixes of analysis-model calls that check or rank generated output.
+_QC_TAG_PREFIXES = ("Analysis.ReferenceFidelity", "Analysis.PrimaryBBox", "Analysis.ItemBBox", "QC.", "Verify")
+_RANKING_TAG_PREFIXES = ("Rank",)
+_CONGESTION_TOKENS = ("429", "quota", "resource has been exhausted", "rate limit", "timeout", "timed out", "deadline", "504")
+
+ACTIVE_MODEL_CALL_REF: contextvars.ContextVar = contextvars.ContextVar("ACTIVE_MODEL_CALL_REF", default=None)
+
+
+def classify_model_call(log_tag: str | None, default: int) -> int:
+    """Priority class for one call; image dispatch defaults to generation, analysis to analysis."""
+    tag = str(log_tag or "")
+    if tag.startswith(_RANKING_TAG_PREFIXES):
+        return PRIORITY_RANKING
+    if tag.startswith(_QC_TAG_PREFIXES):
+        return PRIORITY_QC
+    return default
+
+
+def is_congestion_error(exc: BaseException) -> bool:
+    text = str(exc).lower()
+    return isinstance(exc, TimeoutError) or any(token in text for token in _CONGESTION_TOKENS)
+
+
+def report_model_call_congestion() -> None:
+    """Tell the governor holding the current call that the provider pushed back (429/timeout).
+
+    Provider clients retry internally, so the governor would otherwise only see the
+    final outcome; this lets it back off on the first rejection. No-op outside a call.
+    """
+    permit = ACTIVE_MODEL_CALL_REF.get()
+    if permit is not None:
+        permit.governor._on_congestion(permit)
+
+
+class _Permit:
+    __slots__ = ("governor", "priority", "job_id", "seq", "admitted_at", "congested")
+
+    def __init__(self, governor: "ModelCallGovernor", priority: int, job_id: str, seq: int):
+        self.governor = governor
+        self.priority = priority
+        self.job_id = job_id
+        self.seq = seq
+        self.admitted_at = 0.0
+        self.congested = False
+
+
+class ModelCallGovernor:
+    """Process-wide admission control for provider calls.
+
+    The concurrency limit follows AIMD: each successful call at full utilisation adds
+    ``1/limit`` (about one slot per round of calls) and a 429 or timeout multiplies it by
+    ``decrease_factor``, at most once per ``decrease_interval_sec`` so one burst of
+    rejections counts once. Waiters are admitted by priority class, then arrival order,
+    and a job already holding its fair share (``limit / active jobs``) yields to waiters
+    from other jobs. Slots are held only around the leaf provider call, so nested
+    executors cannot deadlock on them.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 24,
+        min_limit: int = 4,
+        max_limit: int = 64,
+        decrease_factor: float = 0.7,
+        decrease_interval_sec: float = 2.0,
+        max_queue_wait_sec: float = 300.0,
+        job_id_getter: Callable[[], str | None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        logger: Any = None,
+    ):
+        self._max_limit = max(1, int(max_limit))
+        self._min_limit = min(self._max_limit, max(1, int(min_limit)))
+        self._initial_limit = min(self._max_limit, max(self._min_limit, int(initial_limit)))
+        self._decrease_factor = min(0.95, max(0.1, float(decrease_factor)))
+        self._decrease_interval_sec = max(0.0, float(decrease_interval_sec))
+        self._max_queue_wait_sec = max(0.0, float(max_queue_wait_sec))
+        self._job_id_getter = job_id_getter
+        self._clock = clock
+        self._logger = logger
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._limit = float(self._initial_limit)
+        self._in_flight = 0
+        self._waiting: list[_Permit] = []
+        self._job_in_flight: dict[str, int] = {}
+        self._last_decrease_at = -math.inf
+        self._stats = {
+            "admitted": 0,
+            "succeeded": 0,
+            "congested": 0,
+            "failed": 0,
+            "decreases": 0,
+            "queue_timeouts": 0,
+            "queued": 0,
+            "queue_wait_total_sec": 0.0,
+            "queue_wait_max_sec": 0.0,
+        }
+        self._in_flight_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def _ensure_process(self) -> None:
+        # RQ forks a work horse per job; never inherit a parent's lock or counters.
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def _current_job_id(self) -> str:
+        if self._job_id_getter is None:
+            return ""
+        try:
+            return str(self._job_id_getter() or "")
+        except Exception:
+            return ""
+
+    @property
+    def limit(self) -> int:
+        return max(self._min_limit, int(self._limit))
+
+    def _fair_share_locked(self) -> int:
+        jobs = set(self._job_in_flight) | {permit.job_id for permit in self._waiting}
+        return max(1, math.ceil(self.limit / max(1, len(jobs))))
+
+    def _next_admissible_locked(self) -> _Permit | None:
+        if not self._waiting or self._in_flight >= self.limit:
+            return None
+        share = self._fair_share_locked()
+        ordered = sorted(self._waiting, key=lambda permit: (permit.priority, permit.seq))
+        for permit in ordered:
+            if self._job_in_flight.get(permit.job_id, 0) < share:
+                return permit
+        # Every waiting job is at its share: stay work-conserving.
+        return ordered[0]
+
+    def acquire(self, *, priority: int = PRIORITY_ANALYSIS, job_id: str | None = None) -> _Permit | None:
+        """Block until a slot is free for this priority; ``None`` after ``max_queue_wait_sec``."""
+        self._ensure_process()
+        resolved_job_id = self._current_job_id() if job_id is None else str(job_id)
+        started_at = self._clock()
+        deadline = started_at + self._max_queue_wait_sec
+        with self._cond:
+            permit = _Permit(self, int(priority), resolved_job_id, next(self._seq))
+            self._waiting.append(permit)
+            queued = False
+            while self._next_admissible_locked() is not permit:
+                now = self._clock()
+                if now >= deadline:
+                    self._waiting.remove(permit)
+                    self._stats["queue_timeouts"] += 1
+                    self._cond.notify_all()
+                    return None
+                if not queued:
+                    queued = True
+                    self._stats["queued"] += 1
+                self._cond.wait(timeout=min(1.0, deadline - now))
+            self._waiting.remove(permit)
+            now = self._clock()
+            waited = max(0.0, now - started_at)
+            permit.admitted_at = now
+            self._in_flight += 1
+            self._in_flight_by_priority[permit.priority] = self._in_flight_by_priority.get(permit.priority, 0) + 1
+            self._job_in_flight[permit.job_id] = self._job_in_flight.get(permit.job_id, 0) + 1
+            self._stats["admitted"] += 1
+            self._stats["queue_wait_total_sec"] += waited
+            self._stats["queue_wait_max_sec"] = max(self._stats["queue_wait_max_sec"], waited)
+            # Another waiter may also fit (e.g. after a limit increase).
+            self._cond.notify_all()
+        return permit
+
+    def _on_congestion(self, permit: _Permit) -> None:
+        with self._cond:
+            permit.congested = True
+            now = self._clock()
+            if now - self._last_decrease_at < self._decrease_interval_sec:
+                return
+            previous = self.limit
+            self._limit = max(float(self._min_limit), self._limit * self._decrease_factor)
+            self._last_decrease_at = now
+            self._stats["decreases"] += 1
+        if self._logger is not None and self.limit != previous:
+            self._logger.warning(f"[ModelGovernor] provider pushback: limit {previous} -> {self.limit}")
+
+    def release(self, permit: _Permit | None, *, outcome: str = "success") -> None:
+        """``outcome`` is ``success``, ``congested`` (429/timeout) or ``failed`` (other errors)."""
+        if permit is None or permit.governor is not self or self._pid != os.getpid():
+            return
+        if outcome == "congested" and not permit.congested:
+            self._on_congestion(permit)
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._in_flight_by_priority[permit.priority] = max(0, self._in_flight_by_priority.get(permit.priority, 0) - 1)
+            remaining = self._job_in_flight.get(permit.job_id, 0) - 1
+            if remaining > 0:
+                self._job_in_flight[permit.job_id] = remaining
+            else:
+                self._job_in_flight.pop(permit.job_id, None)
+            if permit.congested or outcome == "congested":
+                self._stats["congested"] += 1
+            elif outcome == "failed":
+                self._stats["failed"] += 1
+            else:
+                self._stats["succeeded"] += 1
+                # Only grow when the limit is what is holding calls back.
+                if self._waiting or self._in_flight + 1 >= self.limit:
+                    self._limit = min(float(self._max_limit), self._limit + 1.0 / max(1.0, self._limit))
+            self._cond.notify_all()
+
+    def call(self, fn: Callable[..., Any], *args: Any, priority: int = PRIORITY_ANALYSIS, **kwargs: Any) -> Any:
+        """Run one provider call under a slot; returns ``None`` when the queue wait times out.
+
+        ``None`` is what the failover callers already return once every key is exhausted,
+        so callers need no new error handling.
+        """
+        permit = self.acquire(priority=priority)
+        if permit is None:
+            if self._logger is not None:
+                self._logger.warning(
+                    f"[ModelGovernor] queue wait exceeded {self._max_queue_wait_sec:.0f}s "
+                    f"({PRIORITY_NAMES.get(priority, priority)}); call skipped"
+                )
+            return None
+        token = ACTIVE_MODEL_CALL_REF.set(permit)
+        outcome = "success"
+        try:
+            result = fn(*args, **kwargs)
+            if result is None:
+                outcome = "congested"
+            return result
+        except Exception as exc:
+            outcome = "congested" if is_congestion_error(exc) else "failed"
+            raise
+        finally:
+            ACTIVE_MODEL_CALL_REF.reset(token)
+            self.release(permit, outcome=outcome)
+
+    def stats(self) -> dict[str, Any]:
+        self._ensure_process()
+        with self._cond:
+            admitted = self._stats["admitted"]
+            waiting_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+            for permit in self._waiting:
+                waiting_by_priority[permit.priority] = waiting_by_priority.get(permit.priority, 0) + 1
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiting),
+                "active_jobs": len(set(self._job_in_flight) | {permit.job_id for permit in self._waiting}),
+                **{
+                    f"in_flight_{PRIORITY_NAMES.get(priority, priority)}": count
+                    for priority, count in self._in_flight_by_priority.items()
+                },
+                **{f"waiting_{PRIORITY_NAMES.get(priority, priority)}": count for priority, count in waiting_by_priority.items()},
+                **{key: value for key, value in self._stats.items() if not key.startswith("queue_wait")},
+                "queue_wait_avg_sec": round(self._stats["queue_wait_total_sec"] / admitted, 4) if admitted else 0.0,
+                "queue_wait_max_sec": round(self._stats["queue_wait_max_sec"], 4),
+            }
+
+
+def build_model_call_governor(*, job_id_getter: Callable[[], str | None] | None = None, logger: Any = None) -> ModelCallGovernor | None:
+    """Governor configured from ``MODEL_CALL_*`` env; ``MODEL_CALL_MAX_CONCURRENCY=0`` disables it."""
+    max_limit = max(0, int(os.getenv("MODEL_CALL_MAX_CONCURRENCY", "64") or 64))
+    if max_limit <= 0:
+        return None
+    return ModelCallGovernor(
+        initial_limit=int(os.getenv("MODEL_CALL_INITIAL_CONCURRENCY", "24") or 24),
+        min_limit=int(os.getenv("MODEL_CALL_MIN_CONCURRENCY", "4") or 4),
+        max_limit=max_limit,
+        decrease_factor=float(os.getenv("MODEL_CALL_DECREASE_FACTOR", "0.7") or 0.7),
+        max_queue_wait_sec=float(os.getenv("MODEL_CALL_MAX_QUEUE_WAIT_SEC", "300") or 300),
+        job_id_getter=job_id_getter,
+        logger=logger,
+    )
@@ -0,0 +1,231 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+class TransientPollError(RuntimeError):
+    """A status check that should be retried with the provider's error backoff."""
+
+
+@dataclass(frozen=True)
+class PollSchedule:
+    """Per-provider polling cadence: fast at first, slower for long tasks, backoff on errors."""
+
+    initial_delay_sec: float = 2.0
+    interval_sec: float = 2.0
+    slow_interval_sec: float = 5.0
+    slow_after_sec: float = 180.0
+    error_backoff_sec: float = 5.0
+    max_error_backoff_sec: float = 60.0
+
+    def next_delay(self, elapsed_sec: float, consecutive_errors: int) -> float:
+        if consecutive_errors:
+            return min(self.max_error_backoff_sec, self.error_backoff_sec * (2 ** (consecutive_errors - 1)))
+        return self.slow_interval_sec if elapsed_sec >= self.slow_after_sec else self.interval_sec
+
+
+@dataclass(frozen=True)
+class PollOutcome:
+    status: str = ""
+    done: bool = False
+    result: Any = None
+
+
+@dataclass
+class _TrackedTask:
+    provider: str
+    task_id: str
+    future: Future
+    started_at: float
+    deadline: float
+    on_status: Callable[[str, int, int], None] | None
+    state: dict = field(default_factory=dict)
+    polls: int = 0
+    consecutive_errors: int = 0
+
+
+class ProviderTaskPoller:
+    """One background thread that polls every outstanding provider task.
+
+    ``track`` registers a task and returns a ``Future`` resolved with the provider's
+    result (or its error), so callers hold no thread while a clip renders. Each pass
+    collects every task that is due and runs their status checks together on a small
+    shared fetch pool (the providers expose no batch status endpoint), then reschedules
+    each task from its provider's ``PollSchedule``. ``check(task_id, state)`` performs one
+    status request; ``state`` is a per-task dict that survives between polls.
+    """
+
+    def __init__(
+        self,
+        *,
+        fetch_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        logger: Any = None,
+    ):
+        self._fetch_workers = max(1, int(fetch_workers))
+        self._clock = clock
+        self._logger = logger
+        self._providers: dict[str, tuple[Callable[[str, dict], PollOutcome], PollSchedule]] = {}
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, _TrackedTask]] = []
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+        self._fetch_pool: ThreadPoolExecutor | None = None
+        self._closed = False
+        self._stats = {"tracked": 0, "completed": 0, "failed": 0, "timed_out": 0, "polls": 0, "poll_errors": 0, "passes": 0}
+
+    def register_provider(self, name: str, *, check: Callable[[str, dict], PollOutcome], schedule: PollSchedule) -> None:
+        self._providers[name] = (check, schedule)
+
+    def _ensure_running_locked(self) -> None:
+        if self._pid != os.getpid():
+            # Forked RQ work horse: the parent's thread and pending tasks do not exist here.
+            self._reset_state()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="provider-task-poller", daemon=True)
+            self._thread.start()
+
+    def track(
+        self,
+        provider: str,
+        task_id: str,
+        *,
+        timeout_sec: float = 1800.0,
+        on_status: Callable[[str, int, int], None] | None = None,
+    ) -> Future:
+        """Start polling ``task_id``; ``on_status(status, poll_count, elapsed_sec)`` runs after each poll."""
+        if provider not in self._providers:
+            raise KeyError(f"Unknown poll provider: {provider}")
+        _, schedule = self._providers[provider]
+        future: Future = Future()
+        now = self._clock()
+        task = _TrackedTask(
+            provider=provider,
+            task_id=str(task_id),
+            future=future,
+            started_at=now,
+            deadline=now + max(0.0, float(timeout_sec)),
+            on_status=on_status,
+        )
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ProviderTaskPoller is closed")
+            self._ensure_running_locked()
+            heapq.heappush(self._heap, (now + schedule.initial_delay_sec, next(self._seq), task))
+            self._stats["tracked"] += 1
+            self._cond.notify_all()
+        return future
+
+    def _take_due_locked(self) -> list[_TrackedTask]:
+        while not self._closed:
+            if not self._heap:
+                self._cond.wait()
+                continue
+            due_at = self._heap[0][0]
+            now = self._clock()
+            if due_at > now:
+                self._cond.wait(timeout=due_at - now)
+                continue
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+            return due
+        return []
+
+    def _poll_once(self, task: _TrackedTask) -> tuple[_TrackedTask, PollOutcome | None, BaseException | None]:
+        check, _ = self._providers[task.provider]
+        try:
+            return task, check(task.task_id, task.state), None
+        except BaseException as exc:
+            return task, None, exc
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                due = self._take_due_locked()
+                if self._closed:
+                    return
+                if self._fetch_pool is None:
+                    self._fetch_pool = ThreadPoolExecutor(max_workers=self._fetch_workers, thread_name_prefix="provider-poll")
+                fetch_pool = self._fetch_pool
+                self._stats["passes"] += 1
+                pending = [task for task in due if not task.future.cancelled()]
+                self._stats["failed"] += len(due) - len(pending)
+            if len(pending) == 1:
+                results = [self._poll_once(pending[0])]
+            else:
+                results = list(fetch_pool.map(self._poll_once, pending))
+            for task, outcome, error in results:
+                self._settle(task, outcome, error)
+
+    def _settle(self, task: _TrackedTask, outcome: PollOutcome | None, error: BaseException | None) -> None:
+        _, schedule = self._providers[task.provider]
+        now = self._clock()
+        elapsed_sec = max(0.0, now - task.started_at)
+        task.polls += 1
+        with self._cond:
+            self._stats["polls"] += 1
+        if error is not None and not isinstance(error, TransientPollError):
+            self._finish(task, error=error)
+            return
+        if error is not None:
+            task.consecutive_errors += 1
+            with self._cond:
+                self._stats["poll_errors"] += 1
+            if self._logger is not None:
+                self._logger.warning(f"[Poller] {task.provider} {task.task_id}: {error}; backing off")
+        else:
+            task.consecutive_errors = 0
+            if task.on_status is not None:
+                try:
+                    task.on_status(outcome.status, task.polls, int(elapsed_sec))
+                except Exception:
+                    pass
+            if outcome.done:
+                self._finish(task, result=outcome.result)
+                return
+        if now >= task.deadline:
+            with self._cond:
+                self._stats["timed_out"] += 1
+            self._finish(task, error=RuntimeError(f"{task.provider} task timeout."))
+            return
+        next_at = min(task.deadline, now + schedule.next_delay(elapsed_sec, task.consecutive_errors))
+        with self._cond:
+            heapq.heappush(self._heap, (next_at, next(self._seq), task))
+            self._cond.notify_all()
+
+    def _finish(self, task: _TrackedTask, *, result: Any = None, error: BaseException | None = None) -> None:
+        with self._cond:
+            self._stats["failed" if error is not None else "completed"] += 1
+        if task.future.cancelled():
+            return
+        if error is not None:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(result)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            pending = [entry[2] for entry in self._heap]
+            self._heap.clear()
+            fetch_pool, self._fetch_pool = self._fetch_pool, None
+            self._cond.notify_all()
+        for task in pending:
+            if not task.future.done():
+                task.future.set_exception(RuntimeError("ProviderTaskPoller closed"))
+        if fetch_pool is not None:
+            fetch_pool.shutdown(wait=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {**self._stats, "outstanding": self._stats["tracked"] - self._stats["completed"] - self._stats["failed"]}
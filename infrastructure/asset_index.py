@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from PIL import Image
+
+from infrastructure.moodboard_index import moodboard_lookup_parts
+
+VALID_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+_DIGIT_RUN = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class IndexedPayload:
+    """A pre-serialized JSON response body and its strong ETag."""
+
+    body: bytes
+    etag: str
+
+
+def indexed_payload(value: Any) -> IndexedPayload:
+    body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return IndexedPayload(body=body, etag=f'"{hashlib.sha1(body).hexdigest()[:24]}"')
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    candidates = [token.strip() for token in if_none_match.split(",")]
+    return "*" in candidates or etag in [token[2:] if token.startswith("W/") else token for token in candidates]
+
+
+@dataclass
+class _StyleDir:
+    url_prefix: str
+    path: Path
+    files: list[str]
+    by_variant: dict[str, str]
+
+
+@dataclass
+class _Snapshot:
+    fingerprint: tuple
+    room_types: IndexedPayload
+    styles: dict[str, IndexedPayload]
+    thumbnails: dict[str, IndexedPayload]
+    thumbnail_files: dict[tuple[str, str], str]
+    style_dirs: dict[tuple[str, str], _StyleDir]
+    moodboard_sizes: dict[str, tuple[int, int]]
+    presets: dict
+    preset_dimensions: dict[tuple[str, str, str], str]
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+_EMPTY_LIST = indexed_payload([])
+
+
+class LocalAssetIndex:
+    """In-memory index of the bundled presets: thumbnails, moodboards and preset map.
+
+    Built once from ``static/thumbnails``, ``assets/<room>/<style>/`` and the preset map
+    file, then served from memory with pre-serialized bodies and ETags for the room,
+    style and thumbnail endpoints. At most every ``refresh_sec`` the index stats its
+    directories and the preset map (a few dozen ``stat`` calls); when any mtime changed
+    (a file added, removed or renamed) it is rebuilt while readers keep the old one.
+    Moodboard selection mirrors the local lookup in reference preparation: the first
+    file, in sorted order, whose name has the variant as a whole number.
+    """
+
+    def __init__(
+        self,
+        *,
+        assets_dir: Path,
+        thumbnails_dir: Path,
+        room_styles: dict[str, list[str]],
+        preset_map_path: str = "",
+        refresh_sec: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        logger: Any = None,
+    ):
+        self._assets_dir = Path(assets_dir)
+        self._thumbnails_dir = Path(thumbnails_dir)
+        self._room_styles = room_styles
+        self._preset_map_path = preset_map_path or ""
+        self._refresh_sec = max(0.0, float(refresh_sec))
+        self._clock = clock
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        self._checked_at = 0.0
+        self._stats = {"builds": 0, "refresh_checks": 0, "build_errors": 0}
+
+    # -- building -------------------------------------------------------------
+
+    def _dir_entries(self, path: Path) -> list[str]:
+        try:
+            return sorted(os.listdir(path))
+        except OSError:
+            return []
+
+    def _mtime(self, path: Path | str) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+
+    def _fingerprint(self) -> tuple:
+        parts = [("thumbnails", self._mtime(self._thumbnails_dir)), ("assets", self._mtime(self._assets_dir))]
+        for room in self._dir_entries(self._assets_dir):
+            room_path = self._assets_dir / room
+            if not room_path.is_dir():
+                continue
+            parts.append((room, self._mtime(room_path)))
+            for style in self._dir_entries(room_path):
+                if (room_path / style).is_dir():
+                    parts.append((f"{room}/{style}", self._mtime(room_path / style)))
+        if self._preset_map_path:
+            parts.append(("presets", self._mtime(self._preset_map_path)))
+        return tuple(parts)
+
+    def _load_presets(self) -> dict:
+        if not self._preset_map_path or not os.path.exists(self._preset_map_path):
+            return {}
+        try:
+            with open(self._preset_map_path, "r", encoding="utf-8") as file_obj:
+                presets = json.load(file_obj)
+            return presets if isinstance(presets, dict) else {}
+        except Exception as exc:
+            if self._logger is not None:
+                self._logger.warning(f"[AssetIndex] preset map unreadable: {exc}")
+            return {}
+
+    def _build(self, fingerprint: tuple) -> _Snapshot:
+        grouped: dict[str, list[tuple[int, str]]] = {}
+        thumbnail_files: dict[tuple[str, str], str] = {}
+        for filename in self._dir_entries(self._thumbnails_dir):
+            lower = filename.lower()
+            if not lower.endswith(VALID_IMAGE_EXTS):
+                continue
+            prefix, sep, rest = lower.rpartition("_")
+            number = os.path.splitext(rest)[0]
+            if sep and number.isdigit():
+                grouped.setdefault(prefix, []).append((int(number), filename))
+                thumbnail_files.setdefault((prefix, number), filename)
+        thumbnails = {
+            prefix: indexed_payload([{"index": index, "file": filename} for index, filename in sorted(items)])
+            for prefix, items in grouped.items()
+        }
+
+        style_dirs: dict[tuple[str, str], _StyleDir] = {}
+        moodboard_sizes: dict[str, tuple[int, int]] = {}
+        for room in self._dir_entries(self._assets_dir):
+            room_path = self._assets_dir / room
+            if not room_path.is_dir():
+                continue
+            for style in self._dir_entries(room_path):
+                style_path = room_path / style
+                if not style_path.is_dir():
+                    continue
+                files = [name for name in self._dir_entries(style_path) if name.lower().endswith(VALID_IMAGE_EXTS)]
+                by_variant: dict[str, str] = {}
+                for name in files:
+                    for number in _DIGIT_RUN.findall(name):
+                        by_variant.setdefault(number, name)
+                    try:
+                        with Image.open(style_path / name) as img:
+                            moodboard_sizes[f"{room}/{style}/{name}"] = img.size
+                    except Exception:
+                        pass
+                style_dirs.setdefault(
+                    (room.lower(), style.lower()),
+                    _StyleDir(url_prefix=f"/assets/{room}/{style}", path=style_path, files=files, by_variant=by_variant),
+                )
+
+        presets = self._load_presets()
+        preset_dimensions = {}
+        for preset in presets.values():
+            if isinstance(preset, dict) and preset.get("dimensions"):
+                key = moodboard_lookup_parts(
+                    preset.get("room") or preset.get("room_type") or preset.get("room_name"),
+                    preset.get("style"),
+                    preset.get("variant") or preset.get("variant_id") or preset.get("variant_index"),
+                )
+                preset_dimensions[key] = str(preset["dimensions"])
+
+        styles = {}
+        for room, room_style_list in self._room_styles.items():
+            listed = list(room_style_list)
+            styles[room] = indexed_payload(listed if "Customize" in listed else listed + ["Customize"])
+
+        return _Snapshot(
+            fingerprint=fingerprint,
+            room_types=indexed_payload(list(self._room_styles.keys())),
+            styles=styles,
+            thumbnails=thumbnails,
+            thumbnail_files=thumbnail_files,
+            style_dirs=style_dirs,
+            moodboard_sizes=moodboard_sizes,
+            presets=presets,
+            preset_dimensions=preset_dimensions,
+            counts={
+                "thumbnails": sum(len(items) for items in grouped.values()),
+                "moodboards": len(moodboard_sizes),
+                "style_dirs": len(style_dirs),
+                "presets": len(presets),
+            },
+        )
+
+    def _rebuild(self, fingerprint: tuple) -> _Snapshot:
+        snapshot = self._build(fingerprint)
+        with self._lock:
+            self._snapshot = snapshot
+            self._stats["builds"] += 1
+        if self._logger is not None:
+            self._logger.info(f"[AssetIndex] built {snapshot.counts}")
+        return snapshot
+
+    def warm(self) -> dict[str, int]:
+        with self._build_lock:
+            self._checked_at = self._clock()
+            return self._rebuild(self._fingerprint()).counts
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._checked_at = self._clock()
+                    self._rebuild(self._fingerprint())
+                return self._snapshot
+        if self._clock() - self._checked_at < self._refresh_sec:
+            return snapshot
+        # One request re-checks mtimes; concurrent readers keep the current snapshot.
+        if not self._build_lock.acquire(blocking=False):
+            return snapshot
+        try:
+            self._checked_at = self._clock()
+            with self._lock:
+                self._stats["refresh_checks"] += 1
+            fingerprint = self._fingerprint()
+            if fingerprint != snapshot.fingerprint:
+                try:
+                    return self._rebuild(fingerprint)
+                except Exception as exc:
+                    with self._lock:
+                        self._stats["build_errors"] += 1
+                    if self._logger is not None:
+                        self._logger.warning(f"[AssetIndex] rebuild failed, serving previous index: {exc}")
+            return snapshot
+        finally:
+            self._build_lock.release()
+
+    # -- lookups --------------------------------------------------------------
+
+    def room_types(self) -> IndexedPayload:
+        return self._current().room_types
+
+    def styles_for_room(self, room_type: str) -> IndexedPayload:
+        return self._current().styles.get(room_type) or indexed_payload(["Customize"])
+
+    def thumbnails(self, room_name: str, style_name: str) -> IndexedPayload:
+        safe_room, safe_style, _ = moodboard_lookup_parts(room_name, style_name, None)
+        return self._current().thumbnails.get(f"{safe_room}_{safe_style}", _EMPTY_LIST)
+
+    def preset_map(self) -> dict:
+        return self._current().presets
+
+    def find_moodboard(self, room: str, style: str, variant: Any) -> dict[str, Any] | None:
+        safe_room, safe_style, safe_variant = moodboard_lookup_parts(room, style, variant)
+        snapshot = self._current()
+        style_dir = snapshot.style_dirs.get((safe_room, safe_style))
+        if style_dir is None or not style_dir.files:
+            return None
+        if safe_variant.isdigit():
+            filename = style_dir.by_variant.get(safe_variant)
+        else:
+            pattern = re.compile(rf"(?:^|[^0-9]){re.escape(safe_variant)}(?:[^0-9]|$)", re.IGNORECASE)
+            filename = next((name for name in style_dir.files if pattern.search(name)), None)
+        filename = filename or style_dir.files[0]
+        size_key = f"{style_dir.url_prefix[len('/assets/'):]}/{filename}"
+        size = snapshot.moodboard_sizes.get(size_key)
+        return {
+            "path": str(style_dir.path / filename),
+            "url": f"{style_dir.url_prefix}/{filename}",
+            "width": size[0] if size else None,
+            "height": size[1] if size else None,
+        }
+
+    def describe(self, room: str, style: str, variant: Any) -> dict[str, Any]:
+        """Room/style/variant -> thumbnail, moodboard and preset dimensions, from memory."""
+        key = moodboard_lookup_parts(room, style, variant)
+        snapshot = self._current()
+        thumbnail = snapshot.thumbnail_files.get((f"{key[0]}_{key[1]}", key[2]))
+        return {
+            "thumbnail_url": f"/static/thumbnails/{thumbnail}" if thumbnail else None,
+            "moodboard": self.find_moodboard(room, style, variant),
+            "dimensions": snapshot.preset_dimensions.get(key, ""),
+        }
+
+    def stats(self) -> dict[str, int]:
+        snapshot = self._snapshot
+        with self._lock:
+            return {**self._stats, **(snapshot.counts if snapshot is not None else {})}
@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+import httpx
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+_PASSTHROUGH_HEADERS = (
+    "content-type",
+    "content-length",
+    "content-encoding",
+    "content-range",
+    "accept-ranges",
+    "etag",
+    "last-modified",
+)
+
+
+def build_download_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("DOWNLOAD_PROXY_MAX_CONNECTIONS", "64") or 64),
+            max_keepalive_connections=int(os.getenv("DOWNLOAD_PROXY_MAX_KEEPALIVE", "16") or 16),
+            keepalive_expiry=float(os.getenv("DOWNLOAD_PROXY_KEEPALIVE_SEC", "60") or 60),
+        ),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        follow_redirects=True,
+    )
+
+
+def _etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    if not if_none_match or not etag:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+class DownloadDiskCache:
+    """Bounded on-disk LRU of proxied objects keyed by URL and upstream ETag.
+
+    Each entry is a body file plus a small JSON sidecar, so the index is rebuilt from
+    disk after a restart. Objects without an ETag or larger than ``max_object_bytes``
+    are never stored.
+    """
+
+    def __init__(
+        self,
+        root_dir: str | os.PathLike,
+        *,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_object_bytes: int = 512 * 1024 * 1024,
+        fresh_sec: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root_dir = Path(root_dir)
+        self._max_bytes = max(0, int(max_bytes))
+        self._max_object_bytes = max(0, int(max_object_bytes))
+        self._fresh_sec = max(0.0, float(fresh_sec))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._load_index()
+
+    @staticmethod
+    def _entry_name(url: str, etag: str) -> str:
+        return hashlib.sha256(f"{url}\0{etag}".encode("utf-8")).hexdigest()
+
+    def _load_index(self) -> None:
+        rows = []
+        for meta_path in self.root_dir.glob("*.json"):
+            try:
+                entry = json.loads(meta_path.read_text(encoding="utf-8"))
+                body_path = meta_path.with_suffix(".bin")
+                entry["path"] = str(body_path)
+                entry["size"] = body_path.stat().st_size
+                rows.append((meta_path.stat().st_mtime, entry))
+            except Exception:
+                continue
+        for _, entry in sorted(rows, key=lambda row: row[0]):
+            previous = self._entries.pop(entry.get("url"), None)
+            if previous is not None:
+                self._total_bytes -= previous["size"]
+            self._entries[entry["url"]] = entry
+            self._total_bytes += entry["size"]
+        self._evict_locked()
+
+    def accepts(self, etag: str | None, content_length: int | None) -> bool:
+        return bool(etag) and content_length is not None and 0 <= content_length <= min(self._max_object_bytes, self._max_bytes)
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or not os.path.exists(entry["path"]):
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(url)
+            return dict(entry)
+
+    def is_fresh(self, entry: dict[str, Any]) -> bool:
+        return self._clock() - float(entry.get("validated_at") or 0.0) <= self._fresh_sec
+
+    def mark_hit(self, url: str, *, revalidated: bool = False) -> None:
+        with self._lock:
+            self._stats["hits"] += 1
+            if revalidated:
+                self._stats["revalidated"] += 1
+                entry = self._entries.get(url)
+                if entry is not None:
+                    entry["validated_at"] = self._clock()
+
+    def open_writer(self, url: str, etag: str, content_type: str) -> "_DownloadCacheWriter":
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        return _DownloadCacheWriter(self, url, etag, content_type)
+
+    def _commit(self, url: str, etag: str, content_type: str, temp_path: Path, size: int) -> None:
+        name = self._entry_name(url, etag)
+        body_path = self.root_dir / f"{name}.bin"
+        meta_path = self.root_dir / f"{name}.json"
+        entry = {
+            "url": url,
+            "etag": etag,
+            "content_type": content_type,
+            "size": size,
+            "validated_at": self._clock(),
+        }
+        os.replace(temp_path, body_path)
+        meta_path.write_text(json.dumps(entry), encoding="utf-8")
+        entry["path"] = str(body_path)
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._total_bytes -= previous["size"]
+                if previous["path"] != entry["path"]:
+                    self._remove_files(previous)
+            self._entries[url] = entry
+            self._total_bytes += size
+            self._stats["stores"] += 1
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        while self._entries and self._total_bytes > self._max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry["size"]
+            self._stats["evictions"] += 1
+            self._remove_files(entry)
+
+    @staticmethod
+    def _remove_files(entry: dict[str, Any]) -> None:
+        body_path = Path(entry["path"])
+        for path in (body_path, body_path.with_suffix(".json")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._total_bytes, "max_bytes": self._max_bytes}
+
+
+class _DownloadCacheWriter:
+    def __init__(self, cache: DownloadDiskCache, url: str, etag: str, content_type: str):
+        self._cache = cache
+        self._url = url
+        self._etag = etag
+        self._content_type = content_type
+        self._temp_path = cache.root_dir / f".{DownloadDiskCache._entry_name(url, etag)}.{os.getpid()}.{id(self)}.part"
+        self._fh = self._temp_path.open("wb")
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._fh.write(chunk)
+        self._size += len(chunk)
+
+    def commit(self, expected_size: int | None) -> None:
+        self._fh.close()
+        if expected_size is not None and self._size != expected_size:
+            self.discard()
+            return
+        self._cache._commit(self._url, self._etag, self._content_type, self._temp_path, self._size)
+
+    def discard(self) -> None:
+        try:
+            self._fh.close()
+        except Exception:
+            pass
+        try:
+            self._temp_path.unlink()
+        except OSError:
+            pass
+
+
+class AsyncDownloadProxy:
+    """Streams allow-listed remote objects through one pooled ``httpx.AsyncClient``.
+
+    ``Range`` and ``If-None-Match`` are forwarded upstream; full 200 responses with an
+    ETag are teed into ``DownloadDiskCache`` and later served from disk, revalidating
+    with a conditional request once the entry is older than the cache's fresh window.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache: DownloadDiskCache | None = None,
+        client_factory: Callable[[], httpx.AsyncClient] = build_download_http_client,
+        chunk_bytes: int = DOWNLOAD_CHUNK_BYTES,
+    ):
+        self._cache = cache
+        self._client_factory = client_factory
+        self._chunk_bytes = max(1024, int(chunk_bytes))
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: Any = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections are bound to the event loop that opened them.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop or self._client.is_closed:
+            self._client = self._client_factory()
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats() if self._cache is not None else {}
+
+    async def proxy(
+        self,
+        url: str,
+        *,
+        method: str = "GET",
+        filename: str = "download",
+        range_header: str | None = None,
+        if_none_match: str | None = None,
+    ) -> Response:
+        method = "HEAD" if str(method or "").upper() == "HEAD" else "GET"
+        disposition = {"Content-Disposition": f'attachment; filename="{filename}"'}
+        cached = self._cache.get(url) if self._cache is not None else None
+
+        # Raw bytes are relayed as-is, so ask for the stored representation.
+        upstream_headers = {"Accept-Encoding": "identity"}
+        if range_header:
+            upstream_headers["Range"] = range_header
+        if cached is not None:
+            if _etag_matches(if_none_match, cached["etag"]) and self._cache.is_fresh(cached):
+                self._cache.mark_hit(url)
+                return Response(status_code=304, headers={"ETag": cached["etag"], **disposition})
+            if self._cache.is_fresh(cached):
+                self._cache.mark_hit(url)
+                return self._cached_response(cached, disposition)
+            upstream_headers["If-None-Match"] = cached["etag"]
+        elif if_none_match:
+            upstream_headers["If-None-Match"] = if_none_match
+
+        client = self._get_client()
+        try:
+            upstream = await client.send(client.build_request(method, url, headers=upstream_headers), stream=True)
+        except Exception as exc:
+            return JSONResponse(content={"error": str(exc)}, status_code=502)
+
+        if upstream.status_code == 304 and cached is not None:
+            await upstream.aclose()
+            self._cache.mark_hit(url, revalidated=True)
+            if _etag_matches(if_none_match, cached["etag"]):
+                return Response(status_code=304, headers={"ETag": cached["etag"], **disposition})
+            return self._cached_response(cached, disposition)
+        if upstream.status_code == 304:
+            await upstream.aclose()
+            return Response(status_code=304, headers={**self._passthrough_headers(upstream), **disposition})
+        if upstream.status_code >= 400:
+            await upstream.aclose()
+            return JSONResponse(
+                content={"error": f"Upstream error ({upstream.status_code})"},
+                status_code=upstream.status_code,
+            )
+
+        headers = {**self._passthrough_headers(upstream), **disposition}
+        media_type = upstream.headers.get("content-type") or "application/octet-stream"
+        if method == "HEAD":
+            await upstream.aclose()
+            return Response(status_code=upstream.status_code, headers=headers, media_type=media_type)
+
+        writer = None
+        expected_size = _content_length(upstream)
+        etag = upstream.headers.get("etag")
+        if (
+            self._cache is not None
+            and upstream.status_code == 200
+            and "content-encoding" not in upstream.headers
+            and self._cache.accepts(etag, expected_size)
+        ):
+            try:
+                writer = self._cache.open_writer(url, etag, media_type)
+            except OSError:
+                writer = None
+        return StreamingResponse(
+            self._stream_body(upstream, writer, expected_size),
+            status_code=upstream.status_code,
+            headers=headers,
+            media_type=media_type,
+            background=BackgroundTask(upstream.aclose),
+        )
+
+    async def _stream_body(
+        self,
+        upstream: httpx.Response,
+        writer: _DownloadCacheWriter | None,
+        expected_size: int | None,
+    ) -> AsyncIterator[bytes]:
+        completed = False
+        try:
+            async for chunk in upstream.aiter_raw(self._chunk_bytes):
+                if writer is not None:
+                    try:
+                        writer.write(chunk)
+                    except OSError:
+                        writer.discard()
+                        writer = None
+                yield chunk
+            completed = True
+        finally:
+            await upstream.aclose()
+            if writer is not None:
+                if completed:
+                    writer.commit(expected_size)
+                else:
+                    writer.discard()
+
+    @staticmethod
+    def _passthrough_headers(upstream: httpx.Response) -> dict[str, str]:
+        return {name: upstream.headers[name] for name in _PASSTHROUGH_HEADERS if name in upstream.headers}
+
+    @staticmethod
+    def _cached_response(entry: dict[str, Any], disposition: dict[str, str]) -> Response:
+        # FileResponse serves Range requests and HEAD from the cached body itself.
+        return FileResponse(
+            entry["path"],
+            media_type=entry.get("content_type") or "application/octet-stream",
+            headers={"ETag": entry["etag"], **disposition},
+        )
+
+
+def _content_length(response: httpx.Response) -> int | None:
+    try:
+        return int(response.headers["content-length"])
+    except (KeyError, TypeError, ValueError):
+        return None
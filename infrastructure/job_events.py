@@ -0,0 +1,260 @@
+import asyncio
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable
+
+JOB_EVENTS_CHANNEL_PREFIX = "job-events:"
+TERMINAL_JOB_STATUSES = frozenset({"finished", "failed", "stopped", "canceled"})
+
+CURRENT_JOB_ID_REF: contextvars.ContextVar = contextvars.ContextVar("CURRENT_JOB_ID_REF", default=None)
+
+
+def current_job_id() -> str | None:
+    """Id of the job running in this context: a local inline job or the current RQ job."""
+    job_id = CURRENT_JOB_ID_REF.get()
+    if job_id:
+        return str(job_id)
+    try:
+        from rq import get_current_job
+
+        job = get_current_job()
+    except Exception:
+        return None
+    return str(job.id) if job is not None else None
+
+
+class _Subscription:
+    def __init__(self, hub: "JobEventHub", job_id: str, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self._hub = hub
+        self.job_id = job_id
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(max_queue)))
+
+    def _offer(self, event: dict) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled reader loses intermediate progress, never the terminal status it re-checks.
+            pass
+
+    def deliver(self, event: dict) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            pass
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._hub._unsubscribe(self)
+
+
+class RedisJobEventTransport:
+    """Publishes job events on ``job-events:<job_id>`` and feeds one pattern listener per process."""
+
+    def __init__(self, redis_conn_factory: Callable[[], Any], *, channel_prefix: str = JOB_EVENTS_CHANNEL_PREFIX):
+        self._redis_conn_factory = redis_conn_factory
+        self._channel_prefix = channel_prefix
+
+    def publish(self, event: dict) -> None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return
+        conn.publish(f"{self._channel_prefix}{event['job_id']}", json.dumps(event, ensure_ascii=False, default=str))
+
+    def listen(self, deliver: Callable[[dict], None], stop_event: threading.Event) -> None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            stop_event.wait(5.0)
+            return
+        pubsub = conn.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.psubscribe(f"{self._channel_prefix}*")
+            while not stop_event.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if not message or message.get("type") != "pmessage":
+                    continue
+                data = message.get("data")
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                try:
+                    event = json.loads(data)
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(event, dict) and event.get("job_id"):
+                    deliver(event)
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+
+class JobEventHub:
+    """Fan-out of job progress events to streaming clients.
+
+    Events published in this process reach local subscribers directly, which is all
+    the local inline queue needs. With a transport, events are also published to Redis
+    so RQ workers reach API processes; each API process runs a single pattern listener
+    for all of its subscribers and ignores its own echoes. The latest events per job are
+    kept briefly so a client that connects mid-render still sees the current stage.
+    """
+
+    def __init__(
+        self,
+        *,
+        transport: Any = None,
+        replay_events: int = 8,
+        replay_jobs: int = 2048,
+        subscriber_queue_size: int = 64,
+        clock: Callable[[], float] = time.time,
+        logger: Any = None,
+    ):
+        self._transport = transport
+        self._replay_events = max(1, int(replay_events))
+        self._replay_jobs = max(1, int(replay_jobs))
+        self._subscriber_queue_size = subscriber_queue_size
+        self._clock = clock
+        self._logger = logger
+        self._origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[_Subscription]] = {}
+        self._recent: "OrderedDict[str, deque]" = OrderedDict()
+        self._seq = 0
+        self._listener: threading.Thread | None = None
+        self._listener_stop = threading.Event()
+        self._stats = {"published": 0, "delivered": 0, "remote_received": 0, "publish_errors": 0, "listener_restarts": 0}
+
+    def publish(self, job_id: str | None, event_type: str, **data: Any) -> dict | None:
+        if not job_id:
+            return None
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        event = {"job_id": str(job_id), "event": event_type, "ts": self._clock(), "seq": seq, "origin": self._origin, **data}
+        self._dispatch(event)
+        with self._lock:
+            self._stats["published"] += 1
+        if self._transport is not None:
+            try:
+                self._transport.publish(event)
+            except Exception as exc:
+                with self._lock:
+                    self._stats["publish_errors"] += 1
+                if self._logger is not None:
+                    self._logger.warning(f"[JobEvents] publish failed for {job_id}: {exc}")
+        return event
+
+    def _dispatch(self, event: dict) -> None:
+        job_id = event["job_id"]
+        with self._lock:
+            recent = self._recent.get(job_id)
+            if recent is None:
+                recent = self._recent[job_id] = deque(maxlen=self._replay_events)
+            recent.append(event)
+            self._recent.move_to_end(job_id)
+            while len(self._recent) > self._replay_jobs:
+                self._recent.popitem(last=False)
+            subscribers = list(self._subscribers.get(job_id, ()))
+            self._stats["delivered"] += len(subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _deliver_remote(self, event: dict) -> None:
+        if event.get("origin") == self._origin:
+            return
+        with self._lock:
+            self._stats["remote_received"] += 1
+        self._dispatch(event)
+
+    def subscribe(self, job_id: str) -> _Subscription:
+        """Subscribe from inside the event loop that will read the events."""
+        subscription = _Subscription(self, str(job_id), asyncio.get_running_loop(), self._subscriber_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(subscription.job_id, set()).add(subscription)
+            replay = list(self._recent.get(subscription.job_id, ()))
+        for event in replay:
+            subscription.deliver(event)
+        self._ensure_listener()
+        return subscription
+
+    def _unsubscribe(self, subscription: _Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.job_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.job_id]
+
+    def _ensure_listener(self) -> None:
+        if self._transport is None or not hasattr(self._transport, "listen"):
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen_forever, name="job-events-listener", daemon=True)
+            self._listener.start()
+
+    def _listen_forever(self) -> None:
+        backoff_sec = 0.5
+        while not self._listener_stop.is_set():
+            try:
+                self._transport.listen(self._deliver_remote, self._listener_stop)
+                backoff_sec = 0.5
+            except Exception as exc:
+                with self._lock:
+                    self._stats["listener_restarts"] += 1
+                if self._logger is not None:
+                    self._logger.warning(f"[JobEvents] listener error, reconnecting: {exc}")
+                self._listener_stop.wait(backoff_sec)
+                backoff_sec = min(10.0, backoff_sec * 2)
+
+    def close(self) -> None:
+        self._listener_stop.set()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "subscribers": sum(len(group) for group in self._subscribers.values()),
+                "tracked_jobs": len(self._recent),
+            }
+
+
+def with_job_status_events(worker_class: type, publish: Callable[..., Any]) -> type:
+    """RQ worker subclass that publishes started/finished/failed for every job it runs."""
+
+    def _publish(job: Any, status: str) -> None:
+        try:
+            publish(str(job.id), "status", status=status)
+        except Exception:
+            pass
+
+    class _JobEventWorker(worker_class):
+        def prepare_job_execution(self, job, *args, **kwargs):
+            result = super().prepare_job_execution(job, *args, **kwargs)
+            _publish(job, "started")
+            return result
+
+        def handle_job_success(self, job, *args, **kwargs):
+            result = super().handle_job_success(job, *args, **kwargs)
+            _publish(job, "finished")
+            return result
+
+        def handle_job_failure(self, job, *args, **kwargs):
+            result = super().handle_job_failure(job, *args, **kwargs)
+            _publish(job, "failed")
+            return result
+
+    _JobEventWorker.__name__ = worker_class.__name__
+    _JobEventWorker.__qualname__ = worker_class.__qualname__
+    return _JobEventWorker
@@ -0,0 +1,183 @@
+import bisect
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+
+def moodboard_lookup_parts(room: str, style: str, variant: Any) -> tuple[str, str, str]:
+    """Normalize a preset's room/style the same way reference preparation does."""
+    safe_room = str(room or "").lower().replace(" ", "")
+    safe_style = str(style or "").lower().replace(" ", "-").replace("_", "-")
+    return safe_room, safe_style, str(variant or "1")
+
+
+class S3MoodboardIndex:
+    """In-process index of the moodboard prefix, built from one paginated listing.
+
+    ``find`` answers from a sorted in-memory key list and memoizes each
+    (room, style, variant) answer, so preset renders never list S3 on the hot path. The
+    selection rule itself is injected (``select_key``) and is the same one the direct
+    S3 lookup uses. A listing older than ``refresh_sec`` is re-read on a background
+    thread while the current index keeps serving; the memo is only dropped when an
+    ETag/LastModified fingerprint of the listing changed.
+    """
+
+    def __init__(
+        self,
+        *,
+        get_s3_client: Callable[[], Any],
+        bucket: str,
+        prefix_root: str,
+        select_key: Callable[[str, str, str, str, Callable[[str, int], list[str]]], str | None],
+        refresh_sec: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        logger: Any = None,
+    ):
+        self._get_s3_client = get_s3_client
+        self._bucket = bucket
+        self._prefix_root = prefix_root or ""
+        self._select_key = select_key
+        self._refresh_sec = max(1.0, float(refresh_sec))
+        self._clock = clock
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._keys: list[str] | None = None
+        self._fingerprint: str | None = None
+        self._resolved: dict[tuple[str, str, str], str | None] = {}
+        self._built_at = 0.0
+        self._refresh_pid: int | None = None
+        self._stats = {
+            "lookups": 0,
+            "memo_hits": 0,
+            "list_calls": 0,
+            "refreshes": 0,
+            "rebuilds": 0,
+            "refresh_errors": 0,
+        }
+
+    def _list_objects(self) -> Iterable[dict]:
+        paginator = self._get_s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self._bucket, Prefix=self._prefix_root):
+            with self._lock:
+                self._stats["list_calls"] += 1
+            for obj in page.get("Contents") or []:
+                if obj.get("Key"):
+                    yield obj
+
+    @staticmethod
+    def _fingerprint_of(objects: list[dict]) -> str:
+        hasher = hashlib.sha256()
+        for obj in objects:
+            hasher.update(f"{obj.get('Key')}\0{obj.get('ETag')}\0{obj.get('LastModified')}\n".encode("utf-8"))
+        return hasher.hexdigest()
+
+    def refresh(self) -> bool:
+        """Re-list the prefix; returns True when the index changed."""
+        with self._build_lock:
+            return self._relist_locked()
+
+    def _ensure_built(self) -> None:
+        with self._build_lock:
+            # A concurrent warm-up may have finished the listing while this caller waited.
+            if self._keys is None:
+                self._relist_locked()
+
+    def _relist_locked(self) -> bool:
+        try:
+            objects = sorted(self._list_objects(), key=lambda obj: obj["Key"])
+        except Exception:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+                self._built_at = self._clock()
+            raise
+        fingerprint = self._fingerprint_of(objects)
+        with self._lock:
+            self._stats["refreshes"] += 1
+            self._built_at = self._clock()
+            if fingerprint == self._fingerprint:
+                return False
+            self._keys = [obj["Key"] for obj in objects]
+            self._fingerprint = fingerprint
+            self._resolved = {}
+            self._stats["rebuilds"] += 1
+        return True
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception as exc:
+            if self._logger is not None:
+                self._logger.warning(f"[MoodboardIndex] refresh failed: {exc}")
+        finally:
+            with self._lock:
+                self._refresh_pid = None
+
+    def _schedule_refresh_locked(self) -> None:
+        pid = os.getpid()
+        # A refresh flag inherited through fork belongs to a thread that no longer exists.
+        if self._refresh_pid == pid:
+            return
+        self._refresh_pid = pid
+        threading.Thread(target=self._refresh_in_background, name="moodboard-index-refresh", daemon=True).start()
+
+    def _keys_with_prefix(self, keys: list[str], prefix: str, max_keys: int) -> list[str]:
+        start = bisect.bisect_left(keys, prefix)
+        matched: list[str] = []
+        for key in keys[start:]:
+            if not key.startswith(prefix) or len(matched) >= max_keys:
+                break
+            matched.append(key)
+        return matched
+
+    def find(self, safe_room: str, safe_style: str, variant: str) -> str | None:
+        with self._lock:
+            built = self._keys is not None
+        if not built:
+            self._ensure_built()
+        lookup_key = (safe_room, safe_style, str(variant))
+        with self._lock:
+            self._stats["lookups"] += 1
+            if self._clock() - self._built_at >= self._refresh_sec:
+                self._schedule_refresh_locked()
+            keys = self._keys or []
+            resolved = self._resolved
+            if lookup_key in resolved:
+                self._stats["memo_hits"] += 1
+                return resolved[lookup_key]
+        key = self._select_key(
+            safe_room,
+            safe_style,
+            str(variant),
+            self._prefix_root,
+            lambda prefix, max_keys: self._keys_with_prefix(keys, prefix, max_keys),
+        )
+        resolved[lookup_key] = key
+        return key
+
+    def warm(self, preset_map: dict | None) -> int:
+        """Build the index and pre-resolve every preset's moodboard."""
+        if self._keys is None:
+            self._ensure_built()
+        warmed = 0
+        for preset in (preset_map or {}).values():
+            if not isinstance(preset, dict):
+                continue
+            room = preset.get("room") or preset.get("room_type") or preset.get("room_name")
+            style = preset.get("style")
+            if not room or not style:
+                continue
+            variant = preset.get("variant") or preset.get("variant_id") or preset.get("variant_index")
+            self.find(*moodboard_lookup_parts(room, style, variant))
+            warmed += 1
+        return warmed
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["keys"] = len(self._keys or [])
+            stats["resolved"] = len(self._resolved)
+            stats["age_sec"] = round(max(0.0, self._clock() - self._built_at), 3) if self._keys is not None else -1
+        return stats
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+PUBLISHED_URL_KEY_PREFIX = "published-url:"
+# Keys for content-addressed entries; only these are valid on other hosts.
+CONTENT_KEY_PREFIX = "sha256:"
+
+_MISSING = object()
+
+
+class RedisPublishedUrlTier:
+    def __init__(self, redis_conn_factory: Callable[[], Any], *, key_prefix: str = PUBLISHED_URL_KEY_PREFIX):
+        self._redis_conn_factory = redis_conn_factory
+        self._key_prefix = key_prefix
+
+    def get(self, key: str) -> str | None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return None
+        raw = conn.get(f"{self._key_prefix}{key}")
+        if not raw:
+            return None
+        return raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+
+    def set(self, key: str, url: str, ttl_sec: int) -> None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return
+        conn.set(f"{self._key_prefix}{key}", url, ex=max(1, int(ttl_sec)))
+
+    def delete(self, key: str) -> None:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return
+        conn.delete(f"{self._key_prefix}{key}")
+
+
+class PublishedUrlCache:
+    """Bounded LRU/TTL map of publish keys to public URLs.
+
+    Supports the dict operations ``publish_image`` uses, so it can replace the old
+    module-level dict. Content-addressed keys (``sha256:<digest>::<prefix>``) are also
+    written to the optional shared tier, which lets every web and worker process skip
+    uploading bytes another process already published under the same prefix.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 20000,
+        ttl_sec: int = 7 * 24 * 60 * 60,
+        shared_tier: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._max_entries = max(1, int(max_entries))
+        self._ttl_sec = max(1, int(ttl_sec))
+        self._shared_tier = shared_tier
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "local_hits": 0,
+            "shared_hits": 0,
+            "content_hits": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "shared_errors": 0,
+        }
+
+    @staticmethod
+    def _shared(key: str) -> bool:
+        return str(key).startswith(CONTENT_KEY_PREFIX)
+
+    def _put_local_locked(self, key: str, url: str) -> None:
+        self._entries[key] = (self._clock() + self._ttl_sec, url)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _record_hit_locked(self, key: str, *, shared: bool) -> None:
+        self._stats["hits"] += 1
+        self._stats["shared_hits" if shared else "local_hits"] += 1
+        if self._shared(key):
+            self._stats["content_hits"] += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not key:
+            return default
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, url = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self._record_hit_locked(key, shared=False)
+                    return url
+                del self._entries[key]
+                self._stats["expirations"] += 1
+        url = None
+        if self._shared_tier is not None and self._shared(key):
+            try:
+                url = self._shared_tier.get(key)
+            except Exception:
+                url = None
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+        with self._lock:
+            if not url:
+                self._stats["misses"] += 1
+                return default
+            self._record_hit_locked(key, shared=True)
+            self._put_local_locked(key, url)
+        return url
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key: str) -> str:
+        url = self.get(key, _MISSING)
+        if url is _MISSING:
+            raise KeyError(key)
+        return url
+
+    def __setitem__(self, key: str, url: str) -> None:
+        with self._lock:
+            self._put_local_locked(key, url)
+            self._stats["stores"] += 1
+        if self._shared_tier is not None and self._shared(key):
+            try:
+                self._shared_tier.set(key, url, self._ttl_sec)
+            except Exception:
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if self._shared_tier is not None and self._shared(key):
+            try:
+                self._shared_tier.delete(key)
+            except Exception:
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+        return entry[1] if entry is not None else default
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+def build_published_url_cache(
+    *,
+    backend: str = "memory",
+    max_entries: int = 20000,
+    ttl_sec: int = 7 * 24 * 60 * 60,
+    redis_conn_factory: Callable[[], Any] | None = None,
+) -> PublishedUrlCache:
+    shared_tier = None
+    if str(backend or "memory").strip().lower() == "redis" and redis_conn_factory is not None:
+        shared_tier = RedisPublishedUrlTier(redis_conn_factory)
+    return PublishedUrlCache(max_entries=max_entries, ttl_sec=ttl_sec, shared_tier=shared_tier)
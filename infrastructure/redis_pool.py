@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Any, Callable
+
+from redis import BlockingConnectionPool, Redis
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking pool that records checkouts and how long callers waited for a slot."""
+
+    def __init__(self, *args: Any, clock: Callable[[], float] = time.perf_counter, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._clock = clock
+        self._stats_lock = threading.Lock()
+        self._stats = _empty_pool_stats()
+
+    def get_connection(self, command_name, *keys, **options):
+        must_wait = self.pool.empty()
+        started_at = self._clock()
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except Exception:
+            self._record_checkout(must_wait, self._clock() - started_at, failed=True)
+            raise
+        self._record_checkout(must_wait, self._clock() - started_at, failed=False)
+        return connection
+
+    def _record_checkout(self, must_wait: bool, waited_sec: float, *, failed: bool) -> None:
+        with self._stats_lock:
+            if failed:
+                self._stats["checkout_errors"] += 1
+            else:
+                self._stats["checkouts"] += 1
+                self._stats["in_use"] += 1
+                self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+            if must_wait:
+                self._stats["waits"] += 1
+                self._stats["wait_sec_total"] += waited_sec
+                self._stats["max_wait_sec"] = max(self._stats["max_wait_sec"], waited_sec)
+
+    def release(self, connection):
+        with self._stats_lock:
+            self._stats["in_use"] = max(0, self._stats["in_use"] - 1)
+        super().release(connection)
+
+    def make_connection(self):
+        with self._stats_lock:
+            self._stats["connections_created"] += 1
+        return super().make_connection()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["max_connections"] = self.max_connections
+        stats["wait_sec_total"] = round(stats["wait_sec_total"], 6)
+        stats["max_wait_sec"] = round(stats["max_wait_sec"], 6)
+        return stats
+
+
+def _empty_pool_stats() -> dict[str, Any]:
+    return {
+        "checkouts": 0,
+        "checkout_errors": 0,
+        "waits": 0,
+        "wait_sec_total": 0.0,
+        "max_wait_sec": 0.0,
+        "in_use": 0,
+        "peak_in_use": 0,
+        "connections_created": 0,
+    }
+
+
+class RedisConnectionProvider:
+    """Process-wide Redis client backed by one shared, health-checked connection pool.
+
+    ``get()`` always returns the same ``Redis`` instance, so RQ queues, job fetches and
+    the staging store reuse warm sockets instead of opening a new pool per call.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        *,
+        max_connections: int = 32,
+        pool_timeout_sec: float = 5.0,
+        health_check_interval_sec: int = 30,
+        socket_connect_timeout_sec: float | None = 5.0,
+        socket_timeout_sec: float | None = None,
+    ):
+        self._redis_url = str(redis_url or "").strip()
+        self._max_connections = max(1, int(max_connections))
+        self._pool_timeout_sec = max(0.0, float(pool_timeout_sec))
+        self._health_check_interval_sec = max(0, int(health_check_interval_sec))
+        self._socket_connect_timeout_sec = socket_connect_timeout_sec
+        self._socket_timeout_sec = socket_timeout_sec
+        self._lock = threading.Lock()
+        self._pool: InstrumentedConnectionPool | None = None
+        self._client: Redis | None = None
+
+    def _build_pool(self) -> InstrumentedConnectionPool:
+        return InstrumentedConnectionPool.from_url(
+            self._redis_url,
+            max_connections=self._max_connections,
+            timeout=self._pool_timeout_sec,
+            health_check_interval=self._health_check_interval_sec,
+            socket_connect_timeout=self._socket_connect_timeout_sec,
+            socket_timeout=self._socket_timeout_sec,
+            socket_keepalive=True,
+        )
+
+    def get(self) -> Redis | None:
+        if not self._redis_url:
+            return None
+        with self._lock:
+            if self._client is None:
+                self._pool = self._build_pool()
+                self._client = Redis(connection_pool=self._pool)
+            return self._client
+
+    def reset(self) -> None:
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+            self._client = None
+        if pool is not None:
+            try:
+                pool.disconnect()
+            except Exception:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            pool = self._pool
+        if pool is None:
+            return {**_empty_pool_stats(), "max_connections": self._max_connections}
+        return pool.snapshot()
@@ -0,0 +1,319 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterator
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+PUBLISH_BATCH_REF: contextvars.ContextVar = contextvars.ContextVar("PUBLISH_BATCH_REF", default=None)
+
+
+class S3ClientProvider:
+    """Process-wide boto3 S3 client with a sized connection pool.
+
+    boto3 clients are thread-safe, so one instance serves every upload, job-result write
+    and listing in the process. The client is rebuilt after a fork because the
+    inherited sockets belong to the parent.
+    """
+
+    def __init__(
+        self,
+        region_name: str | None,
+        *,
+        max_pool_connections: int = 32,
+        connect_timeout_sec: float = 5.0,
+        read_timeout_sec: float = 60.0,
+        max_attempts: int = 5,
+        client_factory: Callable[[], Any] | None = None,
+    ):
+        self._region_name = region_name or None
+        self._max_pool_connections = max(1, int(max_pool_connections))
+        self._connect_timeout_sec = float(connect_timeout_sec)
+        self._read_timeout_sec = float(read_timeout_sec)
+        self._max_attempts = max(1, int(max_attempts))
+        self._client_factory = client_factory
+        self._lock = threading.Lock()
+        self._client: Any = None
+        self._pid: int | None = None
+        self._clients_created = 0
+
+    def _build_client(self) -> Any:
+        if self._client_factory is not None:
+            return self._client_factory()
+        return boto3.client(
+            "s3",
+            region_name=self._region_name,
+            config=Config(
+                max_pool_connections=self._max_pool_connections,
+                connect_timeout=self._connect_timeout_sec,
+                read_timeout=self._read_timeout_sec,
+                retries={"max_attempts": self._max_attempts, "mode": "standard"},
+            ),
+        )
+
+    def get(self) -> Any:
+        pid = os.getpid()
+        with self._lock:
+            if self._client is None or self._pid != pid:
+                self._client = self._build_client()
+                self._pid = pid
+                self._clients_created += 1
+            return self._client
+
+    def reset(self) -> None:
+        with self._lock:
+            self._client = None
+            self._pid = None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "clients_created": self._clients_created,
+                "max_pool_connections": self._max_pool_connections,
+            }
+
+
+class _PublishBatch:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: list[tuple[Any, tuple]] = []
+
+    def add(self, future: Any, upload: tuple) -> None:
+        with self._lock:
+            self._entries.append((future, upload))
+
+    def drain(self) -> list[tuple[Any, tuple]]:
+        with self._lock:
+            entries, self._entries = self._entries, []
+        return entries
+
+
+def _run_callback(callback: Callable[[], None] | None) -> None:
+    if callback is None:
+        return
+    try:
+        callback()
+    except Exception:
+        pass
+
+
+def _empty_publisher_stats() -> dict[str, Any]:
+    return {
+        "queued": 0,
+        "in_flight": 0,
+        "uploads": 0,
+        "deferred_uploads": 0,
+        "upload_errors": 0,
+        "multipart_uploads": 0,
+        "bytes_uploaded": 0,
+        "upload_sec_total": 0.0,
+        "max_upload_sec": 0.0,
+        "flushes": 0,
+        "flush_retries": 0,
+        "flush_wait_sec_total": 0.0,
+    }
+
+
+class S3Publisher:
+    """Uploads local files to S3 either inline or on a bounded background pool.
+
+    Outside a ``deferred()`` block ``upload`` behaves like a plain ``upload_file``. Inside
+    one, uploads are queued and the caller continues with the deterministic public URL;
+    leaving the block (or calling ``flush()``) waits for that block's uploads, retries
+    failures once inline and raises if any object is still missing. Large files go up
+    as multipart transfers.
+    """
+
+    def __init__(
+        self,
+        *,
+        get_s3_client: Callable[[], Any],
+        bucket: str,
+        max_workers: int = 8,
+        max_pending: int = 256,
+        multipart_threshold_bytes: int = 16 * 1024 * 1024,
+        multipart_chunk_bytes: int = 16 * 1024 * 1024,
+        transfer_concurrency: int = 4,
+        flush_timeout_sec: float | None = 300.0,
+        clock: Callable[[], float] = time.perf_counter,
+        logger: Any = None,
+    ):
+        self._get_s3_client = get_s3_client
+        self._bucket = bucket
+        self._max_workers = max(1, int(max_workers))
+        self._pending = threading.BoundedSemaphore(max(1, int(max_pending)))
+        self._multipart_threshold_bytes = max(5 * 1024 * 1024, int(multipart_threshold_bytes))
+        self._multipart_chunk_bytes = max(5 * 1024 * 1024, int(multipart_chunk_bytes))
+        self._transfer_concurrency = max(1, int(transfer_concurrency))
+        self._flush_timeout_sec = flush_timeout_sec
+        self._clock = clock
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._executor_ref: ThreadPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._transfer_config: Any = None
+        self._stats = _empty_publisher_stats()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        with self._lock:
+            # Worker threads do not survive a fork; a forked work horse needs its own pool.
+            if self._executor_ref is None or self._executor_pid != pid:
+                self._executor_ref = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="s3-publish")
+                self._executor_pid = pid
+            return self._executor_ref
+
+    def _config(self) -> Any:
+        if self._transfer_config is None:
+            self._transfer_config = TransferConfig(
+                multipart_threshold=self._multipart_threshold_bytes,
+                multipart_chunksize=self._multipart_chunk_bytes,
+                max_concurrency=self._transfer_concurrency,
+            )
+        return self._transfer_config
+
+    def _upload_now(self, local_path: str, key: str, content_type: str | None, *, dequeued: bool = False) -> None:
+        started_at = self._clock()
+        with self._lock:
+            # Moving from queued to in flight in one step keeps queue_depth + in_flight exact.
+            if dequeued:
+                self._stats["queued"] -= 1
+            self._stats["in_flight"] += 1
+        try:
+            size = os.path.getsize(local_path)
+            kwargs: dict[str, Any] = {"Config": self._config()}
+            if content_type:
+                kwargs["ExtraArgs"] = {"ContentType": content_type}
+            self._get_s3_client().upload_file(local_path, self._bucket, key, **kwargs)
+        except Exception:
+            with self._lock:
+                self._stats["upload_errors"] += 1
+            raise
+        finally:
+            elapsed = max(0.0, self._clock() - started_at)
+            with self._lock:
+                self._stats["in_flight"] -= 1
+                self._stats["upload_sec_total"] += elapsed
+                self._stats["max_upload_sec"] = max(self._stats["max_upload_sec"], elapsed)
+        with self._lock:
+            self._stats["uploads"] += 1
+            self._stats["bytes_uploaded"] += size
+            if size >= self._multipart_threshold_bytes:
+                self._stats["multipart_uploads"] += 1
+
+    def _run_queued(
+        self,
+        local_path: str,
+        key: str,
+        content_type: str | None,
+        on_success: Callable[[], None] | None,
+    ) -> None:
+        try:
+            self._upload_now(local_path, key, content_type, dequeued=True)
+        finally:
+            self._pending.release()
+        _run_callback(on_success)
+
+    def upload(
+        self,
+        local_path: str,
+        key: str,
+        content_type: str | None = None,
+        *,
+        on_failure: Callable[[], None] | None = None,
+        on_success: Callable[[], None] | None = None,
+    ) -> None:
+        """Upload now, or queue it inside ``deferred()``; ``on_success`` runs once the object exists."""
+        batch = PUBLISH_BATCH_REF.get()
+        if batch is None:
+            self._upload_now(local_path, key, content_type)
+            _run_callback(on_success)
+            return
+        self._pending.acquire()
+        with self._lock:
+            self._stats["queued"] += 1
+            self._stats["deferred_uploads"] += 1
+        try:
+            future = self._executor().submit(self._run_queued, local_path, key, content_type, on_success)
+        except Exception:
+            with self._lock:
+                self._stats["queued"] -= 1
+            self._pending.release()
+            raise
+        batch.add(future, (local_path, key, content_type, on_failure, on_success))
+
+    def flush(self, *, raise_on_error: bool = True) -> dict[str, Any]:
+        """Wait for the current deferred block's uploads; the barrier before a result is persisted."""
+        batch = PUBLISH_BATCH_REF.get()
+        entries = batch.drain() if batch is not None else []
+        summary = {"uploads": len(entries), "retried": 0, "failed": []}
+        if not entries:
+            return summary
+        started_at = self._clock()
+        wait([future for future, _ in entries], timeout=self._flush_timeout_sec)
+        failed_uploads = []
+        for future, upload in entries:
+            if not future.done():
+                failed_uploads.append((upload, False))
+            elif future.exception() is not None:
+                failed_uploads.append((upload, True))
+        for (local_path, key, content_type, on_failure, on_success), retryable in failed_uploads:
+            if retryable:
+                summary["retried"] += 1
+                try:
+                    self._upload_now(local_path, key, content_type)
+                    _run_callback(on_success)
+                    continue
+                except Exception as exc:
+                    self._log_warning(f"[S3Publish] upload failed for {key}: {exc}")
+            else:
+                self._log_warning(f"[S3Publish] upload still running after flush timeout: {key}")
+            summary["failed"].append(key)
+            _run_callback(on_failure)
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["flush_retries"] += summary["retried"]
+            self._stats["flush_wait_sec_total"] += max(0.0, self._clock() - started_at)
+        if summary["failed"] and raise_on_error:
+            raise RuntimeError(f"S3 upload failed for {len(summary['failed'])} object(s): {', '.join(summary['failed'][:5])}")
+        return summary
+
+    @contextlib.contextmanager
+    def deferred(self) -> Iterator[None]:
+        """Queue uploads made in this context and flush them when it exits."""
+        if PUBLISH_BATCH_REF.get() is not None:
+            yield
+            return
+        token = PUBLISH_BATCH_REF.set(_PublishBatch())
+        try:
+            try:
+                yield
+            except BaseException:
+                self.flush(raise_on_error=False)
+                raise
+            self.flush()
+        finally:
+            PUBLISH_BATCH_REF.reset(token)
+
+    def _log_warning(self, message: str) -> None:
+        if self._logger is not None:
+            try:
+                self._logger.warning(message)
+                return
+            except Exception:
+                pass
+        print(message, flush=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = stats.pop("queued")
+        stats["upload_sec_total"] = round(stats["upload_sec_total"], 6)
+        stats["max_upload_sec"] = round(stats["max_upload_sec"], 6)
+        stats["flush_wait_sec_total"] = round(stats["flush_wait_sec_total"], 6)
+        return stats
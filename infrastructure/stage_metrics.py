@@ -0,0 +1,138 @@
+import re
+import threading
+from typing import Any, Callable, Iterable
+
+STAGE_METRICS_REDIS_KEY = "render:stage-metrics"
+STAGE_METRIC_FIELDS = ("runs", "wall_sec", "model_calls", "bytes_in", "bytes_out")
+
+_METRIC_NAME_UNSAFE = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+class RedisStageMetricsTier:
+    """Cross-process counters in one Redis hash so API and RQ workers report the same totals."""
+
+    def __init__(self, redis_conn_factory: Callable[[], Any], *, key: str = STAGE_METRICS_REDIS_KEY):
+        self._redis_conn_factory = redis_conn_factory
+        self._key = key
+
+    def increment(self, deltas: dict[tuple[str, str], float]) -> None:
+        conn = self._redis_conn_factory()
+        if conn is None or not deltas:
+            return
+        pipe = conn.pipeline(transaction=False)
+        for (stage, field), amount in deltas.items():
+            pipe.hincrbyfloat(self._key, f"{stage}|{field}", float(amount))
+        pipe.execute()
+
+    def read(self) -> dict[tuple[str, str], float]:
+        conn = self._redis_conn_factory()
+        if conn is None:
+            return {}
+        counters: dict[tuple[str, str], float] = {}
+        for raw_field, raw_value in (conn.hgetall(self._key) or {}).items():
+            field = raw_field.decode("utf-8") if isinstance(raw_field, bytes) else str(raw_field)
+            stage, _, name = field.rpartition("|")
+            if not stage or name not in STAGE_METRIC_FIELDS:
+                continue
+            try:
+                counters[(stage, name)] = float(raw_value)
+            except (TypeError, ValueError):
+                continue
+        return counters
+
+
+class StageMetricsRegistry:
+    """Process-wide totals of per-stage render spans, rendered in Prometheus text format."""
+
+    def __init__(self, *, shared_tier: Any = None, logger: Any = None):
+        self._shared_tier = shared_tier
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, str], float] = {}
+
+    def observe(self, spans: dict[str, Any] | None) -> None:
+        deltas: dict[tuple[str, str], float] = {}
+        for row in (spans or {}).get("stages") or []:
+            if not isinstance(row, dict) or not row.get("stage"):
+                continue
+            stage = str(row["stage"])
+            deltas[(stage, "runs")] = 1.0
+            for field in STAGE_METRIC_FIELDS[1:]:
+                deltas[(stage, field)] = float(row.get(field) or 0)
+        if not deltas:
+            return
+        deltas[("__render__", "runs")] = 1.0
+        deltas[("__render__", "wall_sec")] = float((spans or {}).get("total_wall_sec") or 0)
+        with self._lock:
+            for key, amount in deltas.items():
+                self._counters[key] = self._counters.get(key, 0.0) + amount
+        if self._shared_tier is not None:
+            try:
+                self._shared_tier.increment(deltas)
+            except Exception as exc:
+                if self._logger is not None:
+                    self._logger.warning(f"[StageMetrics] shared tier update failed: {exc}")
+
+    def counters(self) -> dict[tuple[str, str], float]:
+        if self._shared_tier is not None:
+            try:
+                return self._shared_tier.read()
+            except Exception as exc:
+                if self._logger is not None:
+                    self._logger.warning(f"[StageMetrics] shared tier read failed: {exc}")
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+    def render_prometheus(self, extra_gauges: dict[str, dict[str, Any]] | None = None) -> str:
+        counters = self.counters()
+        lines: list[str] = []
+        stages = sorted({stage for stage, _ in counters if stage != "__render__"})
+
+        lines.extend(_metric_header("render_requests_total", "counter", "Render workflows that finished."))
+        lines.append(f"render_requests_total {_format_value(counters.get(('__render__', 'runs'), 0))}")
+        lines.extend(_metric_header("render_wall_seconds_total", "counter", "Wall time of finished render workflows."))
+        lines.append(f"render_wall_seconds_total {_format_value(counters.get(('__render__', 'wall_sec'), 0))}")
+
+        for field, metric, help_text in (
+            ("runs", "render_stage_runs_total", "Render workflows that entered the stage."),
+            ("wall_sec", "render_stage_wall_seconds_total", "Wall time spent in the stage."),
+            ("model_calls", "render_stage_model_calls_total", "Model calls issued while the stage was open."),
+            ("bytes_in", "render_stage_model_bytes_in_total", "Estimated bytes sent to models."),
+            ("bytes_out", "render_stage_model_bytes_out_total", "Estimated bytes received from models."),
+        ):
+            lines.extend(_metric_header(metric, "counter", help_text))
+            for stage in stages:
+                lines.append(f'{metric}{{stage="{_escape_label(stage)}"}} {_format_value(counters.get((stage, field), 0))}')
+
+        for group, values in (extra_gauges or {}).items():
+            lines.extend(_gauge_lines(group, values))
+        return "\n".join(lines) + "\n"
+
+
+def _metric_header(name: str, metric_type: str, help_text: str) -> list[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+
+
+def _gauge_lines(group: str, values: dict[str, Any] | None) -> Iterable[str]:
+    prefix = _METRIC_NAME_UNSAFE.sub("_", str(group or "").strip().lower())
+    for key, value in sorted((values or {}).items()):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{_METRIC_NAME_UNSAFE.sub('_', str(key).lower())}"
+        yield f"# TYPE {name} gauge"
+        yield f"{name} {_format_value(value)}"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: Any) -> str:
+    number = float(value or 0)
+    if number.is_integer():
+        return str(int(number))
+    return repr(round(number, 6))
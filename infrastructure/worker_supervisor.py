@@ -0,0 +1,318 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timezone
+from typing import Any, Callable
+
+from rq.utils import utcparse
+
+QUEUE_KEY_PREFIX = "rq:queue:"
+JOB_KEY_PREFIX = "rq:job:"
+STARTED_REGISTRY_KEY_TEMPLATE = "rq:wip:{0}"
+
+
+@dataclass(frozen=True)
+class QueuePoolSpec:
+    """One dedicated process pool: which queues its children listen to and its size bounds."""
+
+    name: str
+    queues: tuple[str, ...]
+    min_workers: int = 1
+    max_workers: int = 1
+
+
+@dataclass(frozen=True)
+class QueueLoad:
+    depth: int = 0
+    started: int = 0
+    oldest_age_sec: float = 0.0
+
+
+def _decode(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return str(value or "")
+
+
+def read_queue_load(redis_conn: Any, queue_name: str, *, now: float | None = None) -> QueueLoad:
+    """Depth, running jobs and age of the oldest waiting job, read straight from RQ's keys.
+
+    RQ pushes to the right of ``rq:queue:<name>`` and pops from the left, so index 0 is
+    the job that has waited longest.
+    """
+    queue_key = f"{QUEUE_KEY_PREFIX}{queue_name}"
+    depth = int(redis_conn.llen(queue_key) or 0)
+    started = int(redis_conn.zcard(STARTED_REGISTRY_KEY_TEMPLATE.format(queue_name)) or 0)
+    oldest_age_sec = 0.0
+    if depth:
+        head = redis_conn.lindex(queue_key, 0)
+        enqueued_at = redis_conn.hget(f"{JOB_KEY_PREFIX}{_decode(head)}", "enqueued_at") if head else None
+        if enqueued_at:
+            try:
+                enqueued_ts = utcparse(_decode(enqueued_at)).replace(tzinfo=timezone.utc).timestamp()
+                oldest_age_sec = max(0.0, (time.time() if now is None else now) - enqueued_ts)
+            except Exception:
+                oldest_age_sec = 0.0
+    return QueueLoad(depth=depth, started=started, oldest_age_sec=oldest_age_sec)
+
+
+def read_process_rss_mb(pid: int, *, proc_root: str = "/proc") -> float | None:
+    try:
+        with open(f"{proc_root}/{int(pid)}/status", "r", encoding="ascii", errors="ignore") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except Exception:
+        return None
+    return None
+
+
+def _descendant_pids(pid: int, *, proc_root: str = "/proc") -> list[int]:
+    children: dict[int, list[int]] = {}
+    try:
+        entries = [name for name in os.listdir(proc_root) if name.isdigit()]
+    except OSError:
+        return []
+    for name in entries:
+        try:
+            with open(f"{proc_root}/{name}/stat", "r", encoding="ascii", errors="ignore") as stat_file:
+                # The command name may contain spaces or parentheses; ppid follows the last ")".
+                ppid = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+        except Exception:
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    found, pending = [], list(children.get(int(pid), []))
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(children.get(child, []))
+    return found
+
+
+def read_process_tree_rss_mb(pid: int, *, proc_root: str = "/proc") -> float | None:
+    """RSS of ``pid`` plus all its descendants, e.g. an RQ worker and its forked work horse."""
+    own = read_process_rss_mb(pid, proc_root=proc_root)
+    if own is None:
+        return None
+    descendants = _descendant_pids(pid, proc_root=proc_root)
+    return own + sum(read_process_rss_mb(child, proc_root=proc_root) or 0.0 for child in descendants)
+
+
+@dataclass
+class _Child:
+    process: Any
+    started_at: float
+    retiring: bool = False
+    retire_reason: str = ""
+
+
+@dataclass
+class _PoolState:
+    spec: QueuePoolSpec
+    children: list[_Child] = field(default_factory=list)
+    desired: int = 0
+    idle_since: float | None = None
+    restart_not_before: float = 0.0
+    crash_streak: int = 0
+    load: QueueLoad = field(default_factory=QueueLoad)
+    stats: dict[str, int] = field(
+        default_factory=lambda: {"spawned": 0, "crashed": 0, "recycled": 0, "retired": 0, "scaled_up": 0, "scaled_down": 0}
+    )
+
+
+class WorkerSupervisor:
+    """Keeps one process pool per queue group sized to its backlog.
+
+    Every ``tick`` reaps exited children, reads each pool's queue depth, running jobs
+    and oldest job age from Redis, and moves the pool towards ``running + waiting``
+    jobs within ``[min_workers, max_workers]``. A pool scales up as soon as a job has
+    waited ``scale_up_age_sec``; it shrinks one child per tick only after its queues
+    have been empty for ``scale_down_idle_sec``. Surplus or oversized children get a
+    SIGTERM, which RQ treats as a warm shutdown after the current job. Children exit on
+    their own after ``max_jobs`` (passed to the worker), and any child that dies with a
+    non-zero code is replaced with an exponential restart backoff.
+
+    ``max_rss_mb`` is checked against each child's whole process tree, because a forking
+    RQ ``Worker`` runs jobs (and grows PIL buffers) in a per-job work horse. An oversized
+    tree retires the worker once its current job finishes; the running job is not killed.
+    """
+
+    def __init__(
+        self,
+        pools: list[QueuePoolSpec],
+        *,
+        redis_conn: Any,
+        spawn: Callable[[QueuePoolSpec], Any],
+        scale_up_age_sec: float = 5.0,
+        scale_down_idle_sec: float = 120.0,
+        max_rss_mb: float = 0.0,
+        restart_backoff_sec: float = 1.0,
+        max_restart_backoff_sec: float = 60.0,
+        rss_reader: Callable[[int], float | None] = read_process_tree_rss_mb,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        logger: Any = None,
+    ):
+        self._pools = [_PoolState(spec=spec, desired=max(0, spec.min_workers)) for spec in pools]
+        self._redis_conn = redis_conn
+        self._spawn = spawn
+        self._scale_up_age_sec = max(0.0, float(scale_up_age_sec))
+        self._scale_down_idle_sec = max(0.0, float(scale_down_idle_sec))
+        self._max_rss_mb = max(0.0, float(max_rss_mb or 0.0))
+        self._restart_backoff_sec = max(0.0, float(restart_backoff_sec))
+        self._max_restart_backoff_sec = max(self._restart_backoff_sec, float(max_restart_backoff_sec))
+        self._rss_reader = rss_reader
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._logger = logger
+
+    def _log(self, message: str) -> None:
+        if self._logger is not None:
+            self._logger.info(f"[Supervisor] {message}")
+        else:
+            print(f"[Supervisor] {message}", flush=True)
+
+    def _read_load(self, spec: QueuePoolSpec) -> QueueLoad | None:
+        try:
+            loads = [read_queue_load(self._redis_conn, queue, now=self._wall_clock()) for queue in spec.queues]
+        except Exception as exc:
+            self._log(f"pool={spec.name} load read failed: {exc}")
+            return None
+        return QueueLoad(
+            depth=sum(load.depth for load in loads),
+            started=sum(load.started for load in loads),
+            oldest_age_sec=max((load.oldest_age_sec for load in loads), default=0.0),
+        )
+
+    def _reap(self, pool: _PoolState, now: float) -> None:
+        alive = []
+        for child in pool.children:
+            if child.process.is_alive():
+                if not child.retiring and now - child.started_at >= self._max_restart_backoff_sec:
+                    pool.crash_streak = 0
+                alive.append(child)
+                continue
+            exitcode = child.process.exitcode
+            if child.retiring:
+                pool.stats["retired"] += 1
+            elif exitcode == 0:
+                # RQ returns cleanly once max_jobs is reached.
+                pool.stats["recycled"] += 1
+            else:
+                pool.stats["crashed"] += 1
+                pool.crash_streak += 1
+                backoff = min(self._max_restart_backoff_sec, self._restart_backoff_sec * (2 ** (pool.crash_streak - 1)))
+                pool.restart_not_before = now + backoff
+                self._log(f"pool={pool.spec.name} pid={child.process.pid} exited code={exitcode}; restart in {backoff:.1f}s")
+        pool.children = alive
+
+    def _retire(self, pool: _PoolState, child: _Child, reason: str) -> None:
+        child.retiring = True
+        child.retire_reason = reason
+        try:
+            child.process.terminate()
+        except Exception:
+            pass
+        self._log(f"pool={pool.spec.name} pid={child.process.pid} retiring ({reason})")
+
+    def _desired(self, pool: _PoolState, load: QueueLoad, now: float) -> int:
+        spec = pool.spec
+        needed = min(spec.max_workers, max(spec.min_workers, load.started + load.depth))
+        if load.depth:
+            pool.idle_since = None
+            if needed > pool.desired and load.oldest_age_sec >= self._scale_up_age_sec:
+                return needed
+            return max(pool.desired, spec.min_workers)
+        if pool.idle_since is None:
+            pool.idle_since = now
+        if needed < pool.desired and now - pool.idle_since >= self._scale_down_idle_sec:
+            return pool.desired - 1
+        return pool.desired
+
+    def tick(self) -> None:
+        now = self._clock()
+        for pool in self._pools:
+            self._reap(pool, now)
+            load = self._read_load(pool.spec)
+            if load is not None:
+                pool.load = load
+                desired = self._desired(pool, load, now)
+                if desired > pool.desired:
+                    pool.stats["scaled_up"] += 1
+                    self._log(f"pool={pool.spec.name} scale {pool.desired}->{desired} depth={load.depth} oldest={load.oldest_age_sec:.0f}s")
+                elif desired < pool.desired:
+                    pool.stats["scaled_down"] += 1
+                    self._log(f"pool={pool.spec.name} scale {pool.desired}->{desired} (idle)")
+                pool.desired = desired
+
+            active = [child for child in pool.children if not child.retiring]
+            if self._max_rss_mb > 0:
+                for child in active:
+                    rss_mb = self._rss_reader(child.process.pid)
+                    if rss_mb is not None and rss_mb > self._max_rss_mb:
+                        self._retire(pool, child, f"rss={rss_mb:.0f}MB")
+                active = [child for child in active if not child.retiring]
+            for child in active[pool.desired :]:
+                self._retire(pool, child, "scale down")
+            active = active[: pool.desired]
+
+            if now < pool.restart_not_before:
+                continue
+            for _ in range(pool.desired - len(active)):
+                process = self._spawn(pool.spec)
+                pool.children.append(_Child(process=process, started_at=now))
+                pool.stats["spawned"] += 1
+
+    def run(self, stop_event: threading.Event, *, interval_sec: float = 2.0) -> None:
+        while not stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as exc:
+                self._log(f"tick failed: {exc}")
+            stop_event.wait(max(0.1, float(interval_sec)))
+        self.shutdown()
+
+    def shutdown(self, *, timeout_sec: float = 30.0) -> None:
+        for pool in self._pools:
+            for child in pool.children:
+                if not child.retiring:
+                    self._retire(pool, child, "shutdown")
+        deadline = time.monotonic() + max(0.0, timeout_sec)
+        for pool in self._pools:
+            for child in pool.children:
+                join = getattr(child.process, "join", None)
+                if join is not None:
+                    join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            pool.spec.name: {
+                "desired": pool.desired,
+                "alive": len(pool.children),
+                "retiring": len([child for child in pool.children if child.retiring]),
+                "queue_depth": pool.load.depth,
+                "started_jobs": pool.load.started,
+                "oldest_job_age_sec": round(pool.load.oldest_age_sec, 1),
+                **pool.stats,
+            }
+            for pool in self._pools
+        }
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)) or default)
+
+
+def build_queue_pool_specs(pool_queues: dict[str, list[str]]) -> list[QueuePoolSpec]:
+    """Pool specs from ``RQ_POOL_<NAME>_MIN`` / ``RQ_POOL_<NAME>_MAX`` (defaults 1/1)."""
+    specs = []
+    for name, queues in pool_queues.items():
+        if not queues:
+            continue
+        env_name = name.upper()
+        min_workers = max(0, _env_int(f"RQ_POOL_{env_name}_MIN", 1))
+        max_workers = max(min_workers, 1, _env_int(f"RQ_POOL_{env_name}_MAX", max(1, min_workers)))
+        specs.append(QueuePoolSpec(name=name, queues=tuple(queues), min_workers=min_workers, max_workers=max_workers))
+    return specs
+
@@ -9,13 +9,11 @@ from urllib.parse import urlparse
 import shutil
 import base64
 import uuid
-import requests
 import json
-import boto3
 import mimetypes
 from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.concurrency import run_in_threadpool
 from application.details.detail_generation_stage import generate_detail_view as generate_detail_view_stage
@@ -36,6 +34,7 @@ from application.http.queue_route_handlers import (
     handle_generate_frontal_view_async,
     handle_generate_image_edit_async,
     handle_get_job_status,
+    handle_stream_job_events,
     handle_patch_external_tracker_manifest,
     handle_regenerate_single_detail,
     handle_render_room_async,
@@ -75,6 +74,7 @@ from application.render.furniture_specs_stage import (
 from application.render.item_analysis_stage import (
     _crop_item_with_padding as crop_item_with_padding_stage,
     analyze_cropped_item as analyze_cropped_item_stage,
+    analyze_cropped_items_batched as analyze_cropped_items_batched_stage,
     detect_furniture_boxes as detect_furniture_boxes_stage,
 )
 from application.render.postprocess_support import (
@@ -94,6 +94,7 @@ from application.render.render_contracts import (
 )
 from application.render.direct_item_image_prep import prepare_direct_item_image
 from application.render.render_room_workflow import run_render_room_workflow
+from application.render.render_stage_spans import StageSpanRecorder, instrument_model_caller
 from application.render.render_workflow_contracts import (
     RenderWorkflowAnalysisServices,
     RenderWorkflowDependencies,
@@ -142,6 +143,7 @@ from application.video.queueing import (
     publish_video_state_outputs,
 )
 from application.video.source_generation_workflow import queue_source_generation_job, run_source_generation_job
+from application.video.video_support import DEFAULT_ENCODER_PROFILE, resolve_encoder_profile
 from application.video.video_support import download_to_path as _download_to_path
 from dotenv import load_dotenv
 from infrastructure.ai.analysis_provider_dispatch import (
@@ -149,7 +151,10 @@ from infrastructure.ai.analysis_provider_dispatch import (
     build_analysis_provider_dispatch,
 )
 from infrastructure.ai.image_provider_dispatch import build_image_provider_dispatch
+from infrastructure.ai.model_call_governor import PRIORITY_GENERATION, build_model_call_governor
+from infrastructure.ai.analysis_result_cache import build_analysis_result_cache, file_sha256
 from infrastructure.ai.gemini_client import call_gemini_with_failover as call_gemini_with_failover_impl
+from infrastructure.ai.gemini_quota_ledger import build_gemini_quota_ledger
 from infrastructure.ai.openai_analysis_client import call_openai_analysis as call_openai_analysis_impl
 from infrastructure.ai.openai_image_client import call_openai_image as call_openai_image_impl
 from infrastructure.ai.provider_defaults import (
@@ -161,6 +166,8 @@ from infrastructure.ai.freepik_kling_client import (
     build_kling_endpoint,
     create_kling_task as create_kling_task_impl,
     poll_kling_task as poll_kling_task_impl,
+    register_kling_poll_provider,
+    track_kling_task as track_kling_task_impl,
 )
 from infrastructure.ai.gemini_policy import allow_all_safety_settings, allow_harassment_only_safety_settings
 from infrastructure.ai.gemini_prompts import (
@@ -170,7 +177,16 @@ from infrastructure.ai.gemini_prompts import (
     build_image_edit_step_prompt,
     build_moodboard_generation_prompt,
 )
-from infrastructure.ai.magnific_client import call_magnific_api as call_magnific_api_impl
+from infrastructure.ai.magnific_client import MagnificClient
+from infrastructure.ai.provider_task_poller import ProviderTaskPoller
+from infrastructure.asset_index import LocalAssetIndex, etag_matches
+from infrastructure.download_proxy import AsyncDownloadProxy, DownloadDiskCache
+from infrastructure.job_events import JobEventHub, RedisJobEventTransport, current_job_id
+from infrastructure.moodboard_index import S3MoodboardIndex
+from infrastructure.published_url_cache import build_published_url_cache
+from infrastructure.redis_pool import RedisConnectionProvider
+from infrastructure.s3_publisher import S3ClientProvider, S3Publisher
+from infrastructure.stage_metrics import RedisStageMetricsTier, StageMetricsRegistry
 from styles_config import STYLES, ROOM_STYLES
 from PIL import Image, ImageOps
 import re
@@ -182,7 +198,6 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import gc
 from typing import Optional, List, Dict, Any
 from contextvars import ContextVar
-from redis import Redis
 from rq import Queue, Retry, get_current_job
 from rq.job import Job
 from api_models import (
@@ -204,7 +219,6 @@ from api_models import (
     VideoClip,
     VideoCreateRequest,
 )
-from preset_helpers import load_preset_map
 from application.http.internal_render_form_parser import parse_internal_render_items_form
 from render_route_services import (
     build_detail_generation_job_payload,
@@ -239,11 +253,11 @@ from storage_helpers import (
     s3_prefix_from_url,
     s3_public_url,
     save_job_result_s3,
+    select_moodboard_key,
 )
 from shared.image_canvas import (
     match_aspect_to_target as match_aspect_to_target_shared,
     pad_image_to_target_canvas as pad_image_to_target_canvas_shared,
-    set_png_dpi as set_png_dpi_shared,
     standardize_image as standardize_image_shared,
     standardize_image_to_reference_canvas as standardize_image_to_reference_canvas_shared,
     standardize_image_to_target_canvas as standardize_image_to_target_canvas_shared,
@@ -410,7 +424,17 @@ print(f"[Env] API key count: {len(API_KEY_POOL)}", flush=True)
 MAGNIFIC_API_KEY = os.getenv("MAGNIFIC_API_KEY")
 MAGNIFIC_ENDPOINT = os.getenv("MAGNIFIC_ENDPOINT", "https://api.freepik.com/v1/ai/image-upscaler")
 TOTAL_TIMEOUT_LIMIT = max(60, int(os.getenv("TOTAL_TIMEOUT_LIMIT", "1800")))
+RENDER_RACE_EXTERNAL_VARIANTS = os.getenv("RENDER_RACE_EXTERNAL_VARIANTS", "0").strip().lower() in ("1", "true", "yes", "y")
+RENDER_VARIANT_RACE_MIN_BUDGET_SEC = max(0.0, float(os.getenv("RENDER_VARIANT_RACE_MIN_BUDGET_SEC", "60") or 60))
+ITEM_ANALYSIS_BATCH_SIZE = max(0, int(os.getenv("ITEM_ANALYSIS_BATCH_SIZE", "0") or 0))
 REDIS_URL = os.getenv("REDIS_URL", "").strip()
+REDIS_CONNECTIONS = RedisConnectionProvider(
+    REDIS_URL,
+    max_connections=int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", "32") or 32),
+    pool_timeout_sec=float(os.getenv("REDIS_POOL_TIMEOUT_SEC", "5") or 5),
+    health_check_interval_sec=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SEC", "30") or 30),
+    socket_connect_timeout_sec=float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT_SEC", "5") or 5),
+)
 LOCAL_INLINE_QUEUE_ENABLED = os.getenv("LOCAL_INLINE_QUEUE", "0").strip().lower() in ("1", "true", "yes", "y")
 
 def _split_queue_names(val: str) -> List[str]:
@@ -454,7 +478,30 @@ INTERNAL_INTEA_API_KEYS = set()
 EXTERNAL_INTEA_API_KEYS = set()
 PRESET_MAP_PATH = os.getenv("PRESET_MAP_PATH", "").strip()
 CART_LIMITS_JSON = os.getenv("CART_LIMITS_JSON", "").strip()
-_PUBLISHED_URL_CACHE = {}
+PUBLISHED_URL_CACHE_BACKEND = os.getenv("PUBLISHED_URL_CACHE_BACKEND", "redis" if REDIS_URL else "memory").strip().lower()
+_PUBLISHED_URL_CACHE = build_published_url_cache(
+    backend=PUBLISHED_URL_CACHE_BACKEND,
+    max_entries=int(os.getenv("PUBLISHED_URL_CACHE_MAX_ENTRIES", "20000") or 20000),
+    ttl_sec=int(os.getenv("PUBLISHED_URL_CACHE_TTL_SEC", "604800") or 604800),
+    redis_conn_factory=lambda: _get_redis_conn() if REDIS_URL else None,
+)
+S3_CLIENTS = S3ClientProvider(
+    AWS_REGION,
+    max_pool_connections=int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32") or 32),
+    connect_timeout_sec=float(os.getenv("S3_CONNECT_TIMEOUT_SEC", "5") or 5),
+    read_timeout_sec=float(os.getenv("S3_READ_TIMEOUT_SEC", "60") or 60),
+)
+S3_PUBLISHER = S3Publisher(
+    get_s3_client=lambda: S3_CLIENTS.get(),
+    bucket=S3_BUCKET,
+    max_workers=int(os.getenv("S3_PUBLISH_MAX_WORKERS", "8") or 8),
+    max_pending=int(os.getenv("S3_PUBLISH_MAX_PENDING", "256") or 256),
+    multipart_threshold_bytes=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16") or 16) * 1024 * 1024,
+    multipart_chunk_bytes=int(os.getenv("S3_MULTIPART_CHUNK_MB", "16") or 16) * 1024 * 1024,
+    transfer_concurrency=int(os.getenv("S3_TRANSFER_CONCURRENCY", "4") or 4),
+    flush_timeout_sec=float(os.getenv("S3_PUBLISH_FLUSH_TIMEOUT_SEC", "300") or 300),
+    logger=logging.getLogger("app"),
+)
 
 def _normalize_audience(audience: Optional[str]) -> str:
     aud = (audience or DEFAULT_AUDIENCE or "internal").strip().lower()
@@ -489,6 +536,17 @@ INTERNAL_INTEA_API_KEYS = _parse_key_list(os.getenv("INTERNAL_INTEA_API_KEYS", "
 EXTERNAL_INTEA_API_KEYS = _parse_key_list(os.getenv("EXTERNAL_INTEA_API_KEYS", ""))
 DOWNLOAD_ALLOWED_HOSTS = _parse_key_list(os.getenv("DOWNLOAD_ALLOWED_HOSTS", ""))
 DOWNLOAD_ALLOW_PUBLIC_CLOUD_HOSTS = os.getenv("DOWNLOAD_ALLOW_PUBLIC_CLOUD_HOSTS", "0").strip().lower() in ("1", "true", "yes", "y")
+DOWNLOAD_CACHE_ENABLED = os.getenv("DOWNLOAD_CACHE_ENABLED", "1").strip().lower() in ("1", "true", "yes", "y")
+DOWNLOAD_PROXY = AsyncDownloadProxy(
+    cache=DownloadDiskCache(
+        os.getenv("DOWNLOAD_CACHE_DIR", str(OUTPUTS_DIR / ".download_cache")),
+        max_bytes=int(os.getenv("DOWNLOAD_CACHE_MAX_MB", "2048") or 2048) * 1024 * 1024,
+        max_object_bytes=int(os.getenv("DOWNLOAD_CACHE_MAX_OBJECT_MB", "512") or 512) * 1024 * 1024,
+        fresh_sec=float(os.getenv("DOWNLOAD_CACHE_FRESH_SEC", "300") or 300),
+    )
+    if DOWNLOAD_CACHE_ENABLED
+    else None,
+)
 OUTPUTS_API_ROLE = os.getenv("OUTPUTS_API_ROLE", "").strip().lower()
 OUTPUTS_API_ENABLED = os.getenv("OUTPUTS_API_ENABLED", "1").strip().lower() in ("1", "true", "yes", "y")
 OUTPUTS_UPLOAD_MAX_MB = max(1, int(os.getenv("OUTPUTS_UPLOAD_MAX_MB", "25") or "25"))
@@ -515,7 +573,6 @@ CORS_ALLOW_CREDENTIALS = os.getenv(
     "0" if "*" in CORS_ALLOW_ORIGINS else "1",
 ).strip().lower() in ("1", "true", "yes", "y")
 
-PRESET_MAP_CACHE = None
 
 DEFAULT_CART_LIMITS = {
     "sofa": 2,
@@ -543,7 +600,7 @@ def _s3_enabled() -> bool:
     return s3_enabled(S3_BUCKET, AWS_REGION)
 
 def _get_s3_client():
-    return boto3.client("s3", region_name=AWS_REGION or None)
+    return S3_CLIENTS.get()
 
 def _normalize_s3_prefix(prefix: str) -> str:
     return normalize_s3_prefix(prefix)
@@ -608,6 +665,11 @@ def _s3_list_keys(prefix: str, max_keys: int = 1000) -> list[str]:
     return s3_list_keys(prefix, S3_BUCKET, AWS_REGION, _get_s3_client, max_keys=max_keys)
 
 def _find_s3_moodboard_key(safe_room: str, safe_style: str, variant: str) -> Optional[str]:
+    if MOODBOARD_INDEX is not None:
+        try:
+            return MOODBOARD_INDEX.find(safe_room, safe_style, variant)
+        except Exception as exc:
+            logging.getLogger("app").warning(f"[MoodboardIndex] lookup failed, listing S3 directly: {exc}")
     return find_s3_moodboard_key(safe_room, safe_style, variant, _build_s3_prefix, _s3_list_keys)
 
 def publish_image(local_path: Optional[str], s3_prefix_override: Optional[str] = None) -> Optional[str]:
@@ -619,6 +681,8 @@ def publish_image(local_path: Optional[str], s3_prefix_override: Optional[str] =
         AWS_REGION,
         _PUBLISHED_URL_CACHE,
         _get_s3_client,
+        publisher=S3_PUBLISHER,
+        file_digest=file_sha256,
     )
 
 def resolve_image_url(local_path: Optional[str], s3_prefix_override: Optional[str] = None) -> Optional[str]:
@@ -631,6 +695,8 @@ def resolve_image_url(local_path: Optional[str], s3_prefix_override: Optional[st
         S3_REQUIRED,
         _PUBLISHED_URL_CACHE,
         _get_s3_client,
+        publisher=S3_PUBLISHER,
+        file_digest=file_sha256,
     )
 
 def _require_outputs_api_access(request: Request) -> Optional[JSONResponse]:
@@ -751,18 +817,57 @@ def _is_allowed_download_url(url: str, request: Request) -> bool:
         allow_public_cloud_hosts=DOWNLOAD_ALLOW_PUBLIC_CLOUD_HOSTS,
     )
 
+def get_redis_pool_stats() -> dict:
+    return REDIS_CONNECTIONS.stats()
+
+
 def _get_redis_conn():
     if not REDIS_URL:
         return None
     try:
-        return Redis.from_url(REDIS_URL)
+        return REDIS_CONNECTIONS.get()
     except Exception:
         return None
 
+# Thumbnails, bundled moodboards and the preset map, indexed once and re-checked by mtime.
+ASSET_INDEX = LocalAssetIndex(
+    assets_dir=ASSETS_DIR,
+    thumbnails_dir=STATIC_DIR / "thumbnails",
+    room_styles=ROOM_STYLES,
+    preset_map_path=PRESET_MAP_PATH,
+    refresh_sec=float(os.getenv("ASSET_INDEX_REFRESH_SEC", "30") or 30),
+    logger=logging.getLogger("app"),
+)
+ASSET_INDEX_CACHE_CONTROL = os.getenv("ASSET_INDEX_CACHE_CONTROL", "public, max-age=60, must-revalidate")
+threading.Thread(target=ASSET_INDEX.warm, name="asset-index-warm", daemon=True).start()
+
+
 def _load_preset_map() -> dict:
-    global PRESET_MAP_CACHE
-    PRESET_MAP_CACHE = load_preset_map(PRESET_MAP_PATH, PRESET_MAP_CACHE)
-    return PRESET_MAP_CACHE
+    return ASSET_INDEX.preset_map()
+
+MOODBOARD_INDEX_ENABLED = os.getenv("MOODBOARD_INDEX_ENABLED", "1").strip().lower() in ("1", "true", "yes", "y")
+MOODBOARD_INDEX = (
+    S3MoodboardIndex(
+        get_s3_client=_get_s3_client,
+        bucket=S3_BUCKET,
+        prefix_root=_normalize_s3_prefix(_build_s3_prefix(None, "moodboard")),
+        select_key=select_moodboard_key,
+        refresh_sec=float(os.getenv("MOODBOARD_INDEX_REFRESH_SEC", "300") or 300),
+        logger=logging.getLogger("app"),
+    )
+    if MOODBOARD_INDEX_ENABLED and _s3_enabled()
+    else None
+)
+
+def _warm_moodboard_index() -> None:
+    try:
+        warmed = MOODBOARD_INDEX.warm(_load_preset_map())
+        logging.getLogger("app").info(f"[MoodboardIndex] warmed {warmed} presets")
+    except Exception as exc:
+        logging.getLogger("app").warning(f"[MoodboardIndex] warm-up failed: {exc}")
+
+if MOODBOARD_INDEX is not None and USE_S3_MOODBOARD and os.getenv("MOODBOARD_INDEX_WARM_ON_START", "1").strip().lower() in ("1", "true", "yes", "y"):
+    threading.Thread(target=_warm_moodboard_index, name="moodboard-index-warm", daemon=True).start()
 def _build_cart_moodboard(items: list[dict], unique_id: str) -> str:
     tile = 512
     cols = min(4, max(1, len(items)))
@@ -860,7 +965,16 @@ def _enqueue_job(func, *args, queue_name: str | None = None, **kwargs):
                 return None, str(exc)
     if LOCAL_INLINE_QUEUE_ENABLED:
         try:
-            return enqueue_local_job(func, *args, job_id=str(custom_job_id) if custom_job_id else None, **kwargs), None
+            return (
+                enqueue_local_job(
+                    func,
+                    *args,
+                    job_id=str(custom_job_id) if custom_job_id else None,
+                    on_status=_publish_local_job_status,
+                    **kwargs,
+                ),
+                None,
+            )
         except Exception as exc:
             return None, str(exc)
     return None, "REDIS_URL not configured"
@@ -1050,7 +1164,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-QUOTA_EXCEEDED_KEYS = set()
+GEMINI_SHARED_QUOTA_LEDGER = os.getenv("GEMINI_SHARED_QUOTA_LEDGER", "1").strip().lower() in ("1", "true", "yes", "y")
+QUOTA_EXCEEDED_KEYS = build_gemini_quota_ledger(
+    redis_conn_factory=_get_redis_conn if REDIS_URL else None,
+    enabled=GEMINI_SHARED_QUOTA_LEDGER,
+    default_cooldown_sec=float(os.getenv("GEMINI_KEY_COOLDOWN_SEC", "20") or 20),
+    fleet_rpm_limit=int(os.getenv("GEMINI_KEY_FLEET_RPM", "0") or 0),
+)
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "1").strip().lower() in ("1", "true", "yes", "y")
+ANALYSIS_RESULT_CACHE = build_analysis_result_cache(
+    enabled=ANALYSIS_CACHE_ENABLED,
+    backend=os.getenv("ANALYSIS_CACHE_BACKEND", "memory"),
+    max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "4096") or 4096),
+    ttl_sec=int(os.getenv("ANALYSIS_CACHE_TTL_SEC", "604800") or 604800),
+    redis_conn_factory=_get_redis_conn if REDIS_URL else None,
+    disk_dir=os.getenv("ANALYSIS_CACHE_DIR", str(OUTPUTS_DIR / ".analysis_cache")),
+)
+STAGE_METRICS_BACKEND = os.getenv("STAGE_METRICS_BACKEND", "redis" if REDIS_URL else "memory").strip().lower()
+STAGE_METRICS = StageMetricsRegistry(
+    shared_tier=RedisStageMetricsTier(_get_redis_conn) if STAGE_METRICS_BACKEND == "redis" and REDIS_URL else None,
+    logger=logging.getLogger("app"),
+)
+JOB_EVENTS_ENABLED = os.getenv("JOB_EVENTS_ENABLED", "1").strip().lower() in ("1", "true", "yes", "y")
+JOB_EVENTS = JobEventHub(
+    transport=RedisJobEventTransport(_get_redis_conn) if JOB_EVENTS_ENABLED and REDIS_URL else None,
+    replay_events=int(os.getenv("JOB_EVENTS_REPLAY", "8") or 8),
+    logger=logging.getLogger("app"),
+)
+JOB_EVENTS_KEEPALIVE_SEC = float(os.getenv("JOB_EVENTS_KEEPALIVE_SEC", "15") or 15)
+JOB_EVENTS_RECHECK_SEC = float(os.getenv("JOB_EVENTS_RECHECK_SEC", "30") or 30)
+JOB_EVENTS_MAX_STREAM_SEC = float(os.getenv("JOB_EVENTS_MAX_STREAM_SEC", "1800") or 1800)
+
+
+def _publish_stage_enter(stage: str, step: int) -> None:
+    if JOB_EVENTS_ENABLED:
+        JOB_EVENTS.publish(current_job_id(), "stage", stage=stage, step=step)
+
+
+def _publish_local_job_status(job_id: str, status: str) -> None:
+    if JOB_EVENTS_ENABLED:
+        JOB_EVENTS.publish(job_id, "status", status=status)
+
+
+def _publish_stage_spans(spans: dict) -> None:
+    STAGE_METRICS.observe(spans)
+    try:
+        job = get_current_job()
+        if job:
+            job.meta["stage_timings"] = spans
+            job.save_meta()
+    except Exception as exc:
+        logger.warning(f"[StageMetrics] job meta update failed: {exc}")
 _analysis_dispatch_logger = logging.getLogger("app")
 
 
@@ -1084,29 +1248,36 @@ def _call_openai_image_generation(model_name, contents, request_options, safety_
     )
 
 
+MODEL_CALL_GOVERNOR = build_model_call_governor(job_id_getter=current_job_id, logger=_analysis_dispatch_logger)
+
 CALL_ANALYSIS_WITH_PROVIDER = build_analysis_provider_dispatch(
     provider=ANALYSIS_PROVIDER,
-    gemini_caller=_call_gemini_generation,
-    openai_caller=call_openai_analysis_impl,
+    gemini_caller=instrument_model_caller(_call_gemini_generation),
+    openai_caller=instrument_model_caller(call_openai_analysis_impl),
     openai_model_set=OPENAI_ANALYSIS_MODEL_SET,
     openai_api_key=OPENAI_API_KEY,
     openai_reasoning_effort=OPENAI_ANALYSIS_REASONING_EFFORT,
     logger=_analysis_dispatch_logger,
     log_brief=LOG_BRIEF,
+    governor=MODEL_CALL_GOVERNOR,
 )
 
 CALL_MAIN_IMAGE_WITH_PROVIDER = build_image_provider_dispatch(
     provider=MAIN_IMAGE_PROVIDER,
-    gemini_caller=_call_gemini_generation,
-    openai_image_caller=_call_openai_image_generation,
+    gemini_caller=instrument_model_caller(_call_gemini_generation),
+    openai_image_caller=instrument_model_caller(_call_openai_image_generation),
     openai_api_key=OPENAI_API_KEY,
+    governor=MODEL_CALL_GOVERNOR,
+    default_priority=PRIORITY_GENERATION,
 )
 
 CALL_REPAIR_IMAGE_WITH_PROVIDER = build_image_provider_dispatch(
     provider=REPAIR_IMAGE_PROVIDER,
-    gemini_caller=_call_gemini_generation,
-    openai_image_caller=_call_openai_image_generation,
+    gemini_caller=instrument_model_caller(_call_gemini_generation),
+    openai_image_caller=instrument_model_caller(_call_openai_image_generation),
     openai_api_key=OPENAI_API_KEY,
+    governor=MODEL_CALL_GOVERNOR,
+    default_priority=PRIORITY_GENERATION,
 )
 
 def call_gemini_with_failover(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
@@ -1160,18 +1331,15 @@ def log_step(title: str):
 
 logger.info("[Logger] initialized (stdout, line-buffered).")
 
-def standardize_image(image_path, output_path=None, keep_ratio=False, force_landscape=False):
+def standardize_image(image_path, output_path=None, keep_ratio=False, force_landscape=False, dpi=None):
     return standardize_image_shared(
         image_path,
         output_path=output_path,
         keep_ratio=keep_ratio,
         force_landscape=force_landscape,
+        dpi=dpi,
     )
 
-def _set_png_dpi(path: str, dpi: tuple = (300, 300)) -> None:
-    return set_png_dpi_shared(path, dpi=dpi)
-
-
 def standardize_image_to_reference_canvas(
     image_path: str,
     reference_path: str,
@@ -1455,6 +1623,7 @@ def detect_furniture_boxes(
         model_name=model_name,
         timeout_sec=timeout_sec,
         max_attempts=max_attempts,
+        analysis_cache=ANALYSIS_RESULT_CACHE,
     )
 
 
@@ -1541,6 +1710,7 @@ def analyze_room_structure(room_path, room_dimensions=None, timeout=120, max_att
         call_gemini_with_failover=call_gemini_with_failover,
         model_name=ROOM_ONLY_MODEL_NAME,
         safe_json_from_model_text=_safe_json_from_model_text,
+        analysis_cache=ANALYSIS_RESULT_CACHE,
     )
 
 
@@ -1583,6 +1753,21 @@ def analyze_cropped_item(
         allow_reference_feature_model=allow_reference_feature_model,
         provided_dims_mm=provided_dims_mm,
         absolute_deadline_ts=absolute_deadline_ts,
+        analysis_cache=ANALYSIS_RESULT_CACHE,
+    )
+
+
+def analyze_cropped_items_batch(requests, **kwargs):
+    return analyze_cropped_items_batched_stage(
+        requests,
+        analyze_single=analyze_cropped_item,
+        call_gemini_with_failover=call_gemini_with_failover,
+        analysis_model_name=ANALYSIS_MODEL_NAME,
+        safe_extract_json=_safe_extract_json,
+        normalize_dims_dict=_normalize_dims_dict,
+        log_brief=LOG_BRIEF,
+        analysis_cache=ANALYSIS_RESULT_CACHE,
+        **kwargs,
     )
 
 # [NEW] 엔드포인트: 도면 업로드 대신 -> 그냥 사진들만 업로드
@@ -1675,15 +1860,12 @@ def generate_furnished_room(
 
 
 def call_magnific_api(image_path, unique_id, start_time):
-    return call_magnific_api_impl(
+    return MAGNIFIC_CLIENT.upscale(
         image_path,
         unique_id,
         start_time,
-        magnific_api_key=MAGNIFIC_API_KEY,
-        magnific_endpoint=MAGNIFIC_ENDPOINT,
         total_timeout_limit=TOTAL_TIMEOUT_LIMIT,
         standardize_image=standardize_image,
-        set_png_dpi=_set_png_dpi,
     )
 
 
@@ -1704,6 +1886,31 @@ def pad_image_to_target_canvas(
 async def version_json():
     return JSONResponse({"version": APP_BUILD_ID}, headers={"Cache-Control": "no-store"})
 
+@app.get("/metrics")
+def metrics():
+    extra_gauges = {
+        "redis_pool": get_redis_pool_stats(),
+        "download_cache": DOWNLOAD_PROXY.stats(),
+        "s3_client": S3_CLIENTS.stats(),
+        "s3_publisher": S3_PUBLISHER.stats(),
+        "published_url_cache": _PUBLISHED_URL_CACHE.stats(),
+        "job_events": JOB_EVENTS.stats(),
+    }
+    if MOODBOARD_INDEX is not None:
+        extra_gauges["moodboard_index"] = MOODBOARD_INDEX.stats()
+    if ANALYSIS_RESULT_CACHE is not None:
+        extra_gauges["analysis_cache"] = ANALYSIS_RESULT_CACHE.stats()
+    if MODEL_CALL_GOVERNOR is not None:
+        extra_gauges["model_call_governor"] = MODEL_CALL_GOVERNOR.stats()
+    extra_gauges["provider_poller"] = PROVIDER_TASK_POLLER.stats()
+    extra_gauges["magnific"] = MAGNIFIC_CLIENT.stats()
+    extra_gauges["asset_index"] = ASSET_INDEX.stats()
+    return PlainTextResponse(
+        STAGE_METRICS.render_prometheus(extra_gauges),
+        media_type="text/plain; version=0.0.4",
+        headers={"Cache-Control": "no-store"},
+    )
+
 @app.get("/")
 async def read_index(): return FileResponse(STATIC_DIR / "index.html")
 
@@ -1779,45 +1986,23 @@ async def api_outputs_upload_video(request: Request, file: UploadFile = File(...
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon(): return FileResponse(STATIC_DIR / "favicon-light.png")
 
+def _indexed_json_response(request: Request, payload) -> Response:
+    headers = {"ETag": payload.etag, "Cache-Control": ASSET_INDEX_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
 @app.get("/room-types")
-async def get_room_types(): return JSONResponse(content=list(ROOM_STYLES.keys()))
+async def get_room_types(request: Request):
+    return _indexed_json_response(request, ASSET_INDEX.room_types())
 
 @app.get("/styles/{room_type}")
-async def get_styles_for_room(room_type: str):
-    styles = ROOM_STYLES.get(room_type, [])
-    if "Customize" not in styles:
-        styles = styles + ["Customize"]
-    return JSONResponse(content=styles)
+async def get_styles_for_room(room_type: str, request: Request):
+    return _indexed_json_response(request, ASSET_INDEX.styles_for_room(room_type))
 
 @app.get("/api/thumbnails/{room_name}/{style_name}")
-def get_available_thumbnails(room_name: str, style_name: str):
-    safe_room = room_name.lower().replace(" ", "")
-    safe_style = style_name.lower().replace(" ", "-").replace("_", "-")
-    prefix = f"{safe_room}_{safe_style}_"
-
-    base_dir = STATIC_DIR / "thumbnails"
-    if not base_dir.exists(): return []
-
-    valid_items = [] # [변경] 단순 숫자 리스트가 아니라 객체 리스트로 변경
-    valid_exts = ('.png', '.jpg', '.jpeg', '.webp')
-
-    try:
-        for f in os.listdir(base_dir):
-            f_lower = f.lower()
-            if f_lower.startswith(prefix) and f_lower.endswith(valid_exts):
-                try:
-                    name_part = f_lower.replace(prefix, "")
-                    num_part = os.path.splitext(name_part)[0]
-                    if num_part.isdigit():
-                        valid_items.append({"index": int(num_part), "file": f})
-                except: continue
-
-        # 번호 순서대로 정렬
-        valid_items.sort(key=lambda x: x["index"])
-        return valid_items
-    except Exception as e:
-        print(f"Thumbnail Scan Error: {e}")
-        return []
+def get_available_thumbnails(room_name: str, style_name: str, request: Request):
+    return _indexed_json_response(request, ASSET_INDEX.thumbnails(room_name, style_name))
 
 # --- 메인 렌더링 엔드포인트 ---
 def render_room(
@@ -1867,6 +2052,10 @@ def render_room(
                     max_concurrency_analysis=GEMINI_MAX_CONCURRENCY_ANALYSIS,
                     cart_max_analysis_workers=CART_MAX_ANALYSIS_WORKERS,
                     total_timeout_limit_sec=TOTAL_TIMEOUT_LIMIT,
+                    stage_spans=StageSpanRecorder(on_finish=_publish_stage_spans, on_enter=_publish_stage_enter),
+                    race_external_variants=RENDER_RACE_EXTERNAL_VARIANTS,
+                    variant_race_min_budget_sec=RENDER_VARIANT_RACE_MIN_BUDGET_SEC,
+                    item_analysis_batch_size=ITEM_ANALYSIS_BATCH_SIZE,
                 ),
                 storage=RenderWorkflowStorageServices(
                     normalize_audience=_normalize_audience,
@@ -1892,6 +2081,7 @@ def render_room(
                     detect_furniture_boxes=detect_furniture_boxes,
                     analyze_room_structure=analyze_room_structure,
                     analyze_cropped_item=analyze_cropped_item,
+                    analyze_cropped_items_batch=analyze_cropped_items_batch,
                     normalize_dims_dict=_normalize_dims_dict,
                     parse_object_dimensions_mm=parse_object_dimensions_mm,
                     build_furniture_specs_json=build_furniture_specs_json,
@@ -1953,7 +2143,7 @@ def _queue_route_deps() -> QueueRouteDependencies:
         build_upscale_job_payload=build_upscale_job_payload,
         build_finalize_download_job_payload=build_finalize_download_job_payload,
         build_empty_room_job_payload=build_empty_room_job_payload,
-        build_external_preset_job=build_external_preset_job,
+        build_external_preset_job=lambda req, preset_map: build_external_preset_job(req, preset_map, asset_index=ASSET_INDEX),
         build_external_cart_job=build_external_cart_job,
         build_external_cart_batch_job=build_external_cart_batch_job,
         build_external_render_video_job=build_external_render_video_job,
@@ -1978,8 +2168,8 @@ def _queue_route_deps() -> QueueRouteDependencies:
         start_background_task=_start_background_task,
     )
 
-@app.get("/download")
-def download_proxy(url: str, request: Request):
+@app.api_route("/download", methods=["GET", "HEAD"])
+async def download_proxy(url: str, request: Request):
     if not url:
         return JSONResponse(content={"error": "url is required"}, status_code=400)
 
@@ -1993,24 +2183,31 @@ def download_proxy(url: str, request: Request):
     if not _is_allowed_download_url(url, request):
         return JSONResponse(content={"error": "URL not allowed"}, status_code=403)
 
-    try:
-        resp = requests.get(url, stream=True, timeout=30)
-    except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=502)
-
-    if not resp.ok:
-        return JSONResponse(content={"error": f"Upstream error ({resp.status_code})"}, status_code=resp.status_code)
-
-    content_type = resp.headers.get("content-type") or "application/octet-stream"
     parsed = urlparse(url)
     filename = os.path.basename(parsed.path) or "download"
-    headers = {"Content-Disposition": f'attachment; filename=\"{filename}\"'}
-    return StreamingResponse(resp.iter_content(chunk_size=1024 * 1024), media_type=content_type, headers=headers)
+    return await DOWNLOAD_PROXY.proxy(
+        url,
+        method=request.method,
+        filename=filename,
+        range_header=request.headers.get("range"),
+        if_none_match=request.headers.get("if-none-match"),
+    )
 
 @app.get("/jobs/{job_id}")
 def get_job_status(job_id: str, compact: bool = False):
     return handle_get_job_status(job_id, deps=_queue_route_deps(), compact=compact)
 
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    return await handle_stream_job_events(
+        job_id,
+        deps=_queue_route_deps(),
+        job_events=JOB_EVENTS,
+        keepalive_sec=JOB_EVENTS_KEEPALIVE_SEC,
+        recheck_sec=JOB_EVENTS_RECHECK_SEC,
+        max_stream_sec=JOB_EVENTS_MAX_STREAM_SEC,
+    )
+
 @app.patch("/api/external/jobs/{job_id}/tracker-manifest")
 @async_wrap
 def patch_external_tracker_manifest(job_id: str, req: TrackerManifestPatchRequest, request: Request):
@@ -2162,6 +2359,27 @@ KLING_ENDPOINT = os.getenv("KLING_ENDPOINT", build_kling_endpoint(KLING_MODEL))
 VIDEO_MAX_CONCURRENCY = int(os.getenv("VIDEO_MAX_CONCURRENCY", "4"))
 _video_sem = threading.Semaphore(VIDEO_MAX_CONCURRENCY)
 
+# One thread polls every outstanding Kling/Magnific task instead of one sleeping thread per task.
+PROVIDER_TASK_POLLER = ProviderTaskPoller(
+    fetch_workers=int(os.getenv("PROVIDER_POLL_FETCH_WORKERS", "4") or 4),
+    logger=logger,
+)
+register_kling_poll_provider(
+    PROVIDER_TASK_POLLER,
+    freepik_api_key=FREEPIK_API_KEY,
+    kling_endpoint=KLING_ENDPOINT,
+    video_semaphore=_video_sem,
+)
+MAGNIFIC_CLIENT = MagnificClient(
+    api_key=MAGNIFIC_API_KEY,
+    endpoint=MAGNIFIC_ENDPOINT,
+    pool_maxsize=int(os.getenv("MAGNIFIC_POOL_MAXSIZE", "8") or 8),
+    connect_timeout_sec=float(os.getenv("MAGNIFIC_CONNECT_TIMEOUT_SEC", "5") or 5),
+    download_timeout_sec=float(os.getenv("MAGNIFIC_DOWNLOAD_TIMEOUT_SEC", "60") or 60),
+)
+if MAGNIFIC_CLIENT.enabled:
+    MAGNIFIC_CLIENT.register_poller(PROVIDER_TASK_POLLER)
+
 VIDEO_TARGET_FPS = int(os.getenv("VIDEO_TARGET_FPS", "30"))
 
 # Provider side: Kling always returns 5 second clips.
@@ -2177,6 +2395,14 @@ VIDEO_SPEED_FACTOR = float(os.getenv("VIDEO_SPEED_FACTOR", "2.0"))
 
 VIDEO_CRF = int(os.getenv("VIDEO_CRF", "18"))
 
+# Final compile: concurrent clip transcodes and the total cores they may use (0 = auto).
+VIDEO_COMPILE_WORKERS = int(os.getenv("VIDEO_COMPILE_WORKERS", "0") or 0)
+VIDEO_COMPILE_CPU_BUDGET = int(os.getenv("VIDEO_COMPILE_CPU_BUDGET", "0") or 0)
+# Size cap for outputs/compile_cache, least recently used clips go first (0 = unbounded).
+VIDEO_COMPILE_CACHE_MAX_MB = int(os.getenv("VIDEO_COMPILE_CACHE_MAX_MB", "2048") or 0)
+# Encoder profile for compiles that do not pick one: draft | standard | archival.
+VIDEO_ENCODER_PROFILE = resolve_encoder_profile(os.getenv("VIDEO_ENCODER_PROFILE", DEFAULT_ENCODER_PROFILE))
+
 def _safe_extract_json(text: str) -> Dict[str, Any]:
     """Extract a JSON object from Gemini text safely."""
     if not text:
@@ -2235,6 +2461,10 @@ def _freepik_kling_poll(
         timeout_sec=timeout_sec,
     )
 
+
+def _freepik_kling_track(task_id: str, **kwargs):
+    return track_kling_task_impl(PROVIDER_TASK_POLLER, task_id, **kwargs)
+
 job_entrypoints_module.configure_job_entrypoints(
     JobEntrypointServices(
         normalize_audience=_normalize_audience,
@@ -2302,8 +2532,19 @@ job_entrypoints_module.configure_job_entrypoints(
         max_concurrency_analysis=GEMINI_MAX_CONCURRENCY_ANALYSIS,
         fetch_job=lambda job_id: _fetch_job(job_id),
         load_job_result=lambda job_id: _load_job_result_s3(job_id),
-        queue_source_generation_job=queue_source_generation_job,
-        queue_final_compile_job=queue_final_compile_job,
+        queue_source_generation_job=lambda *args, **kwargs: queue_source_generation_job(
+            *args,
+            track_kling_task=_freepik_kling_track,
+            **kwargs,
+        ),
+        queue_final_compile_job=lambda req, **kwargs: queue_final_compile_job(
+            req,
+            compile_workers=VIDEO_COMPILE_WORKERS,
+            cpu_budget=VIDEO_COMPILE_CPU_BUDGET,
+            clip_cache_max_bytes=VIDEO_COMPILE_CACHE_MAX_MB * 1024 * 1024,
+            default_encoder_profile=VIDEO_ENCODER_PROFILE,
+            **kwargs,
+        ),
         get_video_job=get_video_job,
         create_kling_task=lambda image_b64, prompt, negative_prompt, duration, cfg_scale: _freepik_kling_create_task(
             image_b64,
@@ -2315,6 +2556,8 @@ job_entrypoints_module.configure_job_entrypoints(
         poll_kling_task=lambda task_id, **kwargs: _freepik_kling_poll(task_id, **kwargs),
         video_target_fps=VIDEO_TARGET_FPS,
         video_max_concurrency=VIDEO_MAX_CONCURRENCY,
+        image_publisher=S3_PUBLISHER,
+        video_encoder_profile=VIDEO_ENCODER_PROFILE,
     )
 )
 
@@ -2335,9 +2578,11 @@ def job_video_generate_sources(payload: dict) -> dict:
         req.cfg_scale,
         video_target_fps=VIDEO_TARGET_FPS,
         video_max_concurrency=VIDEO_MAX_CONCURRENCY,
+        encoder_profile=VIDEO_ENCODER_PROFILE,
         create_kling_task=_freepik_kling_create_task,
         poll_kling_task=_freepik_kling_poll,
         resolve_output_url=_resolve_video_output_url,
+        track_kling_task=_freepik_kling_track,
     )
     return _publish_video_job_state(
         job_id,
@@ -2348,7 +2593,16 @@ def job_video_generate_sources(payload: dict) -> dict:
 def job_video_compile(payload: dict) -> dict:
     job_id = _current_video_job_id(payload)
     req = CompileRequest(**payload)
-    run_final_compile_job(job_id, req, video_target_fps=VIDEO_TARGET_FPS, resolve_output_url=_resolve_video_output_url)
+    run_final_compile_job(
+        job_id,
+        req,
+        video_target_fps=VIDEO_TARGET_FPS,
+        resolve_output_url=_resolve_video_output_url,
+        compile_workers=VIDEO_COMPILE_WORKERS,
+        cpu_budget=VIDEO_COMPILE_CPU_BUDGET,
+        clip_cache_max_bytes=VIDEO_COMPILE_CACHE_MAX_MB * 1024 * 1024,
+        default_encoder_profile=VIDEO_ENCODER_PROFILE,
+    )
     return _publish_video_job_state(
         job_id,
         get_video_job(job_id) or {"status": "FAILED", "error": "Video compile job ended without state"},
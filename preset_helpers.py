@@ -14,7 +14,13 @@ def load_preset_map(preset_map_path: str, cached_map: dict | None) -> dict:
         return {}
 
 
-def resolve_preset_request(data: dict, preset_map: dict) -> dict:
+def resolve_preset_request(data: dict, preset_map: dict, asset_index=None) -> dict:
+    """Merge a preset with request overrides.
+
+    With an ``asset_index`` (``LocalAssetIndex``) the preset's bundled moodboard and
+    thumbnail are looked up from memory and the preset's default dimensions fall back
+    to the indexed ones.
+    """
     preset_room = None
     preset_style = None
     preset_variant = None
@@ -44,10 +50,17 @@ def resolve_preset_request(data: dict, preset_map: dict) -> dict:
     if data.get("placement"):
         placement_parts.append(data.get("placement"))
 
-    return {
+    resolved = {
         "room": room,
         "style": style,
         "variant": variant,
         "dimensions": data.get("dimensions") or preset_dims or "",
         "placement": "\n".join([p for p in placement_parts if p]),
     }
+    if asset_index is not None:
+        assets = asset_index.describe(room, style, variant)
+        moodboard = assets.get("moodboard") or {}
+        resolved["dimensions"] = resolved["dimensions"] or assets.get("dimensions") or ""
+        resolved["moodboard_url"] = moodboard.get("url")
+        resolved["thumbnail_url"] = assets.get("thumbnail_url")
+    return resolved
@@ -343,7 +343,7 @@ def build_internal_render_job_payload(req: InternalRenderRequest) -> dict:
     return {"render": payload}
 
 
-def build_external_preset_job(req: PresetRenderRequest, preset_map: dict) -> tuple[dict, dict]:
+def build_external_preset_job(req: PresetRenderRequest, preset_map: dict, *, asset_index=None) -> tuple[dict, dict]:
     resolved = resolve_preset_request(
         {
             "preset_id": req.preset_id,
@@ -354,6 +354,7 @@ def build_external_preset_job(req: PresetRenderRequest, preset_map: dict) -> tup
             "placement": req.placement,
         },
         preset_map,
+        asset_index=asset_index,
     )
 
     resolved_surface = {
@@ -385,6 +386,8 @@ def build_external_preset_job(req: PresetRenderRequest, preset_map: dict) -> tup
             "detail_target_policy": "preset_fixed_six_unique_targets",
         },
     }
+    if resolved.get("moodboard_url"):
+        job_payload["extra"]["preset_moodboard_url"] = resolved["moodboard_url"]
     job_payload = attach_tracker_metadata(
         job_payload,
         extract_tracker_metadata(req, default_job_kind="preset"),
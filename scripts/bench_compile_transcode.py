@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+"""Benchmark: final compile wall time, sequential vs parallel transcodes, then a cached recompile.
+
+Clips are synthesised locally with ffmpeg's lavfi test sources, so no provider calls are made.
+
+Usage: python scripts/bench_compile_transcode.py [--clips 6] [--workers 0] [--cpu-budget 0]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api_models import CompileClip, CompileRequest  # noqa: E402
+from application.video.compile_workflow import run_final_compile_job  # noqa: E402
+from application.video.job_store import get_video_job  # noqa: E402
+
+
+def _synthesize_clips(count: int, out_dir: Path) -> list[str]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    urls = []
+    for index in range(count):
+        path = out_dir / f"synthetic_{index}.mp4"
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30,hue=h={index * 40}",
+                "-t", "5", "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+                str(path),
+            ],
+            check=True,
+        )
+        # download_to_path copies "/relative/path" URLs from the working directory.
+        urls.append(f"/{path.as_posix()}")
+    return urls
+
+
+def _compile(label: str, job_id: str, req: CompileRequest, cache_dir: Path, *, workers: int, cpu_budget: int) -> float:
+    started = time.perf_counter()
+    run_final_compile_job(
+        job_id,
+        req,
+        video_target_fps=30,
+        compile_workers=workers,
+        cpu_budget=cpu_budget,
+        clip_cache_dir=cache_dir,
+    )
+    elapsed = time.perf_counter() - started
+    state = get_video_job(job_id) or {}
+    print(f"{label:<22} {elapsed:8.2f}s status={state.get('status')}")
+    if state.get("status") != "COMPLETED":
+        raise SystemExit(f"{label} failed: {state.get('error')}")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clips", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=0, help="parallel transcodes (0 = auto)")
+    parser.add_argument("--cpu-budget", type=int, default=0, help="cores to use (0 = all)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prev_cwd = os.getcwd()
+        os.chdir(tmpdir)
+        try:
+            Path("outputs").mkdir()
+            urls = _synthesize_clips(args.clips, Path("synthetic"))
+            req = CompileRequest(
+                clips=[CompileClip(video_url=url, speed=2.0, reverse=bool(i % 2)) for i, url in enumerate(urls)]
+            )
+            sequential = _compile(
+                "sequential (1 worker)", "bench-seq", req, Path("cache-seq"), workers=1, cpu_budget=args.cpu_budget
+            )
+            parallel = _compile(
+                "parallel", "bench-par", req, Path("cache-par"), workers=args.workers, cpu_budget=args.cpu_budget
+            )
+            cached = _compile(
+                "recompile (cached)", "bench-cached", req, Path("cache-par"), workers=args.workers, cpu_budget=args.cpu_budget
+            )
+        finally:
+            os.chdir(prev_cwd)
+
+    print(f"parallel speed-up x{sequential / max(parallel, 1e-9):.2f}, cached recompile x{sequential / max(cached, 1e-9):.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+"""Micro-benchmark: direct item background cutout, BFS reference vs run-length engine.
+
+Usage: python scripts/bench_direct_item_cutout.py [--repeat N] [--sizes 160,512,1024]
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from application.render import direct_item_image_prep as prep  # noqa: E402
+
+
+# Per-pixel BFS the run-length engine replaced; kept here for comparison.
+def _legacy_flood_fill_background(image: Image.Image, bg_color: tuple[int, int, int], threshold: int) -> list[int]:
+    width, height = image.size
+    pixels = image.load()
+    mask = [0] * (width * height)
+    queue: deque[tuple[int, int]] = deque()
+
+    def _mark_if_background(x: int, y: int) -> None:
+        idx = y * width + x
+        if mask[idx]:
+            return
+        if prep._color_distance(pixels[x, y], bg_color) > threshold:
+            return
+        mask[idx] = 1
+        queue.append((x, y))
+
+    for x in range(width):
+        _mark_if_background(x, 0)
+        _mark_if_background(x, height - 1)
+    for y in range(height):
+        _mark_if_background(0, y)
+        _mark_if_background(width - 1, y)
+
+    while queue:
+        x, y = queue.popleft()
+        for next_x, next_y in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if next_x < 0 or next_y < 0 or next_x >= width or next_y >= height:
+                continue
+            _mark_if_background(next_x, next_y)
+
+    return mask
+
+
+def _legacy_cutout(image: Image.Image, bg_color: tuple[int, int, int], threshold: int) -> Image.Image:
+    rgba = image.convert("RGBA")
+    mask = _legacy_flood_fill_background(image, bg_color, threshold)
+    alpha = bytearray(255 if value == 0 else 0 for value in mask)
+    rgba.putalpha(Image.frombytes("L", image.size, bytes(alpha)))
+    return rgba
+
+
+def _catalog_shot(size: int) -> Image.Image:
+    img = Image.new("RGB", (size, size), (246, 246, 244))
+    draw = ImageDraw.Draw(img)
+    unit = size / 10
+    draw.rounded_rectangle((2 * unit, 3 * unit, 8 * unit, 6.5 * unit), radius=int(unit), fill=(120, 84, 60))
+    for leg_x in (2.5, 7.2):
+        draw.rectangle((leg_x * unit, 6.5 * unit, (leg_x + 0.3) * unit, 8 * unit), fill=(60, 40, 30))
+    draw.ellipse((4 * unit, 3.5 * unit, 6 * unit, 5 * unit), fill=(240, 238, 232))
+    return img
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", default="160,512,1024")
+    args = parser.parse_args()
+    repeat = max(1, args.repeat)
+    bg_color = (246, 246, 244)
+    for size in (int(part) for part in args.sizes.split(",") if part.strip()):
+        image = _catalog_shot(size)
+        assert list(prep._flood_fill_background(image, bg_color, 42)) == _legacy_flood_fill_background(image, bg_color, 42)
+        assert prep._cutout_simple_background(image, bg_color, 42).tobytes() == _legacy_cutout(image, bg_color, 42).tobytes()
+        old_sec = _time(lambda: _legacy_cutout(image, bg_color, 42), repeat)
+        new_sec = _time(lambda: prep._cutout_simple_background(image, bg_color, 42), repeat)
+        print(f"cutout {size:>5}px old={old_sec * 1000:9.2f}ms new={new_sec * 1000:8.2f}ms speedup={old_sec / max(new_sec, 1e-9):6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
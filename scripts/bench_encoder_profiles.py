@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+"""Benchmark: encode speed, output size and SSIM/PSNR for each compile encoder profile.
+
+Sample clips are synthesised with ffmpeg's lavfi sources (or pass --clip paths). Each clip
+runs through the compile filter chain once losslessly as the reference, then once per
+profile; quality is measured against that reference.
+
+Usage: python scripts/bench_encoder_profiles.py [--clip a.mp4 --clip b.mp4] [--fps 30]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from application.video.compile_workflow import _build_video_filter  # noqa: E402
+from application.video.video_support import ENCODER_PROFILES, run_ffmpeg  # noqa: E402
+
+_SSIM_RE = re.compile(r"SSIM .*All:([0-9.]+)")
+_PSNR_RE = re.compile(r"PSNR .*average:([0-9.]+|inf)")
+_SYNTHETIC_SOURCES = ("testsrc2=size=1280x720:rate=30", "mandelbrot=size=1280x720:rate=30")
+
+
+def _synthesize(out_dir: Path) -> list[Path]:
+    paths = []
+    for index, source in enumerate(_SYNTHETIC_SOURCES):
+        path = out_dir / f"sample_{index}.mp4"
+        run_ffmpeg(
+            ["ffmpeg", "-y", "-f", "lavfi", "-i", source, "-t", "5", "-c:v", "libx264", "-preset", "ultrafast",
+             "-crf", "12", "-pix_fmt", "yuv420p", str(path)]
+        )
+        paths.append(path)
+    return paths
+
+
+def _transcode(src: Path, out: Path, vf: str, encode_args: list[str]) -> float:
+    started = time.perf_counter()
+    run_ffmpeg(["ffmpeg", "-y", "-i", str(src), "-filter_complex", vf, "-map", "[vout]", "-an", *encode_args, str(out)])
+    return time.perf_counter() - started
+
+
+def _quality(distorted: Path, reference: Path) -> tuple[float, float]:
+    proc = subprocess.run(
+        ["ffmpeg", "-i", str(distorted), "-i", str(reference), "-lavfi", "[0:v][1:v]ssim;[0:v][1:v]psnr", "-f", "null", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    ssim = _SSIM_RE.search(proc.stderr)
+    psnr = _PSNR_RE.search(proc.stderr)
+    return (
+        float(ssim.group(1)) if ssim else float("nan"),
+        float(psnr.group(1)) if psnr else float("nan"),
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clip", action="append", default=[], help="sample clip path (repeatable)")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--aspect-ratio", default="9:16")
+    args = parser.parse_args()
+
+    vf = _build_video_filter(
+        trim_start=0.0,
+        trim_end=5.0,
+        speed=2.0,
+        reverse=False,
+        flip_horizontal=False,
+        video_target_fps=args.fps,
+        aspect_ratio=args.aspect_ratio,
+        aspect_mode="crop",
+    )
+    frames = int(5.0 / 2.0 * args.fps)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        work = Path(tmpdir)
+        clips = [Path(path) for path in args.clip] or _synthesize(work)
+        print(f"{'clip':<16} {'profile':<9} {'enc fps':>8} {'size KB':>9} {'SSIM':>7} {'PSNR dB':>8}")
+        for clip in clips:
+            reference = work / f"{clip.stem}_ref.mkv"
+            _transcode(clip, reference, vf, ["-c:v", "libx264", "-preset", "ultrafast", "-qp", "0"])
+            for profile, encode_args in ENCODER_PROFILES.items():
+                out = work / f"{clip.stem}_{profile}.mp4"
+                elapsed = _transcode(clip, out, vf, list(encode_args))
+                ssim, psnr = _quality(out, reference)
+                print(
+                    f"{clip.stem:<16} {profile:<9} {frames / max(elapsed, 1e-9):8.1f} "
+                    f"{out.stat().st_size / 1024:9.0f} {ssim:7.4f} {psnr:8.2f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+"""Benchmark: one 2048px render candidate through save → aspect crop → QC → ranking.
+
+The legacy path writes the provider bytes, re-opens them for the ratio check, crops and
+re-saves, then the guide-leak check, two bbox calls and the ranker each decode the file
+again. The handle path decodes once, encodes the crop once and lets every later stage
+reuse the adopted handle.
+
+Usage: python scripts/bench_image_handle_pipeline.py [--width 2048] [--rounds 5]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from google.genai import _transformers  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from application.render.furnished_generation_stage import (  # noqa: E402
+    _normalize_render_candidate_aspect,
+    _normalize_render_candidate_handle,
+)
+from shared.image_canvas import match_aspect_to_target  # noqa: E402
+from shared.image_handle import ImageHandle  # noqa: E402
+from shared.prepared_image import (  # noqa: E402
+    PREPARED_REFERENCES_REF,
+    PreparedReferenceCache,
+    adopt_rendered_image,
+    open_reference_image,
+    open_rendered_image,
+)
+
+EXPECTED_RATIO = 16 / 9
+
+
+def _candidate_bytes(width: int) -> bytes:
+    height = int(width / 1.5)
+    image = Image.new("RGB", (width, height), (214, 208, 196))
+    draw = ImageDraw.Draw(image)
+    for index in range(24):
+        x = (index * 97) % (width - 300)
+        y = (index * 53) % (height - 200)
+        draw.rectangle((x, y, x + 280, y + 180), fill=(60 + index * 7, 90, 120 - index * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _downstream_reads(path: str) -> int:
+    sent = 0
+    with open_rendered_image(path) as leak_source:
+        leak_source.convert("RGB").resize((256, 256)).close()
+    for _ in range(2):
+        with open_rendered_image(path) as bbox_source:
+            encoded = getattr(bbox_source, "encoded_bytes", None)
+            sent += len(encoded) if encoded else len(_transformers.pil_to_blob(bbox_source).data)
+    ranked = open_reference_image(path, (512, 512))
+    encoded = getattr(ranked, "encoded_bytes", None)
+    sent += len(encoded) if encoded else len(_transformers.pil_to_blob(ranked).data)
+    return sent
+
+
+def _legacy(data: bytes, root: str) -> None:
+    path = os.path.join(root, "legacy.png")
+    with open(path, "wb") as file_obj:
+        file_obj.write(data)
+    normalized = _normalize_render_candidate_aspect(
+        path,
+        path,
+        expected_ratio=EXPECTED_RATIO,
+        ratio_tol=0.02,
+        match_aspect_to_target=match_aspect_to_target,
+        log_brief=False,
+    )
+    _downstream_reads(normalized)
+
+
+def _handle(data: bytes, root: str) -> dict:
+    token = PREPARED_REFERENCES_REF.set(PreparedReferenceCache())
+    try:
+        path = os.path.join(root, "handle.png")
+        source = ImageHandle.from_bytes(data)
+        handle = _normalize_render_candidate_handle(
+            source,
+            path,
+            path,
+            expected_ratio=EXPECTED_RATIO,
+            ratio_tol=0.02,
+            match_aspect_to_target=match_aspect_to_target,
+            log_brief=False,
+        )
+        handle.materialize(path)
+        adopt_rendered_image(handle)
+        _downstream_reads(path)
+        return {"decodes": source.decode_count + handle.decode_count, "encodes": source.encode_count + handle.encode_count}
+    finally:
+        PREPARED_REFERENCES_REF.reset(token)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=2048)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    data = _candidate_bytes(args.width)
+    legacy_times, handle_times = [], []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            _legacy(data, tmpdir)
+            legacy_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            counts = _handle(data, tmpdir)
+            handle_times.append(time.perf_counter() - started)
+
+    legacy_ms = statistics.median(legacy_times) * 1000
+    handle_ms = statistics.median(handle_times) * 1000
+    print(f"candidate: {args.width}px, {len(data)} bytes")
+    print(f"legacy : {legacy_ms:8.1f} ms/candidate")
+    print(f"handle : {handle_ms:8.1f} ms/candidate  ({legacy_ms / max(handle_ms, 1e-9):.1f}x)")
+    print(f"handle decodes/encodes: {counts['decodes']}/{counts['encodes']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+"""Benchmark: per-update cost of the video job store as it grows, journal vs full rewrite.
+
+Usage: python scripts/bench_job_store.py [--sizes 100,1000,10000] [--updates 500]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from application.video import job_store  # noqa: E402
+
+
+def _job_state(index: int) -> dict:
+    return {
+        "status": "RUNNING",
+        "job_type": "source",
+        "request_key": f"req-{index}",
+        "items": [{"prompt": "slow dolly-in across the living room", "task_id": None, "status": "QUEUED"} for _ in range(3)],
+        "results": [],
+    }
+
+
+def _legacy_rewrite(path: Path) -> None:
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(
+        json.dumps(job_store.video_jobs, ensure_ascii=False, indent=2, sort_keys=True, default=job_store._json_default),
+        encoding="utf-8",
+    )
+    temp_path.replace(path)
+
+
+def _bench(size: int, updates: int) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        job_store.VIDEO_JOB_STORE_PATH = Path(tmpdir) / "video_jobs.json"
+        with job_store.video_jobs_lock:
+            job_store.video_jobs.clear()
+            job_store._video_job_log = None
+        for index in range(size):
+            job_store.set_video_job(f"job-{index}", _job_state(index))
+
+        samples = []
+        for tick in range(updates):
+            started = time.perf_counter()
+            job_store.update_video_job_item(f"job-{tick % size}", tick % 3, status="RUNNING", progress=tick)
+            samples.append(time.perf_counter() - started)
+
+        legacy = []
+        for _ in range(min(updates, 20)):
+            started = time.perf_counter()
+            with job_store.video_jobs_lock:
+                _legacy_rewrite(job_store.VIDEO_JOB_STORE_PATH.with_name("legacy.json"))
+            legacy.append(time.perf_counter() - started)
+
+        with job_store.video_jobs_lock:
+            compact_started = time.perf_counter()
+            job_store._video_job_log_locked().compact(job_store.video_jobs)
+            compact_sec = time.perf_counter() - compact_started
+            job_store._video_job_log_locked().close()
+
+    print(
+        f"jobs={size:>6} journal p50={statistics.median(samples) * 1e6:8.1f}us "
+        f"mean={statistics.fmean(samples) * 1e6:8.1f}us | full-rewrite p50={statistics.median(legacy) * 1e3:8.2f}ms "
+        f"| one compaction={compact_sec * 1e3:8.2f}ms"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--updates", type=int, default=500)
+    args = parser.parse_args()
+    for size in (int(part) for part in args.sizes.split(",") if part.strip()):
+        _bench(size, max(1, args.updates))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
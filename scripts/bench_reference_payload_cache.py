@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+"""Benchmark: reference preparation for one best-of-3 job, per-call re-encode vs shared cache.
+
+Each variant, the ranker and two QC bbox calls open the same cutouts. The legacy path
+re-opens, re-thumbnails and lets the SDK re-encode them every time; the cached path
+prepares each (path, size) once per job.
+
+Usage: python scripts/bench_reference_payload_cache.py [--items 6] [--variants 3] [--rounds 5]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from google.genai import _transformers  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+
+from shared.prepared_image import PreparedReferenceCache  # noqa: E402
+
+
+def _write_cutouts(root: Path, count: int) -> list[str]:
+    paths = []
+    for index in range(count):
+        image = Image.new("RGBA", (1400, 1100), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        draw.rounded_rectangle((120, 160, 1280, 980), radius=80, fill=(90 + index * 20, 70, 50, 255))
+        draw.ellipse((400, 300, 900, 700), fill=(230, 220, 200, 255))
+        path = root / f"cutout_{index}.png"
+        image.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _job_requests(paths: list[str], variants: int) -> list[tuple[str, int | None]]:
+    requests = []
+    for _ in range(variants):
+        requests.extend((path, 640) for path in paths)
+    requests.extend((path, 384) for path in paths)
+    requests.extend((path, None) for path in paths[:2] for _ in range(variants))
+    return requests
+
+
+def _legacy(requests: list[tuple[str, int | None]]) -> int:
+    sent = 0
+    for path, size in requests:
+        image = Image.open(path)
+        if size:
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        sent += len(_transformers.pil_to_blob(image).data)
+        image.close()
+    return sent
+
+
+def _cached(requests: list[tuple[str, int | None]]) -> tuple[int, dict]:
+    cache = PreparedReferenceCache()
+    sent = 0
+    for path, size in requests:
+        sent += len(cache.get(path, size).encoded_bytes)
+    return sent, cache.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=6)
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        requests = _job_requests(_write_cutouts(Path(tmpdir), args.items), args.variants)
+        legacy_times, cached_times = [], []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            legacy_bytes = _legacy(requests)
+            legacy_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            cached_bytes, stats = _cached(requests)
+            cached_times.append(time.perf_counter() - started)
+            assert cached_bytes == legacy_bytes, "prepared payloads must match what the SDK would send"
+
+    legacy_ms = statistics.median(legacy_times) * 1000
+    cached_ms = statistics.median(cached_times) * 1000
+    print(f"references per job: {len(requests)}  unique: {stats['entries']}")
+    print(f"legacy  : {legacy_ms:8.1f} ms/job")
+    print(f"cached  : {cached_ms:8.1f} ms/job  ({legacy_ms / max(cached_ms, 1e-9):.1f}x)")
+    print(f"encoded bytes not re-encoded per job: {stats['bytes_saved']}")
+    print(f"prepare time saved per job: {stats['prepare_sec_saved'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+"""Micro-benchmark: scale-guide leak detector, per-pixel reference vs band-op engine.
+
+Usage: python scripts/bench_scale_guide_leak.py [--repeat N] [--full-size WxH]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from application.render import furnished_generation_stage as stage  # noqa: E402
+
+
+# Per-pixel reference implementation the band-op engine replaced; kept here for comparison.
+def _legacy_is_fluorescent_guide_pixel(rgb: tuple[int, int, int]) -> bool:
+    r, g, b = rgb
+    return r >= 180 and g >= 170 and b <= 140 and abs(r - g) <= 80
+
+
+def _legacy_is_guide_like_pixel(rgb: tuple[int, int, int]) -> bool:
+    r, g, b = rgb
+    return r >= 175 and g >= 160 and b <= 190 and abs(r - g) <= 80
+
+
+def _legacy_mean(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    return sum(values) / len(values)
+
+
+def _legacy_extract_guide_line_positions(guide_img: Image.Image) -> tuple[list[int], list[int], set[tuple[int, int]]]:
+    width, height = guide_img.size
+    pixels = guide_img.load()
+    guide_mask: set[tuple[int, int]] = set()
+    row_positions: list[int] = []
+    col_positions: list[int] = []
+
+    for y in range(height):
+        row_hits = 0
+        for x in range(width):
+            if _legacy_is_fluorescent_guide_pixel(pixels[x, y]):
+                guide_mask.add((x, y))
+                row_hits += 1
+        if row_hits / max(1, width) >= 0.35:
+            row_positions.append(y)
+
+    for x in range(width):
+        col_hits = 0
+        for y in range(height):
+            if (x, y) in guide_mask:
+                col_hits += 1
+        if col_hits / max(1, height) >= 0.35:
+            col_positions.append(x)
+
+    return row_positions, col_positions, guide_mask
+
+
+def _legacy_pixel_delta(a: tuple[int, int, int], b: tuple[int, int, int]) -> float:
+    return float(abs(a[0] - b[0]) + abs(a[1] - b[1]) + abs(a[2] - b[2])) / 3.0
+
+
+def _legacy_line_energy(img: Image.Image, axis: str, index: int) -> float:
+    width, height = img.size
+    if axis == "row":
+        if index <= 0 or index >= height - 1:
+            return 0.0
+    else:
+        if index <= 0 or index >= width - 1:
+            return 0.0
+
+    pixels = img.load()
+    scores: list[float] = []
+    if axis == "row":
+        for x in range(width):
+            here = pixels[x, index]
+            prev_px = pixels[x, index - 1]
+            next_px = pixels[x, index + 1]
+            scores.append(max(_legacy_pixel_delta(here, prev_px), _legacy_pixel_delta(here, next_px)))
+    else:
+        for y in range(height):
+            here = pixels[index, y]
+            prev_px = pixels[index - 1, y]
+            next_px = pixels[index + 1, y]
+            scores.append(max(_legacy_pixel_delta(here, prev_px), _legacy_pixel_delta(here, next_px)))
+    return _legacy_mean(scores)
+
+
+def _legacy_aligned_line_energy(img: Image.Image, axis: str, indices: list[int], *, search_radius: int = 8) -> float:
+    if not indices:
+        return 0.0
+    limit = img.size[1] if axis == "row" else img.size[0]
+    scores: list[float] = []
+    for index in indices:
+        best = 0.0
+        for probe in range(max(1, index - search_radius), min(limit - 1, index + search_radius + 1)):
+            best = max(best, _legacy_line_energy(img, axis, probe))
+        scores.append(best)
+    return _legacy_mean(scores)
+
+
+def _legacy_baseline_line_energy(img: Image.Image, axis: str, guide_indices: list[int], *, exclusion_radius: int = 8) -> float:
+    limit = img.size[1] if axis == "row" else img.size[0]
+    blocked: set[int] = set()
+    for index in guide_indices:
+        blocked.update(range(max(1, index - exclusion_radius), min(limit - 1, index + exclusion_radius + 1)))
+
+    candidates = [idx for idx in range(1, limit - 1) if idx not in blocked]
+    if not candidates:
+        return 0.0
+
+    sample_count = min(24, len(candidates))
+    if len(candidates) > sample_count:
+        step = len(candidates) / sample_count
+        sampled = [candidates[min(len(candidates) - 1, int(round(i * step)))] for i in range(sample_count)]
+    else:
+        sampled = candidates
+    return _legacy_mean([_legacy_line_energy(img, axis, idx) for idx in sampled])
+
+
+def _legacy_sample_points(points: set[tuple[int, int]], *, max_points: int = 512) -> list[tuple[int, int]]:
+    ordered = sorted(points)
+    if len(ordered) <= max_points:
+        return ordered
+    step = len(ordered) / max_points
+    return [ordered[min(len(ordered) - 1, int(i * step))] for i in range(max_points)]
+
+
+def _legacy_point_energy(img: Image.Image, x: int, y: int) -> float:
+    width, height = img.size
+    if x <= 0 or y <= 0 or x >= width - 1 or y >= height - 1:
+        return 0.0
+    pixels = img.load()
+    here = pixels[x, y]
+    return max(
+        _legacy_pixel_delta(here, pixels[x - 1, y]),
+        _legacy_pixel_delta(here, pixels[x + 1, y]),
+        _legacy_pixel_delta(here, pixels[x, y - 1]),
+        _legacy_pixel_delta(here, pixels[x, y + 1]),
+    )
+
+
+def _legacy_aligned_mask_energy(img: Image.Image, guide_mask: set[tuple[int, int]], *, search_radius: int = 8) -> float:
+    sampled = _legacy_sample_points(guide_mask)
+    if not sampled:
+        return 0.0
+
+    width, height = img.size
+    scores: list[float] = []
+    for x, y in sampled:
+        best = 0.0
+        for px in range(max(1, x - search_radius), min(width - 1, x + search_radius + 1)):
+            for py in range(max(1, y - search_radius), min(height - 1, y + search_radius + 1)):
+                best = max(best, _legacy_point_energy(img, px, py))
+        scores.append(best)
+    return _legacy_mean(scores)
+
+
+def _legacy_baseline_mask_energy(img: Image.Image, guide_mask: set[tuple[int, int]], *, max_points: int = 256) -> float:
+    width, height = img.size
+    stride = max(4, int(((width * height) / max(1, max_points)) ** 0.5))
+    points: list[tuple[int, int]] = []
+    for y in range(max(1, stride // 2), height - 1, stride):
+        for x in range(max(1, stride // 2), width - 1, stride):
+            if (x, y) not in guide_mask:
+                points.append((x, y))
+    if not points:
+        return 0.0
+    return _legacy_mean([_legacy_point_energy(img, x, y) for x, y in points[:max_points]])
+
+
+def _legacy_guide_mask_overlap_ratio(rendered_img: Image.Image, guide_mask: set[tuple[int, int]], *, search_radius: int = 2) -> float:
+    sampled = _legacy_sample_points(guide_mask)
+    if not sampled:
+        return 0.0
+
+    width, height = rendered_img.size
+    pixels = rendered_img.load()
+    hits = 0
+    for x, y in sampled:
+        found = False
+        for px in range(max(0, x - search_radius), min(width - 1, x + search_radius) + 1):
+            for py in range(max(0, y - search_radius), min(height - 1, y + search_radius) + 1):
+                if _legacy_is_guide_like_pixel(pixels[px, py]):
+                    found = True
+                    break
+            if found:
+                break
+        if found:
+            hits += 1
+    return hits / max(1, len(sampled))
+
+
+def _make_guide(size: tuple[int, int]) -> Image.Image:
+    width, height = size
+    img = Image.new("RGB", size, (96, 92, 88))
+    draw = ImageDraw.Draw(img)
+    line = max(1, width // 128)
+    for y in range(height // 8, height, height // 6):
+        draw.line((0, y, width, y), fill=(235, 220, 40), width=line)
+    for x in range(width // 10, width, width // 7):
+        draw.line((x, 0, x, height), fill=(235, 220, 40), width=line)
+    return img
+
+
+def _make_render(size: tuple[int, int]) -> Image.Image:
+    width, height = size
+    img = Image.new("RGB", size)
+    img.putdata([((x * 7 + y * 3) % 256, (x * 5) % 256, (y * 11) % 256) for y in range(height) for x in range(width)])
+    return img
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _bench(label: str, size: tuple[int, int], repeat: int) -> None:
+    guide = _make_guide(size)
+    render = _make_render(size)
+    leaked = Image.blend(render, guide, 0.8)
+
+    old_rows, old_cols, old_mask = _legacy_extract_guide_line_positions(guide)
+    new_rows, new_cols, new_mask = stage._extract_guide_line_positions(guide)
+    assert (old_rows, old_cols) == (new_rows, new_cols)
+    assert sorted(old_mask) == stage._mask_points(new_mask)
+    assert _legacy_aligned_line_energy(leaked, "row", old_rows) == stage._aligned_line_energy(leaked, "row", new_rows)
+    assert _legacy_baseline_line_energy(leaked, "col", old_cols) == stage._baseline_line_energy(leaked, "col", new_cols)
+    assert _legacy_aligned_mask_energy(leaked, old_mask) == stage._aligned_mask_energy(leaked, new_mask)
+    assert _legacy_baseline_mask_energy(leaked, old_mask) == stage._baseline_mask_energy(leaked, new_mask)
+    for candidate in (render, leaked, guide):
+        assert _legacy_guide_mask_overlap_ratio(candidate, old_mask) == stage._guide_mask_overlap_ratio(candidate, new_mask)
+
+    cases = [
+        (
+            "extract",
+            lambda: _legacy_extract_guide_line_positions(guide),
+            lambda: stage._extract_guide_line_positions(guide),
+        ),
+        (
+            "overlap",
+            lambda: _legacy_guide_mask_overlap_ratio(leaked, old_mask, search_radius=2),
+            lambda: stage._guide_mask_overlap_ratio(leaked, new_mask, search_radius=2),
+        ),
+        (
+            "detector",
+            lambda: _legacy_guide_mask_overlap_ratio(leaked, _legacy_extract_guide_line_positions(guide)[2]),
+            lambda: stage._guide_mask_overlap_ratio(leaked, stage._extract_guide_line_positions(guide)[2]),
+        ),
+        (
+            "line_energy",
+            lambda: _legacy_aligned_line_energy(leaked, "row", old_rows),
+            lambda: stage._aligned_line_energy(leaked, "row", new_rows),
+        ),
+        (
+            "mask_energy",
+            lambda: _legacy_aligned_mask_energy(leaked, old_mask),
+            lambda: stage._aligned_mask_energy(leaked, new_mask),
+        ),
+    ]
+    print(f"== {label} {size[0]}x{size[1]} (best of {repeat})")
+    for name, old_fn, new_fn in cases:
+        old_sec = _time(old_fn, repeat)
+        new_sec = _time(new_fn, repeat)
+        print(f"  {name:<12} old={old_sec * 1000:9.2f}ms new={new_sec * 1000:8.2f}ms speedup={old_sec / max(new_sec, 1e-9):6.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--full-size", default="1536x1024")
+    args = parser.parse_args()
+    full_w, full_h = (int(part) for part in args.full_size.lower().split("x", 1))
+    _bench("detector", (256, 256), max(1, args.repeat))
+    _bench("full-resolution", (full_w, full_h), 1)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -71,7 +71,7 @@ def match_aspect_to_ratio(
         return image_path
 
 
-def standardize_image(image_path, output_path=None, keep_ratio=False, force_landscape=False):
+def standardize_image(image_path, output_path=None, keep_ratio=False, force_landscape=False, dpi=None):
     try:
         if output_path is None:
             output_path = image_path
@@ -112,7 +112,10 @@ def standardize_image(image_path, output_path=None, keep_ratio=False, force_land
 
             base, _ = os.path.splitext(output_path)
             new_output_path = f"{base}.png"
-            img.save(new_output_path, "PNG")
+            if dpi:
+                img.save(new_output_path, "PNG", dpi=dpi)
+            else:
+                img.save(new_output_path, "PNG")
             return new_output_path
     except Exception as exc:
         print(f"!! 표준화 실패: {exc}", flush=True)
@@ -0,0 +1,140 @@
+import io
+import os
+import threading
+from typing import Any
+
+from PIL import Image, ImageOps
+
+_EXIF_ORIENTATION_TAG = 274
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+class ImageHandle:
+    """One generated image carried between render stages without re-encoding.
+
+    A handle starts from the provider's encoded bytes (or from pixels produced by a
+    crop). Pixels are decoded at most once, EXIF orientation applied, and bytes are
+    encoded at most once; an untouched handle keeps the provider's original bytes.
+    ``materialize`` writes a file only when a stage needs a path. Handles are shared by
+    the stages of one job and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        *,
+        encoded_bytes: bytes | None = None,
+        image: Image.Image | None = None,
+        format: str | None = None,
+        path: str | None = None,
+    ):
+        if encoded_bytes is None and image is None:
+            raise ValueError("ImageHandle needs encoded bytes or pixels")
+        self._encoded_bytes = encoded_bytes
+        self._image = image
+        self._format = (format or ("PNG" if encoded_bytes is None else None) or "").upper() or None
+        self._size: tuple[int, int] | None = image.size if image is not None else None
+        self.path = path
+        self.decode_count = 0
+        self.encode_count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, *, path: str | None = None) -> "ImageHandle":
+        return cls(encoded_bytes=bytes(data), path=path)
+
+    @classmethod
+    def from_path(cls, path: str) -> "ImageHandle":
+        with open(path, "rb") as file_obj:
+            return cls(encoded_bytes=file_obj.read(), path=path)
+
+    def _read_header(self) -> None:
+        with Image.open(io.BytesIO(self._encoded_bytes)) as header:
+            self._format = self._format or header.format
+            width, height = header.size
+            try:
+                orientation = header.getexif().get(_EXIF_ORIENTATION_TAG)
+            except Exception:
+                orientation = None
+        if orientation in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        self._size = (width, height)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Display size (after EXIF orientation); reads only the header."""
+        with self._lock:
+            if self._size is None:
+                self._read_header()
+            return self._size
+
+    @property
+    def format(self) -> str | None:
+        with self._lock:
+            if self._format is None and self._encoded_bytes is not None:
+                self._read_header()
+            return self._format
+
+    @property
+    def mime_type(self) -> str:
+        return _MIME_TYPES.get(self.format or "PNG", "image/png")
+
+    @property
+    def image(self) -> Image.Image:
+        """Decoded, orientation-corrected pixels; decoded on first access only."""
+        with self._lock:
+            if self._image is None:
+                with Image.open(io.BytesIO(self._encoded_bytes)) as opened:
+                    self._format = self._format or opened.format
+                    transposed = ImageOps.exif_transpose(opened)
+                    transposed.load()
+                    self._image = transposed if transposed is not opened else opened.copy()
+                self._size = self._image.size
+                self.decode_count += 1
+            return self._image
+
+    @property
+    def encoded_bytes(self) -> bytes:
+        with self._lock:
+            if self._encoded_bytes is None:
+                buffer = io.BytesIO()
+                self._image.save(buffer, format=self._format or "PNG")
+                self._encoded_bytes = buffer.getvalue()
+                self.encode_count += 1
+            return self._encoded_bytes
+
+    def cropped_to_ratio(self, target_ratio: float) -> "ImageHandle":
+        """Center crop to ``target_ratio``, like ``match_aspect_to_ratio``, without encoding."""
+        width, height = self.size
+        if not target_ratio or target_ratio <= 0 or width <= 0 or height <= 0:
+            return self
+        current_ratio = width / height
+        if abs(current_ratio - target_ratio) < 1e-3:
+            return self
+        image = self.image
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if current_ratio > target_ratio:
+            new_w = int(height * target_ratio)
+            x0 = max(0, (width - new_w) // 2)
+            cropped = image.crop((x0, 0, x0 + new_w, height))
+        else:
+            new_h = int(width / target_ratio)
+            y0 = max(0, (height - new_h) // 2)
+            cropped = image.crop((0, y0, width, y0 + new_h))
+        return ImageHandle(image=cropped, format="PNG")
+
+    def materialize(self, path: str | None = None) -> str:
+        """Write the encoded bytes to ``path`` (once) and return the path."""
+        target = path or self.path
+        if not target:
+            raise ValueError("ImageHandle.materialize needs a path")
+        if target == self.path and os.path.exists(target):
+            return target
+        with open(target, "wb") as file_obj:
+            file_obj.write(self.encoded_bytes)
+        self.path = target
+        return target
+
+    def stats(self) -> dict[str, Any]:
+        return {"decodes": self.decode_count, "encodes": self.encode_count}
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+JOB_LOG_COMPACT_MIN_RECORDS = 1024
+JOB_LOG_COMPACT_RATIO = 4
+
+
+def set_record(job_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    return {"op": "set", "id": job_id, "state": state}
+
+
+def update_record(job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {"op": "update", "id": job_id, "fields": fields}
+
+
+def update_item_record(job_id: str, field: str, index: int, fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {"op": "update_item", "id": job_id, "field": field, "index": int(index), "fields": fields}
+
+
+def delete_record(job_id: str) -> Dict[str, Any]:
+    return {"op": "delete", "id": job_id}
+
+
+def clear_record() -> Dict[str, Any]:
+    return {"op": "clear"}
+
+
+def apply_record(jobs: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> None:
+    op = record.get("op")
+    job_id = record.get("id")
+    if op == "clear":
+        jobs.clear()
+    elif not isinstance(job_id, str):
+        return
+    elif op == "set" and isinstance(record.get("state"), dict):
+        jobs[job_id] = record["state"]
+    elif op == "update" and isinstance(record.get("fields"), dict):
+        if job_id in jobs:
+            jobs[job_id].update(record["fields"])
+    elif op == "update_item" and isinstance(record.get("fields"), dict):
+        job = jobs.get(job_id)
+        if job is None:
+            return
+        items = job.setdefault(str(record.get("field") or "items"), [])
+        index = int(record.get("index") or 0)
+        while len(items) <= index:
+            items.append({})
+        if not isinstance(items[index], dict):
+            items[index] = {}
+        items[index].update(record["fields"])
+    elif op == "delete":
+        jobs.pop(job_id, None)
+
+
+class JobStateLog:
+    """Append-only journal of job-state mutations next to a JSON snapshot.
+
+    Each mutation appends one JSON line, so an update costs O(record) instead of
+    re-serializing every job. The journal is folded into the snapshot once it grows to
+    ``compact_ratio`` times the live job count (and at least ``compact_min_records``).
+    Replaying a record twice is harmless, so a crash between writing the snapshot and
+    truncating the journal loses nothing. Callers serialize access with their own lock.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        *,
+        json_default: Callable[[Any], Any],
+        compact_min_records: int = JOB_LOG_COMPACT_MIN_RECORDS,
+        compact_ratio: int = JOB_LOG_COMPACT_RATIO,
+    ):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_suffix(".jsonl")
+        self._json_default = json_default
+        self._compact_min_records = max(1, int(compact_min_records))
+        self._compact_ratio = max(1, int(compact_ratio))
+        self._journal_records = 0
+        self._journal_file: Any = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        jobs: Dict[str, Dict[str, Any]] = {}
+        try:
+            raw = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except Exception:
+            raw = None
+        if isinstance(raw, dict):
+            for job_id, state in raw.items():
+                if isinstance(job_id, str) and isinstance(state, dict):
+                    jobs[job_id] = state
+
+        self._journal_records = 0
+        try:
+            data = self.journal_path.read_bytes()
+        except OSError:
+            data = b""
+        complete_len = data.rfind(b"\n") + 1
+        for line in data[:complete_len].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                apply_record(jobs, record)
+                self._journal_records += 1
+        if complete_len < len(data):
+            # A torn final line from an interrupted append: cut it off so the next
+            # append starts on a fresh line instead of extending the fragment.
+            self.close()
+            with self.journal_path.open("r+b") as fh:
+                fh.truncate(complete_len)
+
+        for job_id, state in jobs.items():
+            state.setdefault("job_id", job_id)
+        return jobs
+
+    def append(self, jobs: Dict[str, Dict[str, Any]], *records: Dict[str, Any]) -> None:
+        if not records:
+            return
+        payload = "".join(
+            json.dumps(record, ensure_ascii=False, default=self._json_default) + "\n" for record in records
+        )
+        fh = self._open_journal()
+        fh.write(payload)
+        fh.flush()
+        self._journal_records += len(records)
+        if self._journal_records >= max(self._compact_min_records, self._compact_ratio * len(jobs)):
+            self.compact(jobs)
+
+    def compact(self, jobs: Dict[str, Dict[str, Any]]) -> None:
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.snapshot_path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps(jobs, ensure_ascii=False, indent=2, sort_keys=True, default=self._json_default),
+            encoding="utf-8",
+        )
+        temp_path.replace(self.snapshot_path)
+        self.close()
+        self.journal_path.open("w", encoding="utf-8").close()
+        self._journal_records = 0
+
+    def close(self) -> None:
+        if self._journal_file is not None:
+            try:
+                self._journal_file.close()
+            except Exception:
+                pass
+            self._journal_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            journal_bytes = os.path.getsize(self.journal_path)
+        except OSError:
+            journal_bytes = 0
+        return {"journal_records": self._journal_records, "journal_bytes": journal_bytes}
+
+    def _open_journal(self) -> Any:
+        if self._journal_file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal_file = self.journal_path.open("a", encoding="utf-8")
+        return self._journal_file
+
+
+def job_state_log_for(
+    current: Optional[JobStateLog],
+    snapshot_path: Path,
+    *,
+    json_default: Callable[[Any], Any],
+) -> JobStateLog:
+    if current is not None and current.snapshot_path == Path(snapshot_path):
+        return current
+    if current is not None:
+        current.close()
+    return JobStateLog(snapshot_path, json_default=json_default)
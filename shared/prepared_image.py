@@ -0,0 +1,238 @@
+import contextvars
+import io
+import os
+import threading
+import time
+from typing import Any
+
+from PIL import Image, PngImagePlugin
+
+from shared.image_handle import ImageHandle
+
+PREPARED_REFERENCES_REF: contextvars.ContextVar = contextvars.ContextVar("PREPARED_REFERENCES_REF", default=None)
+
+
+class PreparedImage(Image.Image):
+    """Thumbnailed reference image that already carries its provider encoding.
+
+    Instances are shared by every variant, the ranker and the validator of one job, so
+    they must be treated as read-only. ``close()`` is a no-op; the owning cache drops
+    them when the job ends.
+    """
+
+    encoded_bytes: bytes | None = None
+    mime_type: str | None = None
+    source_path: str | None = None
+
+    def close(self) -> None:
+        return None
+
+
+def _encode_like_provider_sdk(image: Image.Image, *, source_is_png: bool) -> tuple[bytes, str]:
+    # Same choice the Gemini SDK makes for a PIL image: PNG for PNG sources and RGBA, JPEG otherwise.
+    buffer = io.BytesIO()
+    if source_is_png or image.mode == "RGBA":
+        image.save(buffer, format="PNG")
+        return buffer.getvalue(), "image/png"
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue(), "image/jpeg"
+
+
+def _thumbnail_size(max_size: Any) -> tuple[int, int] | None:
+    if max_size is None:
+        return None
+    if isinstance(max_size, (int, float)):
+        return int(max_size), int(max_size)
+    width, height = max_size
+    return int(width), int(height)
+
+
+def _open_thumbnail(path: str, size: tuple[int, int] | None) -> Image.Image:
+    image = Image.open(path)
+    if size is not None:
+        try:
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+        except Exception:
+            pass
+    return image
+
+
+class PreparedReferenceCache:
+    """Per-job cache of ``(path, thumbnail size) -> PreparedImage``.
+
+    The first caller decodes, thumbnails and encodes a reference once; concurrent callers
+    for the same key wait for that build instead of repeating it. ``stats()`` reports the
+    encoded bytes and prepare time that later hits did not have to spend again.
+
+    Images generated during the job are ``adopt``-ed with their ``ImageHandle``, so QC
+    and ranking reuse the decoded pixels and, at full size, the original bytes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handles: dict[str, tuple[int, int, ImageHandle]] = {}
+        self._entries: dict[tuple, PreparedImage] = {}
+        self._build_locks: dict[tuple, threading.Lock] = {}
+        self._prepare_sec: dict[tuple, float] = {}
+        self._stats = {
+            "builds": 0,
+            "hits": 0,
+            "build_errors": 0,
+            "encoded_bytes": 0,
+            "prepare_sec": 0.0,
+            "bytes_saved": 0,
+            "prepare_sec_saved": 0.0,
+            "adopted": 0,
+            "handle_builds": 0,
+        }
+
+    @staticmethod
+    def _key(path: str, size: tuple[int, int] | None) -> tuple | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), int(stat.st_mtime_ns), int(stat.st_size), size
+
+    def adopt(self, handle: ImageHandle) -> None:
+        """Register a materialized in-memory image so later reads of its path skip the decode."""
+        if not handle.path:
+            return
+        try:
+            stat = os.stat(handle.path)
+        except OSError:
+            return
+        with self._lock:
+            self._handles[os.path.abspath(handle.path)] = (int(stat.st_mtime_ns), int(stat.st_size), handle)
+            self._stats["adopted"] += 1
+
+    def handle_for(self, path: str) -> ImageHandle | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            adopted = self._handles.get(os.path.abspath(path))
+        if adopted is None:
+            return None
+        mtime_ns, size, handle = adopted
+        # A file rewritten after adoption no longer matches the handle's bytes.
+        if mtime_ns != int(stat.st_mtime_ns) or size != int(stat.st_size):
+            return None
+        return handle
+
+    def get(self, path: str, max_size: Any = None) -> PreparedImage:
+        size = _thumbnail_size(max_size)
+        key = self._key(path, size)
+        if key is None:
+            raise FileNotFoundError(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._record_hit_locked(key, cached)
+                return cached
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._record_hit_locked(key, cached)
+                    return cached
+            try:
+                handle = self.handle_for(path)
+                if handle is not None:
+                    prepared, elapsed = self._build_from_handle(handle, path, size)
+                else:
+                    prepared, elapsed = self._build(path, size)
+            except Exception:
+                with self._lock:
+                    self._stats["build_errors"] += 1
+                raise
+            with self._lock:
+                self._entries[key] = prepared
+                self._prepare_sec[key] = elapsed
+                self._stats["builds"] += 1
+                if handle is not None:
+                    self._stats["handle_builds"] += 1
+                self._stats["encoded_bytes"] += len(prepared.encoded_bytes or b"")
+                self._stats["prepare_sec"] += elapsed
+            return prepared
+
+    def _record_hit_locked(self, key: tuple, cached: PreparedImage) -> None:
+        self._stats["hits"] += 1
+        self._stats["bytes_saved"] += len(cached.encoded_bytes or b"")
+        self._stats["prepare_sec_saved"] += self._prepare_sec.get(key, 0.0)
+
+    @staticmethod
+    def _build(path: str, size: tuple[int, int] | None) -> tuple[PreparedImage, float]:
+        started_at = time.perf_counter()
+        with _open_thumbnail(path, size) as source:
+            source_is_png = isinstance(source, PngImagePlugin.PngImageFile)
+            prepared = source.copy()
+        prepared.__class__ = PreparedImage
+        prepared.source_path = path
+        try:
+            prepared.encoded_bytes, prepared.mime_type = _encode_like_provider_sdk(prepared, source_is_png=source_is_png)
+        except Exception:
+            # Leave encoding to the provider client, which raises as it did before.
+            prepared.encoded_bytes, prepared.mime_type = None, None
+        return prepared, time.perf_counter() - started_at
+
+    @staticmethod
+    def _build_from_handle(handle: ImageHandle, path: str, size: tuple[int, int] | None) -> tuple[PreparedImage, float]:
+        started_at = time.perf_counter()
+        prepared = handle.image.copy()
+        if size is not None:
+            prepared.thumbnail(size, Image.Resampling.LANCZOS)
+        prepared.__class__ = PreparedImage
+        prepared.source_path = path
+        source_is_png = handle.format == "PNG"
+        if size is None or prepared.size == handle.size:
+            # Untouched pixels: send the bytes the handle already holds instead of re-encoding.
+            prepared.encoded_bytes, prepared.mime_type = handle.encoded_bytes, handle.mime_type
+        else:
+            try:
+                prepared.encoded_bytes, prepared.mime_type = _encode_like_provider_sdk(prepared, source_is_png=source_is_png)
+            except Exception:
+                prepared.encoded_bytes, prepared.mime_type = None, None
+        return prepared, time.perf_counter() - started_at
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["prepare_sec"] = round(stats["prepare_sec"], 4)
+        stats["prepare_sec_saved"] = round(stats["prepare_sec_saved"], 4)
+        return stats
+
+
+def open_reference_image(path: str, max_size: Any = None) -> Image.Image:
+    """Open a reference image for a model call, thumbnailed to ``max_size``.
+
+    Inside a job with an active ``PreparedReferenceCache`` the shared prepared handle is
+    returned; otherwise the file is opened and thumbnailed fresh, and the caller owns it.
+    """
+    cache = PREPARED_REFERENCES_REF.get()
+    if cache is not None:
+        return cache.get(path, max_size)
+    return _open_thumbnail(path, _thumbnail_size(max_size))
+
+
+def adopt_rendered_image(handle: ImageHandle) -> None:
+    """Make a generated image's handle visible to the rest of the job, if a cache is active."""
+    cache = PREPARED_REFERENCES_REF.get()
+    if cache is not None:
+        cache.adopt(handle)
+
+
+def open_rendered_image(path: str) -> Image.Image:
+    """Open a generated image for QC at full size.
+
+    Images adopted into the job's cache come back as the shared prepared image (decoded
+    once, carrying the original bytes); anything else is opened from disk as before.
+    Either can be used in a ``with`` block.
+    """
+    cache = PREPARED_REFERENCES_REF.get()
+    if cache is not None and cache.handle_for(path) is not None:
+        return cache.get(path)
+    return Image.open(path)
@@ -159,6 +159,16 @@ def find_s3_moodboard_key(
     s3_list_keys_fn: Callable[[str, int], list[str]],
 ) -> Optional[str]:
     prefix_root = normalize_s3_prefix(build_s3_prefix(None, "moodboard"))
+    return select_moodboard_key(safe_room, safe_style, variant, prefix_root, s3_list_keys_fn)
+
+
+def select_moodboard_key(
+    safe_room: str,
+    safe_style: str,
+    variant: str,
+    prefix_root: str,
+    s3_list_keys_fn: Callable[[str, int], list[str]],
+) -> Optional[str]:
     if not prefix_root:
         prefix_root = ""
     pattern = rf"(?:^|[^0-9]){re.escape(str(variant))}(?:[^0-9]|$)"
@@ -197,6 +207,8 @@ def publish_image(
     aws_region: str,
     published_url_cache: dict,
     get_s3_client: Callable[[], object],
+    publisher: Optional[object] = None,
+    file_digest: Optional[Callable[[str], Optional[str]]] = None,
 ) -> Optional[str]:
     if not local_path:
         return None
@@ -204,21 +216,54 @@ def publish_image(
         return local_path
     key_prefix = normalize_s3_prefix(s3_prefix_override if s3_prefix_override is not None else s3_prefix)
     cache_key = f"{local_path}::{key_prefix}"
-    if cache_key in published_url_cache:
-        return published_url_cache[cache_key]
+    cached_url = published_url_cache.get(cache_key)
+    if cached_url:
+        return cached_url
     if not s3_enabled(s3_bucket, aws_region):
         return None
     if not os.path.exists(local_path):
         return None
+    cache_keys = [cache_key]
+    digest = file_digest(local_path) if file_digest is not None else None
+    if digest:
+        # Same bytes already published under this prefix (by any process sharing the cache): reuse that object.
+        content_key = f"sha256:{digest}::{key_prefix}"
+        cached_url = published_url_cache.get(content_key)
+        if cached_url:
+            published_url_cache[cache_key] = cached_url
+            return cached_url
+        cache_keys.append(content_key)
     key = f"{key_prefix}{os.path.basename(local_path)}"
     content_type, _ = mimetypes.guess_type(local_path)
+    url = s3_public_url(s3_bucket, aws_region, key)
+
+    def _forget() -> None:
+        for stale_key in cache_keys:
+            published_url_cache.pop(stale_key, None)
+
+    if publisher is not None:
+        # The key is deterministic, so the URL can be handed out before a deferred upload lands.
+        # Only the path key is cached now: the content key is shared with other processes,
+        # which must not reuse the URL (and persist it in their results) until the object exists.
+        published_url_cache[cache_key] = url
+
+        def _remember_content() -> None:
+            for fresh_key in cache_keys[1:]:
+                published_url_cache[fresh_key] = url
+
+        try:
+            publisher.upload(local_path, key, content_type, on_failure=_forget, on_success=_remember_content)
+        except Exception:
+            _forget()
+            raise
+        return url
     extra = {"ContentType": content_type} if content_type else None
     if extra:
         get_s3_client().upload_file(local_path, s3_bucket, key, ExtraArgs=extra)
     else:
         get_s3_client().upload_file(local_path, s3_bucket, key)
-    url = s3_public_url(s3_bucket, aws_region, key)
-    published_url_cache[cache_key] = url
+    for fresh_key in cache_keys:
+        published_url_cache[fresh_key] = url
     return url
 
 
@@ -231,6 +276,8 @@ def resolve_image_url(
     s3_required: bool,
     published_url_cache: dict,
     get_s3_client: Callable[[], object],
+    publisher: Optional[object] = None,
+    file_digest: Optional[Callable[[str], Optional[str]]] = None,
 ) -> Optional[str]:
     if not local_path:
         return None
@@ -250,6 +297,8 @@ def resolve_image_url(
         aws_region,
         published_url_cache,
         get_s3_client,
+        publisher=publisher,
+        file_digest=file_digest,
     )
     if url:
         return url
@@ -0,0 +1,212 @@
+import json
+from types import SimpleNamespace
+
+from PIL import Image
+
+from application.render.item_analysis_stage import detect_furniture_boxes
+from application.render.room_analysis import analyze_room_structure
+from infrastructure.ai.analysis_result_cache import (
+    AnalysisResultCache,
+    build_analysis_cache_key,
+    build_analysis_result_cache,
+    file_sha256,
+)
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _DictTier:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl_sec):
+        self.values[key] = json.loads(json.dumps(value))
+
+
+def _write_png(path, color=(200, 120, 40)):
+    Image.new("RGB", (32, 32), color).save(path)
+    return str(path)
+
+
+def test_cache_key_changes_with_image_bytes_and_crop(tmp_path):
+    first = file_sha256(_write_png(tmp_path / "a.png"))
+    second = file_sha256(_write_png(tmp_path / "b.png", color=(0, 0, 0)))
+
+    key = build_analysis_cache_key(namespace="crop-item", image_sha256=first, crop_box=[0, 0, 10, 10])
+    assert key == build_analysis_cache_key(namespace="crop-item", image_sha256=first, crop_box=(0, 0, 10, 10))
+    assert key != build_analysis_cache_key(namespace="crop-item", image_sha256=second, crop_box=[0, 0, 10, 10])
+    assert key != build_analysis_cache_key(namespace="crop-item", image_sha256=first, crop_box=[0, 0, 10, 20])
+    assert build_analysis_cache_key(namespace="crop-item", image_sha256=None) is None
+
+
+def test_cache_evicts_least_recently_used_and_expires_entries():
+    clock = _FakeClock()
+    cache = AnalysisResultCache(max_entries=2, ttl_sec=10, clock=clock)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    clock.now += 11
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 2
+
+
+def test_cache_returns_copies_and_reads_through_shared_tier():
+    tier = _DictTier()
+    writer = AnalysisResultCache(shared_tier=tier)
+    writer.set("k", {"items": [1, 2]})
+
+    reader = AnalysisResultCache(shared_tier=tier)
+    value = reader.get("k")
+    value["items"].append(3)
+
+    assert reader.get("k") == {"items": [1, 2]}
+    assert reader.stats()["shared_hits"] == 1
+    assert reader.stats()["local_hits"] == 1
+
+
+def test_disabled_cache_builds_nothing():
+    assert build_analysis_result_cache(enabled=False) is None
+
+
+def test_detect_furniture_boxes_reuses_cached_detection(tmp_path):
+    moodboard = _write_png(tmp_path / "moodboard.png")
+    calls = []
+
+    def _call(model_name, contents, request_options, safety_settings, log_tag=None):
+        calls.append(model_name)
+        return SimpleNamespace(text='[{"label": "sofa", "box_2d": [0, 0, 500, 500]}]')
+
+    cache = AnalysisResultCache()
+    kwargs = dict(
+        log_brief=True,
+        call_gemini_with_failover=_call,
+        default_model_name="detect-model",
+        analysis_cache=cache,
+    )
+
+    first = detect_furniture_boxes(moodboard, **kwargs)
+    second = detect_furniture_boxes(moodboard, **kwargs)
+
+    assert first == second == [{"label": "sofa", "box_2d": [0, 0, 500, 500]}]
+    assert calls == ["detect-model"]
+
+    detect_furniture_boxes(moodboard, model_name="other-model", **kwargs)
+    assert calls == ["detect-model", "other-model"]
+
+
+def test_room_structure_failure_is_not_cached(tmp_path):
+    room = _write_png(tmp_path / "room.png")
+    responses = ["not json", '{"room_text": "bright room"}']
+    calls = []
+
+    def _call(model_name, contents, request_options, safety_settings, log_tag=None):
+        calls.append(model_name)
+        return SimpleNamespace(text=responses[len(calls) - 1])
+
+    def _parse(text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return {}
+
+    cache = AnalysisResultCache()
+    kwargs = dict(
+        call_gemini_with_failover=_call,
+        model_name="room-model",
+        safe_json_from_model_text=_parse,
+        analysis_cache=cache,
+    )
+
+    assert analyze_room_structure(room, **kwargs) == {}
+    assert analyze_room_structure(room, **kwargs) == {"room_text": "bright room"}
+    assert analyze_room_structure(room, **kwargs) == {"room_text": "bright room"}
+    assert len(calls) == 2
+
+
+def test_analyze_cropped_item_reuses_model_description_with_fresh_job_fields(tmp_path, monkeypatch):
+    from application.render import item_analysis_stage
+
+    monkeypatch.chdir(tmp_path)
+    moodboard = _write_png(tmp_path / "moodboard.png")
+    calls = []
+
+    def _call(model_name, contents, request_options, safety_settings, log_tag=None, **_kwargs):
+        calls.append(log_tag)
+        return SimpleNamespace(text='{"description": "Walnut dining table with tapered legs."}')
+
+    cache = AnalysisResultCache()
+    kwargs = dict(
+        call_gemini_with_failover=_call,
+        analysis_model_name="analysis-model",
+        safe_extract_json=lambda text: json.loads(text),
+        normalize_dims_dict=lambda dims: dict(dims or {}),
+        log_brief=True,
+        save_crop=False,
+        enable_text_read=True,
+        analysis_cache=cache,
+    )
+    item = {"label": "table", "box_2d": [0, 0, 1000, 1000], "target_key": "job-a"}
+
+    first = item_analysis_stage.analyze_cropped_item(moodboard, item, **kwargs)
+    model_calls = len(calls)
+    second = item_analysis_stage.analyze_cropped_item(moodboard, {**item, "target_key": "job-b"}, **kwargs)
+
+    assert model_calls >= 1
+    assert len(calls) == model_calls
+    assert second["description"] == first["description"]
+    assert second["reference_features"] == first["reference_features"]
+    assert second["target_key"] == "job-b"
+
+
+def test_analyze_cropped_item_does_not_cache_fallback_reference_features(tmp_path, monkeypatch):
+    from application.render import item_analysis_stage
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "outputs").mkdir()
+    moodboard = _write_png(tmp_path / "moodboard.png")
+    calls = []
+
+    def _call(model_name, contents, request_options, safety_settings, log_tag=None, **_kwargs):
+        calls.append(log_tag)
+        if log_tag == "Analysis.ReferenceFeatures":
+            return SimpleNamespace(text="{}")
+        return SimpleNamespace(text='{"description": "Oak lounge chair with a woven seat."}')
+
+    cache = AnalysisResultCache()
+    kwargs = dict(
+        call_gemini_with_failover=_call,
+        analysis_model_name="analysis-model",
+        safe_extract_json=lambda text: json.loads(text),
+        normalize_dims_dict=lambda dims: dict(dims or {}),
+        log_brief=True,
+        unique_id="job",
+        item_index=1,
+        enable_text_read=True,
+        analysis_cache=cache,
+    )
+    item = {"label": "chair", "category": "chair", "box_2d": [0, 0, 1000, 1000], "target_key": "job-a"}
+
+    first = item_analysis_stage.analyze_cropped_item(moodboard, item, **kwargs)
+    assert first["reference_features"]["analysis_quality"] == "fallback_after_weak_model"
+    calls.clear()
+    item_analysis_stage.analyze_cropped_item(moodboard, item, **kwargs)
+
+    assert "Analysis.CropItem" in calls
+    assert "Analysis.ReferenceFeatures" in calls
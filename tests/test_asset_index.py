@@ -0,0 +1,106 @@
+import json
+import os
+
+from PIL import Image
+
+from infrastructure.asset_index import LocalAssetIndex, etag_matches
+from preset_helpers import resolve_preset_request
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _image(path, size=(40, 30)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, (200, 200, 200)).save(path)
+
+
+def _index(tmp_path, clock=None, presets=None):
+    assets = tmp_path / "assets"
+    thumbs = tmp_path / "thumbnails"
+    thumbs.mkdir(parents=True, exist_ok=True)
+    for name in ("livingroom_natural_10.png", "livingroom_natural_2.png", "livingroom_natural_1.png", "livingroom_natural_x.png", "notes.txt"):
+        (thumbs / name).write_bytes(b"thumb")
+    for variant in ("1", "10", "11"):
+        _image(assets / "livingroom" / "natural" / f"livingroom_natural_{variant}_moodboard.png", size=(40 + int(variant), 30))
+    preset_path = tmp_path / "preset_map.json"
+    preset_path.write_text(json.dumps(presets or {}), encoding="utf-8")
+    return LocalAssetIndex(
+        assets_dir=assets,
+        thumbnails_dir=thumbs,
+        room_styles={"Living room": ["Natural"]},
+        preset_map_path=str(preset_path),
+        refresh_sec=30,
+        clock=clock or _Clock(),
+    )
+
+
+def test_thumbnails_and_styles_are_served_from_prebuilt_payloads(tmp_path):
+    index = _index(tmp_path)
+
+    thumbnails = index.thumbnails("Living Room", "natural")
+    assert json.loads(thumbnails.body) == [
+        {"index": 1, "file": "livingroom_natural_1.png"},
+        {"index": 2, "file": "livingroom_natural_2.png"},
+        {"index": 10, "file": "livingroom_natural_10.png"},
+    ]
+    assert index.thumbnails("Living Room", "natural") is thumbnails
+    assert json.loads(index.thumbnails("bedroom", "natural").body) == []
+    assert json.loads(index.styles_for_room("Living room").body) == ["Natural", "Customize"]
+    assert json.loads(index.room_types().body) == ["Living room"]
+
+    assert etag_matches(thumbnails.etag, thumbnails.etag)
+    assert etag_matches(f'W/{thumbnails.etag}, "other"', thumbnails.etag)
+    assert etag_matches("*", thumbnails.etag)
+    assert not etag_matches('"other"', thumbnails.etag)
+    assert not etag_matches(None, thumbnails.etag)
+
+
+def test_moodboard_lookup_matches_whole_variant_numbers(tmp_path):
+    index = _index(tmp_path)
+
+    first = index.find_moodboard("livingroom", "Natural", "1")
+    assert first["url"] == "/assets/livingroom/natural/livingroom_natural_1_moodboard.png"
+    assert (first["width"], first["height"]) == (41, 30)
+    assert index.find_moodboard("livingroom", "natural", "11")["url"].endswith("_11_moodboard.png")
+    # Unknown variants fall back to the first file in sorted order, as reference preparation does.
+    assert index.find_moodboard("livingroom", "natural", "7")["url"].endswith("_10_moodboard.png")
+    assert index.find_moodboard("bedroom", "natural", "1") is None
+
+
+def test_index_rebuilds_only_after_refresh_interval_when_mtimes_change(tmp_path):
+    clock = _Clock()
+    index = _index(tmp_path, clock=clock)
+    assert len(json.loads(index.thumbnails("livingroom", "natural").body)) == 3
+
+    new_thumb = tmp_path / "thumbnails" / "livingroom_natural_3.png"
+    new_thumb.write_bytes(b"thumb")
+    stat = os.stat(tmp_path / "thumbnails")
+    os.utime(tmp_path / "thumbnails", (stat.st_atime, stat.st_mtime + 5))
+    assert len(json.loads(index.thumbnails("livingroom", "natural").body)) == 3
+
+    clock.now += 31
+    assert len(json.loads(index.thumbnails("livingroom", "natural").body)) == 4
+    clock.now += 31
+    index.thumbnails("livingroom", "natural")
+    stats = index.stats()
+    assert stats["builds"] == 2
+    assert stats["refresh_checks"] == 2
+
+
+def test_preset_resolution_reuses_the_index(tmp_path):
+    presets = {"living-10": {"room": "livingroom", "style": "natural", "variant": "10", "dimensions": "W2400 D1000"}}
+    index = _index(tmp_path, presets=presets)
+
+    resolved = resolve_preset_request({"preset_id": "living-10"}, index.preset_map(), asset_index=index)
+
+    assert resolved["variant"] == "10"
+    assert resolved["dimensions"] == "W2400 D1000"
+    assert resolved["moodboard_url"] == "/assets/livingroom/natural/livingroom_natural_10_moodboard.png"
+    assert resolved["thumbnail_url"] == "/static/thumbnails/livingroom_natural_10.png"
+    assert "moodboard_url" not in resolve_preset_request({"room": "livingroom", "style": "natural"}, {})
@@ -1,5 +1,6 @@
 import os
 import tempfile
+import time
 import unittest
 from pathlib import Path
 from unittest.mock import patch
@@ -8,6 +9,8 @@ from api_models import CompileClip, CompileRequest
 from application.video import compile_workflow
 from application.video.compile_workflow import _build_video_filter
 from application.video.job_store import get_video_job, video_jobs, video_jobs_lock
+from application.video import video_support
+from application.video.video_support import encoder_args, ffmpeg_progress_seconds, resolve_encoder_profile
 
 
 class CompileWorkflowTests(unittest.TestCase):
@@ -99,7 +102,7 @@ class CompileWorkflowTests(unittest.TestCase):
             Path(out_path).parent.mkdir(parents=True, exist_ok=True)
             Path(out_path).write_bytes(b"source-video")
 
-        def fake_run_ffmpeg(cmd):
+        def fake_run_ffmpeg(cmd, on_progress=None):
             output_path = Path(cmd[-1])
             output_path.parent.mkdir(parents=True, exist_ok=True)
             output_path.write_bytes(b"compiled-video")
@@ -126,6 +129,225 @@ class CompileWorkflowTests(unittest.TestCase):
         self.assertEqual(state.get("result_url"), "https://cdn.example/final_compile-published.mp4")
         self.assertEqual(resolved, ["/outputs/final_compile-published.mp4"])
 
+    def test_recompile_reuses_cached_clips_and_reports_ffmpeg_progress(self):
+        encodes = []
+        progress_seen = []
+
+        def fake_download(url, out_path):
+            Path(out_path).write_bytes(url.encode("utf-8"))
+
+        def fake_run_ffmpeg(cmd, on_progress=None):
+            if on_progress is not None:
+                encodes.append(cmd[cmd.index("-filter_complex") + 1])
+                self.assertEqual(cmd[cmd.index("-threads") + 1], "2")
+                on_progress(1.25)
+                progress_seen.append(get_video_job(job_id)["progress"])
+            Path(cmd[-1]).write_bytes(b"encoded")
+
+        clips = [
+            CompileClip(video_url="https://cdn.example/a.mp4", trim_end=2.5),
+            CompileClip(video_url="https://cdn.example/b.mp4", speed=2.0),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prev_cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                Path("outputs").mkdir()
+                with patch.object(compile_workflow, "download_to_path", side_effect=fake_download), patch.object(
+                    compile_workflow, "run_ffmpeg", side_effect=fake_run_ffmpeg
+                ):
+                    job_id = "compile-first"
+                    compile_workflow.run_final_compile_job(
+                        job_id, CompileRequest(clips=clips), video_target_fps=12, compile_workers=1, cpu_budget=2
+                    )
+                    self.assertEqual(len(encodes), 2)
+                    self.assertEqual(progress_seen, [20, 60])
+
+                    job_id = "compile-second"
+                    clips[1] = CompileClip(video_url="https://cdn.example/b.mp4", speed=2.0, reverse=True)
+                    compile_workflow.run_final_compile_job(
+                        job_id, CompileRequest(clips=clips), video_target_fps=12, compile_workers=2, cpu_budget=4
+                    )
+                    listed = Path("outputs/list_compile-second.txt").read_text(encoding="utf-8").splitlines()
+                cached = sorted(path.name for path in Path("outputs/compile_cache").iterdir())
+            finally:
+                os.chdir(prev_cwd)
+
+        self.assertEqual(len(encodes), 3)
+        self.assertIn("reverse", encodes[-1])
+        self.assertEqual(len(cached), 3)
+        self.assertEqual(len(listed), 2)
+        self.assertEqual(get_video_job("compile-second").get("status"), "COMPLETED")
+
+    def test_clips_sharing_a_source_download_it_once_before_transcoding(self):
+        downloads = []
+        inputs = []
+
+        def slow_download(url, out_path):
+            downloads.append(url)
+            with open(out_path, "wb") as file_obj:
+                time.sleep(0.05)
+                file_obj.write(b"shared-source")
+
+        def fake_run_ffmpeg(cmd, on_progress=None):
+            if "-filter_complex" in cmd:
+                inputs.append(Path(cmd[cmd.index("-i") + 1]).read_bytes())
+            Path(cmd[-1]).write_bytes(b"encoded")
+
+        clips = [
+            CompileClip(video_url="https://cdn.example/shared.mp4"),
+            CompileClip(video_url="https://cdn.example/shared.mp4", reverse=True),
+            CompileClip(video_url="https://other.example/shared.mp4", trim_start=1.0),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prev_cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                Path("outputs").mkdir()
+                with patch.object(compile_workflow, "download_to_path", side_effect=slow_download), patch.object(
+                    compile_workflow, "run_ffmpeg", side_effect=fake_run_ffmpeg
+                ):
+                    compile_workflow.run_final_compile_job(
+                        "compile-shared", CompileRequest(clips=clips), video_target_fps=12, compile_workers=3, cpu_budget=3
+                    )
+                sources = sorted(path.name for path in Path("outputs").glob("src_*"))
+            finally:
+                os.chdir(prev_cwd)
+
+        self.assertEqual(get_video_job("compile-shared").get("status"), "COMPLETED")
+        self.assertEqual(sorted(downloads), ["https://cdn.example/shared.mp4", "https://other.example/shared.mp4"])
+        self.assertEqual(inputs, [b"shared-source"] * 3)
+        self.assertEqual(len(sources), 2)
+
+    def test_encoder_profile_is_selected_per_request_and_keys_the_clip_cache(self):
+        commands = []
+
+        def fake_run_ffmpeg(cmd, on_progress=None):
+            commands.append(cmd)
+            Path(cmd[-1]).write_bytes(b"encoded")
+
+        clips = [CompileClip(video_url="https://cdn.example/a.mp4")]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prev_cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                with patch.object(
+                    compile_workflow, "download_to_path", side_effect=lambda url, out_path: Path(out_path).write_bytes(b"src")
+                ), patch.object(compile_workflow, "run_ffmpeg", side_effect=fake_run_ffmpeg):
+                    compile_workflow.run_final_compile_job(
+                        "compile-draft",
+                        CompileRequest(clips=clips, encoder_profile="draft"),
+                        video_target_fps=12,
+                        default_encoder_profile="standard",
+                    )
+                    compile_workflow.run_final_compile_job(
+                        "compile-default",
+                        CompileRequest(clips=clips, encoder_profile="lossless-please"),
+                        video_target_fps=12,
+                        default_encoder_profile="standard",
+                    )
+            finally:
+                os.chdir(prev_cwd)
+
+        transcodes = [cmd for cmd in commands if "-filter_complex" in cmd]
+        self.assertEqual(len(transcodes), 2)
+        self.assertEqual(transcodes[0][transcodes[0].index("-preset") + 1], "veryfast")
+        self.assertEqual(transcodes[1][transcodes[1].index("-preset") + 1], "medium")
+        self.assertEqual(get_video_job("compile-default").get("status"), "COMPLETED")
+
+    def test_encoder_profiles_fall_back_to_archival_settings(self):
+        self.assertEqual(resolve_encoder_profile(" Draft "), "draft")
+        self.assertEqual(resolve_encoder_profile(None), "archival")
+        self.assertEqual(resolve_encoder_profile("unknown", "bogus"), "archival")
+        archival = encoder_args("archival")
+        self.assertEqual(archival[archival.index("-crf") + 1], "10")
+        self.assertEqual(archival[archival.index("-preset") + 1], "veryslow")
+
+    def test_trim_and_normalize_helpers_use_the_selected_encoder_profile(self):
+        commands = []
+        with patch.object(video_support, "run_ffmpeg", side_effect=lambda cmd, on_progress=None: commands.append(cmd)):
+            video_support.ffmpeg_trim_speed(Path("in.mp4"), Path("out.mp4"), 0.5, 2.0, 2.0, 30)
+            video_support.ffmpeg_trim_speed(Path("in.mp4"), Path("out.mp4"), 0.0, 2.0, 1.0, 30, encoder_profile="draft")
+            video_support.ffmpeg_normalize_to(Path("in.mp4"), Path("out.mp4"), 720, 1280, 30)
+            video_support.ffmpeg_normalize_to(Path("in.mp4"), Path("out.mp4"), 720, 1280, 30, encoder_profile="standard")
+
+        self.assertEqual([cmd[cmd.index("-preset") + 1] for cmd in commands], ["veryslow", "veryfast", "veryslow", "medium"])
+        self.assertIn("trim=start=0.5:duration=2.0,setpts=(PTS-STARTPTS)/2.0,fps=30", commands[0])
+        self.assertEqual(commands[2][-1], "out.mp4")
+
+    def test_clip_cache_evicts_least_recently_used_clips_over_the_cap(self):
+        now = 1_000_000.0
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_dir = Path(tmpdir)
+            ages_hours = {"clip_old.mp4": 30, "clip_mid.mp4": 20, "clip_held.mp4": 40, "clip_new.mp4": 10, "clip_hot.mp4": 0.1}
+            for name, age in ages_hours.items():
+                path = cache_dir / name
+                path.write_bytes(b"x" * 100)
+                os.utime(path, (now - age * 3600, now - age * 3600))
+            stale_part = cache_dir / "clip_old.1234abcd.part.mp4"
+            stale_part.write_bytes(b"x" * 10)
+            os.utime(stale_part, (now - 7200, now - 7200))
+
+            compile_workflow._hold_cached_clip(cache_dir / "clip_held.mp4")
+            try:
+                removed = compile_workflow._evict_compile_cache(cache_dir, 250, now=now)
+            finally:
+                compile_workflow._release_cached_clips([cache_dir / "clip_held.mp4"])
+            remaining = sorted(path.name for path in cache_dir.iterdir())
+
+            # Three oldest unheld clips plus the leftover .part file.
+            self.assertEqual(removed, 4)
+            self.assertEqual(remaining, ["clip_held.mp4", "clip_hot.mp4"])
+            # Recently used clips stay even while the cache is over its cap.
+            self.assertEqual(compile_workflow._evict_compile_cache(cache_dir, 50, now=now), 1)
+            self.assertEqual(sorted(path.name for path in cache_dir.iterdir()), ["clip_hot.mp4"])
+            self.assertEqual(compile_workflow._evict_compile_cache(cache_dir, 0, now=now + 86400), 0)
+
+    def test_compile_trims_the_clip_cache_but_keeps_its_own_clips(self):
+        def fake_download(url, out_path):
+            Path(out_path).write_bytes(url.encode("utf-8"))
+
+        def fake_run_ffmpeg(cmd, on_progress=None):
+            Path(cmd[-1]).write_bytes(b"e" * 100)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prev_cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                cache_dir = Path("outputs/compile_cache")
+                cache_dir.mkdir(parents=True)
+                old_clip = cache_dir / "clip_stale.mp4"
+                old_clip.write_bytes(b"o" * 100)
+                os.utime(old_clip, (time.time() - 86400, time.time() - 86400))
+                with patch.object(compile_workflow, "download_to_path", side_effect=fake_download), patch.object(
+                    compile_workflow, "run_ffmpeg", side_effect=fake_run_ffmpeg
+                ):
+                    compile_workflow.run_final_compile_job(
+                        "compile-evict",
+                        CompileRequest(clips=[CompileClip(video_url="https://cdn.example/a.mp4")]),
+                        video_target_fps=12,
+                        clip_cache_max_bytes=150,
+                    )
+                cached = [path.name for path in cache_dir.iterdir()]
+            finally:
+                os.chdir(prev_cwd)
+
+        self.assertEqual(get_video_job("compile-evict").get("status"), "COMPLETED")
+        self.assertEqual(len(cached), 1)
+        self.assertNotIn("clip_stale.mp4", cached)
+        self.assertEqual(compile_workflow._clips_in_use, {})
+
+    def test_parallelism_stays_within_cpu_budget(self):
+        self.assertEqual(compile_workflow._resolve_compile_parallelism(10, 0, 8), (4, 2))
+        self.assertEqual(compile_workflow._resolve_compile_parallelism(2, 0, 8), (2, 4))
+        self.assertEqual(compile_workflow._resolve_compile_parallelism(6, 16, 4), (4, 1))
+
+    def test_ffmpeg_progress_lines_report_output_seconds(self):
+        self.assertEqual(ffmpeg_progress_seconds("out_time_us=1500000\n"), 1.5)
+        self.assertEqual(ffmpeg_progress_seconds("out_time_ms=250000"), 0.25)
+        self.assertIsNone(ffmpeg_progress_seconds("out_time_us=N/A"))
+        self.assertIsNone(ffmpeg_progress_seconds("progress=continue"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,112 @@
+from collections import deque
+
+import pytest
+from PIL import Image, ImageDraw
+
+from application.render import direct_item_image_prep as prep
+
+
+def _reference_flood_fill(image, bg_color, threshold):
+    width, height = image.size
+    pixels = image.load()
+    mask = [0] * (width * height)
+    queue = deque()
+
+    def _mark(x, y):
+        idx = y * width + x
+        if mask[idx] or prep._color_distance(pixels[x, y], bg_color) > threshold:
+            return
+        mask[idx] = 1
+        queue.append((x, y))
+
+    for x in range(width):
+        _mark(x, 0)
+        _mark(x, height - 1)
+    for y in range(height):
+        _mark(0, y)
+        _mark(width - 1, y)
+    while queue:
+        x, y = queue.popleft()
+        for next_x, next_y in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= next_x < width and 0 <= next_y < height:
+                _mark(next_x, next_y)
+    return mask
+
+
+def _reference_bbox(mask, width, height, target_value):
+    points = [(idx % width, idx // width) for idx, value in enumerate(mask) if value == target_value]
+    if not points:
+        return None
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return min(xs), min(ys), max(xs) + 1, max(ys) + 1
+
+
+def _product_shot(size=(120, 90)):
+    img = Image.new("RGB", size, (246, 246, 244))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((30, 20, 90, 70), fill=(90, 60, 40))
+    draw.rectangle((45, 35, 75, 70), fill=(245, 245, 243))  # pocket enclosed on three sides
+    draw.rectangle((52, 40, 60, 48), fill=(90, 60, 40))
+    draw.ellipse((62, 22, 70, 30), fill=(244, 246, 245))  # background-coloured hole fully enclosed
+    return img
+
+
+def _diagonal_background(size=(64, 48)):
+    # Background only connects diagonally through a checker seam, which 4-connectivity must not cross.
+    img = Image.new("RGB", size, (255, 255, 255))
+    pixels = img.load()
+    for y in range(size[1]):
+        for x in range(size[0]):
+            if 10 <= x < 50 and 10 <= y < 38 and (x + y) % 2 == 0:
+                pixels[x, y] = (20, 20, 20)
+    return img
+
+
+def _noise(size=(57, 41)):
+    img = Image.new("RGB", size)
+    img.putdata([((x * 53 + y * 17) % 256, (x * 29 + y * 71) % 256, (x * y * 13) % 256) for y in range(size[1]) for x in range(size[0])])
+    return img
+
+
+@pytest.mark.parametrize(
+    "image,bg_color,threshold",
+    [
+        (_product_shot(), (246, 246, 244), 42),
+        (_diagonal_background(), (255, 255, 255), 42),
+        (_noise(), (128, 128, 128), 200),
+        (_noise(), (0, 0, 0), 0),
+        (Image.new("RGB", (20, 10), (10, 10, 10)), (10, 10, 10), 42),
+    ],
+)
+def test_flood_fill_matches_reference_bfs(image, bg_color, threshold):
+    width, height = image.size
+    expected = _reference_flood_fill(image, bg_color, threshold)
+    mask = prep._flood_fill_background(image, bg_color, threshold)
+
+    assert list(mask) == expected
+    for target_value in (0, 1):
+        assert prep._mask_bbox(mask, width, height, target_value=target_value) == _reference_bbox(
+            expected, width, height, target_value
+        )
+    assert prep._object_border_touch_ratio(mask, width, height) == prep._object_border_touch_ratio(
+        bytearray(expected), width, height
+    )
+
+
+def test_cutout_alpha_is_opaque_only_on_object_pixels():
+    image = _product_shot()
+    cutout = prep._cutout_simple_background(image, (246, 246, 244), 42)
+    expected = _reference_flood_fill(image, (246, 246, 244), 42)
+
+    assert list(cutout.getchannel("A").getdata()) == [0 if value else 255 for value in expected]
+    assert cutout.getpixel((64, 24))[3] == 255
+    assert cutout.getpixel((55, 60))[3] == 0
+
+
+def test_detection_on_catalog_shot_is_confident():
+    image = _product_shot((400, 300)).resize((1024, 768))
+    detection = prep._detect_simple_border_background(image)
+
+    assert detection.confident is True
+    assert detection.threshold == 42
@@ -0,0 +1,162 @@
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from infrastructure.download_proxy import AsyncDownloadProxy, DownloadDiskCache
+
+BODY = bytes(range(256)) * 40
+URL = "https://bucket.s3.amazonaws.com/videos/clip.mp4"
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _chunks(body):
+    for start in range(0, len(body), 4096):
+        yield body[start : start + 4096]
+
+
+class _Upstream:
+    def __init__(self, body=BODY, etag='"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        headers = {"ETag": self.etag, "Content-Type": "video/mp4", "Accept-Ranges": "bytes"}
+        range_header = request.headers.get("range")
+        if range_header:
+            start, end = (int(part) for part in range_header.removeprefix("bytes=").split("-"))
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(self.body)}"
+            return httpx.Response(206, headers=headers, content=_chunks(self.body[start : end + 1]))
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(self.body))
+            return httpx.Response(200, headers=headers)
+        headers["Content-Length"] = str(len(self.body))
+        return httpx.Response(200, headers=headers, content=_chunks(self.body))
+
+
+def _client(proxy: AsyncDownloadProxy) -> TestClient:
+    app = FastAPI()
+
+    @app.api_route("/download", methods=["GET", "HEAD"])
+    async def _download(url: str, request: Request):
+        return await proxy.proxy(
+            url,
+            method=request.method,
+            filename="clip.mp4",
+            range_header=request.headers.get("range"),
+            if_none_match=request.headers.get("if-none-match"),
+        )
+
+    return TestClient(app)
+
+
+def _proxy(upstream, cache):
+    return AsyncDownloadProxy(
+        cache=cache,
+        client_factory=lambda: httpx.AsyncClient(transport=httpx.MockTransport(upstream)),
+        chunk_bytes=1024,
+    )
+
+
+def test_full_download_is_cached_and_served_from_disk(tmp_path):
+    upstream = _Upstream()
+    cache = DownloadDiskCache(tmp_path)
+    client = _client(_proxy(upstream, cache))
+
+    first = client.get("/download", params={"url": URL})
+    second = client.get("/download", params={"url": URL})
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content == BODY
+    assert first.headers["content-disposition"] == 'attachment; filename="clip.mp4"'
+    assert second.headers["etag"] == '"v1"'
+    assert len(upstream.requests) == 1
+    assert upstream.requests[0].headers["accept-encoding"] == "identity"
+    assert cache.stats()["stores"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_range_and_conditional_requests_are_answered_from_cache(tmp_path):
+    upstream = _Upstream()
+    client = _client(_proxy(upstream, DownloadDiskCache(tmp_path)))
+    client.get("/download", params={"url": URL})
+
+    partial = client.get("/download", params={"url": URL}, headers={"Range": "bytes=10-19"})
+    not_modified = client.get("/download", params={"url": URL}, headers={"If-None-Match": '"v1"'})
+
+    assert partial.status_code == 206
+    assert partial.content == BODY[10:20]
+    assert not_modified.status_code == 304
+    assert len(upstream.requests) == 1
+
+
+def test_range_miss_is_passed_through_without_caching(tmp_path):
+    upstream = _Upstream()
+    cache = DownloadDiskCache(tmp_path)
+    client = _client(_proxy(upstream, cache))
+
+    partial = client.get("/download", params={"url": URL}, headers={"Range": "bytes=0-99"})
+    head = client.head("/download", params={"url": URL})
+
+    assert partial.status_code == 206
+    assert partial.content == BODY[:100]
+    assert partial.headers["content-range"] == f"bytes 0-99/{len(BODY)}"
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(BODY))
+    assert upstream.requests[0].headers["range"] == "bytes=0-99"
+    assert cache.stats()["entries"] == 0
+
+
+def test_stale_entry_revalidates_and_changed_object_replaces_it(tmp_path):
+    clock = _FakeClock()
+    upstream = _Upstream()
+    cache = DownloadDiskCache(tmp_path, fresh_sec=60, clock=clock)
+    client = _client(_proxy(upstream, cache))
+    client.get("/download", params={"url": URL})
+
+    clock.now += 120
+    revalidated = client.get("/download", params={"url": URL})
+    assert revalidated.content == BODY
+    assert upstream.requests[-1].headers["if-none-match"] == '"v1"'
+    assert cache.stats()["revalidated"] == 1
+
+    clock.now += 120
+    upstream.body, upstream.etag = b"new-bytes", '"v2"'
+    replaced = client.get("/download", params={"url": URL})
+    assert replaced.content == b"new-bytes"
+    assert cache.get(URL)["etag"] == '"v2"'
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".bin", ".json"]
+
+
+def test_cache_evicts_least_recent_objects_and_reloads_index(tmp_path):
+    cache = DownloadDiskCache(tmp_path, max_bytes=25)
+    for index in range(3):
+        writer = cache.open_writer(f"https://h/{index}", f'"e{index}"', "image/png")
+        writer.write(b"x" * 10)
+        writer.commit(10)
+
+    assert cache.get("https://h/0") is None
+    assert cache.stats()["evictions"] == 1
+
+    reloaded = DownloadDiskCache(tmp_path, max_bytes=25)
+    assert reloaded.get("https://h/2")["size"] == 10
+    assert reloaded.stats()["entries"] == 2
+
+
+def test_upstream_error_is_reported(tmp_path):
+    client = _client(_proxy(lambda request: httpx.Response(404), DownloadDiskCache(tmp_path)))
+
+    response = client.get("/download", params={"url": URL})
+
+    assert response.status_code == 404
+    assert response.json() == {"error": "Upstream error (404)"}
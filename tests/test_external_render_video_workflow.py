@@ -271,6 +271,46 @@ class ExternalRenderVideoWorkflowTests(unittest.TestCase):
         self.assertEqual(result["intro_url"], "https://cdn.example/brand_intro.mp4")
         self.assertEqual(result["outro_url"], "https://cdn.example/brand_outro.mp4")
 
+    def test_static_fallback_clips_use_the_configured_encoder_profile(self):
+        source_states = {
+            "source-job": {"status": "FAILED", "results": [], "error": "provider down"},
+            "compile-job": {"status": "COMPLETED", "result_url": "/outputs/final_compiled.mp4"},
+        }
+        captured: dict[str, object] = {}
+        encoded_profiles: list[str] = []
+
+        def queue_source_generation_job(req, **kwargs):
+            captured["source_kwargs"] = kwargs
+            return "source-job"
+
+        with patch("application.video.external_render_video_workflow._preferred_brand_card_path", return_value=None), patch(
+            "application.video.external_render_video_workflow.download_to_path"
+        ), patch(
+            "application.video.external_render_video_workflow.ffmpeg_image_to_video",
+            side_effect=lambda *args, encoder_profile: encoded_profiles.append(encoder_profile),
+        ):
+            result = run_external_render_video_job(
+                {"render_job_id": "render-job-1", "clip_count": 2, "cfg_scale": 0.5, "audience": "external"},
+                fetch_job=lambda job_id: _FakeFinishedJob(_render_with_details_payload()),
+                load_job_result=lambda job_id: None,
+                queue_source_generation_job=queue_source_generation_job,
+                queue_final_compile_job=lambda req, **kwargs: "compile-job",
+                get_video_job=lambda job_id: source_states[job_id],
+                resolve_image_url=lambda path, prefix=None: f"https://cdn.example/{Path(path).name}",
+                build_s3_prefix=lambda audience, category, subfolder=None: f"{audience}/{category}/{subfolder or 'root'}",
+                normalize_audience=lambda audience: audience or "external",
+                create_kling_task=lambda *args, **kwargs: "task-123",
+                poll_kling_task=lambda *args, **kwargs: "https://cdn.example/provider-clip.mp4",
+                video_target_fps=12,
+                video_max_concurrency=2,
+                sleep=lambda seconds: None,
+                encoder_profile="draft",
+            )
+
+        self.assertTrue(result["fallback_used"])
+        self.assertEqual(encoded_profiles, ["draft"] * result["clip_count"])
+        self.assertEqual(captured["source_kwargs"]["encoder_profile"], "draft")
+
     def test_run_external_render_video_job_returns_error_when_source_render_not_finished(self):
         result = run_external_render_video_job(
             {
@@ -1,6 +1,19 @@
 from types import SimpleNamespace
 
+import pytest
+
 from infrastructure.ai.gemini_client import call_gemini_with_failover
+from infrastructure.ai.gemini_client_registry import get_gemini_client_stats, reset_gemini_client_registry
+from infrastructure.ai.gemini_key_scheduler import get_gemini_key_scheduler_stats, reset_gemini_key_scheduler
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client_registry():
+    reset_gemini_client_registry()
+    reset_gemini_key_scheduler()
+    yield
+    reset_gemini_client_registry()
+    reset_gemini_key_scheduler()
 
 
 def _install_fake_genai_client(monkeypatch, captured: dict):
@@ -12,8 +25,9 @@ def _install_fake_genai_client(monkeypatch, captured: dict):
             return SimpleNamespace(parts=[], candidates=[SimpleNamespace()])
 
     class DummyClient:
-        def __init__(self, *, api_key):
+        def __init__(self, *, api_key, http_options=None):
             captured["api_key"] = api_key
+            captured["client_inits"] = captured.get("client_inits", 0) + 1
             self.models = DummyModels()
 
     monkeypatch.setattr("infrastructure.ai.gemini_client.genai.Client", DummyClient)
@@ -135,7 +149,7 @@ def test_call_gemini_with_failover_logs_attempts_exhausted_on_final_failure(monk
             raise RuntimeError("504 DEADLINE_EXCEEDED")
 
     class FailingClient:
-        def __init__(self, *, api_key):
+        def __init__(self, *, api_key, http_options=None):
             self.models = FailingModels()
 
     monkeypatch.setattr("infrastructure.ai.gemini_client.genai.Client", FailingClient)
@@ -179,3 +193,105 @@ def test_call_gemini_with_failover_uses_medium_thinking_for_non_furniture_analys
     )
 
     assert captured["config"]["thinking_config"]["thinking_level"] == "medium"
+
+
+def _quiet_logger():
+    return SimpleNamespace(info=lambda *a, **k: None, warning=lambda *a, **k: None, error=lambda *a, **k: None)
+
+
+def test_call_gemini_with_failover_reuses_one_client_per_key(monkeypatch):
+    captured = {}
+    _install_fake_genai_client(monkeypatch, captured)
+
+    for _ in range(3):
+        call_gemini_with_failover(
+            "gemini-3.5-flash",
+            ["prompt"],
+            {"timeout": 12, "max_attempts": 1},
+            {},
+            api_key_pool=["test-key-1234"],
+            quota_exceeded_keys=set(),
+            logger=_quiet_logger(),
+            log_brief=True,
+        )
+
+    stats = get_gemini_client_stats()["...1234"]
+    assert captured["client_inits"] == 1
+    assert stats["clients_created"] == 1
+    assert stats["client_reuses"] == 2
+    assert stats["handshakes_avoided"] == 2
+    assert stats["active"] is True
+
+
+def test_call_gemini_with_failover_invalidates_client_when_key_hits_quota(monkeypatch):
+    inits = []
+
+    class QuotaModels:
+        def generate_content(self, *, model, contents, config=None):
+            raise RuntimeError("429 Resource has been exhausted. Please retry in 17.5s.")
+
+    class QuotaClient:
+        def __init__(self, *, api_key, http_options=None):
+            inits.append(api_key)
+            self.models = QuotaModels()
+
+    monkeypatch.setattr("infrastructure.ai.gemini_client.genai.Client", QuotaClient)
+    monkeypatch.setattr("infrastructure.ai.gemini_client.time.sleep", lambda *_args, **_kwargs: None)
+    quota_exceeded_keys = set()
+
+    response = call_gemini_with_failover(
+        "gemini-3.5-flash",
+        ["prompt"],
+        {"timeout": 12, "max_attempts": 1},
+        {},
+        api_key_pool=["test-key-1234"],
+        quota_exceeded_keys=quota_exceeded_keys,
+        logger=_quiet_logger(),
+        log_brief=True,
+    )
+
+    stats = get_gemini_client_stats()["...1234"]
+    assert response is None
+    assert quota_exceeded_keys == {"test-key-1234"}
+    assert stats["invalidations"] == 1
+    assert stats["active"] is False
+    scheduler_stats = get_gemini_key_scheduler_stats()["...1234"]
+    assert scheduler_stats["quota_hits"] == 1
+    assert scheduler_stats["in_flight"] == 0
+    assert 17.0 <= scheduler_stats["cooldown_remaining_sec"] <= 17.5
+
+
+def test_call_gemini_with_failover_moves_to_another_key_after_quota(monkeypatch):
+    used_keys = []
+
+    class Models:
+        def __init__(self, api_key):
+            self.api_key = api_key
+
+        def generate_content(self, *, model, contents, config=None):
+            used_keys.append(self.api_key)
+            if self.api_key == "test-key-aaaa":
+                raise RuntimeError("429 Quota exceeded")
+            return SimpleNamespace(parts=[], candidates=[SimpleNamespace()])
+
+    class Client:
+        def __init__(self, *, api_key, http_options=None):
+            self.models = Models(api_key)
+
+    monkeypatch.setattr("infrastructure.ai.gemini_client.genai.Client", Client)
+    quota_exceeded_keys = set()
+
+    response = call_gemini_with_failover(
+        "gemini-3.5-flash",
+        ["prompt"],
+        {"timeout": 12, "max_attempts": 2},
+        {},
+        api_key_pool=["test-key-aaaa", "test-key-bbbb"],
+        quota_exceeded_keys=quota_exceeded_keys,
+        logger=_quiet_logger(),
+        log_brief=True,
+    )
+
+    assert response is not None
+    assert used_keys == ["test-key-aaaa", "test-key-bbbb"]
+    assert quota_exceeded_keys == {"test-key-aaaa"}
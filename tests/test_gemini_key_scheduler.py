@@ -0,0 +1,110 @@
+import threading
+import time
+
+from infrastructure.ai.gemini_key_scheduler import GeminiKeyScheduler, parse_retry_after_sec
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_retry_after_sec_reads_gemini_429_payloads():
+    assert parse_retry_after_sec("429 RESOURCE_EXHAUSTED ... 'retryDelay': '23s'") == 23.0
+    assert parse_retry_after_sec("Quota exceeded. Please retry in 4.25s.") == 4.25
+    assert parse_retry_after_sec("Retry-After: 9") == 9.0
+    assert parse_retry_after_sec("403 permission denied") is None
+
+
+def test_acquire_prefers_least_loaded_key():
+    scheduler = GeminiKeyScheduler(clock=FakeClock())
+
+    first = scheduler.acquire(["key-a", "key-b"])
+    second = scheduler.acquire(["key-a", "key-b"])
+
+    assert {first.api_key, second.api_key} == {"key-a", "key-b"}
+
+    scheduler.release(first)
+    third = scheduler.acquire(["key-a", "key-b"])
+    assert third.api_key == first.api_key
+
+
+def test_quota_cooldown_skips_key_until_deadline():
+    clock = FakeClock()
+    scheduler = GeminiKeyScheduler(clock=clock, default_cooldown_sec=30)
+
+    assert scheduler.report_quota_exceeded("key-a", retry_after_sec=12) == 12
+    lease = scheduler.acquire(["key-a", "key-b"])
+    assert lease.api_key == "key-b"
+    scheduler.release(lease)
+
+    assert scheduler.acquire(["key-a"], timeout_sec=0) is None
+
+    clock.now += 12
+    lease = scheduler.acquire(["key-a"], timeout_sec=0)
+    assert lease is not None and lease.api_key == "key-a"
+
+
+def test_rpm_budget_is_spread_across_keys():
+    clock = FakeClock()
+    scheduler = GeminiKeyScheduler(clock=clock, rpm_limit=2)
+    pool = ["key-a", "key-b"]
+
+    leases = [scheduler.acquire(pool, timeout_sec=0) for _ in range(4)]
+    for lease in leases:
+        scheduler.release(lease)
+
+    assert sorted(lease.api_key for lease in leases) == ["key-a", "key-a", "key-b", "key-b"]
+    assert scheduler.acquire(pool, timeout_sec=0) is None
+
+    clock.now += 30
+    assert scheduler.acquire(pool, timeout_sec=0) is not None
+
+
+def test_tpm_usage_reported_on_release_blocks_key():
+    clock = FakeClock()
+    scheduler = GeminiKeyScheduler(clock=clock, tpm_limit=1000)
+
+    lease = scheduler.acquire(["key-a"], timeout_sec=0)
+    scheduler.release(lease, tokens_used=1500)
+
+    assert scheduler.acquire(["key-a"], timeout_sec=0) is None
+    clock.now += 60
+    assert scheduler.acquire(["key-a"], timeout_sec=0) is not None
+
+
+def test_blocked_caller_wakes_when_cooldown_expires():
+    scheduler = GeminiKeyScheduler()
+    scheduler.report_quota_exceeded("key-a", retry_after_sec=0.2)
+    result = {}
+
+    def _worker():
+        started = time.monotonic()
+        result["lease"] = scheduler.acquire(["key-a"], timeout_sec=5)
+        result["elapsed"] = time.monotonic() - started
+
+    thread = threading.Thread(target=_worker)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert result["lease"].api_key == "key-a"
+    assert 0.1 <= result["elapsed"] < 2.0
+
+
+def test_external_cooldowns_are_read_outside_the_scheduler_lock():
+    scheduler = GeminiKeyScheduler(clock=FakeClock())
+    lock_free = []
+
+    def slow_external_cooldown(api_key):
+        probe = threading.Thread(target=lambda: lock_free.append(scheduler.cooldown_remaining("other") == 0.0))
+        probe.start()
+        probe.join(timeout=1)
+        return 5.0 if api_key == "key-a" else 0.0
+
+    lease = scheduler.acquire(["key-a", "key-b"], external_cooldown=slow_external_cooldown)
+
+    assert lease.api_key == "key-b"
+    assert lock_free == [True, True]
@@ -0,0 +1,227 @@
+from types import SimpleNamespace
+
+import pytest
+
+from infrastructure.ai.gemini_client import call_gemini_with_failover
+from infrastructure.ai.gemini_client_registry import reset_gemini_client_registry
+from infrastructure.ai.gemini_key_scheduler import reset_gemini_key_scheduler
+from infrastructure.ai.gemini_quota_ledger import (
+    InMemoryQuotaLedger,
+    RedisQuotaLedger,
+    build_gemini_quota_ledger,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.values: dict[str, object] = {}
+        self.expires_at: dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        expires_at = self.expires_at.get(key)
+        if expires_at is not None and expires_at <= self.clock():
+            self.values.pop(key, None)
+            self.expires_at.pop(key, None)
+        return key in self.values
+
+    def set(self, key, value, px=None, ex=None):
+        self.values[key] = value
+        if px is not None:
+            self.expires_at[key] = self.clock() + px / 1000.0
+        elif ex is not None:
+            self.expires_at[key] = self.clock() + ex
+
+    def get(self, key):
+        return self.values.get(key) if self._alive(key) else None
+
+    def delete(self, key):
+        self.values.pop(key, None)
+        self.expires_at.pop(key, None)
+
+    def incr(self, key):
+        current = int(self.get(key) or 0) + 1
+        self.values[key] = current
+        return current
+
+    def expire(self, key, seconds):
+        self.expires_at[key] = self.clock() + seconds
+
+    def pttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires_at = self.expires_at.get(key)
+        if expires_at is None:
+            return -1
+        return int((expires_at - self.clock()) * 1000)
+
+
+def test_in_memory_ledger_behaves_like_a_set_with_ttl():
+    clock = FakeClock()
+    ledger = InMemoryQuotaLedger(default_cooldown_sec=10, clock=clock)
+
+    ledger.add("key-a")
+    ledger.mark_exhausted("key-b", 3)
+
+    assert "key-a" in ledger and "key-b" in ledger
+    assert set(ledger) == {"key-a", "key-b"}
+
+    clock.now += 5
+    assert "key-b" not in ledger
+    assert set(ledger) == {"key-a"}
+
+    ledger.discard("key-a")
+    assert len(ledger) == 0
+
+
+def test_redis_ledger_shares_cooldowns_between_processes():
+    clock = FakeClock()
+    redis_conn = FakeRedis(clock)
+    worker_a = RedisQuotaLedger(lambda: redis_conn, clock=clock)
+    worker_b = RedisQuotaLedger(lambda: redis_conn, clock=clock)
+
+    worker_a.mark_exhausted("secret-key-1234", 12)
+
+    assert "secret-key-1234" in worker_b
+    assert worker_b.cooldown_remaining("secret-key-1234") == pytest.approx(12.0)
+    assert not any("secret-key-1234" in key for key in redis_conn.values)
+
+    clock.now += 12
+    assert "secret-key-1234" not in worker_b
+
+
+def test_redis_ledger_enforces_shared_rpm_window():
+    clock = FakeClock(now=1_700_000_010.0)
+    redis_conn = FakeRedis(clock)
+    worker_a = RedisQuotaLedger(lambda: redis_conn, fleet_rpm_limit=2, clock=clock)
+    worker_b = RedisQuotaLedger(lambda: redis_conn, fleet_rpm_limit=2, clock=clock)
+
+    worker_a.record_request("key-a")
+    assert worker_b.cooldown_remaining("key-a") == 0
+    worker_b.record_request("key-a")
+
+    window_end = (int(clock.now // 60) + 1) * 60
+    assert worker_a.cooldown_remaining("key-a") == pytest.approx(window_end - clock.now)
+
+
+def test_redis_ledger_success_leaves_other_processes_cooldown_to_expire():
+    clock = FakeClock()
+    redis_conn = FakeRedis(clock)
+    worker_a = RedisQuotaLedger(lambda: redis_conn, clock=clock)
+    worker_b = RedisQuotaLedger(lambda: redis_conn, clock=clock)
+
+    worker_a.mark_exhausted("key-a", 30)
+    # An in-flight call on worker_b finishes successfully after worker_a's 429.
+    worker_b.discard("key-a")
+
+    clock.now += 1
+    assert worker_a.cooldown_remaining("key-a") == pytest.approx(29.0)
+    assert worker_b.cooldown_remaining("key-a") == pytest.approx(29.0)
+    clock.now += 29
+    assert "key-a" not in worker_b
+
+
+def test_redis_ledger_caches_cooldown_reads_and_skips_unused_rpm_counters():
+    class CountingRedis(FakeRedis):
+        def __init__(self, clock):
+            super().__init__(clock)
+            self.calls = []
+
+        def pttl(self, key):
+            self.calls.append("pttl")
+            return super().pttl(key)
+
+        def incr(self, key):
+            self.calls.append("incr")
+            return super().incr(key)
+
+    clock = FakeClock()
+    redis_conn = CountingRedis(clock)
+    ledger = RedisQuotaLedger(lambda: redis_conn, clock=clock)
+
+    ledger.record_request("key-a")
+    assert ledger.cooldown_remaining("key-a") == 0
+    clock.now += 0.1
+    assert ledger.cooldown_remaining("key-a") == 0
+    assert redis_conn.calls == ["pttl"]
+
+    RedisQuotaLedger(lambda: redis_conn, clock=clock).mark_exhausted("key-a", 10)
+    clock.now += 0.2
+    assert ledger.cooldown_remaining("key-a") == pytest.approx(9.8, abs=0.01)
+    assert redis_conn.calls == ["pttl", "pttl"]
+
+
+def test_redis_ledger_falls_back_to_local_state_when_redis_fails():
+    class BrokenRedis:
+        def __getattr__(self, _name):
+            def _fail(*_args, **_kwargs):
+                raise ConnectionError("redis down")
+
+            return _fail
+
+    clock = FakeClock()
+    ledger = RedisQuotaLedger(lambda: BrokenRedis(), clock=clock)
+
+    ledger.mark_exhausted("key-a", 8)
+
+    assert ledger.cooldown_remaining("key-a") == pytest.approx(8.0)
+    assert "key-a" in ledger
+
+
+def test_build_gemini_quota_ledger_uses_memory_without_redis():
+    assert isinstance(build_gemini_quota_ledger(redis_conn_factory=None), InMemoryQuotaLedger)
+    assert isinstance(build_gemini_quota_ledger(redis_conn_factory=lambda: None), RedisQuotaLedger)
+    assert isinstance(
+        build_gemini_quota_ledger(redis_conn_factory=lambda: None, enabled=False),
+        InMemoryQuotaLedger,
+    )
+
+
+def test_call_gemini_with_failover_skips_key_exhausted_by_another_process(monkeypatch):
+    reset_gemini_client_registry()
+    reset_gemini_key_scheduler()
+    used_keys = []
+
+    class Models:
+        def __init__(self, api_key):
+            self.api_key = api_key
+
+        def generate_content(self, *, model, contents, config=None):
+            used_keys.append(self.api_key)
+            return SimpleNamespace(parts=[], candidates=[SimpleNamespace()])
+
+    class Client:
+        def __init__(self, *, api_key, http_options=None):
+            self.models = Models(api_key)
+
+    monkeypatch.setattr("infrastructure.ai.gemini_client.genai.Client", Client)
+    redis_conn = FakeRedis(FakeClock())
+    other_process = RedisQuotaLedger(lambda: redis_conn, clock=redis_conn.clock)
+    this_process = RedisQuotaLedger(lambda: redis_conn, clock=redis_conn.clock)
+    other_process.mark_exhausted("test-key-aaaa", 60)
+
+    try:
+        for _ in range(3):
+            call_gemini_with_failover(
+                "gemini-3.5-flash",
+                ["prompt"],
+                {"timeout": 12, "max_attempts": 1},
+                {},
+                api_key_pool=["test-key-aaaa", "test-key-bbbb"],
+                quota_exceeded_keys=this_process,
+                logger=SimpleNamespace(info=lambda *a, **k: None, warning=lambda *a, **k: None, error=lambda *a, **k: None),
+                log_brief=True,
+            )
+    finally:
+        reset_gemini_client_registry()
+        reset_gemini_key_scheduler()
+
+    assert used_keys == ["test-key-bbbb"] * 3
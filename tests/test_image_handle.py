@@ -0,0 +1,84 @@
+import io
+
+from PIL import Image
+
+from application.render.furnished_generation_stage import _normalize_render_candidate_handle
+from shared.image_canvas import match_aspect_to_target
+from shared.image_handle import ImageHandle
+from shared.prepared_image import (
+    PREPARED_REFERENCES_REF,
+    PreparedImage,
+    PreparedReferenceCache,
+    adopt_rendered_image,
+    open_rendered_image,
+)
+
+
+def _png_bytes(size, color=(120, 80, 40)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_valid_candidate_is_written_with_the_provider_bytes_untouched(tmp_path):
+    data = _png_bytes((1600, 900))
+    handle = ImageHandle.from_bytes(data)
+
+    normalized = _normalize_render_candidate_handle(
+        handle,
+        str(tmp_path / "result.png"),
+        str(tmp_path / "room.png"),
+        expected_ratio=16 / 9,
+        ratio_tol=0.02,
+        match_aspect_to_target=match_aspect_to_target,
+        log_brief=False,
+    )
+    path = normalized.materialize(str(tmp_path / "result.png"))
+
+    assert normalized is handle
+    assert open(path, "rb").read() == data
+    assert handle.stats() == {"decodes": 0, "encodes": 0}
+
+
+def test_cropped_candidate_decodes_and_encodes_once(tmp_path):
+    handle = ImageHandle.from_bytes(_png_bytes((1536, 1024)))
+
+    normalized = _normalize_render_candidate_handle(
+        handle,
+        str(tmp_path / "result.png"),
+        str(tmp_path / "room.png"),
+        expected_ratio=1920 / 1080,
+        ratio_tol=0.02,
+        match_aspect_to_target=match_aspect_to_target,
+        log_brief=False,
+    )
+    path = normalized.materialize(str(tmp_path / "result.png"))
+    normalized.encoded_bytes
+
+    assert handle.stats()["decodes"] == 1
+    assert normalized.stats() == {"decodes": 0, "encodes": 1}
+    with Image.open(path) as written:
+        assert abs(written.size[0] / written.size[1] - 1920 / 1080) < 0.02
+
+
+def test_adopted_candidate_is_served_to_qc_and_ranking_without_decoding_the_file(tmp_path):
+    cache = PreparedReferenceCache()
+    token = PREPARED_REFERENCES_REF.set(cache)
+    try:
+        handle = ImageHandle.from_bytes(_png_bytes((1600, 900)))
+        path = handle.materialize(str(tmp_path / "result.png"))
+        adopt_rendered_image(handle)
+
+        with open_rendered_image(path) as full:
+            full_bytes = full.encoded_bytes
+        thumb = cache.get(path, (512, 512))
+    finally:
+        PREPARED_REFERENCES_REF.reset(token)
+
+    assert full_bytes == handle.encoded_bytes
+    assert thumb.size == (512, 288)
+    assert handle.decode_count == 1
+    assert cache.stats()["handle_builds"] == 2
+
+    with open_rendered_image(path) as plain:
+        assert not isinstance(plain, PreparedImage)
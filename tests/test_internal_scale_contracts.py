@@ -23,6 +23,7 @@ from application.render.empty_room_generation_stage import generate_empty_room
 from application.render.render_room_workflow import _review_summary_from_scalecheck_diagnostics
 from application.render.render_room_workflow import _sync_furniture_specs_contracts
 from application.render.render_room_workflow import run_render_room_workflow
+from application.render.render_stage_spans import StageSpanRecorder
 from application.render.render_variant_stage import _generate_one_variant, run_render_variant_stage
 from application.render.room_analysis import analyze_room_structure
 from application.render.render_workflow_contracts import (
@@ -1069,6 +1070,62 @@ def test_scale_guide_leak_detector_uses_guide_geometry_signature(tmp_path):
     assert furnished_generation_stage._has_scale_guide_leak(str(clean_path), str(guide_path)) is False
 
 
+def test_scale_guide_masks_match_per_pixel_predicates():
+    width, height = 48, 36
+    guide = Image.new("RGB", (width, height))
+    guide.putdata([((x * 37 + y * 11) % 256, (x * 13 + y * 29) % 256, (x * y * 7) % 256) for y in range(height) for x in range(width)])
+    rendered = guide.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+    _, _, guide_mask = furnished_generation_stage._extract_guide_line_positions(guide)
+    pixels = guide.load()
+    expected_points = sorted(
+        (x, y)
+        for x in range(width)
+        for y in range(height)
+        if furnished_generation_stage._is_fluorescent_guide_pixel(pixels[x, y])
+    )
+    assert furnished_generation_stage._mask_points(guide_mask) == expected_points
+
+    rendered_pixels = rendered.load()
+    radius = 2
+    expected_hits = sum(
+        1
+        for x, y in expected_points
+        if any(
+            furnished_generation_stage._is_guide_like_pixel(rendered_pixels[px, py])
+            for px in range(max(0, x - radius), min(width - 1, x + radius) + 1)
+            for py in range(max(0, y - radius), min(height - 1, y + radius) + 1)
+        )
+    )
+    assert expected_points
+    assert furnished_generation_stage._guide_mask_overlap_ratio(rendered, guide_mask, search_radius=radius) == (
+        expected_hits / len(expected_points)
+    )
+
+
+def test_line_energy_profile_matches_per_pixel_reference():
+    width, height = 40, 30
+    image = Image.new("RGB", (width, height))
+    image.putdata([((x * 37 + y * 11) % 256, (x * 13 + y * 29) % 256, (x * y * 7) % 256) for y in range(height) for x in range(width)])
+    pixels = image.load()
+
+    def _delta(a, b):
+        return float(abs(a[0] - b[0]) + abs(a[1] - b[1]) + abs(a[2] - b[2])) / 3.0
+
+    def _reference(axis, index):
+        if axis == "row":
+            points = [((x, index), (x, index - 1), (x, index + 1)) for x in range(width)]
+        else:
+            points = [((index, y), (index - 1, y), (index + 1, y)) for y in range(height)]
+        scores = [max(_delta(pixels[here], pixels[prev]), _delta(pixels[here], pixels[nxt])) for here, prev, nxt in points]
+        return sum(scores) / len(scores)
+
+    for axis, limit in (("row", height), ("col", width)):
+        profile = furnished_generation_stage._line_energy_profile(image, axis)
+        assert profile[0] == profile[-1] == 0.0
+        assert profile[1:-1] == pytest.approx([_reference(axis, index) for index in range(1, limit - 1)])
+
+
 def test_scale_guide_leak_detector_matches_real_perspective_guide_artifact():
     guide_candidates = sorted(glob.glob(os.path.join("outputs", "scale_guide_*.png")))
     if not guide_candidates:
@@ -2165,6 +2222,7 @@ def test_run_render_room_workflow_preserves_variant_scale_counts_without_summary
 def test_run_render_room_workflow_passes_variants_to_postprocess_in_generation_order(monkeypatch):
     summary_ref = _SummaryRef()
     captured = {}
+    entered_stages = []
 
     def fake_bootstrap_stage(**kwargs):
         summary = _build_summary()
@@ -2303,6 +2361,7 @@ def test_run_render_room_workflow_passes_variants_to_postprocess_in_generation_o
             max_concurrency_analysis=1,
             cart_max_analysis_workers=1,
             total_timeout_limit_sec=600.0,
+            stage_spans=StageSpanRecorder(on_enter=lambda name, step: entered_stages.append(name)),
         ),
         storage=RenderWorkflowStorageServices(
             normalize_audience=lambda aud: aud or "internal",
@@ -2346,6 +2405,10 @@ def test_run_render_room_workflow_passes_variants_to_postprocess_in_generation_o
         "outputs/variant_a.png",
         "outputs/variant_b.png",
     ]
+    contract_stages = ["room_dims", "product_identity", "archetype", "scene_contract", "placement_plan", "geometry_contract"]
+    analysis_at = entered_stages.index("analysis")
+    assert entered_stages[analysis_at + 1 : analysis_at + 7] == contract_stages
+    assert entered_stages[analysis_at + 7] == "variants"
 
 
 def test_run_render_room_workflow_allows_best_of_three_rerank_for_internal(monkeypatch):
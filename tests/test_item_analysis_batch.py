@@ -0,0 +1,175 @@
+import json
+from types import SimpleNamespace
+
+from PIL import Image
+
+from application.render import item_analysis_stage
+from application.render.render_analysis_stage import _analyze_items
+
+
+def _write_png(path, color=(200, 120, 40)):
+    Image.new("RGB", (64, 64), color).save(path)
+    return str(path)
+
+
+def _requests(moodboard, count):
+    return [
+        {
+            "moodboard_path": moodboard,
+            "item_data": {"label": f"item-{index}", "box_2d": [0, 0, 1000, 1000], "target_key": f"key-{index}"},
+            "item_index": index + 1,
+            "provided_dims_mm": {"width_mm": 1000 + index},
+        }
+        for index in range(count)
+    ]
+
+
+def _described(slot):
+    return (
+        f"Described slot {slot}: walnut wood frame with a low rectangular silhouette, tapered solid legs, "
+        "a cream linen seat cushion, rounded corners, an open gap below the frame and compact proportions."
+    )
+
+
+def _batch_reply(slots):
+    return json.dumps({"items": [{"slot": slot, "description": _described(slot)} for slot in slots]})
+
+
+def _run(tmp_path, replies, count, **kwargs):
+    moodboard = _write_png(tmp_path / "moodboard.png")
+    batch_calls = []
+    singles = []
+
+    def _call(model_name, contents, request_options, safety_settings, log_tag=None, **_kwargs):
+        if log_tag != "Analysis.CropItemBatch":
+            return SimpleNamespace(text="{}")
+        slots = [int(part.split()[2].rstrip(":")) for part in contents if isinstance(part, str) and part.startswith("ITEM SLOT")]
+        batch_calls.append(slots)
+        reply = replies.pop(0) if replies else _batch_reply(slots)
+        return SimpleNamespace(text=reply(slots) if callable(reply) else reply)
+
+    def _single(moodboard_path, item_data, **single_kwargs):
+        singles.append(item_data["label"])
+        return {"description": f"single {item_data['label']}", "target_key": item_data["target_key"]}
+
+    results = item_analysis_stage.analyze_cropped_items_batched(
+        _requests(moodboard, count),
+        analyze_single=_single,
+        call_gemini_with_failover=_call,
+        analysis_model_name="analysis-model",
+        safe_extract_json=lambda text: json.loads(text),
+        normalize_dims_dict=lambda dims: dict(dims or {}),
+        log_brief=True,
+        **kwargs,
+    )
+    return results, batch_calls, singles
+
+
+def test_batch_describes_every_item_with_one_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "outputs").mkdir()
+    results, batch_calls, singles = _run(tmp_path, [], 3, unique_id="batch")
+
+    assert batch_calls == [[1, 2, 3]]
+    assert singles == []
+    assert [row["description"].split(":")[0] for row in results] == ["Described slot 1", "Described slot 2", "Described slot 3"]
+    assert [row["target_key"] for row in results] == ["key-0", "key-1", "key-2"]
+    assert all(row["crop_path"] for row in results)
+
+
+def test_malformed_batch_splits_in_half_and_missing_slots_are_reasked(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    replies = [
+        '{"items": [{"slot": 1, "descr',
+        lambda slots: _batch_reply(slots[:1]),
+    ]
+    results, batch_calls, singles = _run(tmp_path, replies, 4)
+
+    assert batch_calls == [[1, 2, 3, 4], [1, 2], [1], [1, 2]]
+    assert singles == []
+    assert all(row and row["description"].startswith("Described") for row in results)
+
+
+def test_single_slot_that_keeps_failing_falls_back_to_per_item_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    replies = [lambda slots: _batch_reply([1]), '{"items": []}']
+    results, batch_calls, singles = _run(tmp_path, replies, 2)
+
+    assert batch_calls == [[1, 2], [1]]
+    assert singles == ["item-1"]
+    assert results[1] == {"description": "single item-1", "target_key": "key-1"}
+
+
+def test_compact_profile_skips_batching(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results, batch_calls, singles = _run(tmp_path, [], 2, analysis_profile="compact")
+
+    assert batch_calls == []
+    assert singles == ["item-0", "item-1"]
+
+
+def test_analyze_items_batches_detailed_items_and_keeps_row_contract():
+    batches = []
+
+    def _batch(requests, **kwargs):
+        batches.append(([request["item_index"] for request in requests], kwargs))
+        return [
+            {
+                "description": f"batched {request['item_data']['label']} in oak wood with a rounded rectangular seat, "
+                "slim tapered legs, woven rattan back panel and soft beige cushion for compact dining corners.",
+                "crop_path": f"outputs/{request['item_index']}.png",
+            }
+            for request in requests
+        ]
+
+    def _single(*_args, **_kwargs):
+        raise AssertionError("per-item analysis should not run in batch mode")
+
+    rows = _analyze_items(
+        item_metas=[
+            {
+                "label": f"chair-{index}",
+                "source_path": "outputs/source.png",
+                "box_2d": [0, 0, 1000, 1000],
+                "dims_mm": {"width_mm": 500},
+                "qty": 1,
+                "category": "chair",
+                "category_canonical": "chair",
+                "source_index": index,
+                "target_key": f"chair-{index}",
+            }
+            for index in range(3)
+        ],
+        item_refs=[],
+        unique_id="batch-test",
+        analyze_cropped_item=_single,
+        normalize_dims_dict=lambda dims: dict(dims or {}),
+        canonical_category=lambda value: value or "unknown",
+        build_item_target_key=lambda *args, **kwargs: "fallback-key",
+        room_dims_parsed={"width_mm": 5000, "depth_mm": 4000, "height_mm": 2600},
+        max_concurrency_analysis=2,
+        cart_max_analysis_workers=2,
+        item_analysis_profile="detailed",
+        analyze_cropped_items_batch=_batch,
+        analysis_batch_size=2,
+    )
+
+    assert [indexes for indexes, _ in batches] == [[1, 2], [3]]
+    assert batches[0][1]["analysis_profile"] == "detailed"
+    assert [row["description"].split(" in oak")[0] for row in rows] == ["batched chair-0", "batched chair-1", "batched chair-2"]
+    assert [row["target_key"] for row in rows] == ["chair-0", "chair-1", "chair-2"]
+    assert all(row["item_analysis_profile"] == "detailed" for row in rows)
+
+
+def test_batch_does_not_cache_items_whose_reference_features_fell_back(tmp_path, monkeypatch):
+    from infrastructure.ai.analysis_result_cache import AnalysisResultCache
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "outputs").mkdir()
+    cache = AnalysisResultCache()
+    results, batch_calls, _ = _run(tmp_path, [], 2, unique_id="batch", analysis_cache=cache)
+    assert [row["reference_features"]["analysis_quality"] for row in results] == ["fallback_after_weak_model"] * 2
+
+    _, batch_calls, _ = _run(tmp_path, [], 2, unique_id="batch", analysis_cache=cache)
+
+    assert batch_calls == [[1, 2]]
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from application.http import local_job_store
+from application.http.queue_route_handlers import handle_stream_job_events
+from infrastructure.job_events import JobEventHub, RedisJobEventTransport, current_job_id, with_job_status_events
+
+
+class _FakePubSub:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.patterns = []
+        self.closed = False
+
+    def psubscribe(self, pattern):
+        self.patterns.append(pattern)
+
+    def get_message(self, timeout=None):
+        return self.messages.pop(0) if self.messages else None
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeRedis:
+    def __init__(self, messages=()):
+        self.published = []
+        self.pubsub_ref = _FakePubSub(messages)
+
+    def publish(self, channel, data):
+        self.published.append((channel, data))
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self.pubsub_ref
+
+
+class _FakeJob:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "started"
+        self.enqueued_at = self.started_at = self.ended_at = None
+        self.result = None
+
+    @property
+    def is_finished(self):
+        return self.status == "finished"
+
+    @property
+    def is_failed(self):
+        return self.status == "failed"
+
+    def get_status(self):
+        return self.status
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_hub_delivers_to_subscribers_with_replay_and_drops_own_echoes():
+    hub = JobEventHub(replay_events=2)
+    hub.publish("job-1", "stage", stage="analysis")
+    hub.publish("job-1", "stage", stage="generation")
+    hub.publish("job-1", "stage", stage="qc")
+
+    async def _consume():
+        subscription = hub.subscribe("job-1")
+        replayed = [await subscription.get(1.0), await subscription.get(1.0)]
+        hub._deliver_remote({"job_id": "job-1", "event": "stage", "stage": "echo", "origin": hub._origin})
+        hub._deliver_remote({"job_id": "job-1", "event": "status", "status": "finished", "origin": "worker"})
+        remote = await subscription.get(1.0)
+        subscription.close()
+        return replayed, remote
+
+    replayed, remote = asyncio.run(_consume())
+
+    assert [event["stage"] for event in replayed] == ["generation", "qc"]
+    assert remote["status"] == "finished"
+    stats = hub.stats()
+    assert stats["published"] == 3
+    assert stats["remote_received"] == 1
+    assert stats["subscribers"] == 0
+
+
+def test_redis_transport_publishes_per_job_channel_and_listens_on_pattern():
+    event = {"job_id": "job-2", "event": "status", "status": "started", "origin": "a"}
+    redis = _FakeRedis(
+        [
+            {"type": "pmessage", "data": json.dumps(event).encode("utf-8")},
+            {"type": "pmessage", "data": b"not-json"},
+        ]
+    )
+    transport = RedisJobEventTransport(lambda: redis)
+    transport.publish(event)
+
+    received = []
+    stop_event = threading.Event()
+
+    def _deliver(payload):
+        received.append(payload)
+        stop_event.set()
+
+    transport.listen(_deliver, stop_event)
+
+    assert redis.published[0][0] == "job-events:job-2"
+    assert json.loads(redis.published[0][1])["status"] == "started"
+    assert redis.pubsub_ref.patterns == ["job-events:*"]
+    assert redis.pubsub_ref.closed
+    assert received == [event]
+
+
+def test_worker_wrapper_publishes_status_after_rq_bookkeeping():
+    calls = []
+
+    class _BaseWorker:
+        def prepare_job_execution(self, job, remove_from_intermediate_queue=False):
+            calls.append("prepare")
+
+        def handle_job_success(self, job, queue, started_job_registry):
+            calls.append("success")
+
+        def handle_job_failure(self, job, queue, started_job_registry=None, exc_string=""):
+            calls.append("failure")
+
+    worker_class = with_job_status_events(_BaseWorker, lambda job_id, event, **data: calls.append((job_id, data["status"])))
+    worker = worker_class()
+    job = SimpleNamespace(id="job-3")
+    worker.prepare_job_execution(job)
+    worker.handle_job_success(job, None, None)
+    worker.handle_job_failure(job, None, exc_string="boom")
+
+    assert calls == ["prepare", ("job-3", "started"), "success", ("job-3", "finished"), "failure", ("job-3", "failed")]
+    assert worker_class.__name__ == "_BaseWorker"
+
+
+def test_local_inline_job_reports_status_and_exposes_its_job_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_job_store, "LOCAL_JOB_STORE_PATH", tmp_path / "render_jobs.json")
+    statuses = []
+    done = threading.Event()
+
+    def _on_status(job_id, status):
+        statuses.append((job_id, status))
+        if status == "finished":
+            done.set()
+
+    job = local_job_store.enqueue_local_job(lambda: {"seen_job_id": current_job_id()}, job_id="local-1", on_status=_on_status)
+    assert done.wait(5.0)
+
+    assert job.id == "local-1"
+    assert statuses == [("local-1", "started"), ("local-1", "finished")]
+    assert local_job_store.get_local_job("local-1").result == {"seen_job_id": "local-1"}
+
+
+def test_event_stream_sends_snapshot_progress_then_compact_result():
+    hub = JobEventHub()
+    job = _FakeJob("job-4")
+    deps = SimpleNamespace(
+        redis_url="redis://fake",
+        local_inline_queue_enabled=False,
+        fetch_job=lambda job_id: job if job_id == "job-4" else None,
+        load_job_result_s3=lambda job_id: None,
+        get_staging_job=None,
+    )
+    app = FastAPI()
+
+    @app.get("/jobs/{job_id}/events")
+    async def _events(job_id: str):
+        return await handle_stream_job_events(job_id, deps=deps, job_events=hub, keepalive_sec=0.05, recheck_sec=5.0)
+
+    def _run_job():
+        while not hub.stats()["subscribers"]:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        hub.publish("job-4", "stage", stage="generation", step=3)
+        job.status = "finished"
+        job.result = {"images": ["https://cdn.example.com/out.png"]}
+        hub.publish("job-4", "status", status="finished")
+
+    producer = threading.Thread(target=_run_job)
+    producer.start()
+    with TestClient(app) as client:
+        response = client.get("/jobs/job-4/events")
+        missing = client.get("/jobs/nope/events")
+    producer.join(5.0)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [name for name, _ in events] == ["snapshot", "stage", "status", "result"]
+    assert events[0][1]["status"] == "started"
+    assert events[1][1]["stage"] == "generation"
+    assert "origin" not in events[1][1]
+    assert events[-1][1]["status"] == "finished"
+    assert events[-1][1]["result"] == {"images": ["https://cdn.example.com/out.png"]}
+    assert missing.status_code == 404
+    assert hub.stats()["subscribers"] == 0
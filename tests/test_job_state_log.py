@@ -0,0 +1,105 @@
+import json
+
+from application.video import job_store
+from shared.job_state_log import (
+    JobStateLog,
+    clear_record,
+    delete_record,
+    set_record,
+    update_item_record,
+    update_record,
+)
+
+
+def _log(path, **kwargs):
+    return JobStateLog(path, json_default=str, **kwargs)
+
+
+def test_replay_rebuilds_state_from_snapshot_and_journal(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps({"old": {"status": "done"}}), encoding="utf-8")
+    log = _log(path)
+    jobs = log.load()
+    assert jobs == {"old": {"status": "done", "job_id": "old"}}
+
+    jobs["a"] = {"job_id": "a", "status": "queued", "items": []}
+    log.append(jobs, set_record("a", jobs["a"]))
+    jobs["a"].update({"status": "running"})
+    jobs["a"]["items"] = [{}, {"task_id": "t1"}]
+    log.append(
+        jobs,
+        update_record("a", {"status": "running"}),
+        update_item_record("a", "items", 1, {"task_id": "t1"}),
+    )
+    del jobs["old"]
+    log.append(jobs, delete_record("old"))
+    log.close()
+
+    assert _log(path).load() == jobs
+
+
+def test_replay_skips_torn_trailing_line(tmp_path):
+    path = tmp_path / "jobs.json"
+    log = _log(path)
+    jobs = {"a": {"job_id": "a", "status": "queued"}}
+    log.append(jobs, set_record("a", jobs["a"]))
+    log.close()
+    with log.journal_path.open("a", encoding="utf-8") as fh:
+        fh.write('{"op": "update", "id": "a", "fie')
+
+    assert _log(path).load() == {"a": {"job_id": "a", "status": "queued"}}
+
+
+def test_append_after_torn_trailing_line_survives_reload(tmp_path):
+    path = tmp_path / "jobs.json"
+    log = _log(path)
+    jobs = {"a": {"job_id": "a", "status": "queued"}}
+    log.append(jobs, set_record("a", jobs["a"]))
+    log.close()
+    with log.journal_path.open("a", encoding="utf-8") as fh:
+        fh.write('{"op": "upd')
+
+    log = _log(path)
+    jobs = log.load()
+    jobs["a"]["status"] = "done"
+    log.append(jobs, update_record("a", {"status": "done"}))
+    log.close()
+
+    assert _log(path).load() == {"a": {"job_id": "a", "status": "done"}}
+
+
+def test_journal_is_compacted_into_snapshot(tmp_path):
+    path = tmp_path / "jobs.json"
+    log = _log(path, compact_min_records=4, compact_ratio=1)
+    jobs = {}
+    for index in range(3):
+        jobs[f"j{index}"] = {"job_id": f"j{index}", "n": index}
+        log.append(jobs, set_record(f"j{index}", jobs[f"j{index}"]))
+    assert log.stats()["journal_records"] == 3
+
+    jobs["j0"]["n"] = 10
+    log.append(jobs, update_record("j0", {"n": 10}))
+
+    assert log.stats() == {"journal_records": 0, "journal_bytes": 0}
+    assert json.loads(path.read_text(encoding="utf-8")) == jobs
+    jobs.clear()
+    log.append(jobs, clear_record())
+    log.close()
+    assert _log(path).load() == {}
+
+
+def test_video_job_updates_survive_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_store, "VIDEO_JOB_STORE_PATH", tmp_path / "video_jobs.json")
+    monkeypatch.setattr(job_store, "video_jobs", {})
+    monkeypatch.setattr(job_store, "_video_job_log", None)
+
+    job_store.set_video_job("v1", {"status": "QUEUED", "items": [{"prompt": "a"}]})
+    job_store.update_video_job_item("v1", 0, task_id="task-1", status="RUNNING")
+    job_store.update_video_job("v1", status="RUNNING")
+    expected = job_store.get_video_job("v1")
+
+    with job_store.video_jobs_lock:
+        job_store._video_job_log_locked().close()
+        job_store._load_video_jobs_locked()
+    assert job_store.get_video_job("v1") == expected
+    assert expected["items"][0] == {"prompt": "a", "task_id": "task-1", "status": "RUNNING"}
@@ -0,0 +1,129 @@
+import base64
+import io
+import json
+
+from PIL import Image
+
+from infrastructure.ai.magnific_client import MagnificClient, build_upscale_body
+from shared.image_canvas import standardize_image
+
+
+def _png_bytes(size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (120, 90, 60)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class _Response:
+    def __init__(self, status_code=200, payload=None, content=b"", on_chunk=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self._content = content
+        self._on_chunk = on_chunk
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+    def iter_content(self, chunk_size=1):
+        for offset in range(0, len(self._content), 16):
+            if self._on_chunk is not None:
+                self._on_chunk()
+            yield self._content[offset : offset + 16]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Session:
+    def __init__(self, *, download, statuses):
+        self.download = download
+        self.statuses = list(statuses)
+        self.calls = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.calls.append(("post", url, timeout))
+        self.body = data
+        return _Response(payload={"data": {"task_id": "up-1"}})
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.calls.append(("get", url, timeout))
+        if stream:
+            return self.download
+        return _Response(payload={"data": self.statuses.pop(0)})
+
+
+def test_upload_body_is_json_with_the_base64_image():
+    body = json.loads(build_upscale_body(b"\x89PNG-bytes"))
+    assert base64.b64decode(body["image"]) == b"\x89PNG-bytes"
+    assert body["scale_factor"] == "2x"
+
+
+def test_upscale_streams_to_disk_and_encodes_once_with_dpi(tmp_path, monkeypatch):
+    monkeypatch.setattr("infrastructure.ai.magnific_client.time.sleep", lambda seconds: None)
+    clock = _Clock()
+    source = tmp_path / "room.png"
+    source.write_bytes(_png_bytes())
+    session = _Session(
+        download=_Response(content=_png_bytes((128, 96))),
+        statuses=[{"status": "IN_PROGRESS"}, {"status": "COMPLETED", "generated": ["https://cdn.example/up.png"]}],
+    )
+    saves = []
+
+    def _standardize(path, **kwargs):
+        saves.append(kwargs)
+        return standardize_image(path, **kwargs)
+
+    client = MagnificClient(api_key="key", endpoint="https://mag.example", session_factory=lambda: session, clock=clock)
+    result = client.upscale(
+        str(source), "abc", clock.now - 10, total_timeout_limit=40, standardize_image=_standardize, output_dir=str(tmp_path)
+    )
+
+    assert result.endswith("_abc.png")
+    with Image.open(result) as img:
+        assert img.size == (128, 96)
+        assert round(img.info["dpi"][0]) == 300
+    assert saves == [{"output_path": result, "keep_ratio": True, "dpi": (300, 300)}]
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(["room.png", result.rsplit("/", 1)[-1]])
+    assert all(timeout[1] <= 30 for _, _, timeout in session.calls)
+    stats = client.stats()
+    assert stats["succeeded"] == 1
+    assert stats["queue_count"] == 1
+    assert stats["upload_count"] == 1
+    assert stats["download_bytes"] > 0
+
+
+def test_upscale_gives_up_at_the_deadline_and_returns_the_input(tmp_path):
+    clock = _Clock()
+    source = tmp_path / "room.png"
+    source.write_bytes(_png_bytes())
+
+    def _advance():
+        clock.now += 5
+
+    session = _Session(
+        download=_Response(content=_png_bytes((128, 96)), on_chunk=_advance),
+        statuses=[{"status": "COMPLETED", "generated": ["https://cdn.example/up.png"]}],
+    )
+    client = MagnificClient(api_key="key", endpoint="https://mag.example", session_factory=lambda: session, clock=clock)
+
+    result = client.upscale(
+        str(source), "abc", clock.now, total_timeout_limit=8, standardize_image=standardize_image, output_dir=str(tmp_path)
+    )
+
+    assert result == str(source)
+    assert [path.name for path in tmp_path.iterdir()] == ["room.png"]
+    assert client.stats()["deadline_exceeded"] == 1
+    assert client.upscale(str(source), "late", 0.0, total_timeout_limit=1, standardize_image=standardize_image) == str(source)
+    assert client.stats()["skipped"] == 1
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+from infrastructure.ai.analysis_provider_dispatch import build_analysis_provider_dispatch
+from infrastructure.ai.model_call_governor import (
+    PRIORITY_ANALYSIS,
+    PRIORITY_GENERATION,
+    PRIORITY_QC,
+    PRIORITY_RANKING,
+    ModelCallGovernor,
+    classify_model_call,
+    report_model_call_congestion,
+)
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def _queue_waiter(governor, order, name, priority, job_id):
+    def _run():
+        permit = governor.acquire(priority=priority, job_id=job_id)
+        order.append(name)
+        governor.release(permit)
+
+    thread = threading.Thread(target=_run)
+    thread.start()
+    return thread
+
+
+def test_limit_backs_off_on_congestion_once_per_interval_and_grows_additively():
+    clock = _FakeClock()
+    governor = ModelCallGovernor(initial_limit=10, min_limit=2, max_limit=12, decrease_factor=0.5, clock=clock)
+
+    permit = governor.acquire(job_id="a")
+    governor.release(permit, outcome="congested")
+    permit = governor.acquire(job_id="a")
+    governor.release(permit, outcome="congested")
+    assert governor.limit == 5
+
+    clock.now += 5
+    for _ in range(3):
+        permit = governor.acquire(job_id="a")
+        governor.release(permit, outcome="congested")
+        clock.now += 5
+    assert governor.limit == 2
+
+    permits = [governor.acquire(job_id="a") for _ in range(2)]
+    for permit in permits:
+        governor.release(permit)
+    assert governor.limit == 2
+    assert governor._limit > 2.0
+
+    stats = governor.stats()
+    assert stats["decreases"] == 4
+    assert stats["congested"] == 5
+    assert stats["succeeded"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_waiters_are_admitted_by_priority_class():
+    governor = ModelCallGovernor(initial_limit=1, min_limit=1, max_limit=1)
+    holder = governor.acquire(job_id="job")
+    order = []
+    threads = []
+    for name, priority in (("ranking", PRIORITY_RANKING), ("analysis", PRIORITY_ANALYSIS), ("generation", PRIORITY_GENERATION)):
+        threads.append(_queue_waiter(governor, order, name, priority, "job"))
+        _wait_for(lambda: governor.stats()["waiting"] == len(threads))
+
+    governor.release(holder)
+    for thread in threads:
+        thread.join(2.0)
+
+    assert order == ["generation", "analysis", "ranking"]
+    assert governor.stats()["queued"] == 3
+
+
+def test_job_over_its_fair_share_yields_to_other_jobs():
+    governor = ModelCallGovernor(initial_limit=2, min_limit=2, max_limit=2)
+    held = [governor.acquire(job_id="big"), governor.acquire(job_id="big")]
+    order = []
+    big = _queue_waiter(governor, order, "big", PRIORITY_GENERATION, "big")
+    _wait_for(lambda: governor.stats()["waiting"] == 1)
+    small = _queue_waiter(governor, order, "small", PRIORITY_ANALYSIS, "small")
+    _wait_for(lambda: governor.stats()["waiting"] == 2)
+
+    governor.release(held[0])
+    small.join(2.0)
+    governor.release(held[1])
+    big.join(2.0)
+
+    assert order == ["small", "big"]
+
+
+def test_dispatch_runs_through_governor_and_reports_mid_call_pushback():
+    governor = ModelCallGovernor(initial_limit=8, min_limit=1, max_limit=8, decrease_factor=0.5)
+    seen = []
+
+    def _gemini(model_name, contents, request_options, safety_settings, system_instruction=None, log_tag=None):
+        seen.append(governor.stats()["in_flight_qc"])
+        report_model_call_congestion()
+        return "ok"
+
+    dispatch = build_analysis_provider_dispatch(
+        provider="gemini",
+        gemini_caller=_gemini,
+        openai_caller=lambda *args, **kwargs: None,
+        openai_model_set=set(),
+        openai_api_key="",
+        openai_reasoning_effort="low",
+        logger=None,
+        log_brief=True,
+        governor=governor,
+    )
+
+    assert dispatch("model", ["prompt"], {}, {}, log_tag="Analysis.ReferenceFidelity") == "ok"
+    assert seen == [1]
+    assert governor.limit == 4
+    assert governor.stats()["congested"] == 1
+
+
+def test_call_returns_none_after_queue_wait_and_reraises_errors():
+    governor = ModelCallGovernor(initial_limit=1, min_limit=1, max_limit=1, max_queue_wait_sec=0.05)
+    holder = governor.acquire(job_id="a")
+    assert governor.call(lambda: "never") is None
+    governor.release(holder)
+
+    with pytest.raises(ValueError):
+        governor.call(lambda: (_ for _ in ()).throw(ValueError("bad request")))
+
+    stats = governor.stats()
+    assert stats["queue_timeouts"] == 1
+    assert stats["failed"] == 1
+    assert governor.limit == 1
+
+
+def test_log_tags_map_to_priority_classes():
+    assert classify_model_call("RankBestVariant", PRIORITY_ANALYSIS) == PRIORITY_RANKING
+    assert classify_model_call("Analysis.ItemBBox", PRIORITY_ANALYSIS) == PRIORITY_QC
+    assert classify_model_call("Analysis.CropItem", PRIORITY_ANALYSIS) == PRIORITY_ANALYSIS
+    assert classify_model_call("Stage2.Furnish", PRIORITY_GENERATION) == PRIORITY_GENERATION
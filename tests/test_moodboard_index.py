@@ -0,0 +1,161 @@
+import threading
+import time
+
+from infrastructure.moodboard_index import S3MoodboardIndex, moodboard_lookup_parts
+from storage_helpers import find_s3_moodboard_key, select_moodboard_key
+
+ROOT = "moodboard/"
+KEYS = [
+    "moodboard/bedroom_modern_1.png",
+    "moodboard/bedroom_modern_12.png",
+    "moodboard/bedroom_modern_2.png",
+    "moodboard/livingroom/french-modern/fm_01.png",
+    "moodboard/livingroom/french-modern/fm_3.png",
+    "moodboard/livingroom/french-modern/fm_10.png",
+    "moodboard/livingroom/luxury/cover.png",
+    "moodboard/office_minimal_4.jpg",
+]
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeS3:
+    """Paginated ``list_objects_v2`` over an in-memory bucket, like the real listing."""
+
+    def __init__(self, keys, page_size=3):
+        self.objects = {key: "e1" for key in keys}
+        self.page_size = page_size
+        self.page_calls = 0
+        self.direct_calls = 0
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        for start in range(0, len(keys), self.page_size):
+            self.page_calls += 1
+            yield {"Contents": [{"Key": key, "ETag": self.objects[key], "LastModified": "2026-01-01"} for key in keys[start : start + self.page_size]]}
+
+    def list_keys(self, prefix, max_keys):
+        self.direct_calls += 1
+        return sorted(key for key in self.objects if key.startswith(prefix))[:max_keys]
+
+
+def _index(s3, clock=None):
+    return S3MoodboardIndex(
+        get_s3_client=lambda: s3,
+        bucket="bucket",
+        prefix_root=ROOT,
+        select_key=select_moodboard_key,
+        refresh_sec=60,
+        clock=clock or _FakeClock(),
+    )
+
+
+def test_index_matches_direct_s3_lookup_for_every_layout():
+    s3 = _FakeS3(KEYS)
+    index = _index(s3)
+    cases = [
+        ("livingroom", "french-modern", "3"),
+        ("livingroom", "french-modern", "1"),
+        ("livingroom", "french-modern", "10"),
+        ("livingroom", "luxury", "7"),
+        ("bedroom", "modern", "12"),
+        ("bedroom", "modern", "9"),
+        ("kitchen", "classic", "1"),
+    ]
+
+    for case in cases:
+        expected = find_s3_moodboard_key(*case, lambda audience, category: ROOT, s3.list_keys)
+        assert index.find(*case) == expected
+
+    assert index.find("livingroom", "french-modern", "3") == "moodboard/livingroom/french-modern/fm_3.png"
+    assert index.find("bedroom", "modern", "12") == "moodboard/bedroom_modern_12.png"
+
+
+def test_warmed_presets_resolve_without_listing_again():
+    s3 = _FakeS3(KEYS)
+    index = _index(s3)
+    presets = {
+        "livingroom_french-modern_3": {"room": "livingroom", "style": "french-modern", "variant": "3"},
+        "bedroom_modern_2": {"room": "Bed Room", "style": "Modern", "variant": 2},
+    }
+
+    assert index.warm(presets) == 2
+    listed = s3.page_calls
+    assert index.find(*moodboard_lookup_parts("Bed Room", "Modern", 2)) == "moodboard/bedroom_modern_2.png"
+    assert index.find("livingroom", "french-modern", "3") == "moodboard/livingroom/french-modern/fm_3.png"
+
+    stats = index.stats()
+    assert s3.page_calls == listed == 3
+    assert stats["memo_hits"] == 2
+    assert stats["keys"] == len(KEYS)
+
+
+def test_stale_index_refreshes_and_rebuilds_only_on_listing_change():
+    clock = _FakeClock()
+    s3 = _FakeS3(KEYS)
+    index = _index(s3, clock)
+    assert index.find("office", "minimal", "4") == "moodboard/office_minimal_4.jpg"
+
+    assert index.refresh() is False
+    s3.objects["moodboard/office_minimal_4.jpg"] = "e2"
+    s3.objects["moodboard/office/minimal/new_4.png"] = "e1"
+    assert index.refresh() is True
+
+    assert index.find("office", "minimal", "4") == "moodboard/office/minimal/new_4.png"
+    assert index.stats()["rebuilds"] == 2
+
+
+def test_background_refresh_keeps_serving_the_current_index():
+    clock = _FakeClock()
+    s3 = _FakeS3(KEYS)
+    index = _index(s3, clock)
+    index.find("bedroom", "modern", "1")
+    s3.objects["moodboard/bedroom/modern/bm_1.png"] = "e1"
+
+    clock.now += 61
+    assert index.find("bedroom", "modern", "1") == "moodboard/bedroom_modern_1.png"
+
+    for _ in range(200):
+        if index.stats()["rebuilds"] == 2:
+            break
+        time.sleep(0.01)
+    assert index.find("bedroom", "modern", "1") == "moodboard/bedroom/modern/bm_1.png"
+
+
+def test_concurrent_warm_and_find_list_the_prefix_once():
+    s3 = _FakeS3(KEYS)
+    listing_started = threading.Event()
+    release_listing = threading.Event()
+    paginate = s3.paginate
+
+    def _slow_paginate(Bucket, Prefix):
+        listing_started.set()
+        release_listing.wait(5)
+        yield from paginate(Bucket, Prefix)
+
+    s3.paginate = _slow_paginate
+    index = _index(s3)
+    warm = threading.Thread(target=index.warm, args=({},))
+    warm.start()
+    assert listing_started.wait(5)
+    found = []
+    finder = threading.Thread(target=lambda: found.append(index.find("office", "minimal", "4")))
+    finder.start()
+    time.sleep(0.05)
+    release_listing.set()
+    warm.join(5)
+    finder.join(5)
+
+    assert found == ["moodboard/office_minimal_4.jpg"]
+    assert index.stats()["refreshes"] == 1
+    assert s3.page_calls == 3
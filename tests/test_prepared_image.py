@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from google.genai import _transformers
+from google.genai import types
+from PIL import Image
+
+from application.render.postprocess_support import rank_best_variant_flash
+from infrastructure.ai.gemini_client import _request_contents
+from shared.prepared_image import (
+    PREPARED_REFERENCES_REF,
+    PreparedImage,
+    PreparedReferenceCache,
+    open_reference_image,
+)
+
+
+def _write(path, mode="RGB", size=(900, 600), fmt=None):
+    color = (180, 90, 40, 255) if mode == "RGBA" else (180, 90, 40)
+    Image.new(mode, size, color).save(path, fmt)
+    return str(path)
+
+
+def _legacy_blob(path, size):
+    image = Image.open(path)
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    return _transformers.pil_to_blob(image)
+
+
+def test_prepared_bytes_match_what_the_sdk_would_encode(tmp_path):
+    png = _write(tmp_path / "cutout.png", mode="RGBA")
+    jpg = _write(tmp_path / "ref.jpg", fmt="JPEG")
+    cache = PreparedReferenceCache()
+
+    for path in (png, jpg):
+        prepared = cache.get(path, (384, 384))
+        blob = _legacy_blob(path, (384, 384))
+        assert isinstance(prepared, PreparedImage)
+        assert prepared.size == (384, 256)
+        assert prepared.mime_type == blob.mime_type
+        assert prepared.encoded_bytes == blob.data
+
+
+def test_concurrent_variants_build_each_reference_once(tmp_path):
+    path = _write(tmp_path / "cutout.png")
+    cache = PreparedReferenceCache()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        handles = list(executor.map(lambda _: cache.get(path, 512), range(8)))
+    cache.get(path, 384)
+
+    stats = cache.stats()
+    assert all(handle is handles[0] for handle in handles)
+    assert stats["builds"] == 2
+    assert stats["hits"] == 7
+    assert stats["bytes_saved"] == 7 * len(handles[0].encoded_bytes)
+
+
+def test_shared_handle_survives_close_and_fresh_open_without_cache(tmp_path):
+    path = _write(tmp_path / "cutout.png")
+    cache = PreparedReferenceCache()
+    token = PREPARED_REFERENCES_REF.set(cache)
+    try:
+        shared = open_reference_image(path, (100, 100))
+        shared.close()
+        assert open_reference_image(path, (100, 100)) is shared
+        assert shared.getpixel((0, 0)) == (180, 90, 40)
+    finally:
+        PREPARED_REFERENCES_REF.reset(token)
+
+    fresh = open_reference_image(path, (100, 100))
+    assert not isinstance(fresh, PreparedImage)
+    assert fresh.size == (100, 67)
+
+
+def test_gemini_request_contents_send_prepared_bytes(tmp_path):
+    prepared = PreparedReferenceCache().get(_write(tmp_path / "cutout.png"), 256)
+    plain = Image.new("RGB", (4, 4))
+    items = ["prompt", prepared, plain]
+
+    converted = _request_contents(items, items)
+
+    assert converted[0] == "prompt"
+    assert isinstance(converted[1], types.Part)
+    assert converted[1].inline_data.data == prepared.encoded_bytes
+    assert converted[2] is plain
+    assert _request_contents(["a", plain], ["a", plain]) == ["a", plain]
+
+
+def test_ranker_reuses_references_prepared_by_variants(tmp_path):
+    crop = _write(tmp_path / "chair.png")
+    candidates = [_write(tmp_path / f"variant_{index}.png") for index in range(2)]
+    cache = PreparedReferenceCache()
+    seen = []
+
+    def _call(model_name, contents, request_options, safety_settings, log_tag=None):
+        seen.extend(item for item in contents if isinstance(item, Image.Image))
+        return SimpleNamespace(text='{"best_index": 2}')
+
+    token = PREPARED_REFERENCES_REF.set(cache)
+    try:
+        variant_ref = open_reference_image(crop, (384, 384))
+        best = rank_best_variant_flash(
+            candidates,
+            [{"label": "Chair", "crop_path": crop}],
+            call_gemini_with_failover=_call,
+            rank_model_name="rank",
+            safe_json_from_model_text=lambda text: {"best_index": 2},
+        )
+    finally:
+        PREPARED_REFERENCES_REF.reset(token)
+
+    assert best == 1
+    assert seen[0] is variant_ref
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,163 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from api_models import SourceItem
+from application.video import source_generation_workflow
+from application.video.job_store import get_video_job, video_jobs, video_jobs_lock
+from infrastructure.ai.freepik_kling_client import KLING_POLL_PROVIDER, track_kling_task
+from infrastructure.ai.magnific_client import MAGNIFIC_POLL_PROVIDER, MAGNIFIC_STATUS_TIMEOUT_SEC, MagnificClient
+from infrastructure.ai.provider_task_poller import PollOutcome, PollSchedule, ProviderTaskPoller, TransientPollError
+
+FAST = PollSchedule(initial_delay_sec=0.0, interval_sec=0.01, slow_interval_sec=0.01, error_backoff_sec=0.01, max_error_backoff_sec=0.02)
+
+
+class _FakeProvider:
+    """Each task finishes after ``polls_needed`` status checks."""
+
+    def __init__(self, polls_needed=3, results=None):
+        self.polls_needed = polls_needed
+        self.results = results or {}
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def check(self, task_id, state):
+        with self.lock:
+            self.threads.add(threading.current_thread().name)
+        state["polls"] = state.get("polls", 0) + 1
+        result = self.results.get(task_id, f"https://cdn.example/{task_id}.mp4")
+        if isinstance(result, Exception):
+            raise result
+        if state["polls"] < self.polls_needed:
+            return PollOutcome(status="IN_PROGRESS")
+        return PollOutcome(status="COMPLETED", done=True, result=result)
+
+
+class _Response:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+def test_many_tasks_share_one_poller_thread():
+    provider = _FakeProvider(polls_needed=3)
+    poller = ProviderTaskPoller(fetch_workers=2)
+    poller.register_provider("fake", check=provider.check, schedule=FAST)
+    seen = []
+    try:
+        futures = [
+            poller.track("fake", f"task-{idx}", timeout_sec=5, on_status=lambda status, polls, elapsed: seen.append(status))
+            for idx in range(20)
+        ]
+        assert [future.result(timeout=5) for future in futures] == [f"https://cdn.example/task-{idx}.mp4" for idx in range(20)]
+    finally:
+        poller.close()
+
+    pollers = [thread for thread in threading.enumerate() if thread.name == "provider-task-poller"]
+    assert len(pollers) <= 1
+    assert provider.threads <= {"provider-task-poller"} | {f"provider-poll_{idx}" for idx in range(2)}
+    assert seen.count("COMPLETED") == 20
+    stats = poller.stats()
+    assert stats["completed"] == 20
+    assert stats["outstanding"] == 0
+    assert stats["polls"] == 60
+
+
+def test_errors_fail_the_task_and_transient_errors_back_off():
+    provider = _FakeProvider(polls_needed=1, results={"bad": RuntimeError("Kling task failed: bad prompt")})
+    flaky_calls = []
+
+    def _flaky(task_id, state):
+        flaky_calls.append(task_id)
+        if len(flaky_calls) < 3:
+            raise TransientPollError("status returned 503")
+        return PollOutcome(status="COMPLETED", done=True, result="ok")
+
+    poller = ProviderTaskPoller(fetch_workers=2)
+    poller.register_provider("fake", check=provider.check, schedule=FAST)
+    poller.register_provider("flaky", check=_flaky, schedule=FAST)
+    try:
+        with pytest.raises(RuntimeError, match="bad prompt"):
+            poller.track("fake", "bad", timeout_sec=5).result(timeout=5)
+        assert poller.track("flaky", "t1", timeout_sec=5).result(timeout=5) == "ok"
+    finally:
+        poller.close()
+
+    stats = poller.stats()
+    assert stats["failed"] == 1
+    assert stats["poll_errors"] == 2
+    assert stats["completed"] == 1
+
+
+def test_tasks_time_out_against_their_deadline():
+    poller = ProviderTaskPoller(fetch_workers=1)
+    poller.register_provider("slow", check=lambda task_id, state: PollOutcome(status="IN_PROGRESS"), schedule=FAST)
+    try:
+        with pytest.raises(RuntimeError, match="slow task timeout"):
+            poller.track("slow", "t1", timeout_sec=0.05).result(timeout=5)
+    finally:
+        poller.close()
+    assert poller.stats()["timed_out"] == 1
+
+
+def test_magnific_status_checks_resolve_through_the_poller():
+    responses = iter(
+        [
+            _Response(503),
+            _Response(200, {"data": {"status": "IN_PROGRESS"}}),
+            _Response(200, {"data": {"status": "COMPLETED", "generated": ["https://cdn.example/up.png"]}}),
+        ]
+    )
+    urls = []
+
+    class _Session:
+        def get(self, url, headers=None, timeout=None):
+            urls.append((url, timeout))
+            return next(responses)
+
+    client = MagnificClient(api_key="key", endpoint="https://mag.example", session_factory=_Session)
+    poller = ProviderTaskPoller(fetch_workers=1)
+    client.register_poller(poller, schedule=FAST)
+    try:
+        assert poller.track(MAGNIFIC_POLL_PROVIDER, "up-1", timeout_sec=5).result(timeout=5) == ["https://cdn.example/up.png"]
+    finally:
+        poller.close()
+    assert urls[0] == ("https://mag.example/up-1", (5.0, MAGNIFIC_STATUS_TIMEOUT_SEC))
+    assert poller.stats()["poll_errors"] == 1
+
+
+def test_source_generation_hands_clips_to_the_shared_poller(monkeypatch, tmp_path):
+    with video_jobs_lock:
+        video_jobs.clear()
+    monkeypatch.chdir(tmp_path)
+    Path("outputs").mkdir()
+    monkeypatch.setattr(source_generation_workflow, "image_url_to_b64", lambda url: "img-b64")
+    monkeypatch.setattr(source_generation_workflow, "download_to_path", lambda url, out_path: Path(out_path).write_bytes(b"mp4"))
+
+    provider = _FakeProvider(polls_needed=2)
+    poller = ProviderTaskPoller(fetch_workers=2)
+    poller.register_provider(KLING_POLL_PROVIDER, check=provider.check, schedule=FAST)
+    task_ids = iter(f"kling-{idx}" for idx in range(3))
+    try:
+        source_generation_workflow.run_source_generation_job(
+            "job-tracked",
+            [SourceItem(url=f"https://example.com/{idx}.png", motion="orbit_r_slow", effect="sunlight") for idx in range(3)],
+            0.5,
+            video_target_fps=12,
+            video_max_concurrency=1,
+            create_kling_task=lambda *args, **kwargs: next(task_ids),
+            poll_kling_task=lambda *args, **kwargs: pytest.fail("blocking poll should not be used"),
+            track_kling_task=lambda task_id, **kwargs: track_kling_task(poller, task_id, timeout_sec=5, **kwargs),
+        )
+    finally:
+        poller.close()
+
+    state = get_video_job("job-tracked")
+    assert state["status"] == "COMPLETED"
+    assert state["results"] == [f"/outputs/source_job-tracked_{idx}.mp4" for idx in range(3)]
+    assert [item["provider_result_url"] for item in state["items"]] == [f"https://cdn.example/kling-{idx}.mp4" for idx in range(3)]
+    assert poller.stats()["completed"] == 3
@@ -0,0 +1,137 @@
+from infrastructure.ai.analysis_result_cache import file_sha256
+from infrastructure.published_url_cache import PublishedUrlCache, RedisPublishedUrlTier
+from storage_helpers import publish_image
+
+BUCKET = "bucket"
+REGION = "ap-northeast-2"
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode("utf-8")
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class _FakeS3:
+    def __init__(self):
+        self.uploads = []
+
+    def upload_file(self, local_path, bucket, key, ExtraArgs=None):
+        self.uploads.append(key)
+
+
+def _publish(path, cache, s3, prefix="renders/"):
+    return publish_image(str(path), prefix, "", BUCKET, REGION, cache, lambda: s3, file_digest=file_sha256)
+
+
+def test_cache_is_bounded_expires_entries_and_reports_hit_rate():
+    clock = _FakeClock()
+    cache = PublishedUrlCache(max_entries=2, ttl_sec=60, clock=clock)
+    cache["a"] = "https://h/a"
+    cache["b"] = "https://h/b"
+    assert cache.get("a") == "https://h/a"
+    cache["c"] = "https://h/c"
+
+    assert "b" not in cache
+    assert cache["a"] == "https://h/a"
+    clock.now += 61
+    assert cache.get("c") is None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 2
+    assert stats["hit_rate"] == 0.5
+    assert len(cache) == 1
+
+
+def test_identical_bytes_under_the_same_prefix_are_uploaded_once(tmp_path):
+    first = tmp_path / "variant_a.png"
+    second = tmp_path / "variant_b.png"
+    first.write_bytes(b"same-bytes")
+    second.write_bytes(b"same-bytes")
+    cache = PublishedUrlCache()
+    s3 = _FakeS3()
+
+    first_url = _publish(first, cache, s3)
+    second_url = _publish(second, cache, s3)
+    other_prefix_url = _publish(second, cache, s3, prefix="details/")
+
+    assert second_url == first_url
+    assert other_prefix_url.endswith("/details/variant_b.png")
+    assert s3.uploads == ["renders/variant_a.png", "details/variant_b.png"]
+    assert cache.stats()["content_hits"] == 1
+
+
+def test_shared_tier_dedupes_uploads_across_processes_but_not_local_paths(tmp_path):
+    redis = _FakeRedis()
+    web = PublishedUrlCache(shared_tier=RedisPublishedUrlTier(lambda: redis))
+    worker = PublishedUrlCache(shared_tier=RedisPublishedUrlTier(lambda: redis))
+    path = tmp_path / "crop.png"
+    path.write_bytes(b"crop")
+    s3 = _FakeS3()
+
+    url = _publish(path, web, s3)
+    assert _publish(path, worker, s3) == url
+
+    assert s3.uploads == ["renders/crop.png"]
+    assert worker.stats()["shared_hits"] == 1
+    assert all(key.startswith("published-url:sha256:") for key in redis.values)
+
+
+def test_failed_deferred_upload_forgets_path_and_content_keys(tmp_path):
+    path = tmp_path / "crop.png"
+    path.write_bytes(b"crop")
+    cache = PublishedUrlCache()
+    failures = []
+
+    class _Publisher:
+        def upload(self, local_path, key, content_type=None, *, on_failure=None, on_success=None):
+            failures.append(on_failure)
+
+    url = publish_image(str(path), "renders/", "", BUCKET, REGION, cache, lambda: None, publisher=_Publisher(), file_digest=file_sha256)
+    assert len(cache) == 1
+    failures[0]()
+
+    assert url.endswith("/renders/crop.png")
+    assert len(cache) == 0
+
+
+def test_deferred_upload_shares_its_content_key_only_after_the_object_exists(tmp_path):
+    redis = _FakeRedis()
+    web = PublishedUrlCache(shared_tier=RedisPublishedUrlTier(lambda: redis))
+    worker = PublishedUrlCache(shared_tier=RedisPublishedUrlTier(lambda: redis))
+    path = tmp_path / "crop.png"
+    path.write_bytes(b"crop")
+    s3 = _FakeS3()
+    pending = []
+
+    class _Publisher:
+        def upload(self, local_path, key, content_type=None, *, on_failure=None, on_success=None):
+            pending.append(on_success)
+
+    url = publish_image(str(path), "renders/", "", BUCKET, REGION, web, lambda: s3, publisher=_Publisher(), file_digest=file_sha256)
+    assert redis.values == {}
+    # Another process publishing the same bytes mid-upload uploads its own copy.
+    assert _publish(path, worker, s3) == url
+    assert s3.uploads == ["renders/crop.png"]
+
+    redis.values.clear()
+    pending[0]()
+    assert list(redis.values) == [f"published-url:sha256:{file_sha256(str(path))}::renders/"]
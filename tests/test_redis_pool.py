@@ -0,0 +1,71 @@
+import os
+import threading
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from infrastructure.redis_pool import InstrumentedConnectionPool, RedisConnectionProvider
+
+
+class _FakeConnection:
+    def __init__(self, **kwargs):
+        self.pid = os.getpid()
+
+    def connect(self):
+        return None
+
+    def can_read(self, timeout=0):
+        return False
+
+    def disconnect(self):
+        return None
+
+
+def _pool(**kwargs):
+    return InstrumentedConnectionPool(connection_class=_FakeConnection, **kwargs)
+
+
+def test_pool_counts_checkouts_and_reuses_connections():
+    pool = _pool(max_connections=2, timeout=1)
+    for _ in range(3):
+        pool.release(pool.get_connection("PING"))
+
+    stats = pool.snapshot()
+    assert stats["checkouts"] == 3
+    assert stats["connections_created"] == 1
+    assert stats["in_use"] == 0
+    assert stats["waits"] == 0
+
+
+def test_pool_records_waits_and_exhaustion():
+    pool = _pool(max_connections=1, timeout=0.05)
+    held = pool.get_connection("GET")
+
+    with pytest.raises(RedisConnectionError):
+        pool.get_connection("GET")
+
+    releaser = threading.Timer(0.02, pool.release, args=(held,))
+    pool.timeout = 1
+    releaser.start()
+    conn = pool.get_connection("GET")
+    releaser.join()
+    pool.release(conn)
+
+    stats = pool.snapshot()
+    assert stats["checkout_errors"] == 1
+    assert stats["waits"] == 2
+    assert stats["max_wait_sec"] > 0
+    assert stats["peak_in_use"] == 1
+
+
+def test_provider_returns_one_client_per_process():
+    provider = RedisConnectionProvider("redis://localhost:6379/0", max_connections=4)
+    first = provider.get()
+
+    assert provider.get() is first
+    assert first.connection_pool.max_connections == 4
+    assert provider.stats()["checkouts"] == 0
+
+    provider.reset()
+    assert provider.get() is not first
+    assert RedisConnectionProvider("").get() is None
@@ -0,0 +1,128 @@
+import threading
+import time
+
+from application.render.render_variant_stage import run_render_variant_stage, variant_race_cancelled
+
+
+def _stage_kwargs(generate_furnished_room):
+    return dict(
+        step1_img="empty.png",
+        style_prompt="style",
+        ref_input=None,
+        unique_id="job",
+        furniture_specs_text=None,
+        furniture_specs_json=None,
+        dimensions="",
+        placement="",
+        scale_guide_path=None,
+        primary_item=None,
+        room_dims_parsed={},
+        wall_span_norm=None,
+        size_hierarchy=None,
+        start_time=0.0,
+        room_planes=None,
+        windows_present=False,
+        room_analysis_text="",
+        enable_scale_check=True,
+        generate_furnished_room=generate_furnished_room,
+    )
+
+
+class _Generator:
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = set(failing)
+        self.started = []
+        self.release = threading.Event()
+        self.cancel_seen = []
+
+    def __call__(self, step1_img, style_prompt, ref_input, sub_id, **kwargs):
+        index = int(sub_id.rsplit("_v", 1)[1]) - 1
+        self.started.append(index)
+        if self.delays[index] is None:
+            self.release.wait(2.0)
+            self.cancel_seen.append(variant_race_cancelled())
+        else:
+            time.sleep(self.delays[index])
+        return {"path": f"v{index}.png", "scale_check_failed": index in self.failing}
+
+
+def test_default_mode_waits_for_every_variant_in_submission_order():
+    generator = _Generator([0.05, 0.0, 0.0])
+    timings = []
+
+    results = run_render_variant_stage(
+        **_stage_kwargs(generator),
+        max_variants=3,
+        max_workers=3,
+        variant_timings=timings,
+    )
+
+    assert [row["path"] for row in results] == ["v0.png", "v1.png", "v2.png"]
+    assert [row["status"] for row in timings] == ["completed"] * 3
+    assert timings[0]["elapsed_sec"] >= 0.05
+
+
+def test_race_returns_first_accepted_variant_without_waiting_for_a_slow_one():
+    generator = _Generator([None, 0.05, 0.0], failing={2})
+    timings = []
+
+    started_at = time.perf_counter()
+    results = run_render_variant_stage(
+        **_stage_kwargs(generator),
+        max_variants=3,
+        max_workers=3,
+        race=True,
+        accept_variant=lambda row: not row["scale_check_failed"],
+        variant_timings=timings,
+    )
+    elapsed = time.perf_counter() - started_at
+    generator.release.set()
+
+    assert elapsed < 1.0
+    assert [row["path"] for row in results] == ["v1.png", "v2.png"]
+    by_index = {row["variant_index"]: row for row in timings}
+    assert by_index[1]["accepted"] is True
+    assert by_index[0]["status"] == "abandoned"
+    deadline = time.time() + 2.0
+    while not generator.cancel_seen and time.time() < deadline:
+        time.sleep(0.01)
+    assert generator.cancel_seen == [True]
+
+
+def test_race_cancels_variants_that_have_not_started():
+    generator = _Generator([0.0, 0.2, 0.0])
+    timings = []
+
+    results = run_render_variant_stage(
+        **_stage_kwargs(generator),
+        max_variants=3,
+        max_workers=1,
+        race=True,
+        accept_variant=lambda row: True,
+        variant_timings=timings,
+    )
+
+    assert [row["path"] for row in results] == ["v0.png"]
+    assert 2 not in generator.started
+    assert timings[0]["status"] == "completed"
+    assert timings[2]["status"] == "cancelled"
+
+
+def test_race_stops_waiting_when_budget_runs_low_once_a_candidate_exists():
+    generator = _Generator([None, 0.0], failing={1})
+    clock = {"now": 100.0}
+
+    results = run_render_variant_stage(
+        **_stage_kwargs(generator),
+        max_variants=2,
+        max_workers=2,
+        race=True,
+        accept_variant=lambda row: not row["scale_check_failed"],
+        absolute_deadline_ts=130.0,
+        min_remaining_budget_sec=30.0,
+        time_now=lambda: clock["now"],
+    )
+    generator.release.set()
+
+    assert [row["path"] for row in results] == ["v1.png"]
@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+
+from infrastructure.s3_publisher import S3ClientProvider, S3Publisher
+from storage_helpers import resolve_image_url
+
+BUCKET = "bucket"
+REGION = "ap-northeast-2"
+
+
+class _LocalS3:
+    """In-memory stand-in for the subset of the S3 client the publisher uses."""
+
+    def __init__(self, fail_times=0):
+        self.objects = {}
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def upload_file(self, local_path, bucket, key, ExtraArgs=None, Config=None):
+        self.gate.wait(5.0)
+        with self._lock:
+            self.calls.append({"key": key, "extra": ExtraArgs, "config": Config})
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("upload failed")
+        with open(local_path, "rb") as handle:
+            self.objects[(bucket, key)] = handle.read()
+
+
+def _write(tmp_path, name, size=16):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def _resolve(path, publisher, cache):
+    return resolve_image_url(path, "renders/", "", BUCKET, REGION, False, cache, lambda: None, publisher=publisher)
+
+
+def test_deferred_uploads_return_urls_immediately_and_flush_waits_for_them(tmp_path):
+    s3 = _LocalS3()
+    s3.gate.clear()
+    publisher = S3Publisher(get_s3_client=lambda: s3, bucket=BUCKET, max_workers=2)
+    cache = {}
+    paths = [_write(tmp_path, f"variant_{index}.png") for index in range(3)]
+
+    with publisher.deferred():
+        urls = [_resolve(path, publisher, cache) for path in paths]
+        assert urls[0] == f"https://{BUCKET}.s3.{REGION}.amazonaws.com/renders/variant_0.png"
+        assert s3.objects == {}
+        assert publisher.stats()["queue_depth"] + publisher.stats()["in_flight"] == 3
+        s3.gate.set()
+        summary = publisher.flush()
+
+    assert summary == {"uploads": 3, "retried": 0, "failed": []}
+    assert sorted(key for _, key in s3.objects) == ["renders/variant_0.png", "renders/variant_1.png", "renders/variant_2.png"]
+    assert s3.calls[0]["extra"] == {"ContentType": "image/png"}
+    stats = publisher.stats()
+    assert stats["uploads"] == 3
+    assert stats["deferred_uploads"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_failed_background_upload_is_retried_once_at_flush(tmp_path):
+    s3 = _LocalS3(fail_times=1)
+    publisher = S3Publisher(get_s3_client=lambda: s3, bucket=BUCKET, max_workers=1)
+    cache = {}
+
+    with publisher.deferred():
+        url = _resolve(_write(tmp_path, "crop.png"), publisher, cache)
+
+    assert url.endswith("/renders/crop.png")
+    assert (BUCKET, "renders/crop.png") in s3.objects
+    assert publisher.stats()["flush_retries"] == 1
+    assert publisher.stats()["upload_errors"] == 1
+
+
+def test_flush_raises_and_forgets_url_when_upload_keeps_failing(tmp_path):
+    s3 = _LocalS3(fail_times=2)
+    publisher = S3Publisher(get_s3_client=lambda: s3, bucket=BUCKET, max_workers=1)
+    cache = {}
+
+    with pytest.raises(RuntimeError, match="renders/crop.png"):
+        with publisher.deferred():
+            _resolve(_write(tmp_path, "crop.png"), publisher, cache)
+
+    assert cache == {}
+    assert s3.objects == {}
+
+
+def test_success_callback_runs_only_once_the_object_is_uploaded(tmp_path):
+    s3 = _LocalS3(fail_times=1)
+    publisher = S3Publisher(get_s3_client=lambda: s3, bucket=BUCKET, max_workers=1)
+    landed = []
+
+    with publisher.deferred():
+        publisher.upload(
+            _write(tmp_path, "retry.png"),
+            "renders/retry.png",
+            on_success=lambda: landed.append(("renders/retry.png" in {key for _, key in s3.objects})),
+        )
+    publisher.upload(_write(tmp_path, "inline.png"), "renders/inline.png", on_success=lambda: landed.append(True))
+
+    assert landed == [True, True]
+
+
+def test_uploads_outside_a_deferred_block_run_inline_with_multipart_config(tmp_path):
+    s3 = _LocalS3()
+    publisher = S3Publisher(
+        get_s3_client=lambda: s3,
+        bucket=BUCKET,
+        multipart_threshold_bytes=5 * 1024 * 1024,
+        multipart_chunk_bytes=8 * 1024 * 1024,
+    )
+    cache = {}
+    video = _write(tmp_path, "clip.mp4", size=6 * 1024 * 1024)
+
+    url = _resolve(video, publisher, cache)
+
+    assert url.endswith("/renders/clip.mp4")
+    assert (BUCKET, "renders/clip.mp4") in s3.objects
+    config = s3.calls[0]["config"]
+    assert config.multipart_threshold == 5 * 1024 * 1024
+    assert config.multipart_chunksize == 8 * 1024 * 1024
+    stats = publisher.stats()
+    assert stats["multipart_uploads"] == 1
+    assert stats["deferred_uploads"] == 0
+    assert _resolve(video, publisher, cache) == url
+    assert len(s3.calls) == 1
+
+
+def test_client_provider_reuses_one_client_and_rebuilds_after_fork(monkeypatch):
+    built = []
+    provider = S3ClientProvider(REGION, client_factory=lambda: built.append(object()) or built[-1])
+
+    first = provider.get()
+    assert provider.get() is first
+
+    monkeypatch.setattr("infrastructure.s3_publisher.os.getpid", lambda: -1)
+    assert provider.get() is not first
+    assert provider.stats()["clients_created"] == 2
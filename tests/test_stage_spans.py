@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from application.render.render_stage_spans import (
+    STAGE_SPANS_REF,
+    StageSpanRecorder,
+    estimate_payload_bytes,
+    instrument_model_caller,
+    submit_in_context,
+)
+from infrastructure.stage_metrics import RedisStageMetricsTier, StageMetricsRegistry
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field.encode("utf-8")] = str(float(bucket.get(field.encode("utf-8"), 0)) + amount).encode("utf-8")
+
+    def execute(self):
+        return []
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+def test_recorder_accumulates_wall_time_and_model_calls_per_stage():
+    clock = _FakeClock()
+    finished = []
+    entered = []
+    recorder = StageSpanRecorder(clock=clock, on_finish=finished.append, on_enter=lambda name, step: entered.append((name, step)))
+
+    recorder.enter("analysis")
+    recorder.record_model_call(bytes_in=10, bytes_out=4)
+    clock.now += 2.0
+    recorder.enter("variants")
+    recorder.record_model_call(bytes_in=100, bytes_out=50)
+    recorder.record_model_call(bytes_in=100, bytes_out=50)
+    clock.now += 3.0
+    recorder.enter("analysis")
+    clock.now += 0.5
+    snapshot = recorder.finish()
+    recorder.finish()
+
+    stages = {row["stage"]: row for row in snapshot["stages"]}
+    assert stages["analysis"]["wall_sec"] == 2.5
+    assert stages["analysis"]["entries"] == 2
+    assert stages["analysis"]["model_calls"] == 1
+    assert stages["variants"] == {
+        "stage": "variants",
+        "wall_sec": 3.0,
+        "entries": 1,
+        "model_calls": 2,
+        "bytes_in": 200,
+        "bytes_out": 100,
+    }
+    assert snapshot["total_wall_sec"] == 5.5
+    assert snapshot["model_calls"] == 3
+    assert finished == [snapshot]
+    assert entered == [("analysis", 1), ("variants", 2), ("analysis", 3)]
+
+
+def test_instrumented_caller_attributes_executor_calls_to_the_open_stage():
+    recorder = StageSpanRecorder()
+    calls = []
+
+    def _caller(model_name, contents, request_options, safety_settings, log_tag=None):
+        calls.append(model_name)
+        return SimpleNamespace(text="ok!")
+
+    caller = instrument_model_caller(_caller)
+    token = STAGE_SPANS_REF.set(recorder)
+    try:
+        recorder.enter("analysis")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [submit_in_context(executor, caller, "m", ["abcd"], {}, None) for _ in range(3)]
+            assert [future.result().text for future in futures] == ["ok!"] * 3
+            # A plain submit runs outside the request context and is not attributed.
+            executor.submit(caller, "m", ["abcd"], {}, None).result()
+    finally:
+        STAGE_SPANS_REF.reset(token)
+
+    stages = {row["stage"]: row for row in recorder.finish()["stages"]}
+    assert len(calls) == 4
+    assert stages["analysis"]["model_calls"] == 3
+    assert stages["analysis"]["bytes_in"] == 12
+    assert stages["analysis"]["bytes_out"] == 9
+
+
+def test_estimate_payload_bytes_counts_text_bytes_and_images():
+    image = Image.new("RGB", (10, 4))
+    inline = SimpleNamespace(inline_data=SimpleNamespace(data=b"x" * 7))
+    response = SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[inline]))])
+
+    assert estimate_payload_bytes(["ab", b"abc", image, {"k": "é"}]) == 2 + 3 + 120 + 2
+    assert estimate_payload_bytes(response) == 7
+    assert estimate_payload_bytes(None) == 0
+
+
+def test_registry_renders_prometheus_text_from_shared_tier():
+    redis = _FakeRedis()
+    writer = StageMetricsRegistry(shared_tier=RedisStageMetricsTier(lambda: redis))
+    reader = StageMetricsRegistry(shared_tier=RedisStageMetricsTier(lambda: redis))
+    spans = {
+        "total_wall_sec": 4.0,
+        "stages": [
+            {"stage": "analysis", "wall_sec": 1.5, "model_calls": 2, "bytes_in": 10, "bytes_out": 5},
+            {"stage": "variants", "wall_sec": 2.5, "model_calls": 3, "bytes_in": 30, "bytes_out": 60},
+        ],
+    }
+    writer.observe(spans)
+    writer.observe(spans)
+
+    text = reader.render_prometheus({"redis_pool": {"in_use": 2, "label": "skip"}})
+
+    assert "render_requests_total 2" in text
+    assert "render_wall_seconds_total 8" in text
+    assert 'render_stage_wall_seconds_total{stage="analysis"} 3' in text
+    assert 'render_stage_model_calls_total{stage="variants"} 6' in text
+    assert 'render_stage_model_bytes_out_total{stage="variants"} 120' in text
+    assert "redis_pool_in_use 2" in text
+    assert "redis_pool_label" not in text
+
+
+def test_metrics_endpoint_serves_prometheus_text(monkeypatch):
+    import main
+
+    registry = StageMetricsRegistry()
+    registry.observe({"total_wall_sec": 1.0, "stages": [{"stage": "analysis", "wall_sec": 1.0, "model_calls": 1}]})
+    monkeypatch.setattr(main, "STAGE_METRICS", registry)
+
+    response = TestClient(main.app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'render_stage_runs_total{stage="analysis"} 1' in response.text
+    assert "redis_pool_checkouts" in response.text
@@ -222,6 +222,37 @@ class SourceGenerationWorkflowTests(unittest.TestCase):
         finally:
             os.chdir(prev_cwd)
 
+    def test_run_source_generation_job_encodes_static_clips_with_the_given_profile(self):
+        prev_cwd = os.getcwd()
+        os.chdir(self.tmp_root)
+        encoded = []
+
+        def _image_to_video(img_path, out_path, *args, encoder_profile):
+            encoded.append(encoder_profile)
+            Path(out_path).write_bytes(b"fake-mp4")
+
+        try:
+            with patch.object(source_generation_workflow, "download_to_path"), patch.object(
+                source_generation_workflow,
+                "ffmpeg_image_to_video",
+                side_effect=_image_to_video,
+            ):
+                source_generation_workflow.run_source_generation_job(
+                    "job-static",
+                    [SourceItem(url="https://example.com/image.png", motion="static", effect="none")],
+                    0.5,
+                    video_target_fps=12,
+                    video_max_concurrency=1,
+                    create_kling_task=lambda *args, **kwargs: "task-123",
+                    poll_kling_task=lambda *args, **kwargs: "https://example.com/generated.mp4",
+                    encoder_profile="standard",
+                )
+            state = get_video_job("job-static")
+            self.assertEqual(state.get("status"), "COMPLETED")
+            self.assertEqual(encoded, ["standard"])
+        finally:
+            os.chdir(prev_cwd)
+
     def test_run_source_generation_job_marks_failed_when_all_clips_fail(self):
         prev_cwd = os.getcwd()
         os.chdir(self.tmp_root)
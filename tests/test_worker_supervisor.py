@@ -0,0 +1,226 @@
+import itertools
+from datetime import datetime, timezone
+
+from rq.utils import utcformat
+
+from infrastructure.worker_supervisor import (
+    QueuePoolSpec,
+    WorkerSupervisor,
+    build_queue_pool_specs,
+    read_process_tree_rss_mb,
+    read_queue_load,
+)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+        self.hashes = {}
+
+    def enqueue(self, queue, job_id, enqueued_ts):
+        self.lists.setdefault(f"rq:queue:{queue}", []).append(job_id.encode())
+        self.hashes[f"rq:job:{job_id}"] = {
+            "enqueued_at": utcformat(datetime.fromtimestamp(enqueued_ts, tz=timezone.utc).replace(tzinfo=None)).encode()
+        }
+
+    def start(self, queue, job_id):
+        self.lists[f"rq:queue:{queue}"].remove(job_id.encode())
+        self.zsets.setdefault(f"rq:wip:{queue}", set()).add(job_id)
+
+    def finish(self, queue, job_id):
+        self.zsets[f"rq:wip:{queue}"].discard(job_id)
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lindex(self, key, index):
+        values = self.lists.get(key, [])
+        return values[index] if values else None
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, ()))
+
+
+class _FakeProcess:
+    _pids = itertools.count(100)
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.pid = next(self._pids)
+        self.exitcode = None
+        self.terminated = False
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def terminate(self):
+        self.terminated = True
+
+    def exit(self, code):
+        self.exitcode = code
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _supervisor(redis, pools, clock, **kwargs):
+    spawned = []
+
+    def _spawn(spec):
+        process = _FakeProcess(spec)
+        spawned.append(process)
+        return process
+
+    supervisor = WorkerSupervisor(
+        pools,
+        redis_conn=redis,
+        spawn=_spawn,
+        clock=clock,
+        wall_clock=clock,
+        logger=None,
+        **kwargs,
+    )
+    return supervisor, spawned
+
+
+def _alive(spawned, pool_name):
+    return [process for process in spawned if process.spec.name == pool_name and process.is_alive() and not process.terminated]
+
+
+def test_queue_load_reads_depth_running_jobs_and_oldest_age():
+    redis = _FakeRedis()
+    redis.enqueue("render", "a", 900.0)
+    redis.enqueue("render", "b", 990.0)
+    redis.enqueue("render", "c", 995.0)
+    redis.start("render", "c")
+
+    load = read_queue_load(redis, "render", now=1000.0)
+
+    assert load.depth == 2
+    assert load.started == 1
+    assert round(load.oldest_age_sec) == 100
+    assert read_queue_load(redis, "video", now=1000.0).depth == 0
+
+
+def test_pools_scale_with_backlog_and_video_burst_does_not_starve_render():
+    redis = _FakeRedis()
+    clock = _Clock()
+    pools = [
+        QueuePoolSpec("render", ("render",), min_workers=1, max_workers=3),
+        QueuePoolSpec("video", ("video",), min_workers=0, max_workers=2),
+    ]
+    supervisor, spawned = _supervisor(redis, pools, clock, scale_up_age_sec=5.0, scale_down_idle_sec=60.0)
+
+    supervisor.tick()
+    assert len(_alive(spawned, "render")) == 1
+    assert len(_alive(spawned, "video")) == 0
+
+    for index in range(6):
+        redis.enqueue("video", f"v{index}", clock.now)
+    redis.enqueue("render", "r0", clock.now)
+    redis.enqueue("render", "r1", clock.now)
+    supervisor.tick()
+    assert len(_alive(spawned, "video")) == 0
+
+    clock.now += 10
+    supervisor.tick()
+    assert len(_alive(spawned, "video")) == 2
+    assert len(_alive(spawned, "render")) == 2
+    assert all(process.spec.queues == ("video",) for process in _alive(spawned, "video"))
+
+    for job_id in ("r0", "r1"):
+        redis.start("render", job_id)
+        redis.finish("render", job_id)
+    clock.now += 30
+    supervisor.tick()
+    assert len(_alive(spawned, "render")) == 2
+
+    clock.now += 61
+    supervisor.tick()
+    assert len(_alive(spawned, "render")) == 1
+    stats = supervisor.stats()
+    assert stats["render"]["scaled_down"] == 1
+    assert stats["video"]["queue_depth"] == 6
+
+
+def test_crashed_children_restart_with_backoff_and_clean_exits_are_recycled():
+    redis = _FakeRedis()
+    clock = _Clock()
+    supervisor, spawned = _supervisor(
+        redis,
+        [QueuePoolSpec("render", ("render",), min_workers=1, max_workers=1)],
+        clock,
+        restart_backoff_sec=2.0,
+    )
+    supervisor.tick()
+    spawned[0].exit(-9)
+
+    supervisor.tick()
+    assert len(spawned) == 1
+    clock.now += 2.5
+    supervisor.tick()
+    assert len(spawned) == 2
+
+    spawned[1].exit(0)
+    supervisor.tick()
+    assert len(spawned) == 3
+    stats = supervisor.stats()["render"]
+    assert stats["crashed"] == 1
+    assert stats["recycled"] == 1
+
+
+def test_children_over_the_rss_cap_are_retired_and_replaced():
+    redis = _FakeRedis()
+    clock = _Clock()
+    rss = {}
+    supervisor, spawned = _supervisor(
+        redis,
+        [QueuePoolSpec("upscale", ("upscale",), min_workers=1, max_workers=1)],
+        clock,
+        max_rss_mb=512,
+        rss_reader=lambda pid: rss.get(pid, 100.0),
+    )
+    supervisor.tick()
+    rss[spawned[0].pid] = 900.0
+    supervisor.tick()
+
+    assert spawned[0].terminated
+    assert len(spawned) == 2
+    spawned[0].exit(0)
+    supervisor.tick()
+    assert supervisor.stats()["upscale"]["retired"] == 1
+    assert supervisor.stats()["upscale"]["alive"] == 1
+
+
+def test_rss_cap_counts_the_forked_work_horse(tmp_path):
+    def _proc(pid, ppid, rss_kb, comm="rq (worker) x"):
+        (tmp_path / str(pid)).mkdir()
+        (tmp_path / str(pid) / "stat").write_text(f"{pid} ({comm}) S {ppid} 1 1 0")
+        (tmp_path / str(pid) / "status").write_text(f"Name:\tpython\nVmRSS:\t{rss_kb} kB\n")
+
+    _proc(100, 1, 200 * 1024)
+    _proc(101, 100, 700 * 1024, comm="rq:work-horse")
+    _proc(102, 101, 100 * 1024)
+    _proc(200, 1, 900 * 1024)
+    (tmp_path / "self").mkdir()
+
+    assert read_process_tree_rss_mb(100, proc_root=str(tmp_path)) == 1000.0
+    assert read_process_tree_rss_mb(101, proc_root=str(tmp_path)) == 800.0
+    assert read_process_tree_rss_mb(999, proc_root=str(tmp_path)) is None
+
+
+def test_pool_specs_come_from_env(monkeypatch):
+    monkeypatch.setenv("RQ_POOL_RENDER_MIN", "2")
+    monkeypatch.setenv("RQ_POOL_RENDER_MAX", "6")
+    specs = build_queue_pool_specs({"render": ["render"], "video": ["video"], "default": []})
+
+    assert [(spec.name, spec.min_workers, spec.max_workers) for spec in specs] == [("render", 2, 6), ("video", 1, 1)]
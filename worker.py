@@ -1,11 +1,16 @@
 import os
 import multiprocessing
+import signal
+import threading
 from pathlib import Path
-from redis import Redis
 from rq import Connection
 from rq.worker import Worker, SimpleWorker
 from rq.timeouts import BaseDeathPenalty
 
+from infrastructure.job_events import JobEventHub, RedisJobEventTransport, with_job_status_events
+from infrastructure.redis_pool import RedisConnectionProvider
+from infrastructure.worker_supervisor import WorkerSupervisor, build_queue_pool_specs
+
 BASE_DIR = Path(__file__).resolve().parent
 os.chdir(BASE_DIR)
 
@@ -39,22 +44,86 @@ queue_names = [q for q in queue_names if not (q in seen or seen.add(q))]
 if not REDIS_URL:
     raise SystemExit("REDIS_URL not configured")
 
-conn = Redis.from_url(REDIS_URL)
+# One pooled client per process; redis-py rebuilds the pool after fork, so each
+# multiprocessing worker ends up with its own sockets.
+conn = RedisConnectionProvider(
+    REDIS_URL,
+    max_connections=int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", "32") or 32),
+    pool_timeout_sec=float(os.getenv("REDIS_POOL_TIMEOUT_SEC", "5") or 5),
+    health_check_interval_sec=int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SEC", "30") or 30),
+).get()
 
 worker_class = SimpleWorker if os.name == "nt" else Worker
+if os.getenv("JOB_EVENTS_ENABLED", "1").strip().lower() in ("1", "true", "yes", "y"):
+    # Status events let /jobs/{id}/events push started/finished/failed instead of being polled.
+    job_events = JobEventHub(transport=RedisJobEventTransport(lambda: conn), replay_events=1, replay_jobs=64)
+    worker_class = with_job_status_events(worker_class, job_events.publish)
+
+RQ_WORKER_MAX_JOBS = max(0, int(os.getenv("RQ_WORKER_MAX_JOBS", "0") or 0))
+RQ_PRELOAD_APP = os.getenv("RQ_PRELOAD_APP", "1").strip().lower() in ("1", "true", "yes", "y")
+_APP_WARM_THREADS = ("asset-index-warm", "moodboard-index-warm")
+
+
+def _preload_app():
+    # Jobs run functions from main inside forked work horses. Importing it here lets every
+    # horse inherit the app and its warmed asset/moodboard indexes instead of importing it
+    # and listing S3 again per job.
+    import main  # noqa: F401
 
-def _run_worker():
+    # Never fork while a warm-up thread is mid-build and holding an index lock.
+    for thread in threading.enumerate():
+        if thread.name in _APP_WARM_THREADS:
+            thread.join()
+
+
+def _run_worker(listen_queues=None):
+    if RQ_PRELOAD_APP:
+        _preload_app()
     with Connection(conn):
-        worker = worker_class(queue_names)
+        worker = worker_class(list(listen_queues or queue_names))
         if os.name == "nt":
             class _NoopDeathPenalty(BaseDeathPenalty):
                 def __enter__(self): return self
                 def __exit__(self, exc_type, exc, tb): return False
             worker.disable_job_timeout = True
             worker.death_penalty_class = _NoopDeathPenalty
-        worker.work(with_scheduler=True)
+        worker.work(with_scheduler=True, max_jobs=RQ_WORKER_MAX_JOBS or None)
+
+
+def _pool_queues() -> dict[str, list[str]]:
+    # Dedicated queues get their own pool; everything else shares the default pool.
+    dedicated = {"render": RQ_QUEUE_RENDER, "upscale": RQ_QUEUE_UPSCALE, "video": RQ_QUEUE_VIDEO}
+    pools = {name: [queue] for name, queue in dedicated.items() if queue}
+    claimed = {queue for queues in pools.values() for queue in queues}
+    pools["default"] = [queue for queue in queue_names if queue not in claimed]
+    return pools
+
+
+def _spawn_pool_worker(spec):
+    process = multiprocessing.Process(target=_run_worker, args=(list(spec.queues),), name=f"rq-{spec.name}")
+    process.start()
+    return process
+
+
+def _run_supervisor():
+    supervisor = WorkerSupervisor(
+        build_queue_pool_specs(_pool_queues()),
+        redis_conn=conn,
+        spawn=_spawn_pool_worker,
+        scale_up_age_sec=float(os.getenv("RQ_SCALE_UP_AGE_SEC", "5") or 5),
+        scale_down_idle_sec=float(os.getenv("RQ_SCALE_DOWN_IDLE_SEC", "120") or 120),
+        max_rss_mb=float(os.getenv("RQ_WORKER_MAX_RSS_MB", "0") or 0),
+    )
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_args: stop_event.set())
+    supervisor.run(stop_event, interval_sec=float(os.getenv("RQ_SUPERVISOR_INTERVAL_SEC", "2") or 2))
+
 
 def main():
+    if os.name != "nt" and os.getenv("RQ_SUPERVISOR", "0").strip().lower() in ("1", "true", "yes", "y"):
+        _run_supervisor()
+        return
     workers = int(os.getenv("RQ_WORKERS", "1") or 1)
     workers = max(1, workers)
     if workers == 1: